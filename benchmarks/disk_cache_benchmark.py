@@ -0,0 +1,45 @@
+"""Measures the cost of the persistent DiskCache on the request path: a lookup that misses, a lookup that hits and
+the write following a miss, in microseconds.
+
+Usage:
+    python -m benchmarks.disk_cache_benchmark [operations]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from lyft.cache.disk_cache import DiskCache
+
+# size of a ride types response of 4 ride types
+_CONTENT = b"x" * 2400
+
+
+def _report(label, total, elapsed):
+    print("{:<8} {:>8.1f} us/operation".format(label, elapsed / total * 1e6))
+
+
+def main(total=20000):
+    with tempfile.TemporaryDirectory() as directory:
+        cache = DiskCache(os.path.join(directory, "lyft.sqlite"))
+        keys  = [cache.location_key("ridetypes", 37.7 + index * 0.001, -122.3, "lyft") for index in range(total)]
+
+        start = time.perf_counter()
+        for key in keys:
+            cache.get(key)
+        _report("miss", total, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for key in keys:
+            cache.set(key, _CONTENT)
+        _report("set", total, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for key in keys:
+            cache.get(key)
+        _report("hit", total, time.perf_counter() - start)
+        cache.close()
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,46 @@
+"""Measures the receipt export pipeline against the local simulator: receipts per second and peak memory of
+ReceiptExporter writing NDJSON, compared to fetching the receipts one at a time into a list.
+
+Usage:
+    python -m benchmarks.export_benchmark [receipts]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from lyft.export import NdjsonWriter, ReceiptExporter
+from lyft.rides import Rides
+from lyft.testing.simulator import LyftSimulator
+from lyft.transport.transport import Transport
+
+
+def _measure(label, total, function):
+    # tracemalloc slows down every allocation, the throughput and the peak memory are measured in separate runs
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print("{:<12} {:>8.0f} receipts/s {:>8.0f} KiB peak".format(label, total / elapsed, peak / 1024.0))
+
+
+def main(total=500):
+    with LyftSimulator(latency=0.01, ride_step=0) as simulator, \
+            Transport(pool_maxsize=16, base_url=simulator.base_url) as transport, \
+            tempfile.TemporaryDirectory() as directory:
+        rides    = Rides("Bearer", "token", transport=transport)
+        ride_ids = [rides.create_ride_request("lyft", 37.7, -122.3, 37.8, -122.4)["ride_id"] for _ in range(total)]
+
+        _measure("sequential", total, lambda: [rides.get_receipt(ride_id) for ride_id in ride_ids])
+        with NdjsonWriter(os.path.join(directory, "receipts.ndjson")) as writer:
+            exporter = ReceiptExporter(rides, writer, max_concurrency=16)
+            _measure("exporter", total, lambda: exporter.export(iter(ride_ids)))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
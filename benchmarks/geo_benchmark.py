@@ -0,0 +1,62 @@
+"""Measures the throughput of the vectorized geo utilities: haversine distances and snapping on coordinate arrays, and
+PairFilter.plan on origin/destination pairs, compared to a pure Python haversine loop.
+
+Usage:
+    python -m benchmarks.geo_benchmark [pairs]
+"""
+import math
+import sys
+import time
+
+import numpy
+
+from lyft.util.geo import EARTH_RADIUS_METERS, PairFilter, haversine, snap
+
+
+def _python_haversine(lat, lng, end_lat, end_lng):
+    lat, lng, end_lat, end_lng = map(math.radians, (lat, lng, end_lat, end_lng))
+    a = math.sin((end_lat - lat) / 2) ** 2 + math.cos(lat) * math.cos(end_lat) * math.sin((end_lng - lng) / 2) ** 2
+    return 2 * EARTH_RADIUS_METERS * math.asin(math.sqrt(min(a, 1.0)))
+
+
+def _report(label, count, elapsed):
+    print("{:<22} {:>10.2f} M pairs/s".format(label, count / elapsed / 1e6))
+
+
+def main(total=2000000):
+    generator = numpy.random.default_rng(0)
+    lats      = generator.uniform(37.6, 37.9, (2, total))
+    lngs      = generator.uniform(-122.6, -122.3, (2, total))
+
+    start = time.perf_counter()
+    haversine(lats[0], lngs[0], lats[1], lngs[1])
+    _report("haversine numpy", total, time.perf_counter() - start)
+
+    sample = min(total, 200000)
+    columns = [column[:sample].tolist() for column in (lats[0], lngs[0], lats[1], lngs[1])]
+    start = time.perf_counter()
+    for lat, lng, end_lat, end_lng in zip(*columns):
+        _python_haversine(lat, lng, end_lat, end_lng)
+    _report("haversine python", sample, time.perf_counter() - start)
+
+    array = numpy.stack([lats[0], lngs[0], lats[1], lngs[1]], axis=1)
+    start = time.perf_counter()
+    PairFilter(max_distance=20000).distances(array)
+    _report("PairFilter.distances", total, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    snap(lats, 3)
+    snap(lngs, 3)
+    _report("snap", total, time.perf_counter() - start)
+
+    # plan works on the normalized tuples the batch methods receive: its cost includes converting them to an array
+    # and building the dictionary of pairs to query, one entry per request it did not prevent
+    pairs = list(zip(*columns))
+    start = time.perf_counter()
+    groups, rejected = PairFilter(max_distance=20000, min_distance=500, precision=3).plan(pairs)
+    _report("PairFilter.plan", sample, time.perf_counter() - start)
+    print("{} pairs -> {} queried, {} rejected".format(sample, len(groups), len(rejected)))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
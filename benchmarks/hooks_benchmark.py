@@ -0,0 +1,43 @@
+"""Measures the cost of the transport hooks: requests per second against the local simulator without hooks and with
+MetricsHooks, and the time spent per request in the hooks themselves.
+
+Usage:
+    python -m benchmarks.hooks_benchmark [requests]
+"""
+import sys
+import time
+
+from lyft.availability import Availability
+from lyft.testing.simulator import LyftSimulator
+from lyft.transport.hooks import MetricsHooks, _end_event, _start_event
+from lyft.transport.transport import Transport
+
+
+class _Response(object):
+    status_code = 200
+    content     = b"{}"
+
+
+def main(total=2000):
+    with LyftSimulator() as simulator:
+        for label, hooks in (("no hooks", None), ("MetricsHooks", [MetricsHooks()])):
+            with Transport(base_url=simulator.base_url, hooks=hooks) as transport:
+                availability = Availability("Bearer", "token", transport=transport)
+                start = time.perf_counter()
+                for _ in range(total):
+                    availability.get_driver_eta(37.7763, -122.3918, ride_type="lyft")
+                elapsed = time.perf_counter() - start
+            print("{:<14} {:>8.0f} req/s".format(label, total / elapsed))
+
+    hooks, response = [MetricsHooks()], _Response()
+    start = time.perf_counter()
+    for _ in range(total * 10):
+        event = _start_event(hooks, "GET", "https://api.lyft.com/v1/eta?lat=37.7763&lng=-122.3918&ride_type=lyft",
+                             1, None, None)
+        _end_event(hooks, event, 0.01, response)
+    elapsed = time.perf_counter() - start
+    print("hooks overhead {:>8.2f} us/request".format(elapsed / (total * 10) * 1e6))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,96 @@
+"""Compares the HTTP/1.1 Transport with the HTTP/2 Http2Transport on a fan-out of get_driver_eta and
+get_ride_estimates calls from many threads, the simulator answering after 200 ms: connections the server accepted,
+peak memory the client allocated and p50/p99 latency per call. The servers run in a child process, so that neither
+their threads nor their allocations are measured.
+
+Usage:
+    python -m benchmarks.http2_benchmark [calls] [threads]
+"""
+import multiprocessing
+import statistics
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from lyft.availability import Availability
+from lyft.testing.simulator import LyftSimulator
+from lyft.transport.http2 import HTTP2_AVAILABLE, Http2Transport
+from lyft.transport.transport import Transport
+
+_LATENCY = 0.2
+
+
+def _serve(connection, http2):
+    simulator = LyftSimulator(latency=_LATENCY, seed=0)
+    if http2:
+        from lyft.testing.http2 import Http2Simulator
+        server = Http2Simulator(simulator)
+    else:
+        server = simulator
+    with server:
+        connection.send(server.base_url)
+        connection.recv()
+        connection.send(server.stats())
+
+
+def _call(availability, index):
+    start = time.perf_counter()
+    lat, lng = 37.7 + index % 50 / 1000, -122.4 + index // 50 % 50 / 1000
+    if index % 2:
+        availability.get_ride_estimates(lat, lng, lat + 0.02, lng + 0.02)
+    else:
+        availability.get_driver_eta(lat, lng)
+    return time.perf_counter() - start
+
+
+def _fan_out(create_transport, base_url, calls, threads):
+    with create_transport(base_url) as transport:
+        availability = Availability("Bearer", "token", transport=transport)
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            return sorted(executor.map(lambda index: _call(availability, index), range(calls)))
+
+
+def run(label, create_transport, http2, calls, threads):
+    connection, child = multiprocessing.Pipe()
+    process = multiprocessing.Process(target=_serve, args=(child, http2), daemon=True)
+    process.start()
+    base_url = connection.recv()
+
+    start     = time.perf_counter()
+    latencies = _fan_out(create_transport, base_url, calls, threads)
+    elapsed   = time.perf_counter() - start
+    connection.send(None)
+    stats = connection.recv()
+    process.join()
+
+    # tracing slows the client down, the peak is measured on a second, shorter fan-out
+    process = multiprocessing.Process(target=_serve, args=(child, http2), daemon=True)
+    process.start()
+    tracemalloc.start()
+    _fan_out(create_transport, connection.recv(), threads * 2, threads)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    connection.send(None)
+    connection.recv()
+    process.join()
+
+    print("{:<34} {:>6.0f} calls/s {:>5} connections {:>7.1f} MiB  p50 {:>6.1f} ms  p99 {:>6.1f} ms".format(
+        label, calls / elapsed, stats["connections"], peak / 2 ** 20,
+        statistics.median(latencies) * 1000, latencies[int(len(latencies) * 0.99)] * 1000))
+
+
+def main(calls=4000, threads=200):
+    run("Transport, HTTP/1.1", lambda base_url: Transport(pool_maxsize=threads, base_url=base_url), False, calls,
+        threads)
+    if not HTTP2_AVAILABLE:
+        print("Http2Transport skipped: pip install h2")
+        return
+    for connections in (1, 4):
+        run("Http2Transport, {} connection(s)".format(connections),
+            lambda base_url: Http2Transport(connections, prior_knowledge=True, base_url=base_url), True, calls,
+            threads)
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:3]])
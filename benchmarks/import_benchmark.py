@@ -0,0 +1,66 @@
+"""Measures the cold import time of the lyft modules, each in a new interpreter, and lists the heavy dependencies each
+one loads. Guards against import time regressions: exits with status 1 if a module loads a dependency it should only
+import on first use, eg: requests for lyft.authentication.scopes or for the asyncio classes.
+
+Usage:
+    python -m benchmarks.import_benchmark [runs]
+"""
+import statistics
+import subprocess
+import sys
+
+# dependencies which take long to import, reported when loaded
+HEAVY = ("requests", "asyncio", "aiohttp", "orjson", "ujson", "numpy", "sqlite3", "http.server")
+
+# module -> heavy dependencies it must not import
+FORBIDDEN = {"lyft"                       : HEAVY,
+             "lyft.authentication.scopes" : HEAVY,
+             "lyft.util.url_util"         : HEAVY,
+             "lyft.util.errors"           : HEAVY,
+             "lyft.models"                : HEAVY,
+             "lyft.availability"          : HEAVY,
+             "lyft.rides"                 : HEAVY,
+             "lyft.authentication.auth"   : HEAVY,
+             "lyft.session.session"       : HEAVY,
+             "lyft.registry"              : HEAVY,
+             "lyft.webhooks"              : HEAVY,
+             "lyft.transport.transport"   : ("asyncio", "aiohttp", "orjson", "ujson", "numpy", "sqlite3"),
+             "lyft.transport.http2"       : ("asyncio", "aiohttp", "orjson", "ujson", "numpy", "sqlite3"),
+             "lyft.aio.availability"      : ("requests", "orjson", "ujson", "numpy", "sqlite3"),
+             "lyft.aio.rides"             : ("requests", "orjson", "ujson", "numpy", "sqlite3")}
+
+_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(elapsed, " ".join(name for name in {heavy!r} if name in sys.modules))
+"""
+
+
+def _import(module):
+    """Imports module in a new interpreter, returns (seconds, heavy dependencies loaded)"""
+    output = subprocess.run([sys.executable, "-c", _SCRIPT.format(module=module, heavy=HEAVY)], check=True,
+                            stdout=subprocess.PIPE, universal_newlines=True).stdout.split()
+    return float(output[0]), output[1:]
+
+
+def main(runs=10):
+    failures = []
+    print("{:<28} {:>9} {:>9}  {}".format("module", "median ms", "max ms", "heavy dependencies loaded"))
+    for module, forbidden in FORBIDDEN.items():
+        timings, loaded = [], []
+        for _ in range(runs):
+            elapsed, loaded = _import(module)
+            timings.append(elapsed * 1000)
+        print("{:<28} {:>9.1f} {:>9.1f}  {}".format(module, statistics.median(timings), max(timings),
+                                                     " ".join(loaded) or "-"))
+        failures.extend("{} imports {}".format(module, name) for name in loaded if name in forbidden)
+
+    for failure in failures:
+        print("REGRESSION: " + failure)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(*[int(arg) for arg in sys.argv[1:2]]))
@@ -0,0 +1,67 @@
+"""Compares, per endpoint, the bytes transferred with and without compression and the time to decode a response body
+with response.json() and with each installed JSON backend of lyft.util.fast_json.
+
+The fixtures are the recorded ride types response of the tests and the responses of the local simulator for the
+other endpoints. eta_and_nearby_drivers is the nearby-drivers-pickup-etas endpoint.
+
+Usage:
+    python -m benchmarks.json_benchmark [decodes]
+"""
+import gzip
+import json
+import sys
+import time
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from lyft.testing.simulator import LyftSimulator
+from lyft.util.fast_json import BACKEND, BACKENDS
+from tests import availability_res
+
+_PATHS = {"eta"                    : "/v1/eta?lat=37.7763&lng=-122.3918",
+          "cost"                   : "/v1/cost?start_lat=37.7763&start_lng=-122.3918&end_lat=37.79&end_lng=-122.4",
+          "drivers"                : "/v1/drivers?lat=37.7763&lng=-122.3918",
+          "eta_and_nearby_drivers" : "/v1/nearby-drivers-pickup-etas?lat=37.7763&lng=-122.3918"}
+
+
+def _fixtures():
+    simulator = LyftSimulator(seed=0)
+    fixtures  = {"ridetypes": json.dumps(availability_res.ride_types_res).encode("utf-8")}
+    for endpoint, path in _PATHS.items():
+        _, payload, _ = simulator.handle("GET", path, {"authorization": "Bearer token"}, b"")
+        fixtures[endpoint] = json.dumps(payload).encode("utf-8")
+    return fixtures
+
+
+def _response_json(content):
+    # what requests.Response.json does: the bytes are decoded to text, which is then parsed
+    return json.loads(content.decode("utf-8"))
+
+
+def _per_decode(function, content, total):
+    start = time.perf_counter()
+    for _ in range(total):
+        function(content)
+    return (time.perf_counter() - start) / total * 1e6
+
+
+def main(total=20000):
+    decoders = [("response.json()", _response_json)] + sorted(BACKENDS.items())
+    print("default backend: {}".format(BACKEND))
+    print("{:<24} {:>8} {:>8} {:>8}  decode us: {}".format("endpoint", "bytes", "gzip", "br",
+                                                           "  ".join(name for name, _ in decoders)))
+    for endpoint, content in _fixtures().items():
+        sizes = [len(content), len(gzip.compress(content))]
+        sizes.append(len(brotli.compress(content)) if brotli is not None else "-")
+        timings = ["{:.1f}".format(_per_decode(function, content, total)) for _, function in decoders]
+        print("{:<24} {:>8} {:>8} {:>8}  {}".format(endpoint, sizes[0], sizes[1], sizes[2], "  ".join(timings)))
+
+    compressed = gzip.compress(_fixtures()["drivers"])
+    print("gunzip of the drivers body: {:.1f} us".format(_per_decode(gzip.decompress, compressed, total)))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,59 @@
+"""Compares the memory held and the decoding time of response dictionaries and lyft.models objects.
+
+Usage:
+    python -m benchmarks.models_benchmark [responses]
+"""
+import gc
+import json
+import sys
+import time
+import tracemalloc
+
+from lyft.models import CostEstimates, NearbyDrivers
+
+cost_res = {"cost_estimates": [{"ride_type": ride_type, "display_name": ride_type, "currency": "USD",
+                                "estimated_cost_cents_min": 1052, "estimated_cost_cents_max": 1755,
+                                "estimated_duration_seconds": 913, "estimated_distance_miles": 3.29,
+                                "primetime_percentage": "0%", "is_valid_estimate": True}
+                               for ride_type in ("lyft_line", "lyft", "lyft_plus", "lyft_premier", "lyft_lux")]}
+
+drivers_res = {"nearby_drivers": [{"ride_type": ride_type,
+                                   "drivers": [{"locations": [{"lat": 37.7 + index * 0.001, "lng": -122.4}
+                                                              for index in range(5)]}
+                                               for _ in range(5)]}
+                                  for ride_type in ("lyft_line", "lyft", "lyft_plus")]}
+
+
+def measure(label, build, bodies, keeps_body=False):
+    """Prints the decoding rate and the memory held by the results, including the bodies kept by lazy models"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    held = [build(body) for body in bodies]
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    if keeps_body:
+        size += sum(sys.getsizeof(body) for body in bodies)
+    print("{:<34} {:>8.0f} responses/s {:>10.1f} KiB held".format(label, len(bodies) / elapsed, size / 1024.0))
+    return held
+
+
+def models(model_class):
+    def build(body):
+        model = model_class(body)
+        model.items
+        return model
+    return build
+
+
+def main(total=20000):
+    for name, payload, model_class in (("cost", cost_res, CostEstimates), ("drivers", drivers_res, NearbyDrivers)):
+        bodies = [json.dumps(payload).encode() for _ in range(total)]
+        measure("{} dict (response.json())".format(name), json.loads, bodies)
+        measure("{} models (lazy, not read)".format(name), model_class, bodies, True)
+        measure("{} models (decoded)".format(name), models(model_class), bodies, True)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
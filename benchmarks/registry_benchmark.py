@@ -0,0 +1,55 @@
+"""Measures the memory held by a ClientRegistry as the number of tenants grows: per registered tenant and per active
+tenant, and the cost of a tenant lookup when every lookup evicts another tenant.
+
+Usage:
+    python -m benchmarks.registry_benchmark [tenants]
+"""
+import sys
+import time
+import tracemalloc
+
+from lyft.registry import ClientRegistry
+from lyft.transport.transport import Transport
+
+_CONFIG = {"client_id": "app", "client_secret": "secret"}
+
+
+def main(total=50000):
+    transport = Transport()
+    active    = min(1024, total)
+    registry  = ClientRegistry(transport, max_active=active)
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for index in range(total):
+        registry.add_user("user-{}".format(index), _CONFIG, "refresh-{}".format(index))
+    registered = tracemalloc.get_traced_memory()[0]
+    for index in range(total):
+        registry.availability("user-{}".format(index))
+        registry.rides("user-{}".format(index))
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    print("{} tenants, {} active".format(total, registry.stats()["active"]))
+    print("{:<10} {:>8.0f} bytes/tenant".format("registered", (registered - before) / total))
+    print("{:<10} {:>8.0f} bytes/tenant".format("active", (after - registered) / active))
+
+    # max_active tenants cycling through the whole registry: every lookup activates one tenant and evicts another
+    tenant_ids = ["user-{}".format(index) for index in range(total)]
+    start = time.perf_counter()
+    for tenant_id in tenant_ids:
+        registry.transport(tenant_id)
+    print("{:<10} {:>8.1f} us/lookup with eviction".format("churn", (time.perf_counter() - start) / total * 1e6))
+
+    tenant_ids = tenant_ids[-active:]
+    start = time.perf_counter()
+    for tenant_id in tenant_ids * 10:
+        registry.transport(tenant_id)
+    print("{:<10} {:>8.1f} us/lookup".format("hit", (time.perf_counter() - start) / active / 10 * 1e6))
+
+    registry.close()
+    transport.close()
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,71 @@
+"""Measures the per-call overhead of building requests on the hot path: the URL of get_driver_eta and the headers,
+with the compiled Endpoint and HeaderCache against the former str.format templates, and a whole get_driver_eta call
+on a transport that answers without network I/O.
+
+Usage:
+    python -m benchmarks.request_builder_benchmark [calls]
+"""
+import sys
+import time
+
+from lyft.availability import Availability, _driver_eta_url
+from lyft.util.endpoints import HeaderCache
+from lyft.util.url_util import AVAILABILITY
+
+
+def _format_url(lat, lng, end_lat=None, end_lng=None, ride_type=None):
+    """The former four-way template of get_driver_eta"""
+    lat = float(lat)
+    lng = float(lng)
+    if all([end_lat, end_lng]) is True:
+        end_lat = float(end_lat)
+        end_lng = float(end_lng)
+
+    if ride_type is None and (end_lat is None or end_lng is None):
+        return "{}eta?lat={}&lng={}".format(AVAILABILITY, lat, lng)
+    elif ride_type is not None and (end_lat is None or end_lng is None):
+        return "{}eta?lat={}&lng={}&ride_type={}".format(AVAILABILITY, lat, lng, ride_type)
+    elif ride_type is not None:
+        return "{}eta?lat={}&lng={}&destination_lat={}&destination_lng={}&ride_type={}".format(
+            AVAILABILITY, lat, lng, end_lat, end_lng, ride_type)
+    return "{}eta?lat={}&lng={}&destination_lat={}&destination_lng={}".format(AVAILABILITY, lat, lng, end_lat,
+                                                                                end_lng)
+
+
+class _Response(object):
+    status_code = 200
+    content     = b'{"eta_estimates": []}'
+
+    def json(self):
+        return {"eta_estimates": []}
+
+
+class _Transport(object):
+    hooks = ()
+
+    def get(self, url, **kwargs):
+        return _Response()
+
+
+def _report(label, total, function):
+    start = time.perf_counter()
+    for _ in range(total):
+        function()
+    print("{:<26} {:>8.2f} us/call".format(label, (time.perf_counter() - start) / total * 1e6))
+
+
+def main(total=200000):
+    arguments = (37.7763, -122.3918, 37.7972, -122.4533, "lyft")
+    _report("url str.format", total, lambda: _format_url(*arguments))
+    _report("url Endpoint", total, lambda: _driver_eta_url(*arguments))
+
+    cache = HeaderCache()
+    _report("headers dict", total, lambda: {"Authorization": "{} {}".format("Bearer", "token")})
+    _report("headers HeaderCache", total, lambda: cache.for_token("Bearer", "token"))
+
+    availability = Availability("Bearer", "token", transport=_Transport())
+    _report("get_driver_eta overhead", total, lambda: availability.get_driver_eta(*arguments))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
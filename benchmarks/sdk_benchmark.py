@@ -0,0 +1,100 @@
+"""Measures the throughput and the p50/p99 latency of every SDK method under concurrency, against the local Lyft API
+simulator. Save the results of each release with --output and compare them to spot performance changes.
+
+Usage:
+    python -m benchmarks.sdk_benchmark [--requests 500] [--threads 8] [--latency 0] [--jitter 0]
+                                       [--error-rate 0] [--output results.json]
+"""
+import argparse
+import json
+import platform
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from lyft.authentication.auth import LyftPublicAuth
+from lyft.availability import Availability
+from lyft.rides import Rides
+from lyft.testing.simulator import LyftSimulator
+from lyft.transport.transport import Transport
+
+ORIGIN      = (37.7763, -122.3918)
+DESTINATION = (37.7972, -122.4533)
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of sorted values"""
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+
+def run(call, total, threads):
+    """Calls call total times from threads workers, returns the throughput, latency percentiles and error count"""
+    def timed(_):
+        start = time.perf_counter()
+        try:
+            result = call()
+            failed = isinstance(result, dict) and "error" in result
+        except Exception:
+            failed = True
+        return time.perf_counter() - start, failed
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        samples = list(executor.map(timed, range(total)))
+    elapsed   = time.perf_counter() - start
+    latencies = sorted(latency for latency, _ in samples)
+    return {"requests"   : total,
+            "throughput" : total / elapsed,
+            "p50_ms"     : percentile(latencies, 0.50) * 1000,
+            "p99_ms"     : percentile(latencies, 0.99) * 1000,
+            "errors"     : sum(1 for _, failed in samples if failed)}
+
+
+def methods(transport):
+    """Returns the benchmarked SDK calls by name"""
+    auth         = LyftPublicAuth({"client_id": "id", "client_secret": "secret"}, transport=transport)
+    availability = Availability("Bearer", "token", transport=transport)
+    rides        = Rides("Bearer", "token", transport=transport)
+    ride_id      = rides.create_ride_request("lyft", *(ORIGIN + DESTINATION))["ride_id"]
+    return [("LyftPublicAuth.get_access_token", auth.get_access_token),
+            ("Availability.get_ride_types", lambda: availability.get_ride_types(*ORIGIN)),
+            ("Availability.get_driver_eta", lambda: availability.get_driver_eta(*ORIGIN)),
+            ("Availability.get_ride_estimates", lambda: availability.get_ride_estimates(*(ORIGIN + DESTINATION))),
+            ("Availability.get_nearby_drivers", lambda: availability.get_nearby_drivers(*ORIGIN)),
+            ("Availability.get_eta_and_nearby_drivers", lambda: availability.get_eta_and_nearby_drivers(*ORIGIN)),
+            ("Rides.create_ride_request", lambda: rides.create_ride_request("lyft", *(ORIGIN + DESTINATION))),
+            ("Rides.get_ride_details", lambda: rides.get_ride_details(ride_id)),
+            ("Rides.get_receipt", lambda: rides.get_receipt(ride_id))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500, help="calls per method")
+    parser.add_argument("--threads", type=int, default=8, help="concurrent workers")
+    parser.add_argument("--latency", type=float, default=0, help="simulated API latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0, help="maximum random latency added, in seconds")
+    parser.add_argument("--error-rate", type=float, default=0, help="fraction of requests failing with a 503")
+    parser.add_argument("--output", help="JSON file receiving the results")
+    args = parser.parse_args(argv)
+
+    results = {}
+    with LyftSimulator(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, ride_step=0,
+                       seed=0) as simulator:
+        with Transport(pool_maxsize=args.threads, base_url=simulator.base_url) as transport:
+            print("{:<42} {:>10} {:>9} {:>9} {:>7}".format("method", "req/s", "p50 ms", "p99 ms", "errors"))
+            for name, call in methods(transport):
+                result = results[name] = run(call, args.requests, args.threads)
+                print("{:<42} {:>10.0f} {:>9.2f} {:>9.2f} {:>7}".format(name, result["throughput"], result["p50_ms"],
+                                                                        result["p99_ms"], result["errors"]))
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump({"python"  : platform.python_version(),
+                       "time"    : time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                       "options" : vars(args),
+                       "results" : results}, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Measures requests per second of the pooled Transport against module level requests.get on the local simulator.
+
+Usage:
+    python -m benchmarks.transport_benchmark [requests] [threads]
+"""
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from lyft.availability import Availability
+from lyft.testing.simulator import LyftSimulator
+from lyft.transport.transport import Transport
+
+
+def run(label, call, total, threads):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(lambda _: call(), range(total)))
+    elapsed = time.perf_counter() - start
+    print("{:<28} {:>8.0f} req/s  ({} requests, {} threads, {:.2f}s)".format(label, total / elapsed, total,
+                                                                            threads, elapsed))
+
+
+def main(total=2000, threads=8):
+    with LyftSimulator() as server:
+        url = "{}/v1/ridetypes?lat=37.7763&lng=-122.3918".format(server.base_url)
+        run("requests.get (no pooling)", lambda: requests.get(url, headers={"Authorization": "Bearer token"}),
+            total, threads)
+        unpooled_connections = server.connections
+
+        with Transport(pool_maxsize=threads, base_url=server.base_url) as transport:
+            availability = Availability("Bearer", "token", transport=transport)
+            run("Transport (pooled)", lambda: availability.get_ride_types(37.7763, -122.3918), total, threads)
+        print("connections opened: unpooled={} pooled={}".format(unpooled_connections,
+                                                                 server.connections - unpooled_connections))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:3]])
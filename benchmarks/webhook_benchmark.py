@@ -0,0 +1,56 @@
+"""Measures the throughput of a WebhookReceiver in events per second: in process, where handle verifies, parses,
+deduplicates and dispatches each signed body, and over HTTP, from the local WebhookSender to a WebhookServer. 10% of
+the events are delivered twice.
+
+Usage:
+    python -m benchmarks.webhook_benchmark [rides]
+"""
+import json
+import sys
+import time
+
+from lyft.testing.webhooks import WebhookSender, ride_status_events
+from lyft.webhooks import SIGNATURE_HEADER, WebhookReceiver, WebhookServer, sign
+
+_TOKEN = "benchmark-token"
+
+
+def _report(name, events, elapsed, stats):
+    print("{:<32} {:>8} events {:>8.0f} events/s  dispatched {} duplicates {} stale {} overloaded {}".format(
+        name, events, events / elapsed, stats["dispatched"], stats["duplicates"], stats["stale"],
+        stats["overloaded"]))
+
+
+def _in_process(events, workers, reorder_delay):
+    bodies = [json.dumps(event).encode("utf-8") for event in events]
+    bodies = [(body, {SIGNATURE_HEADER: sign(body, _TOKEN)}) for body in bodies]
+    with WebhookReceiver(_TOKEN, [lambda event: None], workers=workers, reorder_delay=reorder_delay,
+                         submit_timeout=10) as receiver:
+        start = time.perf_counter()
+        for body, headers in bodies:
+            receiver.handle(body, headers)
+        receiver.join()
+        return time.perf_counter() - start, receiver.stats()
+
+
+def _over_http(events, workers, concurrency):
+    with WebhookServer(WebhookReceiver(_TOKEN, [lambda event: None], workers=workers)) as server:
+        with WebhookSender(server.url, _TOKEN) as sender:
+            start = time.perf_counter()
+            sender.send_many(events, concurrency=concurrency)
+            server.receiver.join()
+            return time.perf_counter() - start, server.receiver.stats()
+
+
+def main(rides=2000):
+    events = ride_status_events(rides, duplicates=0.1, seed=0)
+    for workers, reorder_delay in ((1, 0), (8, 0), (8, 0.05)):
+        elapsed, stats = _in_process(events, workers, reorder_delay)
+        _report("handle, {} workers, delay {}".format(workers, reorder_delay), len(events), elapsed, stats)
+    for concurrency in (1, 8):
+        elapsed, stats = _over_http(events, 8, concurrency)
+        _report("http, {} senders".format(concurrency), len(events), elapsed, stats)
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,68 @@
+"""Python SDK of the Lyft API.
+
+The classes are available from the top level namespace and only imported on first use, so that `import lyft` costs
+well under a millisecond and a function needing Scopes does not import requests:
+
+    import lyft
+    availability = lyft.Availability("Bearer", access_token, transport=lyft.Transport())
+
+The submodules, eg: lyft.rides, are imported on first access as well.
+"""
+import importlib
+
+# public name -> module defining it
+_EXPORTS = {"Availability"        : "lyft.availability",
+            "BatchEstimate"       : "lyft.availability",
+            "Rides"               : "lyft.rides",
+            "RideTracker"         : "lyft.tracker",
+            "AreaSweep"           : "lyft.sweep",
+            "ReceiptExporter"     : "lyft.export",
+            "ClientRegistry"      : "lyft.registry",
+            "WebhookReceiver"     : "lyft.webhooks",
+            "WebhookServer"       : "lyft.webhooks",
+            "Scopes"              : "lyft.authentication.scopes",
+            "LyftPublicAuth"      : "lyft.authentication.auth",
+            "LyftUserAuth"        : "lyft.authentication.auth",
+            "TokenProvider"       : "lyft.authentication.token_provider",
+            "CodeExchanger"       : "lyft.authentication.code_exchange",
+            "Session"             : "lyft.session.session",
+            "Transport"           : "lyft.transport.transport",
+            "Http2Transport"      : "lyft.transport.http2",
+            "RateLimiter"         : "lyft.transport.rate_limiter",
+            "RetryPolicy"         : "lyft.transport.retry",
+            "CircuitBreaker"      : "lyft.transport.retry",
+            "SingleFlight"        : "lyft.transport.single_flight",
+            "MetricsHooks"        : "lyft.transport.hooks",
+            "GeoCache"            : "lyft.cache.geo_cache",
+            "DiskCache"           : "lyft.cache.disk_cache",
+            "LyftAPIError"        : "lyft.util.errors",
+            "AsyncAvailability"   : "lyft.aio.availability",
+            "AsyncRides"          : "lyft.aio.rides",
+            "AsyncRideTracker"    : "lyft.aio.tracker",
+            "AsyncLyftPublicAuth" : "lyft.aio.auth",
+            "AsyncLyftUserAuth"   : "lyft.aio.auth",
+            "AsyncSession"        : "lyft.aio.session",
+            "AsyncTransport"      : "lyft.aio.transport"}
+
+_SUBMODULES = ("aio", "authentication", "availability", "cache", "export", "models", "registry", "rides", "session",
+               "sweep", "testing", "tracker", "transport", "util", "webhooks")
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is not None:
+        value = getattr(importlib.import_module(module), name)
+    elif name in _SUBMODULES:
+        value = importlib.import_module("lyft." + name)
+    else:
+        raise AttributeError("module 'lyft' has no attribute {!r}".format(name))
+
+    # later accesses are plain module attribute lookups
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS) | set(_SUBMODULES))
@@ -0,0 +1,67 @@
+import json
+
+from lyft.aio.transport import get_default_async_transport
+from lyft.authentication.auth import _authorization_uri, _client_credentials, _public_token_result, _user_token_result
+from lyft.util.url_util import PUBLIC_AUTH_URL
+
+
+class AsyncLyftPublicAuth:
+    def __init__(self, config, sandbox_mode=False, transport=None):
+        """asyncio version of lyft.authentication.auth.LyftPublicAuth
+
+        :param sandbox_mode: Set to True if you want a sandbox environment else False
+        :param config: Dictionary of client_id and client_secret
+        :param transport: AsyncTransport used to send the requests, defaults to the shared asyncio transport
+        """
+        self.__sandbox_mode = sandbox_mode
+        self.__config = config
+        self.__transport = transport if transport is not None else get_default_async_transport()
+
+    async def get_access_token(self):
+        """See lyft.authentication.auth.LyftPublicAuth.get_access_token"""
+        header = {"content-type": "application/json"}
+        data   = {"grant_type": "client_credentials",
+                  "scope": "public"}
+
+        authentication_response = await self.__transport.post(PUBLIC_AUTH_URL,
+                                                              headers=header,
+                                                              data=json.dumps(data),
+                                                              auth=_client_credentials(self.__config,
+                                                                                       self.__sandbox_mode))
+
+        return _public_token_result(authentication_response)
+
+
+class AsyncLyftUserAuth:
+
+    def __init__(self, config, scopes, state, sandbox_mode=False, transport=None):
+        """asyncio version of lyft.authentication.auth.LyftUserAuth
+
+        :param sandbox_mode: Set to True if you want a sandbox environment else False
+        :param config: Dictionary of client_id and client_secret
+        :param scopes: List of scopes that you need to give get from the user
+        :param state: A payload which will be passed back to your application through the redirect
+        :param transport: AsyncTransport used to send the requests, defaults to the shared asyncio transport
+        """
+        self.__sandbox_mode = sandbox_mode
+        self.__config       = config
+        self.__scopes       = scopes
+        self.__state        = state
+        self.__transport    = transport if transport is not None else get_default_async_transport()
+
+    async def get_authorization_uri(self, state=None):
+        """See lyft.authentication.auth.LyftUserAuth.get_authorization_uri, no request is sent"""
+        return _authorization_uri(self.__config, self.__scopes, self.__state if state is None else state)
+
+    async def get_access_token(self, authorization_code):
+        """See lyft.authentication.auth.LyftUserAuth.get_access_token"""
+        header = {"content-type": "application/json"}
+        data   = {"grant_type": "authorization_code", "code": authorization_code}
+
+        authentication_response = await self.__transport.post(PUBLIC_AUTH_URL,
+                                                              headers=header,
+                                                              data=json.dumps(data),
+                                                              auth=_client_credentials(self.__config,
+                                                                                       self.__sandbox_mode))
+
+        return _user_token_result(authentication_response)
@@ -0,0 +1,129 @@
+import asyncio
+
+from lyft.aio.transport import get_default_async_transport
+from lyft.availability import (DEFAULT_BATCH_CONCURRENCY, BatchEstimate, _cache_event, _driver_eta_url,
+                               _eta_and_nearby_drivers_url, _json_or_raise, _nearby_drivers_url, _plan_pairs,
+                               _ride_estimates_url, _ride_types_url)
+from lyft.cache.disk_cache import _store_response
+from lyft.models import AVAILABILITY_MODELS
+from lyft.util.endpoints import HeaderCache
+
+
+class AsyncAvailability(object):
+    def __init__(self, token_type=None, access_token=None, transport=None, cache=None, token_provider=None,
+                 models=False, disk_cache=None):
+        """
+        asyncio version of lyft.availability.Availability, every method is a coroutine with the same arguments and
+        return value as its blocking counterpart.
+
+        :param token_type: Token type. eg: "Bearer"
+        :param access_token: access token
+        :param transport: AsyncTransport used to send the requests, defaults to the shared asyncio transport
+        :param cache: Optional lyft.cache.geo_cache.GeoCache answering requests made from nearby locations
+        :param token_provider: Optional lyft.authentication.token_provider.TokenProvider used instead of access_token
+        :param models: Set to True to return lyft.models objects instead of dictionaries
+        :param disk_cache: Optional lyft.cache.disk_cache.DiskCache persisting the ride types across restarts, its
+                           lookups are short blocking SQLite reads
+        """
+        self.token_type = token_type
+        self.__access_token = access_token
+        self.__transport = transport if transport is not None else get_default_async_transport()
+        self.__cache = cache
+        self.__token_provider = token_provider
+        self.__models = models
+        self.__disk_cache = disk_cache
+        self.__headers = HeaderCache()
+
+    async def _headers(self):
+        if self.__token_provider is not None:
+            return self.__headers.get(await self.__token_provider.authorization_async())
+
+        return self.__headers.for_token(self.token_type, self.__access_token)
+
+    async def _get(self, endpoint, url, lat, lng, ride_type=None, end_lat=None, end_lng=None):
+        key = self.__cache.key(endpoint, lat, lng, ride_type, end_lat, end_lng) if self.__cache is not None else None
+        if key is not None:
+            response = self.__cache.get(key)
+            _cache_event(self.__transport, endpoint, ride_type, response is not None)
+            if response is not None:
+                return response
+
+        model = AVAILABILITY_MODELS[endpoint] if self.__models else None
+        disk_key = (self.__disk_cache.location_key(endpoint, lat, lng, ride_type, end_lat, end_lng)
+                    if self.__disk_cache is not None else None)
+        response = self.__disk_cache.get(disk_key) if disk_key is not None else None
+        if response is None:
+            response = _store_response(self.__disk_cache, disk_key,
+                                       await self.__transport.get(url, headers=await self._headers()))
+        response = _json_or_raise(response, model)
+
+        if key is not None:
+            self.__cache.set(key, response)
+        return response
+
+    async def get_ride_types(self, lat, lng, ride_type=None):
+        """See lyft.availability.Availability.get_ride_types"""
+        return await self._get("ridetypes", _ride_types_url(lat, lng, ride_type), lat, lng, ride_type)
+
+    async def get_driver_eta(self, lat, lng, end_lat=None, end_lng=None, ride_type=None):
+        """See lyft.availability.Availability.get_driver_eta"""
+        return await self._get("eta", _driver_eta_url(lat, lng, end_lat, end_lng, ride_type),
+                               lat, lng, ride_type, end_lat, end_lng)
+
+    async def get_ride_estimates(self, start_lat, start_lng, end_lat=None, end_lng=None, ride_type=None):
+        """See lyft.availability.Availability.get_ride_estimates"""
+        return await self._get("cost", _ride_estimates_url(start_lat, start_lng, end_lat, end_lng, ride_type),
+                               start_lat, start_lng, ride_type, end_lat, end_lng)
+
+    async def get_nearby_drivers(self, lat, lng):
+        """See lyft.availability.Availability.get_nearby_drivers"""
+        return await self._get("drivers", _nearby_drivers_url(lat, lng), lat, lng)
+
+    async def get_eta_and_nearby_drivers(self, lat, lng, end_lat=None, end_lng=None, ride_type=None):
+        """See lyft.availability.Availability.get_eta_and_nearby_drivers"""
+        return await self._get("nearby-drivers-pickup-etas",
+                               _eta_and_nearby_drivers_url(lat, lng, end_lat, end_lng, ride_type),
+                               lat, lng, ride_type, end_lat, end_lng)
+
+    async def iter_batch_estimates(self, pairs, ride_type=None, max_concurrency=DEFAULT_BATCH_CONCURRENCY,
+                                   prefilter=None):
+        """See lyft.availability.Availability.iter_batch_estimates, this is an async generator. Leaving the loop
+        early cancels the requests still in flight."""
+        groups, rejected = _plan_pairs(list(pairs), prefilter)
+        for estimate in rejected:
+            yield estimate
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def limited(method, *args):
+            async with semaphore:
+                return await method(*args)
+
+        async def query(pair):
+            eta, cost = await asyncio.gather(limited(self.get_driver_eta, *pair, ride_type),
+                                             limited(self.get_ride_estimates, *pair, ride_type),
+                                             return_exceptions=True)
+            error = eta if isinstance(eta, Exception) else cost if isinstance(cost, Exception) else None
+            return (pair,
+                    None if isinstance(eta, Exception) else eta,
+                    None if isinstance(cost, Exception) else cost,
+                    error)
+
+        tasks = [asyncio.ensure_future(query(pair)) for pair in groups]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                pair, eta, cost, error = await next_done
+                for index in groups[pair]:
+                    yield BatchEstimate(index, pair, eta, cost, error)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def batch_estimates(self, pairs, ride_type=None, max_concurrency=DEFAULT_BATCH_CONCURRENCY,
+                              prefilter=None):
+        """See lyft.availability.Availability.batch_estimates"""
+        pairs   = list(pairs)
+        results = [None] * len(pairs)
+        async for estimate in self.iter_batch_estimates(pairs, ride_type, max_concurrency, prefilter):
+            results[estimate.index] = estimate
+        return results
@@ -0,0 +1,133 @@
+import asyncio
+
+from lyft.aio.transport import get_default_async_transport
+from lyft.cache.disk_cache import _store_response
+from lyft.models import ReceiptResponse, RideResponse
+from lyft.rides import (_END, DEFAULT_HISTORY_PAGE_SIZE, DEFAULT_HISTORY_PREFETCH, DEFAULT_HISTORY_WINDOWS,
+                        RIDE_ENDPOINTS, _cancel_ride_result, _format_time, _history_windows, _HistoryCursor,
+                        _json_with_status_code, _parse_time, _rating_and_tip_result, _receipt_result,
+                        _ride_history_result, _update_destination_result)
+from lyft.util.endpoints import HeaderCache
+
+
+class AsyncRides:
+
+    def __init__(self, token_type=None, access_token=None, transport=None, token_provider=None, models=False,
+                 disk_cache=None, user_id=None):
+        """asyncio version of lyft.rides.Rides, every method is a coroutine with the same arguments and return value
+        as its blocking counterpart.
+
+        :param token_type: Token type
+        :param access_token:
+        :param transport: AsyncTransport used to send the requests, defaults to the shared asyncio transport
+        :param token_provider: Optional lyft.authentication.token_provider.TokenProvider used instead of access_token
+        :param models: Set to True to return lyft.models objects instead of dictionaries for rides and receipts
+        :param disk_cache: Optional lyft.cache.disk_cache.DiskCache persisting the receipts, only used with a user_id
+        :param user_id: Stable identity of the user the token belongs to, see lyft.rides.Rides
+        """
+        self.token_type       = token_type
+        self.__access_token   = access_token
+        self.__transport      = transport if transport is not None else get_default_async_transport()
+        self.__token_provider = token_provider
+        self.__ride_model     = RideResponse if models else None
+        self.__receipt_model  = ReceiptResponse if models else None
+        self.__disk_cache     = disk_cache
+        self.__user_id        = user_id
+        self.__headers        = HeaderCache({"content-type": "application/json"})
+
+    async def _headers(self):
+        if self.__token_provider is not None:
+            return self.__headers.get(await self.__token_provider.authorization_async())
+
+        return self.__headers.for_token(self.token_type, self.__access_token)
+
+    async def _request(self, endpoint, *args, query=(), **path_params):
+        """See lyft.rides.Rides._request"""
+        endpoint = RIDE_ENDPOINTS[endpoint]
+        return await self.__transport.request(endpoint.method, endpoint.url(*query, **path_params),
+                                              headers=await self._headers(),
+                                              data=endpoint.data(*args) if endpoint.body is not None else None,
+                                              idempotent=endpoint.idempotent)
+
+    async def create_ride_request(self, ride_type, src_lat, src_lng, dest_lat, dest_lng, src_address=None,
+                                  dest_address=None):
+        """See lyft.rides.Rides.create_ride_request"""
+        ride_request_response = await self._request("create", ride_type, src_lat, src_lng, dest_lat, dest_lng,
+                                                    src_address, dest_address)
+
+        return _json_with_status_code(ride_request_response, self.__ride_model)
+
+    async def get_ride_details(self, ride_id):
+        """See lyft.rides.Rides.get_ride_details"""
+        ride_details_response = await self._request("details", ride_id=ride_id)
+
+        return _json_with_status_code(ride_details_response, self.__ride_model)
+
+    async def update_destination(self, ride_id, lat, lng, address=None):
+        """See lyft.rides.Rides.update_destination"""
+        update_destination_response = await self._request("destination", lat, lng, address, ride_id=ride_id)
+
+        return _update_destination_result(update_destination_response)
+
+    async def set_rating_and_tip(self, ride_id, rating, tip_amount=None, currency="USD"):
+        """See lyft.rides.Rides.set_rating_and_tip"""
+        if int(rating) > 5:
+            return {"error": "Please enter rating less than 5"}
+
+        rating_tip_response = await self._request("rating", rating, tip_amount, currency, ride_id=ride_id)
+
+        return _rating_and_tip_result(rating_tip_response)
+
+    async def get_receipt(self, ride_id):
+        """See lyft.rides.Rides.get_receipt"""
+        disk_key = None
+        if self.__disk_cache is not None and self.__user_id is not None:
+            disk_key = self.__disk_cache.user_key("receipt", self.__user_id, ride_id)
+        receipt_response = self.__disk_cache.get(disk_key) if disk_key is not None else None
+        if receipt_response is None:
+            receipt_response = _store_response(self.__disk_cache, disk_key,
+                                               await self._request("receipt", ride_id=ride_id))
+
+        return _receipt_result(receipt_response, self.__receipt_model)
+
+    async def cancel_ride(self, ride_id):
+        """See lyft.rides.Rides.cancel_ride"""
+        receipt_response = await self._request("cancel", ride_id=ride_id)
+
+        return _cancel_ride_result(receipt_response)
+
+    async def get_ride_history(self, start_time, end_time=None, limit=DEFAULT_HISTORY_PAGE_SIZE):
+        """See lyft.rides.Rides.get_ride_history"""
+        start_time = _format_time(_parse_time(start_time))
+        end_time   = _format_time(_parse_time(end_time)) if end_time is not None else None
+        return _ride_history_result(await self._request("history", query=(start_time, end_time, str(limit))))
+
+    async def _fetch_window(self, cursor, pages):
+        """Fetches the pages of a window into the pages queue, ended by _END or the exception raised"""
+        try:
+            while not cursor.done:
+                await pages.put(cursor.advance(await self.get_ride_history(*cursor.query())))
+            await pages.put(_END)
+        except Exception as error:
+            await pages.put(error)
+
+    async def iter_ride_history(self, start_time, end_time=None, page_size=DEFAULT_HISTORY_PAGE_SIZE,
+                                windows=DEFAULT_HISTORY_WINDOWS, prefetch=DEFAULT_HISTORY_PREFETCH):
+        """Async generator version of lyft.rides.Rides.iter_ride_history, iterate over it with async for. The windows
+        are fetched by tasks of the running event loop, cancelled when the generator is closed."""
+        cursors = [_HistoryCursor(start, end, page_size)
+                   for start, end in _history_windows(start_time, end_time, windows)]
+        queues  = [asyncio.Queue(maxsize=max(1, prefetch)) for _ in cursors]
+        tasks   = [asyncio.ensure_future(self._fetch_window(cursor, pages)) for cursor, pages in zip(cursors, queues)]
+        try:
+            for pages in queues:
+                page = await pages.get()
+                while page is not _END:
+                    if isinstance(page, Exception):
+                        raise page
+                    for ride in page:
+                        yield ride
+                    page = await pages.get()
+        finally:
+            for task in tasks:
+                task.cancel()
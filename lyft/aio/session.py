@@ -0,0 +1,45 @@
+import json
+
+from lyft.aio.transport import get_default_async_transport
+from lyft.authentication.auth import _client_credentials
+from lyft.session.session import _refresh_token_result, _revoke_token_result
+from lyft.util.url_util import PUBLIC_AUTH_URL, AUTH_REVOKE_URL
+
+
+class AsyncSession:
+
+    def __init__(self, config, refresh_token, sandbox_mode=False, transport=None):
+        """asyncio version of lyft.session.session.Session
+
+        :param refresh_token: Token we get after the user authorizes the application
+        :param transport: AsyncTransport used to send the requests, defaults to the shared asyncio transport
+        """
+        self.refresh_token  = refresh_token
+        self.__sandbox_mode = sandbox_mode
+        self.__config       = config
+        self.__transport    = transport if transport is not None else get_default_async_transport()
+
+    async def refresh_access_token(self):
+        """See lyft.session.session.Session.refresh_access_token"""
+        header = {"content-type": "application/json"}
+        data   = {"grant_type": "refresh_token", "refresh_token": self.refresh_token}
+
+        refresh_token_response = await self.__transport.post(PUBLIC_AUTH_URL,
+                                                             headers=header,
+                                                             data=json.dumps(data),
+                                                             auth=_client_credentials(self.__config,
+                                                                                      self.__sandbox_mode))
+
+        return _refresh_token_result(refresh_token_response)
+
+    async def revoke_token(self):
+        """See lyft.session.session.Session.revoke_token"""
+        header = {"content-type": "application/json"}
+        data   = {"token"       : self.refresh_token}
+
+        revoke_token_response = await self.__transport.post(AUTH_REVOKE_URL,
+                                                            data=json.dumps(data),
+                                                            headers=header,
+                                                            auth=_client_credentials(self.__config,
+                                                                                     self.__sandbox_mode))
+        return _revoke_token_result(revoke_token_response)
@@ -0,0 +1,105 @@
+import asyncio
+
+from lyft.tracker import (DEFAULT_INTERVAL, DEFAULT_INTERVALS, DEFAULT_MAX_ERRORS, DEFAULT_TRACKER_CONCURRENCY,
+                          _ride_status, _RideState)
+
+
+class AsyncRideTracker(object):
+
+    def __init__(self, rides, ride_ids=(), intervals=None, default_interval=DEFAULT_INTERVAL,
+                 max_concurrency=DEFAULT_TRACKER_CONCURRENCY, max_errors=DEFAULT_MAX_ERRORS):
+        """asyncio version of lyft.tracker.RideTracker, iterate over it with async for. Each ride is polled by its
+        own task, leaving the loop early cancels them.
+
+        :param rides: lyft.aio.rides.AsyncRides used to poll the rides
+        :param ride_ids: Ids of the rides to track, more can be added with add at any time
+        :param intervals: dict of status -> seconds between two polls, defaults to DEFAULT_INTERVALS
+        :param default_interval: Seconds between two polls for the statuses missing from intervals
+        :param max_concurrency: Maximum number of polls in flight
+        :param max_errors: Number of consecutive failed polls after which a ride is no longer tracked
+        """
+        self.intervals        = dict(DEFAULT_INTERVALS if intervals is None else intervals)
+        self.default_interval = default_interval
+        self.max_concurrency  = max_concurrency
+        self.max_errors       = max_errors
+        self.__rides          = rides
+        self.__states         = {}
+        self.__tasks          = {}
+        self.__queue          = None
+        self.__semaphore      = None
+        for ride_id in ride_ids:
+            self.add(ride_id)
+
+    def add(self, ride_id):
+        """Starts tracking a ride, its first update is yielded after its first poll"""
+        if ride_id not in self.__states:
+            self.__states[ride_id] = _RideState(ride_id)
+            if self.__queue is not None:
+                self._start(ride_id)
+
+    def remove(self, ride_id):
+        """Stops tracking a ride"""
+        self.__states.pop(ride_id, None)
+        task = self.__tasks.get(ride_id)
+        if task is not None:
+            task.cancel()
+
+    def stop(self):
+        """Ends the iteration over the updates, polls in flight are cancelled"""
+        for ride_id in list(self.__states):
+            self.remove(ride_id)
+
+    def tracked(self):
+        """Returns the ids of the rides still tracked"""
+        return list(self.__states)
+
+    def _start(self, ride_id):
+        state = self.__states[ride_id]
+        queue = self.__queue
+        task  = self.__tasks[ride_id] = asyncio.ensure_future(self._track(state, queue))
+        task.add_done_callback(lambda _: self._done(state, task, queue))
+
+    def _done(self, state, task, queue):
+        if self.__states.get(state.ride_id) is state:
+            del self.__states[state.ride_id]
+        if self.__tasks.get(state.ride_id) is task:
+            del self.__tasks[state.ride_id]
+        # wakes up updates so it notices when the last ride is done
+        queue.put_nowait(None)
+
+    async def _track(self, state, queue):
+        while True:
+            async with self.__semaphore:
+                try:
+                    details = await self.__rides.get_ride_details(state.ride_id)
+                    status, error = _ride_status(details), None
+                except Exception as poll_error:
+                    details, status, error = None, None, poll_error
+
+            update, done = state.observe(status, details, error, self.max_errors)
+            if update is not None:
+                queue.put_nowait(update)
+            if done:
+                return
+            await asyncio.sleep(self.intervals.get(state.status, self.default_interval))
+
+    async def updates(self):
+        """Async generator of RideUpdate in the order the status changes are seen, ends when no ride is left to
+        track or stop is called"""
+        self.__queue     = queue = asyncio.Queue()
+        self.__semaphore = asyncio.Semaphore(self.max_concurrency)
+        for ride_id in self.__states:
+            self._start(ride_id)
+
+        try:
+            while self.__tasks or not queue.empty():
+                update = await queue.get()
+                if update is not None:
+                    yield update
+        finally:
+            self.__queue = None
+            for task in list(self.__tasks.values()):
+                task.cancel()
+
+    def __aiter__(self):
+        return self.updates()
@@ -0,0 +1,299 @@
+import asyncio
+import base64
+import time
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from lyft.transport.hooks import _end_event, _retry_event, _start_event
+from lyft.transport.retry import DEFAULT_TIMEOUT, cap_timeout
+from lyft.transport.single_flight import request_key
+from lyft.util.fast_json import loads
+from lyft.util.url_util import API_HOST
+
+DEFAULT_LIMIT = 100
+
+
+def _trace_config():
+    """aiohttp TraceConfig recording the dns, connect and ttfb durations in the timings of the RequestEvent given
+    as trace_request_ctx"""
+    def started(name):
+        async def callback(session, context, params):
+            if context.trace_request_ctx is not None:
+                context.trace_request_ctx["_" + name] = time.perf_counter()
+        return callback
+
+    def ended(name):
+        async def callback(session, context, params):
+            timings = context.trace_request_ctx
+            if timings is not None and "_" + name in timings:
+                timings[name] = time.perf_counter() - timings.pop("_" + name)
+        return callback
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_dns_resolvehost_start.append(started("dns"))
+    trace_config.on_dns_resolvehost_end.append(ended("dns"))
+    trace_config.on_connection_create_start.append(started("connect"))
+    trace_config.on_connection_create_end.append(ended("connect"))
+    trace_config.on_request_start.append(started("ttfb"))
+    trace_config.on_request_end.append(ended("ttfb"))
+    return trace_config
+
+
+class AsyncResponse(object):
+    __slots__ = ("status_code", "headers", "url", "content")
+
+    def __init__(self, status_code, headers, url, content):
+        """Fully read response returned by AsyncTransport. It exposes the same attributes as requests.Response that
+        the SDK uses, so the response handling code is shared by the blocking and the asyncio classes.
+
+        :param status_code: HTTP status code
+        :param headers: Case insensitive response headers
+        :param url: Final URL of the request
+        :param content: Response body in bytes
+        """
+        self.status_code = status_code
+        self.headers     = headers
+        self.url         = url
+        self.content     = content
+
+    def json(self):
+        return loads(self.content)
+
+
+async def _close_session(session, loop):
+    """Closes a session created on another event loop"""
+    if loop.is_running():
+        # the loop runs in another thread, its connections are closed there
+        asyncio.run_coroutine_threadsafe(session.close(), loop)
+    else:
+        # the loop is stopped or closed, eg: by a previous asyncio.run: the session and its connector are closed from
+        # this loop, so that they are not left open and reported as unclosed
+        await session.close()
+
+
+class AsyncTransport(object):
+
+    def __init__(self, limit=DEFAULT_LIMIT, limit_per_host=0, max_concurrency=None, timeout=DEFAULT_TIMEOUT,
+                 base_url=None, rate_limiter=None, rate_limit_timeout=None, retry_policy=None, circuit_breaker=None,
+                 single_flight=None, hooks=None):
+        """asyncio counterpart of lyft.transport.transport.Transport, backed by an aiohttp connection pool. One
+        AsyncTransport can be shared by every asyncio SDK class running on the same event loop.
+
+        Cancelling a task awaiting a request closes the underlying request and releases its concurrency slot.
+
+        :param limit: Maximum number of open connections, 0 for no limit
+        :param limit_per_host: Maximum number of open connections per host, 0 for no limit
+        :param max_concurrency: Maximum number of requests in flight, extra requests wait for a free slot
+        :param timeout: Default timeout in seconds, either a float or a (connect, read) tuple
+        :param base_url: Optional scheme and host, eg: "http://127.0.0.1:8080", used instead of https://api.lyft.com
+        :param rate_limiter: Optional lyft.transport.rate_limiter.RateLimiter pacing the requests
+        :param rate_limit_timeout: Maximum number of seconds a request waits for the rate limiter before
+                                   RateLimitExceeded is raised, None to wait as long as needed and 0 to never wait
+        :param retry_policy: Optional lyft.transport.retry.RetryPolicy retrying transient failures
+        :param circuit_breaker: Optional lyft.transport.retry.CircuitBreaker failing fast while the API is degraded
+        :param single_flight: Optional lyft.transport.single_flight.SingleFlight sharing one upstream call between
+                              identical concurrent GET requests
+        :param hooks: Optional list of lyft.transport.hooks.Hooks notified of every attempt, retry and cache hit
+        """
+        if aiohttp is None:
+            raise ImportError("AsyncTransport requires aiohttp, install it with: pip install aiohttp")
+
+        self.limit              = limit
+        self.limit_per_host     = limit_per_host
+        self.max_concurrency    = max_concurrency
+        self.timeout            = timeout
+        self.base_url           = base_url.rstrip("/") if base_url else None
+        self.rate_limiter       = rate_limiter
+        self.rate_limit_timeout = rate_limit_timeout
+        self.retry_policy       = retry_policy
+        self.circuit_breaker    = circuit_breaker
+        self.single_flight      = single_flight
+        self.hooks              = tuple(hooks or ())
+        self.__semaphore        = None
+        self.__session          = None
+        self.__loop             = None
+
+    def _resolve_url(self, url):
+        if self.base_url is not None and url.startswith(API_HOST):
+            return self.base_url + url[len(API_HOST):]
+        return url
+
+    @staticmethod
+    def _client_timeout(timeout):
+        if isinstance(timeout, tuple):
+            return aiohttp.ClientTimeout(sock_connect=timeout[0], sock_read=timeout[1])
+        return aiohttp.ClientTimeout(total=timeout)
+
+    async def _get_session(self):
+        """Returns the session of the running event loop. The session and the concurrency semaphore are bound to the
+        loop they are first used on, both are created again when the transport is used on another loop, after the
+        session of the previous loop is closed"""
+        loop = asyncio.get_running_loop()
+        if self.__loop is not loop:
+            stale, previous  = self.__session, self.__loop
+            self.__session   = None
+            self.__semaphore = asyncio.Semaphore(self.max_concurrency) if self.max_concurrency else None
+            self.__loop      = loop
+            if stale is not None and not stale.closed:
+                await _close_session(stale, previous)
+
+        if self.__session is None or self.__session.closed:
+            connector      = aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host)
+            self.__session = aiohttp.ClientSession(connector=connector,
+                                                   timeout=self._client_timeout(self.timeout),
+                                                   trace_configs=[_trace_config()] if self.hooks else None)
+        return self.__session
+
+    async def _send(self, method, url, headers=None, data=None, params=None, auth=None, timeout=None, attempt=1):
+        # the rate limit is waited for first: past the recovery timeout, before_request lets a single trial request
+        # through, a RateLimitExceeded raised after it would leave the circuit half open for good
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire_async(timeout=self.rate_limit_timeout)
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.before_request()
+
+        if auth is not None:
+            credentials = "{}:{}".format(auth[0] or "", auth[1] or "").encode("utf-8")
+            headers     = dict(headers or {})
+            headers["Authorization"] = "Basic {}".format(base64.b64encode(credentials).decode("ascii"))
+
+        kwargs = {}
+        if timeout is not None:
+            kwargs["timeout"] = self._client_timeout(timeout)
+
+        event = None
+        try:
+            if self.hooks:
+                event   = _start_event(self.hooks, method, url, attempt, params, data)
+                started = time.perf_counter()
+                kwargs["trace_request_ctx"] = event.timings
+
+            try:
+                session = await self._get_session()
+                async with session.request(method, url, headers=headers, data=data, params=params,
+                                           **kwargs) as response:
+                    content  = await response.read()
+                    response = AsyncResponse(response.status, response.headers, str(response.url), content)
+            except Exception as error:
+                if event is not None:
+                    _end_event(self.hooks, event, time.perf_counter() - started, error=error)
+                raise
+
+            if event is not None:
+                _end_event(self.hooks, event, time.perf_counter() - started, response)
+        except (aiohttp.ClientError, asyncio.TimeoutError, OSError):
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.record_failure()
+            raise
+        except BaseException:
+            # a hook error or a cancellation, eg: by iter_batch_estimates or a tracker being stopped, says nothing
+            # about the API, a trial request is given back
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.release()
+            raise
+
+        if self.rate_limiter is not None:
+            self.rate_limiter.observe(response)
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.record(response)
+        return response
+
+    async def _send_limited(self, method, url, **kwargs):
+        await self._get_session()
+        if self.__semaphore is None:
+            return await self._send(method, url, **kwargs)
+
+        async with self.__semaphore:
+            return await self._send(method, url, **kwargs)
+
+    async def request(self, method, url, idempotent=None, deadline=None, **kwargs):
+        """Sends a request over the pooled session, retrying it according to the retry policy
+
+        :param method: HTTP method, eg: "GET"
+        :param url: Absolute URL of the endpoint
+        :param idempotent: Whether the request may be sent more than once, defaults to the retry policy guess based
+                           on the HTTP method
+        :param deadline: Maximum number of seconds spent on the request, retries included, defaults to the retry
+                         policy deadline
+        :param kwargs: headers, data, params, auth (a (user, password) tuple) and timeout
+        :return: AsyncResponse
+        """
+        if self.single_flight is not None and method.upper() == "GET":
+            key = request_key(method, url, kwargs.get("params"), kwargs.get("headers"))
+            return await self.single_flight.do_async(key, lambda: self._request(method, url, idempotent, deadline,
+                                                                                **kwargs))
+        return await self._request(method, url, idempotent, deadline, **kwargs)
+
+    async def _request(self, method, url, idempotent, deadline, **kwargs):
+        url    = self._resolve_url(url)
+        policy = self.retry_policy
+        if policy is None:
+            return await self._send_limited(method, url, **kwargs)
+
+        retry      = policy.is_idempotent(method) if idempotent is None else idempotent
+        deadline   = deadline if deadline is not None else policy.deadline
+        expires_at = time.monotonic() + deadline if deadline is not None else None
+        timeout    = kwargs.pop("timeout", self.timeout)
+        attempt    = 0
+        while True:
+            attempt += 1
+            if expires_at is not None:
+                kwargs["timeout"] = cap_timeout(timeout, expires_at - time.monotonic())
+
+            try:
+                response, error = await self._send_limited(method, url, attempt=attempt, **kwargs), None
+            except (aiohttp.ClientError, asyncio.TimeoutError) as exception:
+                response, error = None, exception
+
+            if not retry or not policy.should_retry(attempt, response):
+                break
+            delay = policy.retry_delay(attempt, response)
+            if expires_at is not None and time.monotonic() + delay >= expires_at:
+                break
+            if self.hooks:
+                _retry_event(self.hooks, method, url, attempt, kwargs.get("params"), kwargs.get("data"), delay,
+                             response, error)
+            await asyncio.sleep(delay)
+
+        if error is not None:
+            raise error
+        return response
+
+    async def get(self, url, **kwargs):
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        return await self.request("POST", url, **kwargs)
+
+    async def put(self, url, **kwargs):
+        return await self.request("PUT", url, **kwargs)
+
+    async def close(self):
+        """Closes every pooled connection"""
+        if self.__session is not None:
+            await self.__session.close()
+            self.__session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+
+_default_async_transport = None
+
+
+def get_default_async_transport():
+    """Returns the process wide AsyncTransport used by the asyncio SDK classes when none is given to them. Its
+    connection pool is bound to the event loop that first uses it and re-created if a different loop is running.
+
+    :return: AsyncTransport
+    """
+    global _default_async_transport
+    if _default_async_transport is None:
+        _default_async_transport = AsyncTransport()
+    return _default_async_transport
@@ -1,12 +1,68 @@
 import json
-import requests
-from requests.auth import HTTPBasicAuth
+from urllib.parse import quote, urlencode
 
+from lyft.util.lazy import lazy_function
 from lyft.util.url_util import PUBLIC_AUTH_URL, USER_AUTH_URL
 
+# requests is only imported by the first object created without a transport, or the first token request
+get_default_transport = lazy_function("lyft.transport.transport", "get_default_transport")
+HTTPBasicAuth         = lazy_function("requests.auth", "HTTPBasicAuth")
+
+
+def _client_credentials(config, sandbox_mode):
+    """Returns the (client_id, client_secret) pair used for basic authentication against the oauth endpoints"""
+    client_id       = config.get("client_id")
+    if sandbox_mode is False:
+        client_secret   = config.get("client_secret")
+    else:
+        client_secret   = "SANDBOX-{}".format(config.get("client_secret"))
+
+    return client_id, client_secret
+
+
+def _authorization_uri(config, scopes, state):
+    """Returns the URL of the Lyft authorization page, with the query parameters percent-encoded, or None if the
+    client id or the scopes are missing"""
+    client_id = config.get("client_id")
+    if not scopes or not client_id:
+        return None
+
+    query = urlencode([("client_id", client_id), ("scope", " ".join(scopes)), ("state", state),
+                       ("response_type", "code")], quote_via=quote)
+    return "{}?{}".format(USER_AUTH_URL, query)
+
+
+def _public_token_result(authentication_response):
+    if authentication_response.status_code == 200:
+        authentication_response_json = authentication_response.json()
+        return {"x-ratelimit-limit"     : authentication_response.headers.get("x-ratelimit-limit"),
+                "x-ratelimit-remaining" : authentication_response.headers.get("x-ratelimit-remaining"),
+                "expires_in"            : authentication_response_json.get("expires_in"),
+                "access_token"          : authentication_response_json.get("access_token"),
+                "token_type"            : authentication_response_json.get("token_type")}
+
+    else:
+        return authentication_response.json()
+
+
+def _user_token_result(authentication_response):
+    if authentication_response.status_code == 200:
+        authentication_response_json = authentication_response.json()
+        return {"access_token"          : authentication_response_json.get("access_token"),
+                "refresh_token"         : authentication_response_json.get("refresh_token"),
+                "token_type"            : authentication_response_json.get("token_type"),
+                "expires_in"            : authentication_response_json.get("expires_in"),
+                "scope"                 : authentication_response_json.get("scope"),
+                "x-ratelimit-remaining" : authentication_response.headers.get("x-ratelimit-remaining"),
+                "x-ratelimit-limit"     : authentication_response.headers.get("x-ratelimit-limit")
+                }
+
+    else:
+        return authentication_response.json()
+
 
 class LyftPublicAuth:
-    def __init__(self, config, sandbox_mode=False):
+    def __init__(self, config, sandbox_mode=False, transport=None):
         """Authentication class for the 2 legged flow. This calls does not need user data and can access the public
         endpoints directly with the client secret and client ID. After successful authentication it will retrurn the
         access token
@@ -14,10 +70,12 @@ class LyftPublicAuth:
 
         :param sandbox_mode: Set to True if you want a sandbox environment else False
         :param config: Dictionary of client_id and client_secret
+        :param transport: Transport used to send the requests, defaults to the shared pooled transport
 
         """
         self.__sandbox_mode = sandbox_mode
         self.__config = config
+        self.__transport = transport if transport is not None else get_default_transport()
 
     def get_access_token(self):
         """Retrieves the access token along with the expiration time and rate limiting data in a dictionary
@@ -27,49 +85,38 @@ class LyftPublicAuth:
         """
         header = {"content-type": "application/json"}
 
-        client_id       = self.__config.get("client_id")
-        if self.__sandbox_mode is False:
-            client_secret   = self.__config.get("client_secret")
-        else:
-            client_secret   = "SANDBOX-{}".format(self.__config.get("client_secret"))
+        client_id, client_secret = _client_credentials(self.__config, self.__sandbox_mode)
 
         data = {"grant_type": "client_credentials",
                 "scope": "public"}
 
-        authentication_response = requests.post(PUBLIC_AUTH_URL,
-                                                headers=header,
-                                                data=json.dumps(data),
-                                                auth=HTTPBasicAuth(client_id, client_secret))
-
-        if authentication_response.status_code == 200:
-            authentication_response_json = authentication_response.json()
-            return {"x-ratelimit-limit"     : authentication_response.headers.get("x-ratelimit-limit"),
-                    "x-ratelimit-remaining" : authentication_response.headers.get("x-ratelimit-remaining"),
-                    "expires_in"            : authentication_response_json.get("expires_in"),
-                    "access_token"          : authentication_response_json.get("access_token"),
-                    "token_type"            : authentication_response_json.get("token_type")}
+        authentication_response = self.__transport.post(PUBLIC_AUTH_URL,
+                                                        headers=header,
+                                                        data=json.dumps(data),
+                                                        auth=HTTPBasicAuth(client_id, client_secret))
 
-        else:
-            return authentication_response.json()
+        return _public_token_result(authentication_response)
 
 
 class LyftUserAuth:
 
-    def __init__(self, config, scopes, state, sandbox_mode=False):
+    def __init__(self, config, scopes, state, sandbox_mode=False, transport=None):
         """Authentcation class for the 3 legged flow.
 
         :param sandbox_mode: Set to True if you want a sandbox environment else False
         :param config: Dictionary of client_id and client_secret
         :param scopes: List of scopes that you need to give get from the user
         :param state: A payload which will be passed back to your application through the redirect
+        :param transport: Transport used to send the requests, defaults to the shared pooled transport
 
         """
         self.__sandbox_mode = sandbox_mode
         self.__config       = config
         self.__scopes       = scopes
         self.__state        = state
+        self.__transport    = transport if transport is not None else get_default_transport()
 
-    def get_authorization_uri(self):
+    def get_authorization_uri(self, state=None):
         """Returns the authorization URI that will be presented to the customer to authenticate. Present this URL in the
         application. The user will see information about your application, along with the list of permissions your
         application is requesting. The user can indicate whether Lyft should grant access to your application or not.
@@ -83,30 +130,13 @@ class LyftUserAuth:
 
         GET 'your-redirect-uri/?code=<authorization_code>'
 
-        :return: URL: authorization URL that will be presented to user
-        """
-        client_id     = self.__config.get("client_id")
-        if len(self.__scopes) > 0:
-            scopes        = "%20".join(self.__scopes)
-        else:
-            return None
-
-        if client_id is None or len(client_id) == 0:
-            return None
+        The URI is built locally, no request is sent. The scopes and the state are percent-encoded.
 
-        header = {"content-type": "application/json"}
-        redirect_response = requests.get("{}?client_id={}&scope={}&state={}&response_type=code".format(USER_AUTH_URL,
-                                                                                                       client_id,
-                                                                                                       scopes,
-                                                                                                       self.__state),
-                                         headers=header
-                                         )
-
-        if redirect_response.status_code == 200:
-            return redirect_response.url
-
-        else:
-            return redirect_response.json()
+        :param state: State of this authorization, defaults to the state given to the constructor. See
+                      lyft.authentication.code_exchange.StateStore to issue one per login
+        :return: URL: authorization URL that will be presented to user, None if the client id or the scopes are missing
+        """
+        return _authorization_uri(self.__config, self.__scopes, self.__state if state is None else state)
 
     def get_access_token(self, authorization_code):
         """We will use the authorization code that we will get after the user authenticates with the application to
@@ -118,28 +148,11 @@ class LyftUserAuth:
         header = {"content-type": "application/json"}
         data   = {"grant_type": "authorization_code", "code": authorization_code}
 
-        client_id = self.__config.get("client_id")
-
-        if self.__sandbox_mode is False:
-            client_secret = self.__config.get("client_secret")
-        else:
-            client_secret = "SANDBOX-{}".format(self.__config.get("client_secret"))
-
-        authentication_response = requests.post(PUBLIC_AUTH_URL,
-                                                headers=header,
-                                                data=json.dumps(data),
-                                                auth=HTTPBasicAuth(client_id, client_secret))
-
-        if authentication_response.status_code == 200:
-            authentication_response_json = authentication_response.json()
-            return {"access_token"          : authentication_response_json.get("access_token"),
-                    "refresh_token"         : authentication_response_json.get("refresh_token"),
-                    "token_type"            : authentication_response_json.get("token_type"),
-                    "expires_in"            : authentication_response_json.get("expires_in"),
-                    "scope"                 : authentication_response_json.get("scope"),
-                    "x-ratelimit-remaining" : authentication_response.headers.get("x-ratelimit-remaining"),
-                    "x-ratelimit-limit"     : authentication_response.headers.get("x-ratelimit-limit")
-                    }
-
-        else:
-            return authentication_response.json()
+        client_id, client_secret = _client_credentials(self.__config, self.__sandbox_mode)
+
+        authentication_response = self.__transport.post(PUBLIC_AUTH_URL,
+                                                        headers=header,
+                                                        data=json.dumps(data),
+                                                        auth=HTTPBasicAuth(client_id, client_secret))
+
+        return _user_token_result(authentication_response)
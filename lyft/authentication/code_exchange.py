@@ -0,0 +1,185 @@
+import secrets
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from lyft.util.errors import InvalidStateError, LyftAPIError
+from lyft.util.fork import register_after_fork
+
+DEFAULT_EXCHANGE_CONCURRENCY = 8
+DEFAULT_STATE_TTL            = 600
+DEFAULT_STATE_MAX_SIZE       = 100000
+
+Exchange = namedtuple("Exchange", ["index", "code", "state", "value", "token", "error"])
+Exchange.__doc__ = """Result of one authorization code of CodeExchanger.exchange_many
+
+:param index: Position of the (code, state) pair in the input
+:param code: Authorization code
+:param state: State received along the code
+:param value: Value stored with the state when the authorization URI was issued, None if the exchange failed
+:param token: Token dictionary with "access_token" and "refresh_token", None if the exchange failed
+:param error: InvalidStateError, LyftAPIError carrying the error response or the exception raised, None on success
+"""
+
+
+class StateStore(object):
+
+    def __init__(self, ttl=DEFAULT_STATE_TTL, max_size=DEFAULT_STATE_MAX_SIZE, clock=time.monotonic):
+        """Bounded store of the states of the authorizations in progress, each with a value such as the session or
+        the page to return to. A state is random, can only be consumed once and expires after ttl seconds: Lyft
+        authorization codes expire after 10 minutes anyway.
+
+        Once max_size states are stored the oldest one is dropped, so a flood of login page renders can not grow the
+        memory without bound. The store is thread safe.
+
+        :param ttl: Seconds a state stays valid
+        :param max_size: int, maximum number of stored states
+        :param clock: function returning the current time in seconds
+        """
+        self.ttl       = ttl
+        self.max_size  = max_size
+        self.evictions = 0
+        self.__clock   = clock
+        # state -> (expires_at, value), oldest first since every state lives ttl seconds
+        self.__states  = OrderedDict()
+        self.__lock    = threading.Lock()
+        register_after_fork(self)
+
+    def _after_fork(self):
+        self.__lock = threading.Lock()
+
+    def issue(self, value=None):
+        """Stores a value under a new random state
+
+        :param value: Returned by pop along the state
+        :return: state string, URL safe
+        """
+        state = secrets.token_urlsafe(24)
+        with self.__lock:
+            now = self.__clock()
+            self._purge(now)
+            self.__states[state] = (now + self.ttl, value)
+            while len(self.__states) > self.max_size:
+                self.__states.popitem(last=False)
+                self.evictions += 1
+        return state
+
+    def pop(self, state):
+        """Consumes a state. Raises InvalidStateError if it was never issued, already consumed or expired
+
+        :return: value stored with the state
+        """
+        with self.__lock:
+            entry = self.__states.pop(state, None)
+        if entry is None or entry[0] <= self.__clock():
+            raise InvalidStateError(state)
+        return entry[1]
+
+    def _purge(self, now):
+        """Drops the expired states. Caller holds the lock"""
+        while self.__states:
+            state, (expires_at, _) = next(iter(self.__states.items()))
+            if expires_at > now:
+                break
+            del self.__states[state]
+
+    def purge(self):
+        """Drops the expired states, they are otherwise dropped as new states are issued"""
+        with self.__lock:
+            self._purge(self.__clock())
+
+    def __len__(self):
+        return len(self.__states)
+
+
+class CodeExchanger(object):
+
+    def __init__(self, auth, states=None, max_concurrency=DEFAULT_EXCHANGE_CONCURRENCY):
+        """Issues the authorization URIs of a login flow and exchanges the authorization codes Lyft redirects back
+        with for tokens. Exchanges run concurrently on a pool of max_concurrency threads, so that a surge of logins
+        is not served one token request at a time.
+
+        Give the LyftUserAuth object a Transport with pool_maxsize >= max_concurrency so every exchange gets a
+        pooled connection.
+
+        :param auth: lyft.authentication.auth.LyftUserAuth of the application
+        :param states: StateStore checking the state of every code, defaults to a new StateStore
+        :param max_concurrency: int, maximum number of token requests in flight
+        """
+        self.states          = states if states is not None else StateStore()
+        self.max_concurrency = max_concurrency
+        self.__auth          = auth
+        self.__executor      = None
+        self.__lock          = threading.Lock()
+        register_after_fork(self)
+
+    def _after_fork(self):
+        # the threads of the pool do not exist in the child
+        self.__executor = None
+        self.__lock     = threading.Lock()
+
+    def _executor(self):
+        with self.__lock:
+            if self.__executor is None:
+                self.__executor = ThreadPoolExecutor(max_workers=self.max_concurrency)
+            return self.__executor
+
+    def authorization_uri(self, value=None):
+        """Returns the authorization URI of a new login, with a new state
+
+        :param value: Stored with the state and returned by exchange, eg: the page to return to
+        :return: URL
+        """
+        return self.__auth.get_authorization_uri(state=self.states.issue(value))
+
+    def exchange(self, code, state):
+        """Exchanges an authorization code in the calling thread. Raises InvalidStateError if the state is unknown or
+        expired and LyftAPIError if Lyft refuses the code.
+
+        :param code: code query parameter of the redirect
+        :param state: state query parameter of the redirect
+        :return: (token, value) where token is the dictionary returned by LyftUserAuth.get_access_token and value
+                 the one given to authorization_uri
+        """
+        value = self.states.pop(state)
+        token = self.__auth.get_access_token(code)
+        if not token.get("access_token"):
+            raise LyftAPIError(token)
+        return token, value
+
+    def submit(self, code, state):
+        """Exchanges an authorization code on the pool, eg: from the request handlers of a web server
+
+        :return: concurrent.futures.Future of (token, value)
+        """
+        return self._executor().submit(self.exchange, code, state)
+
+    def exchange_many(self, callbacks):
+        """Exchanges many authorization codes concurrently, yielding an Exchange per code as soon as it is done. A
+        failing code yields an Exchange with its error set instead of interrupting the others.
+
+        :param callbacks: iterable of (code, state)
+        :return: generator of Exchange in completion order
+        """
+        executor = self._executor()
+        futures  = {executor.submit(self.exchange, code, state): (index, code, state)
+                    for index, (code, state) in enumerate(callbacks)}
+        try:
+            for future in as_completed(futures):
+                index, code, state = futures[future]
+                try:
+                    (token, value), error = future.result(), None
+                except Exception as exception:
+                    (token, value), error = (None, None), exception
+                yield Exchange(index, code, state, value, token, error)
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def close(self):
+        """Waits for the exchanges in progress and stops the threads"""
+        with self.__lock:
+            executor, self.__executor = self.__executor, None
+        if executor is not None:
+            executor.shutdown()
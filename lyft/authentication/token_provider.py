@@ -0,0 +1,203 @@
+import threading
+import time
+
+from lyft.util.errors import LyftAPIError
+from lyft.util.fork import register_after_fork
+from lyft.util.lazy import lazy_module
+
+# asyncio takes longer to import than the rest of the SDK, it is only imported by the first coroutine
+asyncio = lazy_module("asyncio")
+# only imported by the first TokenProvider, to tell the coroutine functions from the plain ones
+inspect = lazy_module("inspect")
+
+DEFAULT_REFRESH_MARGIN = 60
+DEFAULT_RETRY_DELAY    = 5
+
+
+class TokenProvider(object):
+
+    def __init__(self, fetch_token, refresh_margin=DEFAULT_REFRESH_MARGIN, background=True,
+                 retry_delay=DEFAULT_RETRY_DELAY, clock=time.monotonic):
+        """Caches an access token and refreshes it before it expires, so that requests never wait for a token
+        round trip. Pass it to Availability, Rides and their asyncio versions instead of a fixed access token.
+
+        The provider is thread safe and asyncio safe: concurrent callers needing a new token share a single call to
+        fetch_token. With background=True a daemon timer refreshes the token refresh_margin seconds before it expires,
+        otherwise the first request inside that margin refreshes it.
+
+        fetch_token may be a coroutine function, eg: AsyncLyftPublicAuth(config).get_access_token. The provider is
+        then only usable from coroutines, with get_token_async and authorization_async, which await it on the running
+        event loop; the concurrent callers of a loop share a single call. It is never refreshed in the background,
+        there is no event loop in the timer thread.
+
+        A forked child process keeps the token of its parent and refreshes it itself, to share the token of many
+        processes give a fetch_token from lyft.transport.coordinator.Coordinator.token_fetcher.
+
+        :param fetch_token: function or coroutine function returning a token dictionary with "access_token",
+                            "token_type" and "expires_in", eg: LyftPublicAuth(config).get_access_token
+        :param refresh_margin: Seconds before the expiry at which the token is refreshed
+        :param background: Set to False to disable the background refresh timer, ignored for a coroutine function
+        :param retry_delay: Seconds to wait before retrying a failed background refresh
+        :param clock: function returning the current time in seconds
+        """
+        self.refresh_margin = refresh_margin
+        self.is_async       = inspect.iscoroutinefunction(fetch_token)
+        self.background     = background and not self.is_async
+        self.retry_delay    = retry_delay
+        self.refresh_count  = 0
+        self.__fetch_token  = fetch_token
+        self.__clock        = clock
+        self.__token        = None
+        self.__expires_at   = 0
+        self.__lock         = threading.Lock()
+        # (event loop, asyncio.Lock) coalescing the calls to a coroutine fetch_token, an asyncio.Lock is bound to
+        # the loop it is first used on
+        self.__async_lock   = None
+        self.__timer        = None
+        self.__closed       = False
+        register_after_fork(self)
+
+    def _after_fork(self):
+        # the timer thread does not exist in the child, the first request inside the margin refreshes the token
+        self.__lock       = threading.Lock()
+        self.__async_lock = None
+        self.__timer      = None
+
+    def __reduce__(self):
+        # the token is carried with its remaining lifetime, the clocks of two processes need not agree
+        state = (self.__token, self.__expires_at - self.__clock()) if self.__token is not None else None
+        return self.__class__, (self.__fetch_token, self.refresh_margin, self.background, self.retry_delay,
+                                self.__clock), state
+
+    def __setstate__(self, state):
+        self.__token, expires_in = state
+        self.__expires_at        = self.__clock() + expires_in
+
+    @classmethod
+    def from_public_auth(cls, auth, **kwargs):
+        """Provider of 2 legged tokens
+
+        :param auth: lyft.authentication.auth.LyftPublicAuth or lyft.aio.auth.AsyncLyftPublicAuth
+        :return: TokenProvider
+        """
+        return cls(auth.get_access_token, **kwargs)
+
+    @classmethod
+    def from_session(cls, session, **kwargs):
+        """Provider of user tokens refreshed with the session refresh token
+
+        :param session: lyft.session.session.Session or lyft.aio.session.AsyncSession
+        :return: TokenProvider
+        """
+        return cls(session.refresh_access_token, **kwargs)
+
+    def _is_fresh(self):
+        return self.__token is not None and self.__clock() < self.__expires_at - self.refresh_margin
+
+    def _is_valid(self):
+        return self.__token is not None and self.__clock() < self.__expires_at
+
+    def refresh(self, force=False):
+        """Fetches a new token unless another caller just did. Raises a LyftAPIError carrying the error response if
+        the token could not be retrieved, TypeError if fetch_token is a coroutine function: use refresh_async.
+
+        :param force: Set to True to fetch a new token even if the current one is fresh
+        :return: token dictionary
+        """
+        self._check_sync()
+        with self.__lock:
+            if force or not self._is_fresh():
+                self._store(self.__fetch_token())
+            return self.__token
+
+    async def refresh_async(self, force=False):
+        """asyncio version of refresh: a coroutine fetch_token is awaited, the concurrent callers of an event loop
+        sharing a single call, a function is called in the default executor
+
+        :param force: Set to True to fetch a new token even if the current one is fresh
+        :return: token dictionary
+        """
+        if not self.is_async:
+            return await asyncio.get_running_loop().run_in_executor(None, self.refresh, force)
+
+        async with self._async_lock():
+            if force or not self._is_fresh():
+                self._store(await self.__fetch_token())
+            return self.__token
+
+    def _check_sync(self):
+        if self.is_async:
+            raise TypeError("the fetch_token of this TokenProvider is a coroutine function, use get_token_async, "
+                            "authorization_async or refresh_async")
+
+    def _async_lock(self):
+        loop  = asyncio.get_running_loop()
+        entry = self.__async_lock
+        if entry is None or entry[0] is not loop:
+            entry = self.__async_lock = (loop, asyncio.Lock())
+        return entry[1]
+
+    def _store(self, token):
+        if not token.get("access_token"):
+            raise LyftAPIError(token, token.get("status_code"))
+
+        self.__token      = token
+        self.__expires_at = self.__clock() + float(token.get("expires_in") or 0)
+        self.refresh_count += 1
+        self._schedule(max(float(token.get("expires_in") or 0) - self.refresh_margin, 1))
+
+    def _schedule(self, delay):
+        if not self.background or self.__closed:
+            return
+        if self.__timer is not None:
+            self.__timer.cancel()
+        self.__timer = threading.Timer(delay, self._background_refresh)
+        self.__timer.daemon = True
+        self.__timer.start()
+
+    def _background_refresh(self):
+        try:
+            self.refresh(force=True)
+        except Exception:
+            with self.__lock:
+                self._schedule(self.retry_delay)
+
+    def get_token(self):
+        """Returns the current token dictionary, fetching it first if there is none or if it is about to expire.
+        Raises TypeError if fetch_token is a coroutine function, see get_token_async
+
+        :return: token dictionary
+        """
+        self._check_sync()
+        token = self.__token
+        if self._is_fresh() or (self.__timer is not None and self._is_valid()):
+            return token
+        return self.refresh()
+
+    async def get_token_async(self):
+        """asyncio version of get_token, the event loop is never blocked while a token is fetched
+
+        :return: token dictionary
+        """
+        token = self.__token
+        if self._is_fresh() or (self.__timer is not None and self._is_valid()):
+            return token
+        return await self.refresh_async()
+
+    def authorization(self):
+        """Returns the value of the Authorization header, eg: "Bearer <access_token>"
+
+        :return: string
+        """
+        token = self.get_token()
+        return "{} {}".format(token.get("token_type"), token.get("access_token"))
+
+    async def authorization_async(self):
+        token = await self.get_token_async()
+        return "{} {}".format(token.get("token_type"), token.get("access_token"))
+
+    def close(self):
+        """Stops the background refresh"""
+        self.__closed = True
+        if self.__timer is not None:
+            self.__timer.cancel()
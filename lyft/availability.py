@@ -1,19 +1,159 @@
-import requests
-
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from lyft.cache.disk_cache import _store_response
+from lyft.models import AVAILABILITY_MODELS
+from lyft.util.endpoints import Endpoint, HeaderCache
+from lyft.util.errors import FilteredPairError, LyftAPIError
+from lyft.util.fast_json import loads
+from lyft.util.lazy import lazy_function
 from lyft.util.url_util import AVAILABILITY
 
+DEFAULT_BATCH_CONCURRENCY = 8
+
+# requests is only imported by the first object created without a transport
+get_default_transport = lazy_function("lyft.transport.transport", "get_default_transport")
+
+BatchEstimate = namedtuple("BatchEstimate", ["index", "pair", "eta", "cost", "error"])
+BatchEstimate.__doc__ = """Result of one origin/destination pair of Availability.batch_estimates
+
+:param index: Position of the pair in the input
+:param pair: (start_lat, start_lng, end_lat, end_lng) tuple, end coordinates may be None
+:param eta: Response of get_driver_eta, None if it failed
+:param cost: Response of get_ride_estimates, None if it failed
+:param error: First exception raised while querying the pair, None on success
+"""
+
+
+# query parameters of each endpoint, in the order of the arguments of the Availability methods
+AVAILABILITY_ENDPOINTS = {
+    "ridetypes"                  : Endpoint("ridetypes", "GET", AVAILABILITY + "ridetypes",
+                                            (("lat", float), ("lng", float), ("ride_type", str)),
+                                            required=("lat", "lng")),
+    "eta"                        : Endpoint("eta", "GET", AVAILABILITY + "eta",
+                                            (("lat", float), ("lng", float), ("destination_lat", float),
+                                             ("destination_lng", float), ("ride_type", str)),
+                                            required=("lat", "lng")),
+    "cost"                       : Endpoint("cost", "GET", AVAILABILITY + "cost",
+                                            (("start_lat", float), ("start_lng", float), ("end_lat", float),
+                                             ("end_lng", float), ("ride_type", str)),
+                                            required=("start_lat", "start_lng")),
+    "drivers"                    : Endpoint("drivers", "GET", AVAILABILITY + "drivers",
+                                            (("lat", float), ("lng", float)),
+                                            required=("lat", "lng")),
+    "nearby-drivers-pickup-etas" : Endpoint("nearby-drivers-pickup-etas", "GET",
+                                            AVAILABILITY + "nearby-drivers-pickup-etas",
+                                            (("lat", float), ("lng", float), ("destination_lat", float),
+                                             ("destination_lng", float), ("ride_type", str)),
+                                            required=("lat", "lng"))}
+
+_ride_types_url             = AVAILABILITY_ENDPOINTS["ridetypes"].url
+_driver_eta_url             = AVAILABILITY_ENDPOINTS["eta"].url
+_ride_estimates_url         = AVAILABILITY_ENDPOINTS["cost"].url
+_nearby_drivers_url         = AVAILABILITY_ENDPOINTS["drivers"].url
+_eta_and_nearby_drivers_url = AVAILABILITY_ENDPOINTS["nearby-drivers-pickup-etas"].url
+
+
+def _normalize_pair(pair):
+    """Accepts (start_lat, start_lng, end_lat, end_lng), ((start_lat, start_lng), (end_lat, end_lng)) or
+    (start_lat, start_lng) and returns a hashable tuple of four coordinates"""
+    if len(pair) == 2 and isinstance(pair[0], (tuple, list)):
+        origin, destination = pair
+        pair = tuple(origin) + (tuple(destination) if destination is not None else (None, None))
+    elif len(pair) == 2:
+        pair = tuple(pair) + (None, None)
+
+    start_lat, start_lng, end_lat, end_lng = pair
+    return (float(start_lat), float(start_lng),
+            float(end_lat) if end_lat is not None else None,
+            float(end_lng) if end_lng is not None else None)
+
+
+def _group_pairs(pairs):
+    """Returns an ordered dictionary of normalized pair -> list of input indexes, so identical pairs are queried once"""
+    groups = {}
+    for index, pair in enumerate(pairs):
+        groups.setdefault(_normalize_pair(pair), []).append(index)
+    return groups
+
+
+def _plan_pairs(pairs, prefilter=None):
+    """Returns the ordered dictionary of pair to query -> list of input indexes, and the BatchEstimate of the pairs
+    rejected by the prefilter, a lyft.util.geo.PairFilter"""
+    if prefilter is None:
+        return _group_pairs(pairs), []
+    groups, rejected = prefilter.plan([_normalize_pair(pair) for pair in pairs])
+    return groups, [BatchEstimate(index, pair, None, None, FilteredPairError(pair, distance))
+                    for index, pair, distance in rejected]
+
+
+def _cache_event(transport, endpoint, ride_type, hit):
+    """Notifies the hooks of the transport of a GeoCache hit or miss"""
+    for hook in getattr(transport, "hooks", ()):
+        if hit:
+            hook.on_cache_hit(endpoint, ride_type)
+        else:
+            hook.on_cache_miss(endpoint, ride_type)
+
+
+def _json_or_raise(response, model=None):
+    if response.status_code == 200:
+        return model(response.content) if model is not None else loads(response.content)
+
+    else:
+        raise LyftAPIError.from_response(response)
+
 
 class Availability(object):
-    def __init__(self, token_type, access_token):
+    def __init__(self, token_type=None, access_token=None, transport=None, cache=None, token_provider=None,
+                 models=False, disk_cache=None):
         """
         Constructor fot the class Availability.
         Use for storing various related operations
 
         :param token_type: Token type. eg: "Bearer"
         :param access_token: access token
+        :param transport: Transport used to send the requests, defaults to the shared pooled transport
+        :param cache: Optional lyft.cache.geo_cache.GeoCache answering requests made from nearby locations
+        :param token_provider: Optional lyft.authentication.token_provider.TokenProvider used instead of access_token
+        :param models: Set to True to return lyft.models objects instead of dictionaries
+        :param disk_cache: Optional lyft.cache.disk_cache.DiskCache persisting the ride types across restarts
         """
         self.token_type = token_type
         self.__access_token = access_token
+        self.__transport = transport if transport is not None else get_default_transport()
+        self.__cache = cache
+        self.__token_provider = token_provider
+        self.__models = models
+        self.__disk_cache = disk_cache
+        self.__headers = HeaderCache()
+
+    def _headers(self):
+        if self.__token_provider is not None:
+            return self.__headers.get(self.__token_provider.authorization())
+
+        return self.__headers.for_token(self.token_type, self.__access_token)
+
+    def _get(self, endpoint, url, lat, lng, ride_type=None, end_lat=None, end_lng=None):
+        key = self.__cache.key(endpoint, lat, lng, ride_type, end_lat, end_lng) if self.__cache is not None else None
+        if key is not None:
+            response = self.__cache.get(key)
+            _cache_event(self.__transport, endpoint, ride_type, response is not None)
+            if response is not None:
+                return response
+
+        model = AVAILABILITY_MODELS[endpoint] if self.__models else None
+        disk_key = (self.__disk_cache.location_key(endpoint, lat, lng, ride_type, end_lat, end_lng)
+                    if self.__disk_cache is not None else None)
+        response = self.__disk_cache.get(disk_key) if disk_key is not None else None
+        if response is None:
+            response = _store_response(self.__disk_cache, disk_key,
+                                       self.__transport.get(url, headers=self._headers()))
+        response = _json_or_raise(response, model)
+
+        if key is not None:
+            self.__cache.set(key, response)
+        return response
 
     def get_ride_types(self, lat, lng, ride_type=None):
         """
@@ -26,24 +166,9 @@ class Availability(object):
         :param ride_type: string, ID of a ride type. Returned by this endpoint
         :return: ride types available in JSON format
         """
-        lat = float(lat)
-        lng = float(lng)
+        ride_types_url = _ride_types_url(lat, lng, ride_type)
 
-        if ride_type is None:
-            ride_types_url = "{}ridetypes?lat={}&lng={}".format(AVAILABILITY, lat, lng)
-        else:
-            ride_types_url = "{}ridetypes?lat={}&lng={}&ride_type={}".format(AVAILABILITY, lat, lng, ride_type)
-
-        headers = {"Authorization": "{} {}".format(self.token_type,
-                                                   self.__access_token)}
-
-        ride_types_available_response = requests.get(ride_types_url, headers=headers)
-
-        if ride_types_available_response.status_code == 200:
-            return ride_types_available_response.json()
-
-        else:
-            raise Exception(ride_types_available_response.json())
+        return self._get("ridetypes", ride_types_url, lat, lng, ride_type)
 
     def get_driver_eta(self, lat, lng, end_lat=None, end_lng=None, ride_type=None):
         """
@@ -62,38 +187,9 @@ class Availability(object):
         :param ride_type: string, ID of a ride type. Returned by this endpoint
         :return: driver eta available in JSON format
         """
-        lat = float(lat)
-        lng = float(lng)
-        # check if destination is given
-        if all([end_lat, end_lng]) is True:
-            end_lat = float(end_lat)
-            end_lng = float(end_lng)
-
-        # construct the request URL
-        if ride_type is None and (end_lat is None or end_lng is None):
-            driver_eta_url = "{}eta?lat={}&lng={}".format(AVAILABILITY, lat, lng)
-
-        elif ride_type is not None and (end_lat is None or end_lng is None):
-            driver_eta_url = "{}eta?lat={}&lng={}&ride_type={}".format(AVAILABILITY, lat, lng, ride_type)
-
-        elif ride_type is not None and (end_lat is not None or end_lng is not None):
-            driver_eta_url = "{}eta?lat={}&lng={}&end_lat={}&destination_lng={}&ride_type={}".format(
-                AVAILABILITY, lat, lng, end_lat, end_lng, ride_type)
-
-        elif ride_type is None and (end_lat is not None or end_lng is not None):
-            driver_eta_url = "{}eta?lat={}&lng={}&end_lat={}&destination_lng={}".format(
-                AVAILABILITY, lat, lng, end_lat, end_lng)
+        driver_eta_url = _driver_eta_url(lat, lng, end_lat, end_lng, ride_type)
 
-        headers = {"Authorization": "{} {}".format(self.token_type,
-                                                   self.__access_token)}
-
-        driver_eta_response = requests.get(driver_eta_url, headers=headers)
-
-        if driver_eta_response.status_code == 200:
-            return driver_eta_response.json()
-
-        else:
-            raise Exception(driver_eta_response.json())
+        return self._get("eta", driver_eta_url, lat, lng, ride_type, end_lat, end_lng)
 
     def get_ride_estimates(self, start_lat, start_lng, end_lat=None, end_lng=None, ride_type=None):
         """
@@ -113,38 +209,9 @@ class Availability(object):
         :param ride_type: string, ID of a ride type. Returned by this endpoint
         :return: ride estimates in JSON format
         """
-        start_lat = float(start_lat)
-        start_lng = float(start_lng)
-        # check if destination is given
-        if all([end_lat, end_lng]) is True:
-            end_lat = float(end_lat)
-            end_lng = float(end_lng)
-
-        # construct the request URL
-        if ride_type is None and (end_lat is None or end_lng is None):
-            ride_estimates_url = "{}cost?start_lat={}&start_lng={}".format(AVAILABILITY,start_lat, start_lng)
+        ride_estimates_url = _ride_estimates_url(start_lat, start_lng, end_lat, end_lng, ride_type)
 
-        elif ride_type is not None and (end_lat is None or end_lng is None):
-            ride_estimates_url = "{}cost?start_lat={}&start_lng={}&ride_type={}".format(AVAILABILITY,start_lat, start_lng, ride_type)
-
-        elif ride_type is not None and (end_lat is not None or end_lng is not None):
-            ride_estimates_url = "{}cost?start_lat={}&start_lng={}&end_lat={}&end_lng={}&ride_type={}".format(
-                AVAILABILITY, start_lat, start_lng, end_lat, end_lng, ride_type)
-
-        elif ride_type is None and (end_lat is not None or end_lng is not None):
-            ride_estimates_url = "{}cost?start_lat={}&start_lng={}&end_lat={}&end_lng={}".format(
-                AVAILABILITY, start_lat, start_lng, end_lat, end_lng)
-
-        headers = {"Authorization": "{} {}".format(self.token_type,
-                                                   self.__access_token)}
-
-        ride_estimates_response = requests.get(ride_estimates_url, headers=headers)
-
-        if ride_estimates_response.status_code == 200:
-            return ride_estimates_response.json()
-
-        else:
-            raise Exception(ride_estimates_response.json())
+        return self._get("cost", ride_estimates_url, start_lat, start_lng, ride_type, end_lat, end_lng)
 
     def get_nearby_drivers(self, lat, lng):
         """
@@ -156,21 +223,9 @@ class Availability(object):
         :param lng: float, REQUIRED, Longitude of a location
         :return: nearby drivers in JSON format
         """
-        lat = float(lat)
-        lng = float(lng)
-
-        nearby_drivers_url = "{}drivers?lat={}&lng={}".format(AVAILABILITY, lat, lng)
-
-        headers = {"Authorization": "{} {}".format(self.token_type,
-                                                   self.__access_token)}
+        nearby_drivers_url = _nearby_drivers_url(lat, lng)
 
-        nearby_drivers_response = requests.get(nearby_drivers_url, headers=headers)
-
-        if nearby_drivers_response.status_code == 200:
-            return nearby_drivers_response.json()
-
-        else:
-            raise Exception(nearby_drivers_response.json())
+        return self._get("drivers", nearby_drivers_url, lat, lng)
 
     def get_eta_and_nearby_drivers(self, lat, lng, end_lat=None, end_lng=None, ride_type=None):
         """
@@ -191,36 +246,76 @@ class Availability(object):
         :param ride_type: string, ID of a ride type. Returned by this endpoint
         :return: nearby drivers and eta in JSON format
         """
-        lat = float(lat)
-        lng = float(lng)
-        # check if destination is given
-        if all([end_lat, end_lng]) is True:
-            end_lat = float(end_lat)
-            end_lng = float(end_lng)
-
-        # construct the request URL
-        if ride_type is None and (end_lat is None or end_lng is None):
-            eta_and_nearby_drivers_url = "{}nearby-drivers-pickup-etas?lat={}&lng={}".format(AVAILABILITY, lat, lng)
-
-        elif ride_type is not None and (end_lat is None or end_lng is None):
-            eta_and_nearby_drivers_url = "{}nearby-drivers-pickup-etas?lat={}&lng={}&ride_type={}".format(
-                AVAILABILITY, lat, lng, ride_type)
+        eta_and_nearby_drivers_url = _eta_and_nearby_drivers_url(lat, lng, end_lat, end_lng, ride_type)
 
-        elif ride_type is not None and (end_lat is not None or end_lng is not None):
-            eta_and_nearby_drivers_url = "{}nearby-drivers-pickup-etas?lat={}&lng={}&destination_lat={}&destination_lng={}&ride_type={}".format(
-                AVAILABILITY, lat, lng, end_lat, end_lng, ride_type)
+        return self._get("nearby-drivers-pickup-etas", eta_and_nearby_drivers_url,
+                         lat, lng, ride_type, end_lat, end_lng)
 
-        elif ride_type is None and (end_lat is not None or end_lng is not None):
-            eta_and_nearby_drivers_url = "{}nearby-drivers-pickup-etas?lat={}&lng={}&destination_lat={}&destination_lng={}".format(
-                AVAILABILITY, lat, lng, end_lat, end_lng)
+    def iter_batch_estimates(self, pairs, ride_type=None, max_concurrency=DEFAULT_BATCH_CONCURRENCY,
+                             prefilter=None):
+        """
+        Queries get_driver_eta and get_ride_estimates for many origin/destination pairs concurrently and yields a
+        BatchEstimate per input pair as soon as both of its requests are done, so one slow pair does not hold back
+        the others. Identical pairs are only queried once. A failing pair yields a BatchEstimate with its error set
+        instead of interrupting the batch.
 
-        headers = {"Authorization": "{} {}".format(self.token_type,
-                                                   self.__access_token)}
+        Give the Availability object a Transport with pool_maxsize >= max_concurrency so every worker gets a
+        pooled connection.
 
-        eta_and_nearby_drivers_response = requests.get(eta_and_nearby_drivers_url, headers=headers)
+        A prefilter (lyft.util.geo.PairFilter) computes the trip distances of the whole batch at once before any
+        request: out of range pairs yield a BatchEstimate whose error is a FilteredPairError, and nearby pairs are
+        merged and queried once at their rounded coordinates, which is then the pair of their BatchEstimate.
 
-        if eta_and_nearby_drivers_response.status_code == 200:
-            return eta_and_nearby_drivers_response.json()
+        :param pairs: iterable of (start_lat, start_lng, end_lat, end_lng), ((start_lat, start_lng), (end_lat, end_lng))
+                      or (start_lat, start_lng) tuples
+        :param ride_type: string, ID of a ride type. Returned by this endpoint
+        :param max_concurrency: int, maximum number of requests in flight
+        :param prefilter: Optional lyft.util.geo.PairFilter rejecting and merging pairs before they are queried
+        :return: generator of BatchEstimate in completion order, the rejected pairs first
+        """
+        groups, rejected = _plan_pairs(list(pairs), prefilter)
+        for estimate in rejected:
+            yield estimate
+
+        executor = ThreadPoolExecutor(max_workers=max_concurrency)
+        try:
+            futures = {}
+            for pair in groups:
+                start_lat, start_lng, end_lat, end_lng = pair
+                futures[executor.submit(self.get_driver_eta, start_lat, start_lng, end_lat, end_lng,
+                                        ride_type)] = (pair, "eta")
+                futures[executor.submit(self.get_ride_estimates, start_lat, start_lng, end_lat, end_lng,
+                                        ride_type)] = (pair, "cost")
+
+            partial = {}
+            for future in as_completed(futures):
+                pair, kind = futures[future]
+                results = partial.setdefault(pair, {"eta": None, "cost": None, "error": None, "pending": 2})
+                try:
+                    results[kind] = future.result()
+                except Exception as error:
+                    results["error"] = results["error"] or error
+
+                results["pending"] -= 1
+                if results["pending"] == 0:
+                    del partial[pair]
+                    for index in groups[pair]:
+                        yield BatchEstimate(index, pair, results["eta"], results["cost"], results["error"])
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def batch_estimates(self, pairs, ride_type=None, max_concurrency=DEFAULT_BATCH_CONCURRENCY, prefilter=None):
+        """
+        Same as iter_batch_estimates but waits for the whole batch and returns the results in input order.
 
-        else:
-            raise Exception(eta_and_nearby_drivers_response.json())
+        :param pairs: iterable of origin/destination pairs, see iter_batch_estimates
+        :param ride_type: string, ID of a ride type. Returned by this endpoint
+        :param max_concurrency: int, maximum number of requests in flight
+        :param prefilter: Optional lyft.util.geo.PairFilter, see iter_batch_estimates
+        :return: list of BatchEstimate, one per input pair
+        """
+        pairs = list(pairs)
+        results = [None] * len(pairs)
+        for estimate in self.iter_batch_estimates(pairs, ride_type, max_concurrency, prefilter):
+            results[estimate.index] = estimate
+        return results
@@ -0,0 +1,204 @@
+import hashlib
+import os
+import threading
+import time
+
+from lyft.util import geohash
+from lyft.util.fast_json import loads
+from lyft.util.fork import register_after_fork
+from lyft.util.lazy import lazy_module
+
+# imported by the first DiskCache, not by the SDK classes importing _store_response
+sqlite3 = lazy_module("sqlite3")
+
+# time to live in seconds of the stored responses, per endpoint, None never expires
+DEFAULT_TTLS = {"ridetypes" : 86400,
+                "receipt"   : None}
+DEFAULT_PRECISION = 5
+DEFAULT_TIMEOUT   = 5.0
+
+_SCHEMA = """CREATE TABLE IF NOT EXISTS responses (
+    key         TEXT PRIMARY KEY,
+    endpoint    TEXT NOT NULL,
+    status_code INTEGER NOT NULL,
+    content     BLOB NOT NULL,
+    expires     REAL
+) WITHOUT ROWID"""
+
+
+class CachedResponse(object):
+    __slots__ = ("status_code", "content")
+
+    def __init__(self, status_code, content):
+        """Response read from a DiskCache, decoded the same way as a transport response
+
+        :param status_code: HTTP status code
+        :param content: Response body in bytes
+        """
+        self.status_code = status_code
+        self.content     = content
+
+    def json(self):
+        return loads(self.content)
+
+
+def _store_response(disk_cache, key, response):
+    """Stores a successful response of the transport when the key is not None, and returns it"""
+    if key is not None and response.status_code == 200:
+        disk_cache.set(key, response.content)
+    return response
+
+
+class DiskCache(object):
+
+    def __init__(self, path, ttls=None, precision=DEFAULT_PRECISION, clock=time.time, timeout=DEFAULT_TIMEOUT):
+        """Persistent response cache in a SQLite database, for the payloads that rarely or never change: ride types
+        (Availability) and receipts (Rides). Responses survive restarts and are shared by every process using the
+        same file.
+
+        The database is in WAL mode, so readers never wait for a writer and processes can read and write it
+        concurrently. Each thread and each forked process opens its own connection. Only the response bodies are
+        stored, a lookup costs a primary key read.
+
+        :param path: Path of the database file, created if missing
+        :param ttls: Dictionary of endpoint -> time to live in seconds (None never expires), endpoints missing from
+                     it are not stored. Defaults to DEFAULT_TTLS
+        :param precision: int, geohash length of the cell sharing ride types, 5 is about 4.9km x 4.9km
+        :param clock: function returning the current wall clock time in seconds, shared between processes
+        :param timeout: Seconds to wait for the write lock held by another process
+        """
+        self.path      = path
+        self.ttls      = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.precision = precision
+        self.hits      = 0
+        self.misses    = 0
+        self.__clock   = clock
+        self.__timeout = timeout
+        self.__local   = threading.local()
+        self.__lock    = threading.Lock()
+
+        connection = self._connection()
+        with connection:
+            connection.execute(_SCHEMA)
+        register_after_fork(self)
+
+    def _after_fork(self):
+        # the connections are reopened by _connection
+        self.__lock = threading.Lock()
+
+    def __reduce__(self):
+        return DiskCache, (self.path, self.ttls, self.precision, self.__clock, self.__timeout)
+
+    def _connection(self):
+        """Connection of the current thread, reopened in a forked child"""
+        connection = getattr(self.__local, "connection", None)
+        if connection is not None and self.__local.pid == os.getpid():
+            return connection
+
+        connection = sqlite3.connect(self.path, timeout=self.__timeout, isolation_level=None,
+                                     check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        self.__local.connection = connection
+        self.__local.pid        = os.getpid()
+        return connection
+
+    def key(self, endpoint, *parts):
+        """Returns the key of a response, eg: key("ridetypes", cell), or None if the endpoint is not stored"""
+        if endpoint not in self.ttls:
+            return None
+        return ":".join([endpoint] + ["" if part is None else str(part) for part in parts])
+
+    def user_key(self, endpoint, user_id, *parts):
+        """Returns the key of a response only readable by one user, eg: user_key("receipt", user_id, ride_id), or None
+        if the endpoint is not stored. user_id is a stable identity of the user, such as the user id of the
+        application, not a token which changes on every refresh. The key holds a digest of it.
+
+        :param endpoint: Endpoint of the response
+        :param user_id: Stable identity of the user
+        :param parts: Parameters of the request, eg: the ride id
+        :return: str
+        """
+        if endpoint not in self.ttls:
+            return None
+        return self.key(endpoint, hashlib.sha256(str(user_id).encode("utf-8")).hexdigest(), *parts)
+
+    def location_key(self, endpoint, lat, lng, ride_type=None, end_lat=None, end_lng=None):
+        """Returns the key of an Availability response, requests from the same geohash cell share it. None if the
+        endpoint is not stored"""
+        if endpoint not in self.ttls:
+            return None
+
+        destination = None
+        if end_lat is not None and end_lng is not None:
+            destination = geohash.encode(float(end_lat), float(end_lng), self.precision)
+        return self.key(endpoint, geohash.encode(float(lat), float(lng), self.precision), ride_type, destination)
+
+    def get(self, key):
+        """Returns the stored CachedResponse for the key, or None if it is missing or expired"""
+        row = self._connection().execute("SELECT status_code, content, expires FROM responses WHERE key = ?",
+                                          (key,)).fetchone()
+        hit = row is not None and (row[2] is None or row[2] > self.__clock())
+        with self.__lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return CachedResponse(row[0], bytes(row[1])) if hit else None
+
+    def set(self, key, content, status_code=200):
+        """Stores a response body under a key returned by key or location_key
+
+        :param key: str
+        :param content: Response body in bytes
+        :param status_code: HTTP status code
+        """
+        endpoint = key.split(":", 1)[0]
+        ttl      = self.ttls[endpoint]
+        self._connection().execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                                   (key, endpoint, status_code, sqlite3.Binary(content),
+                                    self.__clock() + ttl if ttl is not None else None))
+
+    def invalidate(self, key=None, endpoint=None):
+        """Deletes one response, or every response of an endpoint
+
+        :param key: Key of the response to delete
+        :param endpoint: Endpoint whose responses are deleted, eg: "ridetypes"
+        :return: int, number of deleted responses
+        """
+        if key is not None:
+            return self._connection().execute("DELETE FROM responses WHERE key = ?", (key,)).rowcount
+        return self._connection().execute("DELETE FROM responses WHERE endpoint = ?", (endpoint,)).rowcount
+
+    def purge(self):
+        """Deletes the expired responses, expired responses are otherwise only overwritten
+
+        :return: int, number of deleted responses
+        """
+        return self._connection().execute("DELETE FROM responses WHERE expires <= ?", (self.__clock(),)).rowcount
+
+    def clear(self):
+        self._connection().execute("DELETE FROM responses")
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def stats(self):
+        """Returns the hit and miss counters of this object, the number of stored responses and the hit ratio
+
+        :return: dict
+        """
+        size = len(self)
+        with self.__lock:
+            lookups = self.hits + self.misses
+            return {"hits"      : self.hits,
+                    "misses"    : self.misses,
+                    "size"      : size,
+                    "hit_ratio" : float(self.hits) / lookups if lookups else 0.0}
+
+    def close(self):
+        """Closes the connection of the current thread"""
+        connection = getattr(self.__local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self.__local.connection = None
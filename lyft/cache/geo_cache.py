@@ -0,0 +1,100 @@
+import threading
+import time
+from collections import OrderedDict
+
+from lyft.util import geohash
+from lyft.util.fork import register_after_fork
+
+# time to live in seconds of the cached responses, per availability endpoint
+DEFAULT_TTLS = {"ridetypes" : 300,
+                "eta"       : 30,
+                "cost"      : 60}
+DEFAULT_PRECISION = 7
+DEFAULT_MAX_SIZE  = 10000
+
+
+class GeoCache(object):
+
+    def __init__(self, precision=DEFAULT_PRECISION, ttls=None, max_size=DEFAULT_MAX_SIZE, clock=time.monotonic):
+        """Response cache for the Availability endpoints. Requests whose origin (and destination) fall in the same
+        geohash cell, for the same ride type, share the cached response until it expires.
+
+        The cache is thread safe and bounded: once max_size entries are stored the least recently used one is
+        evicted. Cached responses are shared between callers and must not be modified.
+
+        :param precision: int, geohash length of a cell, 7 is about 153m x 153m, see lyft.util.geohash.encode
+        :param ttls: Dictionary of endpoint -> time to live in seconds, endpoints missing from it are not cached.
+                     Defaults to DEFAULT_TTLS, the other endpoints are "drivers" and "nearby-drivers-pickup-etas"
+        :param max_size: int, maximum number of cached responses
+        :param clock: function returning the current time in seconds
+        """
+        self.precision = precision
+        self.ttls      = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.max_size  = max_size
+        self.hits      = 0
+        self.misses    = 0
+        self.evictions = 0
+        self.__clock   = clock
+        self.__entries = OrderedDict()
+        self.__lock    = threading.Lock()
+        register_after_fork(self)
+
+    def _after_fork(self):
+        self.__lock = threading.Lock()
+
+    def __reduce__(self):
+        # the cached responses are not copied
+        return GeoCache, (self.precision, self.ttls, self.max_size, self.__clock)
+
+    def key(self, endpoint, lat, lng, ride_type=None, end_lat=None, end_lng=None):
+        """Returns the cache key of a request, or None if the endpoint is not cached"""
+        if endpoint not in self.ttls:
+            return None
+
+        destination = None
+        if end_lat is not None and end_lng is not None:
+            destination = geohash.encode(float(end_lat), float(end_lng), self.precision)
+
+        return endpoint, geohash.encode(float(lat), float(lng), self.precision), ride_type, destination
+
+    def get(self, key):
+        """Returns the cached response for the key, or None if it is missing or expired"""
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None and entry[0] > self.__clock():
+                self.__entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+            if entry is not None:
+                del self.__entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, response):
+        with self.__lock:
+            self.__entries[key] = (self.__clock() + self.ttls[key[0]], response)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.max_size:
+                self.__entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self.__lock:
+            self.__entries.clear()
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def stats(self):
+        """Returns the hit, miss and eviction counters along with the current size and the hit ratio
+
+        :return: dict
+        """
+        with self.__lock:
+            lookups = self.hits + self.misses
+            return {"hits"      : self.hits,
+                    "misses"    : self.misses,
+                    "evictions" : self.evictions,
+                    "size"      : len(self.__entries),
+                    "hit_ratio" : float(self.hits) / lookups if lookups else 0.0}
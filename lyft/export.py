@@ -0,0 +1,280 @@
+import csv
+import json
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+from lyft.util.errors import LyftAPIError
+
+DEFAULT_EXPORT_CONCURRENCY = 8
+DEFAULT_MAX_ATTEMPTS       = 3
+DEFAULT_BACKOFF            = 1.0
+DEFAULT_CHECKPOINT_EVERY   = 100
+# columns of the CSV and Parquet exports, dotted names are nested fields, lists are written as JSON
+DEFAULT_COLUMNS = ("ride_id", "requested_at", "price.amount", "price.currency", "price.description", "line_items",
+                   "charges")
+
+_END = object()
+
+ExportResult = namedtuple("ExportResult", ["exported", "skipped", "failed"])
+ExportResult.__doc__ = """Outcome of ReceiptExporter.export
+
+:param exported: Number of receipts written
+:param skipped: Number of ride ids already exported according to the checkpoint
+:param failed: list of (ride_id, error) for the receipts still failing after max_attempts, error is the exception or
+               the error body
+"""
+
+
+def _receipt_record(receipt):
+    """Decoded receipt of a get_receipt response, a dictionary or a lyft.models.ReceiptResponse. Raises
+    LyftAPIError for an error response"""
+    if not isinstance(receipt, dict):
+        return receipt.raw
+    if "error" in receipt or receipt.get("status_code", 200) != 200:
+        raise LyftAPIError(receipt, receipt.get("status_code"))
+    record = dict(receipt)
+    record.pop("status_code", None)
+    return record
+
+
+def _flatten(record, columns):
+    row = {}
+    for column in columns:
+        value = record
+        for name in column.split("."):
+            value = value.get(name) if isinstance(value, dict) else None
+        row[column] = json.dumps(value, sort_keys=True) if isinstance(value, (dict, list)) else value
+    return row
+
+
+class NdjsonWriter(object):
+
+    def __init__(self, path):
+        """Writes one receipt per line as JSON, appending to the file so that an export can be resumed
+
+        :param path: Path of the output file
+        """
+        self.path   = path
+        self.__file = open(path, "a", encoding="utf-8")
+
+    def write(self, record):
+        self.__file.write(json.dumps(record, sort_keys=True))
+        self.__file.write("\n")
+
+    def flush(self):
+        """Makes the written records durable, called before a checkpoint"""
+        self.__file.flush()
+        os.fsync(self.__file.fileno())
+
+    def close(self):
+        self.__file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class CsvWriter(object):
+
+    def __init__(self, path, columns=DEFAULT_COLUMNS):
+        """Writes one receipt per row, appending to the file so that an export can be resumed. The header is only
+        written to an empty file.
+
+        :param path: Path of the output file
+        :param columns: Fields written, see DEFAULT_COLUMNS
+        """
+        self.path     = path
+        self.columns  = tuple(columns)
+        self.__file   = open(path, "a", encoding="utf-8", newline="")
+        self.__writer = csv.DictWriter(self.__file, fieldnames=self.columns)
+        if self.__file.tell() == 0:
+            self.__writer.writeheader()
+
+    def write(self, record):
+        self.__writer.writerow(_flatten(record, self.columns))
+
+    def flush(self):
+        self.__file.flush()
+        os.fsync(self.__file.fileno())
+
+    def close(self):
+        self.__file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ParquetWriter(object):
+
+    def __init__(self, directory, columns=DEFAULT_COLUMNS):
+        """Writes the receipts as a Parquet dataset, one row group per checkpoint. Parquet files can not be appended
+        to, so each export writes a new part-<n>.parquet file in the directory. Requires pyarrow.
+
+        :param directory: Directory of the dataset, created if missing
+        :param columns: Fields written, see DEFAULT_COLUMNS
+        """
+        if pyarrow is None:
+            raise ImportError("ParquetWriter requires pyarrow, install it with: pip install pyarrow")
+
+        os.makedirs(directory, exist_ok=True)
+        parts        = [name for name in os.listdir(directory) if name.startswith("part-")]
+        self.path    = os.path.join(directory, "part-{}.parquet".format(len(parts)))
+        self.columns  = tuple(columns)
+        self.__rows   = []
+        self.__schema = None
+        self.__file   = None
+
+    def write(self, record):
+        self.__rows.append(_flatten(record, self.columns))
+
+    def flush(self):
+        if not self.__rows:
+            return
+        # the first row group fixes the schema of the file
+        table = pyarrow.Table.from_pylist(self.__rows, schema=self.__schema)
+        if self.__file is None:
+            self.__schema = table.schema
+            self.__file   = pyarrow.parquet.ParquetWriter(self.path, self.__schema)
+        self.__file.write_table(table)
+        self.__rows = []
+
+    def close(self):
+        self.flush()
+        if self.__file is not None:
+            self.__file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class Checkpoint(object):
+
+    def __init__(self, path):
+        """Append-only file of the exported ride ids, one per line, read back when an export is resumed
+
+        :param path: Path of the checkpoint file
+        """
+        self.path = path
+        self.done = set()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as checkpoint:
+                self.done.update(line.strip() for line in checkpoint if line.strip())
+        self.__file = open(path, "a", encoding="utf-8")
+
+    def __contains__(self, ride_id):
+        return str(ride_id) in self.done
+
+    def add(self, ride_ids):
+        """Records ride ids as exported, durably"""
+        ride_ids = [str(ride_id) for ride_id in ride_ids]
+        self.__file.write("".join(ride_id + "\n" for ride_id in ride_ids))
+        self.__file.flush()
+        os.fsync(self.__file.fileno())
+        self.done.update(ride_ids)
+
+    def close(self):
+        self.__file.close()
+
+
+class ReceiptExporter(object):
+
+    def __init__(self, rides, writer, checkpoint=None, max_concurrency=DEFAULT_EXPORT_CONCURRENCY,
+                 max_attempts=DEFAULT_MAX_ATTEMPTS, backoff=DEFAULT_BACKOFF, checkpoint_every=DEFAULT_CHECKPOINT_EVERY,
+                 sleep=time.sleep):
+        """Fetches the receipts of many rides concurrently and streams them to a writer. At most 2 * max_concurrency
+        ride ids are read ahead from the input, so memory does not grow with the size of the export.
+
+        Every checkpoint_every receipts, the writer is flushed and their ride ids are added to the checkpoint. An
+        export restarted with the same checkpoint skips the ride ids it holds: receipts written after the last
+        checkpoint of a crashed export are written again.
+
+        :param rides: lyft.rides.Rides used to fetch the receipts, give it a Transport with
+                      pool_maxsize >= max_concurrency
+        :param writer: NdjsonWriter, CsvWriter, ParquetWriter or any object with write(record) and flush()
+        :param checkpoint: Optional Checkpoint to resume the export after a crash
+        :param max_concurrency: Maximum number of requests in flight
+        :param max_attempts: Attempts per receipt before it is reported as failed
+        :param backoff: Seconds before the first retry of a receipt, doubled at every attempt
+        :param checkpoint_every: Number of receipts written between two checkpoints
+        :param sleep: function used to wait between attempts
+        """
+        self.max_concurrency  = max_concurrency
+        self.max_attempts     = max_attempts
+        self.backoff          = backoff
+        self.checkpoint_every = checkpoint_every
+        self.__rides          = rides
+        self.__writer         = writer
+        self.__checkpoint     = checkpoint
+        self.__sleep          = sleep
+
+    def _fetch(self, ride_id):
+        """Returns (record, error) for a ride, retrying up to max_attempts"""
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                return _receipt_record(self.__rides.get_receipt(ride_id)), None
+            except Exception as error:
+                if attempt == self.max_attempts:
+                    return None, error.error if isinstance(error, LyftAPIError) else error
+                self.__sleep(self.backoff * 2 ** (attempt - 1))
+
+    def _commit(self, ride_ids):
+        self.__writer.flush()
+        if self.__checkpoint is not None:
+            self.__checkpoint.add(ride_ids)
+        del ride_ids[:]
+
+    def export(self, ride_ids):
+        """Exports the receipts of the rides, in completion order
+
+        :param ride_ids: iterable of ride ids, read lazily
+        :return: ExportResult
+        """
+        exported, skipped, failed = 0, 0, []
+        uncommitted = []
+        ride_ids    = iter(ride_ids)
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            pending   = {}
+            exhausted = False
+            while True:
+                while not exhausted and len(pending) < 2 * self.max_concurrency:
+                    ride_id = next(ride_ids, _END)
+                    if ride_id is _END:
+                        exhausted = True
+                    elif self.__checkpoint is not None and ride_id in self.__checkpoint:
+                        skipped += 1
+                    else:
+                        pending[executor.submit(self._fetch, ride_id)] = ride_id
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    ride_id = pending.pop(future)
+                    record, error = future.result()
+                    if error is not None:
+                        failed.append((ride_id, error))
+                        continue
+                    self.__writer.write(record)
+                    uncommitted.append(ride_id)
+                    exported += 1
+                if len(uncommitted) >= self.checkpoint_every:
+                    self._commit(uncommitted)
+
+        self._commit(uncommitted)
+        return ExportResult(exported, skipped, failed)
@@ -0,0 +1,220 @@
+"""Compact, read-only models of the Lyft API responses.
+
+Models keep the response body as bytes and only decode it the first time one of their attributes is read. The items
+they hold use __slots__, which makes them several times smaller than the equivalent dictionaries. The decoded
+dictionary is not kept around, .raw decodes the body again whenever it is needed.
+
+Pass models=True to Availability or Rides (and their asyncio versions) to get models instead of dictionaries.
+"""
+from lyft.util.fast_json import loads
+
+
+class _Item(object):
+    __slots__ = ()
+    _nested   = {}
+
+    @classmethod
+    def from_dict(cls, data):
+        item = cls.__new__(cls)
+        for field in cls.__slots__:
+            value = data.get(field)
+            if value is not None and field in cls._nested:
+                value = cls._nested[field].from_dict(value)
+            object.__setattr__(item, field, value)
+        return item
+
+    def to_dict(self):
+        return {field: getattr(self, field).to_dict() if isinstance(getattr(self, field), _Item)
+                else getattr(self, field) for field in self.__slots__}
+
+    def __eq__(self, other):
+        return type(self) is type(other) and all(getattr(self, field) == getattr(other, field)
+                                                 for field in self.__slots__)
+
+    def __repr__(self):
+        return "{}({})".format(type(self).__name__,
+                               ", ".join("{}={!r}".format(field, getattr(self, field)) for field in self.__slots__))
+
+
+class PricingDetails(_Item):
+    __slots__ = ("base_charge", "cost_minimum", "cost_per_minute", "cost_per_mile", "currency", "trust_and_service",
+                 "cancel_penalty_amount")
+
+
+class RideType(_Item):
+    __slots__ = ("ride_type", "display_name", "seats", "image_url", "pricing_details")
+    _nested   = {"pricing_details": PricingDetails}
+
+
+class EtaEstimate(_Item):
+    __slots__ = ("ride_type", "display_name", "eta_seconds", "is_valid_estimate")
+
+
+class CostEstimate(_Item):
+    __slots__ = ("ride_type", "display_name", "currency", "estimated_cost_cents_min", "estimated_cost_cents_max",
+                 "estimated_duration_seconds", "estimated_distance_miles", "primetime_percentage",
+                 "is_valid_estimate")
+
+
+class NearbyDriver(_Item):
+    __slots__ = ("ride_type", "lat", "lng", "bearing", "recorded_at_ms", "locations")
+
+    @classmethod
+    def from_locations(cls, ride_type, locations):
+        """Driver at its most recent location, locations is a tuple of (lat, lng) from oldest to newest"""
+        last = locations[-1] if locations else {}
+        item = cls.__new__(cls)
+        item.ride_type      = ride_type
+        item.lat            = last.get("lat")
+        item.lng            = last.get("lng")
+        item.bearing        = last.get("bearing")
+        item.recorded_at_ms = last.get("recorded_at_ms")
+        item.locations      = tuple((location.get("lat"), location.get("lng")) for location in locations)
+        return item
+
+
+class PickupEta(_Item):
+    __slots__ = ("ride_type", "display_name", "pickup_duration_ms", "pickup_range_ms", "drivers")
+
+    @classmethod
+    def from_dict(cls, data):
+        item = cls.__new__(cls)
+        duration_range          = data.get("pickup_duration_range") or {}
+        item.ride_type          = data.get("ride_type")
+        item.display_name       = data.get("display_name")
+        item.pickup_duration_ms = duration_range.get("duration_ms")
+        item.pickup_range_ms    = duration_range.get("range_ms")
+        item.drivers            = tuple(NearbyDriver.from_locations(item.ride_type, driver.get("locations") or [])
+                                        for driver in data.get("nearby_drivers") or [])
+        return item
+
+
+class Location(_Item):
+    __slots__ = ("lat", "lng", "address", "eta_seconds", "time")
+
+
+class Ride(_Item):
+    __slots__ = ("ride_id", "status", "ride_type", "origin", "destination", "pickup", "dropoff", "location",
+                 "passenger", "driver", "vehicle", "price", "primetime_percentage", "requested_at", "generated_at",
+                 "can_cancel", "canceled_by", "cancellation_price", "route_url", "beacon_color")
+    _nested   = {"origin": Location, "destination": Location, "pickup": Location, "dropoff": Location,
+                 "location": Location}
+
+
+class Receipt(_Item):
+    __slots__ = ("ride_id", "price", "line_items", "charges", "requested_at", "ride_profile")
+
+
+class _Response(object):
+    """Base of the models built from a response body, decoded on first attribute access"""
+    __slots__ = ("content", "status_code")
+    _fields   = ()
+
+    def __init__(self, content, status_code=200):
+        self.content     = content
+        self.status_code = status_code
+
+    @property
+    def raw(self):
+        """The decoded JSON body, as returned by the SDK without models"""
+        return loads(self.content)
+
+    def _load(self, data):
+        for field in self._fields:
+            object.__setattr__(self, field, data.get(field))
+
+    def __getattr__(self, name):
+        # only called for slots not set yet, ie: before the body is decoded
+        if name in type(self)._fields:
+            self._load(self.raw)
+            return object.__getattribute__(self, name)
+        raise AttributeError(name)
+
+
+class _Collection(_Response):
+    __slots__ = ("items",)
+    _fields   = ("items",)
+    _key      = None
+    _item     = None
+
+    def _load(self, data):
+        self.items = tuple(self._item.from_dict(item) for item in data.get(self._key) or ())
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, index):
+        return self.items[index]
+
+    def __repr__(self):
+        return "{}({!r})".format(type(self).__name__, list(self.items))
+
+
+class RideTypes(_Collection):
+    __slots__ = ()
+    _key      = "ride_types"
+    _item     = RideType
+
+
+class EtaEstimates(_Collection):
+    __slots__ = ()
+    _key      = "eta_estimates"
+    _item     = EtaEstimate
+
+
+class CostEstimates(_Collection):
+    __slots__ = ()
+    _key      = "cost_estimates"
+    _item     = CostEstimate
+
+
+class NearbyDrivers(_Collection):
+    __slots__ = ()
+
+    def _load(self, data):
+        self.items = tuple(NearbyDriver.from_locations(group.get("ride_type"), driver.get("locations") or [])
+                           for group in data.get("nearby_drivers") or []
+                           for driver in group.get("drivers") or [])
+
+
+class PickupEtas(_Collection):
+    __slots__ = ()
+    _key      = "nearby_drivers_pickup_etas"
+    _item     = PickupEta
+
+
+class RideResponse(_Response):
+    __slots__ = ("ride",)
+    _fields   = ("ride",)
+
+    def _load(self, data):
+        self.ride = Ride.from_dict(data)
+
+    def __getattr__(self, name):
+        if name in Ride.__slots__:
+            return getattr(self.ride, name)
+        return _Response.__getattr__(self, name)
+
+
+class ReceiptResponse(_Response):
+    __slots__ = ("receipt",)
+    _fields   = ("receipt",)
+
+    def _load(self, data):
+        self.receipt = Receipt.from_dict(data)
+
+    def __getattr__(self, name):
+        if name in Receipt.__slots__:
+            return getattr(self.receipt, name)
+        return _Response.__getattr__(self, name)
+
+
+# model of each availability endpoint
+AVAILABILITY_MODELS = {"ridetypes"                  : RideTypes,
+                       "eta"                        : EtaEstimates,
+                       "cost"                       : CostEstimates,
+                       "drivers"                    : NearbyDrivers,
+                       "nearby-drivers-pickup-etas" : PickupEtas}
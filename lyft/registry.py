@@ -0,0 +1,287 @@
+import threading
+import time
+from collections import OrderedDict
+
+from lyft.authentication.auth import LyftPublicAuth
+from lyft.authentication.token_provider import DEFAULT_REFRESH_MARGIN, TokenProvider
+from lyft.availability import Availability
+from lyft.rides import Rides
+from lyft.session.session import Session
+from lyft.transport.rate_limiter import RateLimiter
+from lyft.util.fork import register_after_fork
+from lyft.util.lazy import lazy_function
+
+DEFAULT_MAX_ACTIVE   = 1024
+DEFAULT_IDLE_TIMEOUT = 900
+
+# requests is only imported by the first object created without a transport
+get_default_transport = lazy_function("lyft.transport.transport", "get_default_transport")
+
+
+class TenantTransport(object):
+    __slots__ = ("transport", "rate_limiter", "rate_limit_timeout")
+
+    def __init__(self, transport, rate_limiter, rate_limit_timeout=None):
+        """View of a shared Transport drawing every request of a tenant from the tenant's own RateLimiter. The
+        connections, retry policy and hooks are the ones of the shared transport.
+
+        :param transport: lyft.transport.transport.Transport shared by the tenants
+        :param rate_limiter: lyft.transport.rate_limiter.RateLimiter of the tenant
+        :param rate_limit_timeout: Maximum number of seconds to wait for the rate limiter, None waits as long as needed
+        """
+        self.transport          = transport
+        self.rate_limiter       = rate_limiter
+        self.rate_limit_timeout = rate_limit_timeout
+
+    @property
+    def hooks(self):
+        return self.transport.hooks
+
+    def request(self, method, url, idempotent=None, deadline=None, **kwargs):
+        """Sends a request over the shared transport once the tenant's rate limiter allows it, see
+        Transport.request. Retries made by the shared transport are not charged to the tenant again."""
+        self.rate_limiter.acquire(timeout=self.rate_limit_timeout)
+        response = self.transport.request(method, url, idempotent=idempotent, deadline=deadline, **kwargs)
+        self.rate_limiter.observe(response)
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request("PUT", url, **kwargs)
+
+
+class _Tenant(object):
+    # tens of thousands of these are kept alive, the per tenant state is only built while the tenant is active
+    __slots__ = ("config", "refresh_token", "sandbox_mode", "last_used", "token_provider", "transport",
+                 "availability", "rides")
+
+    def __init__(self, config, refresh_token, sandbox_mode):
+        self.config        = config
+        self.refresh_token = refresh_token
+        self.sandbox_mode  = sandbox_mode
+        self.last_used     = 0
+        self._deactivate()
+
+    def _deactivate(self):
+        self.token_provider = None
+        self.transport      = None
+        self.availability   = None
+        self.rides          = None
+
+
+class ClientRegistry(object):
+
+    def __init__(self, transport=None, max_active=DEFAULT_MAX_ACTIVE, idle_timeout=DEFAULT_IDLE_TIMEOUT, rate=None,
+                 capacity=None, rate_limit_timeout=None, refresh_margin=DEFAULT_REFRESH_MARGIN, models=False,
+                 cache=None, disk_cache=None, clock=time.monotonic):
+        """Serves many client apps and user sessions over one connection pool. Each tenant is registered once with
+        its credentials and gets its own TokenProvider and RateLimiter, shared by every Availability and Rides
+        object returned for it, so concurrent requests of a tenant trigger a single token refresh.
+
+        Registered tenants only keep their credentials. The tokens, rate limiters and SDK objects are built on first
+        use and dropped once the tenant has been idle for idle_timeout seconds or when more than max_active tenants
+        are active, least recently used first. An evicted tenant fetches a new token on its next request.
+
+        Tokens are refreshed by the first request inside the refresh margin, no timer thread is started per tenant.
+
+        :param transport: Transport shared by every tenant, defaults to the shared pooled transport. Give it a
+                          pool_maxsize matching the number of concurrent requests of all the tenants
+        :param max_active: Maximum number of tenants holding a token, a rate limiter and SDK objects
+        :param idle_timeout: Seconds without requests after which the state of a tenant is dropped
+        :param rate: Initial requests per second of each tenant, None for no limit until the rate limit headers of
+                     the tenant's responses are seen. See lyft.transport.rate_limiter.RateLimiter
+        :param capacity: Initial burst size of each tenant, defaults to rate
+        :param rate_limit_timeout: Maximum number of seconds a request waits for its tenant's rate limiter
+        :param refresh_margin: Seconds before the expiry at which the token of a tenant is refreshed
+        :param models: Passed to the Availability and Rides objects
+        :param cache: Optional lyft.cache.geo_cache.GeoCache shared by the Availability objects of every tenant
+        :param disk_cache: Optional lyft.cache.disk_cache.DiskCache shared by every tenant, the receipts are stored
+                           per tenant id
+        :param clock: function returning the current time in seconds
+        """
+        self.max_active         = max_active
+        self.idle_timeout       = idle_timeout
+        self.rate               = rate
+        self.capacity           = capacity
+        self.rate_limit_timeout = rate_limit_timeout
+        self.refresh_margin     = refresh_margin
+        self.evictions          = 0
+        self.__transport        = transport if transport is not None else get_default_transport()
+        self.__models           = models
+        self.__cache            = cache
+        self.__disk_cache       = disk_cache
+        self.__clock            = clock
+        self.__tenants          = {}
+        # active tenants, least recently used first
+        self.__active           = OrderedDict()
+        self.__lock             = threading.Lock()
+        register_after_fork(self)
+
+    def _after_fork(self):
+        self.__lock = threading.Lock()
+
+    def add_app(self, tenant_id, config, sandbox_mode=False):
+        """Registers a client app using 2 legged tokens, see lyft.authentication.auth.LyftPublicAuth. Registering a
+        tenant id again replaces it.
+
+        :param tenant_id: Hashable identifier of the tenant
+        :param config: Dictionary of client_id and client_secret, may be shared by many tenants
+        :param sandbox_mode: Set to True to use the sandbox environment
+        """
+        self._add(tenant_id, _Tenant(config, None, sandbox_mode))
+
+    def add_user(self, tenant_id, config, refresh_token, sandbox_mode=False):
+        """Registers a user session whose tokens are refreshed with its refresh token, see
+        lyft.session.session.Session. Registering a tenant id again replaces it.
+
+        :param tenant_id: Hashable identifier of the tenant
+        :param config: Dictionary of client_id and client_secret of the app the user authorized
+        :param refresh_token: Refresh token of the user
+        :param sandbox_mode: Set to True to use the sandbox environment
+        """
+        self._add(tenant_id, _Tenant(config, refresh_token, sandbox_mode))
+
+    def _add(self, tenant_id, tenant):
+        with self.__lock:
+            self._evict(tenant_id)
+            self.__tenants[tenant_id] = tenant
+
+    def remove(self, tenant_id):
+        """Unregisters a tenant
+
+        :return: True if the tenant was registered
+        """
+        with self.__lock:
+            self._evict(tenant_id)
+            return self.__tenants.pop(tenant_id, None) is not None
+
+    def _evict(self, tenant_id):
+        """Drops the state of an active tenant. Caller holds the lock"""
+        tenant = self.__active.pop(tenant_id, None)
+        if tenant is not None:
+            tenant.token_provider.close()
+            tenant._deactivate()
+            self.evictions += 1
+
+    def _activate(self, tenant):
+        transport = TenantTransport(self.__transport, RateLimiter(self.rate, self.capacity, clock=self.__clock),
+                                    self.rate_limit_timeout)
+        if tenant.refresh_token is None:
+            fetch_token = LyftPublicAuth(tenant.config, tenant.sandbox_mode, transport).get_access_token
+        else:
+            session     = Session(tenant.config, tenant.refresh_token, tenant.sandbox_mode, transport)
+            fetch_token = session.refresh_access_token
+
+        tenant.transport      = transport
+        tenant.token_provider = TokenProvider(fetch_token, refresh_margin=self.refresh_margin, background=False,
+                                              clock=self.__clock)
+
+    def _tenant(self, tenant_id, name, create=None):
+        """Returns an attribute of the active tenant, activating the tenant first and building the attribute with
+        create(tenant_id, tenant) if it is None, and evicts the idle tenants. Both happen under the lock: another thread evicting
+        the tenant in between would otherwise leave an SDK object without transport nor token provider"""
+        with self.__lock:
+            tenant = self.__tenants.get(tenant_id)
+            if tenant is None:
+                raise KeyError("unknown tenant {!r}".format(tenant_id))
+
+            now = self.__clock()
+            if tenant.token_provider is None:
+                self._activate(tenant)
+            tenant.last_used = now
+            self.__active[tenant_id] = tenant
+            self.__active.move_to_end(tenant_id)
+
+            value = getattr(tenant, name)
+            if value is None:
+                value = create(tenant_id, tenant)
+                setattr(tenant, name, value)
+
+            while len(self.__active) > self.max_active:
+                self._evict(next(iter(self.__active)))
+            self._evict_idle(now)
+            return value
+
+    def _evict_idle(self, now):
+        """Evicts the idle tenants, the least recently used tenant is first. Caller holds the lock"""
+        evicted = 0
+        while self.__active:
+            tenant_id, tenant = next(iter(self.__active.items()))
+            if now - tenant.last_used < self.idle_timeout:
+                break
+            self._evict(tenant_id)
+            evicted += 1
+        return evicted
+
+    def _create_availability(self, tenant_id, tenant):
+        return Availability(transport=tenant.transport, cache=self.__cache, token_provider=tenant.token_provider,
+                            models=self.__models, disk_cache=self.__disk_cache)
+
+    def _create_rides(self, tenant_id, tenant):
+        # the receipts of a tenant are stored under its id, repr keeps the tenants 1 and "1" apart
+        return Rides(transport=tenant.transport, token_provider=tenant.token_provider, models=self.__models,
+                     disk_cache=self.__disk_cache, user_id=repr(tenant_id))
+
+    def token_provider(self, tenant_id):
+        """Returns the TokenProvider of a tenant
+
+        :return: lyft.authentication.token_provider.TokenProvider
+        """
+        return self._tenant(tenant_id, "token_provider")
+
+    def transport(self, tenant_id):
+        """Returns the transport of a tenant, the shared transport drawing from the tenant's rate limiter
+
+        :return: TenantTransport
+        """
+        return self._tenant(tenant_id, "transport")
+
+    def availability(self, tenant_id):
+        """Returns the Availability object of a tenant
+
+        :return: lyft.availability.Availability
+        """
+        return self._tenant(tenant_id, "availability", self._create_availability)
+
+    def rides(self, tenant_id):
+        """Returns the Rides object of a tenant
+
+        :return: lyft.rides.Rides
+        """
+        return self._tenant(tenant_id, "rides", self._create_rides)
+
+    def evict_idle(self):
+        """Drops the state of the tenants idle for idle_timeout seconds. Idle tenants are otherwise evicted when
+        another tenant is used.
+
+        :return: int, number of evicted tenants
+        """
+        with self.__lock:
+            return self._evict_idle(self.__clock())
+
+    def __contains__(self, tenant_id):
+        return tenant_id in self.__tenants
+
+    def __len__(self):
+        return len(self.__tenants)
+
+    def stats(self):
+        """Returns the number of registered and active tenants and the number of evictions
+
+        :return: dict
+        """
+        with self.__lock:
+            return {"tenants"   : len(self.__tenants),
+                    "active"    : len(self.__active),
+                    "evictions" : self.evictions}
+
+    def close(self):
+        """Drops the state of every tenant, the shared transport is left open"""
+        with self.__lock:
+            for tenant_id in list(self.__active):
+                self._evict(tenant_id)
@@ -1,19 +1,309 @@
+import datetime
 import json
-import requests
-
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from lyft.cache.disk_cache import _store_response
+from lyft.models import ReceiptResponse, RideResponse
+from lyft.util.endpoints import Endpoint, HeaderCache
+from lyft.util.errors import LyftAPIError
+from lyft.util.fast_json import loads
+from lyft.util.lazy import lazy_function
 from lyft.util.url_util import RIDE
 
+# requests is only imported by the first object created without a transport
+get_default_transport = lazy_function("lyft.transport.transport", "get_default_transport")
+
+# limit of a GET /v1/rides page: 10 by default, 50 at most
+DEFAULT_HISTORY_PAGE_SIZE = 50
+DEFAULT_HISTORY_WINDOWS   = 1
+DEFAULT_HISTORY_PREFETCH  = 2
+
+_END          = object()
+_SECOND       = datetime.timedelta(seconds=1)
+_TIME_FORMATS = ("%Y-%m-%dT%H:%M:%S%z", "%Y-%m-%dT%H:%M:%S.%f%z")
+
+
+def _ride_request_data(ride_type, src_lat, src_lng, dest_lat, dest_lng, src_address=None, dest_address=None):
+    src_lng     = float(src_lng)
+    src_lat     = float(src_lat)
+    dest_lng    = float(dest_lng)
+    dest_lat    = float(dest_lat)
+
+    if src_address is not None:
+        data = {"ride_type"  : ride_type,
+                "origin"     : {
+                    "lat"    : src_lat,
+                    "lng"    : src_lng,
+                    "address": src_address
+                },
+                "destination": {
+                    "lat"    : dest_lat,
+                    "lng"    : dest_lng
+                }}
+
+    elif dest_address is not None:
+        data = {"ride_type"  : ride_type,
+                "origin"     : {
+                    "lat"    : src_lat,
+                    "lng"    : src_lng
+                },
+                "destination": {
+                    "lat"    : dest_lat,
+                    "lng"    : dest_lng,
+                    "address": dest_address
+                }}
+
+    else:
+        data = {"ride_type" : ride_type,
+                "origin"    : {
+                    "lat"   : src_lat,
+                    "lng"   : src_lng
+                },
+                "destination": {
+                    "lat"   : dest_lat,
+                    "lng"   : dest_lng
+                }}
+
+    return data
+
+
+def _json_body(response):
+    """Decoded JSON body of the response, or {"error": <body text>} if the body is not JSON, eg: a proxy error page"""
+    error = LyftAPIError.from_response(response).error
+    return error if isinstance(error, dict) else {"error": error}
+
+
+def _json_with_status_code(response, model=None):
+    if model is not None and response.status_code < 300:
+        return model(response.content, response.status_code)
+
+    response_json = _json_body(response)
+    response_json["status_code"] = response.status_code
+    return response_json
+
+
+def _update_destination_data(lat, lng, address=None):
+    lat = float(lat)
+    lng = float(lng)
+
+    if address is None:
+        return {"lat" : lat,
+                "lng" : lng}
+    else:
+        return {"lat"    : lat,
+                "lng"    : lng,
+                "address": address}
+
+
+def _update_destination_result(response):
+    if response.status_code == 200:
+        return {"status_code": response.status_code, "message": "Success"}
+
+    else:
+        return _json_body(response)
+
+
+def _rating_and_tip_data(rating, tip_amount=None, currency="USD"):
+    if tip_amount is None:
+        return {"rating": rating}
+
+    else:
+        return {"rating": rating,
+                "tip"   : {
+                    "amount": tip_amount,
+                    "currency": currency
+                }}
+
+
+def _rating_and_tip_result(response):
+    if response.status_code == 204:
+        result = {}
+        result["status_code"] = response.status_code
+        result["message"] = "Success"
+        return result
+
+    else:
+        return _json_body(response)
+
+
+def _receipt_result(response, model=None):
+    if response.status_code == 200:
+        return _json_with_status_code(response, model)
+    else:
+        return _json_body(response)
+
+
+def _cancel_ride_result(response):
+    if response.status_code == 204:
+        return json.dumps({"message": "Success"})
+
+    else:
+        raise LyftAPIError.from_response(response)
+
+
+def _parse_time(value):
+    """Aware datetime of a datetime, naive ones being UTC, or of an ISO 8601 string such as 2015-12-01T21:04:22Z or
+    the requested_at of a ride"""
+    if isinstance(value, datetime.datetime):
+        return value if value.tzinfo is not None else value.replace(tzinfo=datetime.timezone.utc)
+
+    for time_format in _TIME_FORMATS:
+        try:
+            return datetime.datetime.strptime(value, time_format)
+        except ValueError:
+            pass
+    raise ValueError("invalid time {!r}, expected ISO 8601 such as 2015-12-01T21:04:22Z".format(value))
+
+
+def _format_time(value):
+    return value.astimezone(datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _history_windows(start_time, end_time, windows):
+    """Splits [start_time, end_time) in at most `windows` consecutive ranges of whole seconds, end_time defaults to
+    now. Returns a list of (start, end) datetimes, empty if the range is empty, ie: end_time is not after start_time"""
+    start = _parse_time(start_time)
+    end   = _parse_time(end_time) if end_time is not None else datetime.datetime.now(datetime.timezone.utc)
+    if end <= start:
+        return []
+
+    seconds = max(1, int((end - start).total_seconds()))
+    count   = max(1, min(int(windows), seconds))
+    bounds  = [start + datetime.timedelta(seconds=seconds * index // count) for index in range(count)] + [end]
+    return list(zip(bounds, bounds[1:]))
+
+
+def _ride_history_result(response):
+    if response.status_code == 200:
+        return loads(response.content).get("ride_history") or []
+    raise LyftAPIError.from_response(response)
+
+
+class _HistoryCursor(object):
+    __slots__ = ("start", "end", "page_size", "done", "__seen")
+
+    def __init__(self, start, end, page_size):
+        """Pagination state of one window of the ride history. GET /v1/rides returns the rides requested from
+        start_time on, oldest first, and has no page token: the next page starts at the requested_at of the last ride
+        and the rides of that second already returned are skipped.
+
+        :param start: datetime, first second of the window
+        :param end: datetime, end of the window, excluded
+        :param page_size: int, limit of every page
+        """
+        self.start     = start
+        self.end       = end
+        self.page_size = page_size
+        self.done      = False
+        # ride ids of the rides requested at self.start which were already returned
+        self.__seen    = set()
+
+    def query(self):
+        """Returns the start_time, end_time and limit of the next page"""
+        return _format_time(self.start), _format_time(self.end), str(self.page_size)
+
+    def advance(self, rides):
+        """Moves past a page and returns its rides which were not returned yet, in the window
+
+        :param rides: list of ride dictionaries of the page
+        :return: list of ride dictionaries
+        """
+        fresh, last = [], None
+        for ride in rides:
+            requested_at = _parse_time(ride["requested_at"])
+            if requested_at >= self.end:
+                self.done = True
+                break
+            last = requested_at
+            if requested_at == self.start and ride["ride_id"] in self.__seen:
+                continue
+            fresh.append(ride)
+
+        if self.done or len(rides) < self.page_size or last is None:
+            self.done = True
+        elif last > self.start:
+            self.start  = last
+            self.__seen = {ride["ride_id"] for ride in fresh if _parse_time(ride["requested_at"]) == last}
+        elif fresh:
+            self.__seen.update(ride["ride_id"] for ride in fresh)
+        else:
+            # a full page of rides of the same second, all returned already: the rest of that second is skipped
+            self.start += _SECOND
+            self.__seen = set()
+        return fresh
+
+
+def _put(pages, item, stop):
+    """Queues a page for the consumer, returns False once the consumer is gone"""
+    pages.put(item)
+    return not stop.is_set()
+
+
+def _drain(queues):
+    """Empties the page queues, so the producers blocked on a full queue can notice the consumer is gone"""
+    for pages in queues:
+        try:
+            while True:
+                pages.get_nowait()
+        except queue.Empty:
+            pass
+
+
+# the requests booking a ride or charging a tip are never retried: a second attempt could book or charge twice
+RIDE_ENDPOINTS = {"create"      : Endpoint("create", "POST", RIDE, body=_ride_request_data, idempotent=False),
+                  "details"     : Endpoint("details", "GET", RIDE + "/{ride_id}"),
+                  "destination" : Endpoint("destination", "PUT", RIDE + "/{ride_id}/destination",
+                                           body=_update_destination_data),
+                  "rating"      : Endpoint("rating", "PUT", RIDE + "/{ride_id}/rating", body=_rating_and_tip_data,
+                                           idempotent=False),
+                  "receipt"     : Endpoint("receipt", "GET", RIDE + "/{ride_id}/receipt"),
+                  "cancel"      : Endpoint("cancel", "GET", RIDE + "/{ride_id}/cancel", idempotent=False),
+                  "history"     : Endpoint("history", "GET", RIDE,
+                                           (("start_time", str), ("end_time", str), ("limit", str)),
+                                           required=("start_time",))}
+
 
 class Rides:
 
-    def __init__(self, token_type, access_token):
+    def __init__(self, token_type=None, access_token=None, transport=None, token_provider=None, models=False,
+                 disk_cache=None, user_id=None):
         """Class for various related operations
 
         :param token_type: Token type
         :param access_token:
+        :param transport: Transport used to send the requests, defaults to the shared pooled transport
+        :param token_provider: Optional lyft.authentication.token_provider.TokenProvider used instead of access_token
+        :param models: Set to True to return lyft.models objects instead of dictionaries for rides and receipts
+        :param disk_cache: Optional lyft.cache.disk_cache.DiskCache persisting the receipts, which never change once
+                           issued. Only used with a user_id
+        :param user_id: Stable identity of the user the token belongs to, eg: the user id of your application, under
+                        which the receipts are stored in disk_cache. Tokens change on every refresh and cannot be used
         """
-        self.token_type     = token_type
-        self.__access_token = access_token
+        self.token_type       = token_type
+        self.__access_token   = access_token
+        self.__transport      = transport if transport is not None else get_default_transport()
+        self.__token_provider = token_provider
+        self.__ride_model     = RideResponse if models else None
+        self.__receipt_model  = ReceiptResponse if models else None
+        self.__disk_cache     = disk_cache
+        self.__user_id        = user_id
+        self.__headers        = HeaderCache({"content-type": "application/json"})
+
+    def _headers(self):
+        if self.__token_provider is not None:
+            return self.__headers.get(self.__token_provider.authorization())
+
+        return self.__headers.for_token(self.token_type, self.__access_token)
+
+    def _request(self, endpoint, *args, query=(), **path_params):
+        """Sends a request to one of RIDE_ENDPOINTS, args are given to its body function and query to its url"""
+        endpoint = RIDE_ENDPOINTS[endpoint]
+        return self.__transport.request(endpoint.method, endpoint.url(*query, **path_params),
+                                        headers=self._headers(),
+                                        data=endpoint.data(*args) if endpoint.body is not None else None,
+                                        idempotent=endpoint.idempotent)
 
     def create_ride_request(self, ride_type, src_lat, src_lng, dest_lat, dest_lng, src_address=None, dest_address=None):
         """Creates a ride and returns a ride_response object.
@@ -29,57 +319,10 @@ class Rides:
 
         :return: Ride response JSON object
         """
-        src_lng     = float(src_lng),
-        src_lat     = float(src_lat)
-        dest_lng    = float(dest_lng)
-        dest_lat    = float(dest_lat)
-
-        headers = {"Authorization": "{} {}".format(self.token_type,
-                                                   self.__access_token),
-                   "content-type": "application/json"}
-
-        if src_address is not None:
-            data = {"ride_type"  : ride_type,
-                    "origin"     : {
-                        "lat"    : src_lat,
-                        "lng"    : src_lng,
-                        "address": src_address
-                    },
-                    "destination": {
-                        "lat"    : dest_lat,
-                        "lng"    : dest_lng
-                    }}
-
-        elif dest_address is not None:
-            data = {"ride_type"  : ride_type,
-                    "origin"     : {
-                        "lat"    : src_lat,
-                        "lng"    : src_lng
-                    },
-                    "destination": {
-                        "lat"    : dest_lat,
-                        "lng"    : dest_lng,
-                        "address": dest_address
-                    }}
+        ride_request_response = self._request("create", ride_type, src_lat, src_lng, dest_lat, dest_lng,
+                                              src_address, dest_address)
 
-        else:
-            data = {"ride_type" : ride_type,
-                    "origin"    : {
-                        "lat"   : src_lat,
-                        "lng"   : src_lng
-                    },
-                    "destination": {
-                        "lat"   : dest_lat,
-                        "lng"   : dest_lng
-                    }}
-
-        ride_request_response = requests.post(RIDE,
-                                              headers=headers,
-                                              data=json.dumps(data))
-
-        ride_request_response_json = ride_request_response.json()
-        ride_request_response_json["status_code"] = ride_request_response.status_code
-        return ride_request_response_json
+        return _json_with_status_code(ride_request_response, self.__ride_model)
 
     def get_ride_details(self, ride_id):
         """Get details of the ride given the ride_id such as pending, picked-up, dropped, cancelled, etc
@@ -88,16 +331,9 @@ class Rides:
         :param ride_id: Ride ID retrieved from ride creation
         :return: Ride details JSON object
         """
-        headers = {"Authorization": "{} {}".format(self.token_type,
-                                                   self.__access_token),
-                   "content-type" : "application/json"}
-
-        ride_details_response = requests.post("{}/{}".format(RIDE, ride_id),
-                                              headers=headers)
+        ride_details_response = self._request("details", ride_id=ride_id)
 
-        ride_details_response_json = ride_details_response.json()
-        ride_details_response_json["status_code"] = ride_details_response.status_code
-        return ride_details_response_json
+        return _json_with_status_code(ride_details_response, self.__ride_model)
 
     def update_destination(self, ride_id, lat, lng, address=None):
         """Update the destination of the specified ride. Note that the ride state must still be active (not droppedOff
@@ -110,32 +346,9 @@ class Rides:
         :param lng: Longitude of the destination
         :return: Message object
         """
-        lat = float(lat)
-        lng = float(lng)
-
-        headers = {"Authorization": "{} {}".format(self.token_type,
-                                                   self.__access_token),
-                   "content-type" : "application/json"}
-
-        if address is None:
-            data = {"lat" : lat,
-                    "lng" : lng}
-        else:
-            data = {"lat"    : lat,
-                    "lng"    : lng,
-                    "address": address}
+        update_destination_response = self._request("destination", lat, lng, address, ride_id=ride_id)
 
-        update_destination_response = requests.put("{}/{}/destination".format(RIDE,
-                                                                              ride_id),
-                                                   headers=headers,
-                                                   data=json.dumps(data))
-
-        if update_destination_response.status_code == 200:
-            response = {"status_code": update_destination_response.status_code, "message": "Success"}
-            return response
-
-        else:
-            return update_destination_response.json()
+        return _update_destination_result(update_destination_response)
 
     def set_rating_and_tip(self, ride_id, rating, tip_amount=None, currency="USD"):
         """Allows to tip the user and set rating for him, Rating is mandatory and accepts values from 1 to 5, while
@@ -148,35 +361,12 @@ class Rides:
         :param currency: Currency format, by default currency is USD
         :return: Message object
         """
-        headers = {"Authorization": "{} {}".format(self.token_type,
-                                                   self.__access_token),
-                   "content-type" : "application/json"}
-
         if int(rating) > 5:
             return {"error": "Please enter rating less than 5"}
 
-        if tip_amount is None:
-            data = {"rating": rating}
+        rating_tip_response = self._request("rating", rating, tip_amount, currency, ride_id=ride_id)
 
-        else:
-            data = {"rating": rating,
-                    "tip"   : {
-                        "amount": tip_amount,
-                        "currency": currency
-                    }}
-
-        rating_tip_response = requests.put("{}/{}/rating".format(RIDE, ride_id),
-                                           headers=headers,
-                                           data=json.dumps(data))
-
-        if rating_tip_response.status_code == 204:
-            response = {}
-            response["status_code"] = rating_tip_response.status_code
-            response["message"] = "Success"
-            return response
-
-        else:
-            return rating_tip_response.json()
+        return _rating_and_tip_result(rating_tip_response)
 
     def get_receipt(self, ride_id):
         """Get a receipt for the ride. Receipts are only available after the passenger has rated the ride and the
@@ -185,19 +375,15 @@ class Rides:
         :param ride_id: Id of ride you want to retrieve the receipt
         :return: Receipt JSON object
         """
-        headers = {"Authorization": "{} {}".format(self.token_type,
-                                                   self.__access_token),
-                   "content-type": "application/json"}
+        disk_key = None
+        if self.__disk_cache is not None and self.__user_id is not None:
+            # stored per user, the receipts of a user are never read by another one
+            disk_key = self.__disk_cache.user_key("receipt", self.__user_id, ride_id)
+        receipt_response = self.__disk_cache.get(disk_key) if disk_key is not None else None
+        if receipt_response is None:
+            receipt_response = _store_response(self.__disk_cache, disk_key, self._request("receipt", ride_id=ride_id))
 
-        receipt_response = requests.get("{}/{}/receipt".format(RIDE, ride_id),
-                                        headers=headers)
-
-        if receipt_response.status_code == 200:
-            receipt_response_json = receipt_response.json()
-            receipt_response_json["status_code"] = receipt_response.status_code
-            return receipt_response_json
-        else:
-            return receipt_response.json()
+        return _receipt_result(receipt_response, self.__receipt_model)
 
     def cancel_ride(self, ride_id):
         """Cancel ride
@@ -205,14 +391,75 @@ class Rides:
         :param ride_id: Id of ride you want to retrieve the receipt
         :return: Message object
         """
-        headers = {"Authorization": "{} {}".format(self.token_type,
-                                                   self.__access_token),
-                   "content-type": "application/json"}
-        receipt_response = requests.get("{}/{}/cancel".format(RIDE, ride_id),
-                                        headers=headers)
+        receipt_response = self._request("cancel", ride_id=ride_id)
 
-        if receipt_response.status_code == 204:
-            return json.dumps({"message": "Success"})
+        return _cancel_ride_result(receipt_response)
 
-        else:
-            raise Exception(receipt_response.json())
+    def get_ride_history(self, start_time, end_time=None, limit=DEFAULT_HISTORY_PAGE_SIZE):
+        """Get one page of the rides of the user, requested from start_time on, oldest first. Requires the rides.read
+        scope. Raises LyftAPIError on an error response
+        https://developer.lyft.com/reference#ride-history
+
+        :param start_time: datetime, naive ones being UTC, or ISO 8601 string such as 2015-12-01T21:04:22Z
+        :param end_time: datetime or ISO 8601 string, defaults to now
+        :param limit: int, number of rides of the page, from 1 to 50
+        :return: list of ride dictionaries
+        """
+        start_time = _format_time(_parse_time(start_time))
+        end_time   = _format_time(_parse_time(end_time)) if end_time is not None else None
+        return _ride_history_result(self._request("history", query=(start_time, end_time, str(limit))))
+
+    def _fetch_window(self, cursor, pages, stop):
+        """Fetches the pages of a window into the pages queue, ended by _END or the exception raised"""
+        try:
+            while not cursor.done and not stop.is_set():
+                if not _put(pages, cursor.advance(self.get_ride_history(*cursor.query())), stop):
+                    return
+            pages.put(_END)
+        except Exception as error:
+            pages.put(error)
+
+    def iter_ride_history(self, start_time, end_time=None, page_size=DEFAULT_HISTORY_PAGE_SIZE,
+                          windows=DEFAULT_HISTORY_WINDOWS, prefetch=DEFAULT_HISTORY_PREFETCH):
+        """
+        Lazily iterates over the rides of the user requested between start_time and end_time, oldest first, fetching
+        the pages of GET /v1/rides in the background while the rides are consumed. Requires the rides.read scope.
+
+        A long range is split into `windows` consecutive time windows paged in parallel, each on its own thread and
+        pooled connection. Every window fetches at most `prefetch` pages ahead of the consumer, so no more than
+        windows * (prefetch + 1) pages plus the one being consumed are held in memory, whatever the length of the
+        history. Closing the generator, or leaving the loop, stops the fetches. An error response raises LyftAPIError
+        when the iteration reaches it.
+
+        :param start_time: datetime, naive ones being UTC, or ISO 8601 string such as 2015-12-01T21:04:22Z
+        :param end_time: datetime or ISO 8601 string, excluded, defaults to now
+        :param page_size: int, rides per request, from 1 to 50
+        :param windows: int, number of time windows fetched in parallel
+        :param prefetch: int, pages fetched ahead of the consumer per window, at least 1
+        :return: generator of ride dictionaries
+        """
+        cursors = [_HistoryCursor(start, end, page_size)
+                   for start, end in _history_windows(start_time, end_time, windows)]
+        if not cursors:
+            return
+
+        queues   = [queue.Queue(maxsize=max(1, prefetch)) for _ in cursors]
+        stop     = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=len(cursors))
+        try:
+            for cursor, pages in zip(cursors, queues):
+                executor.submit(self._fetch_window, cursor, pages, stop)
+
+            # the windows are consumed in order, the later ones fill their queue meanwhile
+            for pages in queues:
+                page = pages.get()
+                while page is not _END:
+                    if isinstance(page, Exception):
+                        raise page
+                    for ride in page:
+                        yield ride
+                    page = pages.get()
+        finally:
+            stop.set()
+            _drain(queues)
+            executor.shutdown(wait=False, cancel_futures=True)
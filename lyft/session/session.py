@@ -1,20 +1,42 @@
 import json
-import requests
-from requests.auth import HTTPBasicAuth
 
+from lyft.authentication.auth import HTTPBasicAuth, _client_credentials, get_default_transport
 from lyft.util.url_util import PUBLIC_AUTH_URL, AUTH_REVOKE_URL
 
 
+def _refresh_token_result(refresh_token_response):
+    if refresh_token_response.status_code == 200:
+        refresh_token_response_json = refresh_token_response.json()
+        return {"access_token"          : refresh_token_response_json.get("access_token"),
+                "token_type"            : refresh_token_response_json.get("token_type"),
+                "expires_in"            : refresh_token_response_json.get("expires_in"),
+                "scope"                 : refresh_token_response_json.get("scope"),
+                "x-ratelimit-remaining" : refresh_token_response.headers.get("x-ratelimit-remaining"),
+                "x-ratelimit-limit"     : refresh_token_response.headers.get("x-ratelimit-limit")
+                }
+    else:
+        return refresh_token_response.json()
+
+
+def _revoke_token_result(revoke_token_response):
+    if revoke_token_response.status_code == 200:
+        return {"status": True}
+    else:
+        return revoke_token_response.json()
+
+
 class Session:
 
-    def __init__(self, config, refresh_token, sandbox_mode=False):
+    def __init__(self, config, refresh_token, sandbox_mode=False, transport=None):
         """This class is used to refresh or revoke the authentication or access token
 
         :param refresh_token: Token we get after the user authorizes the application
+        :param transport: Transport used to send the requests, defaults to the shared pooled transport
         """
         self.refresh_token  = refresh_token
         self.__sandbox_mode = sandbox_mode
         self.__config       = config
+        self.__transport    = transport if transport is not None else get_default_transport()
 
     def refresh_access_token(self):
         """Method to refresh the access token
@@ -24,28 +46,14 @@ class Session:
         header = {"content-type": "application/json"}
         data   = {"grant_type": "refresh_token", "refresh_token": self.refresh_token}
 
-        client_id = self.__config.get("client_id")
-        if self.__sandbox_mode is False:
-            client_secret = self.__config.get("client_secret")
-        else:
-            client_secret = "SANDBOX-{}".format(self.__config.get("client_secret"))
-
-        refresh_token_response = requests.post(PUBLIC_AUTH_URL,
-                                               headers=header,
-                                               data=json.dumps(data),
-                                               auth=HTTPBasicAuth(client_id, client_secret))
-
-        if refresh_token_response.status_code == 200:
-            refresh_token_response_json = refresh_token_response.json()
-            return {"access_token"          : refresh_token_response_json.get("access_token"),
-                    "token_type"            : refresh_token_response_json.get("token_type"),
-                    "expires_in"            : refresh_token_response_json.get("expires_in"),
-                    "scope"                 : refresh_token_response_json.get("scope"),
-                    "x-ratelimit-remaining" : refresh_token_response.headers.get("x-ratelimit-remaining"),
-                    "x-ratelimit-limit"     : refresh_token_response.headers.get("x-ratelimit-limit")
-                    }
-        else:
-            return refresh_token_response.json()
+        client_id, client_secret = _client_credentials(self.__config, self.__sandbox_mode)
+
+        refresh_token_response = self.__transport.post(PUBLIC_AUTH_URL,
+                                                       headers=header,
+                                                       data=json.dumps(data),
+                                                       auth=HTTPBasicAuth(client_id, client_secret))
+
+        return _refresh_token_result(refresh_token_response)
 
     def revoke_token(self):
         """Removes the user refresh token
@@ -55,17 +63,10 @@ class Session:
         header = {"content-type": "application/json"}
         data   = {"token"       : self.refresh_token}
 
-        client_id = self.__config.get("client_id")
-        if self.__sandbox_mode is False:
-            client_secret = self.__config.get("client_secret")
-        else:
-            client_secret = "SANDBOX-{}".format(self.__config.get("client_secret"))
-
-        revoke_token_response = requests.post(AUTH_REVOKE_URL,
-                                              data=json.dumps(data),
-                                              headers=header,
-                                              auth=HTTPBasicAuth(client_id, client_secret))
-        if revoke_token_response.status_code == 200:
-            return {"status": True}
-        else:
-            return revoke_token_response.json()
+        client_id, client_secret = _client_credentials(self.__config, self.__sandbox_mode)
+
+        revoke_token_response = self.__transport.post(AUTH_REVOKE_URL,
+                                                      data=json.dumps(data),
+                                                      headers=header,
+                                                      auth=HTTPBasicAuth(client_id, client_secret))
+        return _revoke_token_result(revoke_token_response)
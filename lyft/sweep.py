@@ -0,0 +1,204 @@
+import math
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from lyft.availability import DEFAULT_BATCH_CONCURRENCY
+
+DEFAULT_MAX_POINTS      = 10000
+DEFAULT_DEDUP_PRECISION = 5
+METERS_PER_DEGREE       = 111320.0
+
+
+def _require_numpy():
+    if numpy is None:
+        raise ImportError("the sweep API requires numpy, install it with: pip install numpy")
+
+
+def _polygon_mask(lats, lngs, polygon):
+    """Vectorized even-odd ray casting, returns a boolean array telling which points are inside the polygon"""
+    inside = numpy.zeros(lats.shape, dtype=bool)
+    vertices = list(polygon)
+    for (lat_a, lng_a), (lat_b, lng_b) in zip(vertices, vertices[1:] + vertices[:1]):
+        if lat_a == lat_b:
+            continue
+        crosses = (lat_a > lats) != (lat_b > lats)
+        lng_cross = lng_a + (lats - lat_a) * (lng_b - lng_a) / (lat_b - lat_a)
+        inside ^= crosses & (lngs < lng_cross)
+    return inside
+
+
+def sample_points(area, resolution, max_points=DEFAULT_MAX_POINTS):
+    """Returns the points of a regular grid covering an area
+
+    :param area: (min_lat, min_lng, max_lat, max_lng) bounding box, or polygon as a list of (lat, lng) vertices
+    :param resolution: Distance in meters between two neighbouring points
+    :param max_points: Maximum number of points, ValueError is raised beyond it
+    :return: (lats, lngs) tuple of numpy arrays
+    """
+    _require_numpy()
+    polygon = None
+    if len(area) == 4 and not isinstance(area[0], (tuple, list)):
+        min_lat, min_lng, max_lat, max_lng = (float(value) for value in area)
+    else:
+        polygon = [(float(lat), float(lng)) for lat, lng in area]
+        if len(polygon) < 3:
+            raise ValueError("a polygon needs at least 3 vertices")
+        min_lat, max_lat = min(lat for lat, _ in polygon), max(lat for lat, _ in polygon)
+        min_lng, max_lng = min(lng for _, lng in polygon), max(lng for _, lng in polygon)
+
+    lat_step = resolution / METERS_PER_DEGREE
+    lng_step = resolution / (METERS_PER_DEGREE * max(math.cos(math.radians((min_lat + max_lat) / 2)), 1e-6))
+    rows     = int((max_lat - min_lat) / lat_step) + 1
+    columns  = int((max_lng - min_lng) / lng_step) + 1
+    if rows * columns > max_points * (1 if polygon is None else 4):
+        raise ValueError("{} points needed at {}m resolution, more than max_points={}".format(rows * columns,
+                                                                                              resolution,
+                                                                                              max_points))
+
+    lats, lngs = numpy.meshgrid(min_lat + numpy.arange(rows) * lat_step,
+                                min_lng + numpy.arange(columns) * lng_step, indexing="ij")
+    lats, lngs = lats.ravel(), lngs.ravel()
+    if polygon is not None:
+        mask       = _polygon_mask(lats, lngs, polygon)
+        lats, lngs = lats[mask], lngs[mask]
+        if len(lats) > max_points:
+            raise ValueError("{} points needed at {}m resolution, more than max_points={}".format(len(lats),
+                                                                                                  resolution,
+                                                                                                  max_points))
+    return lats, lngs
+
+
+class SweepResult(object):
+
+    def __init__(self, lat, lng, ride_type, eta_seconds, points, errors):
+        """Columnar result of a sweep, one row per driver or per sample point and ride type
+
+        :param lat: float64 array of latitudes
+        :param lng: float64 array of longitudes
+        :param ride_type: str array of ride types
+        :param eta_seconds: float64 array of ETAs in seconds, nan when unknown
+        :param points: Number of sample points queried
+        :param errors: list of ((lat, lng), exception) for the points whose request failed
+        """
+        self.lat         = lat
+        self.lng         = lng
+        self.ride_type   = ride_type
+        self.eta_seconds = eta_seconds
+        self.points      = points
+        self.errors      = errors
+
+    def __len__(self):
+        return len(self.lat)
+
+    def columns(self):
+        """Returns the columns as a dict of name -> array, eg: to build a pandas DataFrame"""
+        return {"lat"         : self.lat,
+                "lng"         : self.lng,
+                "ride_type"   : self.ride_type,
+                "eta_seconds" : self.eta_seconds}
+
+    def __repr__(self):
+        return "SweepResult({} rows, {} points, {} errors)".format(len(self), self.points, len(self.errors))
+
+
+def _json(response):
+    """Decoded body of an Availability response, which is a lyft.models object when created with models=True"""
+    return response.raw if hasattr(response, "raw") else response
+
+
+def _result(rows, points, errors):
+    lats, lngs, ride_types, etas = zip(*rows) if rows else ((), (), (), ())
+    return SweepResult(numpy.array(lats, dtype=numpy.float64),
+                       numpy.array(lngs, dtype=numpy.float64),
+                       numpy.array(ride_types, dtype=str),
+                       numpy.array([numpy.nan if eta is None else eta for eta in etas], dtype=numpy.float64),
+                       points,
+                       errors)
+
+
+class AreaSweep(object):
+
+    def __init__(self, availability, max_concurrency=DEFAULT_BATCH_CONCURRENCY, max_points=DEFAULT_MAX_POINTS,
+                 dedup_precision=DEFAULT_DEDUP_PRECISION):
+        """Queries every point of a grid covering an area concurrently and returns columnar numpy arrays, eg: to
+        build supply or ETA heatmaps. Requires numpy.
+
+        Requests go through the transport of the Availability object: give it a RateLimiter to stay within the rate
+        limits, and pool_maxsize >= max_concurrency.
+
+        :param availability: lyft.availability.Availability used to send the requests
+        :param max_concurrency: Maximum number of requests in flight
+        :param max_points: Maximum number of sample points of a sweep
+        :param dedup_precision: Decimals of the coordinates identifying a driver seen from several points
+        """
+        _require_numpy()
+        self.max_concurrency = max_concurrency
+        self.max_points      = max_points
+        self.dedup_precision = dedup_precision
+        self.__availability  = availability
+
+    def _query(self, function, lats, lngs):
+        """Yields ((lat, lng), response, error) for every point, in completion order"""
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            futures = {executor.submit(function, lat, lng): (lat, lng) for lat, lng in zip(lats.tolist(),
+                                                                                          lngs.tolist())}
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], _json(future.result()), None
+                except Exception as error:
+                    yield futures[future], None, error
+
+    def driver_etas(self, area, resolution, ride_type=None):
+        """Pickup ETA at every sample point, one row per point and ride type (get_driver_eta)
+
+        :param area: (min_lat, min_lng, max_lat, max_lng) bounding box, or polygon as a list of (lat, lng) vertices
+        :param resolution: Distance in meters between two neighbouring points
+        :param ride_type: string, ID of a ride type, None for all the ride types available
+        :return: SweepResult whose lat/lng are the sample points
+        """
+        lats, lngs = sample_points(area, resolution, self.max_points)
+        rows, errors = [], []
+        query = lambda lat, lng: self.__availability.get_driver_eta(lat, lng, ride_type=ride_type)
+        for (lat, lng), response, error in self._query(query, lats, lngs):
+            if error is not None:
+                errors.append(((lat, lng), error))
+                continue
+            for estimate in response.get("eta_estimates") or []:
+                rows.append((lat, lng, estimate.get("ride_type"), estimate.get("eta_seconds")))
+        return _result(rows, len(lats), errors)
+
+    def nearby_drivers(self, area, resolution, ride_type=None):
+        """Drivers around every sample point, each driver once even when seen from several points
+        (get_eta_and_nearby_drivers). A driver's eta_seconds is the smallest pickup ETA of its ride type among the
+        points it was seen from.
+
+        :param area: (min_lat, min_lng, max_lat, max_lng) bounding box, or polygon as a list of (lat, lng) vertices
+        :param resolution: Distance in meters between two neighbouring points
+        :param ride_type: string, ID of a ride type, None for all the ride types available
+        :return: SweepResult whose lat/lng are the most recent driver locations
+        """
+        lats, lngs = sample_points(area, resolution, self.max_points)
+        drivers, errors = {}, []
+        query = lambda lat, lng: self.__availability.get_eta_and_nearby_drivers(lat, lng, ride_type=ride_type)
+        for point, response, error in self._query(query, lats, lngs):
+            if error is not None:
+                errors.append((point, error))
+                continue
+            for group in response.get("nearby_drivers_pickup_etas") or []:
+                duration = (group.get("pickup_duration_range") or {}).get("duration_ms")
+                eta      = duration / 1000.0 if duration is not None else None
+                for driver in group.get("nearby_drivers") or []:
+                    locations = driver.get("locations") or []
+                    if not locations:
+                        continue
+                    lat, lng = locations[-1]["lat"], locations[-1]["lng"]
+                    key      = (group.get("ride_type"), round(lat, self.dedup_precision),
+                                round(lng, self.dedup_precision))
+                    seen     = drivers.get(key)
+                    if seen is None or (eta is not None and (seen[3] is None or eta < seen[3])):
+                        drivers[key] = (lat, lng, group.get("ride_type"), eta)
+        return _result(list(drivers.values()), len(lats), errors)
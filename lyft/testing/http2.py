@@ -0,0 +1,192 @@
+"""Local HTTP/2 front end of a LyftSimulator, used to test and benchmark lyft.transport.http2.Http2Transport. Speaks
+cleartext HTTP/2 with prior knowledge (h2c) and answers the concurrent streams of a connection in parallel:
+
+    with LyftSimulator(latency=0.05) as simulator, Http2Simulator(simulator) as server:
+        transport = Http2Transport(base_url=server.base_url, prior_knowledge=True)
+
+Requires h2: pip install h2
+"""
+import gzip
+import json
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import h2.config
+    import h2.connection
+    import h2.events
+    import h2.exceptions
+    import h2.settings
+except ImportError:
+    h2 = None
+
+DEFAULT_MAX_CONCURRENT_STREAMS = 100
+
+
+class _Connection(object):
+
+    def __init__(self, server, sock):
+        self.server  = server
+        self.sock    = sock
+        self.h2      = h2.connection.H2Connection(h2.config.H2Configuration(client_side=False,
+                                                                              header_encoding="utf-8"))
+        # guards self.h2 and the socket writes, notified when the client opens the flow control window
+        self.changed = threading.Condition()
+        self.streams = {}
+        self.closed  = False
+
+    def run(self):
+        with self.changed:
+            self.h2.initiate_connection()
+            self.h2.update_settings({h2.settings.SettingCodes.MAX_CONCURRENT_STREAMS:
+                                     self.server.max_concurrent_streams})
+            self.sock.sendall(self.h2.data_to_send())
+        try:
+            while True:
+                data = self.sock.recv(65536)
+                if not data:
+                    break
+                with self.changed:
+                    events = self.h2.receive_data(data)
+                    for event in events:
+                        self._received(event)
+                    self.sock.sendall(self.h2.data_to_send())
+                    self.changed.notify_all()
+        except (OSError, h2.exceptions.ProtocolError):
+            pass
+        finally:
+            with self.changed:
+                self.closed = True
+                self.changed.notify_all()
+            self.sock.close()
+
+    def _received(self, event):
+        if isinstance(event, h2.events.RequestReceived):
+            self.streams[event.stream_id] = (dict(event.headers), [])
+        elif isinstance(event, h2.events.DataReceived):
+            self.streams[event.stream_id][1].append(event.data)
+            self.h2.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+        elif isinstance(event, h2.events.StreamEnded):
+            headers, body = self.streams.pop(event.stream_id)
+            self.server._dispatch(self, event.stream_id, headers, b"".join(body))
+        elif isinstance(event, h2.events.StreamReset):
+            self.streams.pop(event.stream_id, None)
+
+    def respond(self, stream_id, status, data, headers):
+        """Sends a response in frames the flow control windows of the client allow, from a worker thread"""
+        headers = [(":status", str(status)), ("content-type", "application/json"),
+                   ("content-length", str(len(data)))] + [(key, str(value)) for key, value in headers.items()]
+        with self.changed:
+            try:
+                self.h2.send_headers(stream_id, headers, end_stream=not data)
+                while data and not self.closed:
+                    size = min(self.h2.local_flow_control_window(stream_id), self.h2.max_outbound_frame_size)
+                    if size <= 0:
+                        self.sock.sendall(self.h2.data_to_send())
+                        self.changed.wait()
+                        continue
+                    self.h2.send_data(stream_id, data[:size], end_stream=size >= len(data))
+                    data = data[size:]
+                self.sock.sendall(self.h2.data_to_send())
+            except (OSError, h2.exceptions.StreamClosedError):
+                pass
+
+
+class Http2Simulator(object):
+
+    def __init__(self, simulator, host="127.0.0.1", port=0, max_concurrent_streams=DEFAULT_MAX_CONCURRENT_STREAMS,
+                 workers=256):
+        """HTTP/2 server answering with simulator.handle, counting its connections and streams. A connection reads
+        its frames in a thread of its own and the requests are answered by a pool of workers, so that the latency of
+        the simulator is spent in parallel for the streams of a connection.
+
+        :param simulator: LyftSimulator, does not need to be started
+        :param host: Interface to listen on
+        :param port: Port to listen on, 0 for any free port
+        :param max_concurrent_streams: Streams a client may open at once on a connection
+        :param workers: Maximum number of requests answered at once
+        """
+        if h2 is None:
+            raise ImportError("Http2Simulator requires h2: pip install h2")
+
+        self.simulator              = simulator
+        self.max_concurrent_streams = max_concurrent_streams
+        self.connections            = 0
+        self.streams                = 0
+        self.__lock                 = threading.Lock()
+        self.__open                 = set()
+        self.__executor             = ThreadPoolExecutor(workers)
+        self.__socket               = socket.create_server((host, port))
+        self.__thread               = threading.Thread(target=self.__serve, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.__socket.getsockname()[:2]
+        return "http://{}:{}".format(host, port)
+
+    def start(self):
+        self.__thread.start()
+        return self
+
+    def stop(self):
+        self.__socket.close()
+        with self.__lock:
+            for sock in self.__open:
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+        self.__executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def stats(self):
+        """Returns the stats of the simulator, with the HTTP/2 connections opened and streams answered
+
+        :return: dict
+        """
+        with self.__lock:
+            return dict(self.simulator.stats(), connections=self.connections, streams=self.streams)
+
+    def __serve(self):
+        while True:
+            try:
+                sock, _ = self.__socket.accept()
+            except OSError:
+                return
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            with self.__lock:
+                self.connections += 1
+                self.__open.add(sock)
+            threading.Thread(target=self.__run, args=(_Connection(self, sock),), daemon=True).start()
+
+    def __run(self, connection):
+        try:
+            connection.run()
+        finally:
+            with self.__lock:
+                self.__open.discard(connection.sock)
+
+    def _dispatch(self, connection, stream_id, headers, body):
+        with self.__lock:
+            self.streams += 1
+        try:
+            self.__executor.submit(self.__answer, connection, stream_id, headers, body)
+        except RuntimeError:
+            # stopped
+            pass
+
+    def __answer(self, connection, stream_id, headers, body):
+        status, payload, response_headers = self.simulator.handle(headers[":method"], headers[":path"], headers,
+                                                                  body)
+        data = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        if self.simulator.compress and data and "gzip" in headers.get("accept-encoding", ""):
+            data = gzip.compress(data)
+            response_headers["content-encoding"] = "gzip"
+        self.simulator._sent(len(data))
+        connection.respond(stream_id, status, data, response_headers)
@@ -0,0 +1,523 @@
+"""Local HTTP simulator of the Lyft API, used to test and benchmark the SDK without credentials or network access.
+
+Point a Transport at it with base_url:
+
+    with LyftSimulator(latency=0.02, error_rate=0.01, rate_limit=500) as simulator:
+        transport = Transport(base_url=simulator.base_url)
+        Availability("Bearer", "token", transport=transport).get_driver_eta(37.7763, -122.3918)
+"""
+import base64
+import calendar
+import datetime
+import gzip
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+RIDE_STATUSES = ("pending", "accepted", "arrived", "pickedUp", "droppedOff")
+
+# the past rides of the history parameter are requested every HISTORY_INTERVAL seconds from HISTORY_START on
+HISTORY_START    = calendar.timegm((2020, 1, 1, 0, 0, 0))
+HISTORY_INTERVAL = 3600
+HISTORY_MAX_PAGE = 50
+
+# ride_type, display_name, seats, base_charge, cost_minimum, cost_per_minute, cost_per_mile
+RIDE_TYPES = (("lyft_line", "Lyft Line", 2, 200, 475, 22, 121),
+              ("lyft", "Lyft", 4, 200, 500, 22, 121),
+              ("lyft_plus", "Lyft Plus", 6, 300, 700, 30, 206),
+              ("lyft_premier", "Lyft Premier", 4, 500, 900, 50, 281))
+
+
+def _distance_miles(lat, lng, end_lat, end_lng):
+    """Equirectangular approximation, precise enough for city distances"""
+    x = math.radians(end_lng - lng) * math.cos(math.radians((lat + end_lat) / 2))
+    y = math.radians(end_lat - lat)
+    return 3958.8 * math.hypot(x, y)
+
+
+def _timestamp(value):
+    """Seconds since the epoch of an ISO 8601 time such as 2015-12-01T21:04:22Z, raises ValueError if invalid"""
+    for time_format in ("%Y-%m-%dT%H:%M:%S%z", "%Y-%m-%dT%H:%M:%S.%f%z"):
+        try:
+            return datetime.datetime.strptime(value, time_format).timestamp()
+        except ValueError:
+            pass
+    raise _Error(400, "bad_parameter", "invalid time {}".format(value))
+
+
+def _ride_types(ride_type=None):
+    return [{"ride_type"       : name,
+             "display_name"    : display_name,
+             "seats"           : seats,
+             "image_url"       : "https://cdn.lyft.com/assets/car_standard.png",
+             "pricing_details" : {"base_charge"           : base_charge,
+                                  "cost_minimum"          : cost_minimum,
+                                  "cost_per_minute"       : cost_per_minute,
+                                  "cost_per_mile"         : cost_per_mile,
+                                  "currency"              : "USD",
+                                  "trust_and_service"     : 200,
+                                  "cancel_penalty_amount" : 500}}
+            for name, display_name, seats, base_charge, cost_minimum, cost_per_minute, cost_per_mile in RIDE_TYPES
+            if ride_type is None or ride_type == name]
+
+
+class _Error(Exception):
+
+    def __init__(self, status, error, description=None):
+        Exception.__init__(self, error)
+        self.status  = status
+        self.payload = {"error": error, "error_description": description or error}
+
+
+class LyftSimulator(object):
+
+    def __init__(self, latency=0, jitter=0, error_rate=0, error_status=503, rate_limit=None, window=60,
+                 ride_step=5, token_ttl=86400, seed=None, host="127.0.0.1", port=0, compress=False, history=0):
+        """Keep-alive HTTP server implementing the oauth, availability and rides endpoints of the Lyft API with
+        generated but consistent data: estimates depend on the coordinates and rides go through their statuses over
+        time.
+
+        Any client id and secret are accepted, the API endpoints only require an Authorization header.
+
+        :param latency: Seconds added to every response
+        :param jitter: Maximum random seconds added on top of latency
+        :param error_rate: Fraction of requests failing with error_status, between 0 and 1
+        :param error_status: HTTP status of the injected errors
+        :param rate_limit: Requests allowed per window and token, sent in the x-ratelimit headers. Requests over
+                           the limit get a 429 with Retry-After. None for no limit and no headers
+        :param window: Seconds of a rate limit window
+        :param ride_step: Seconds a ride spends in each status before droppedOff, 0 to drop rides off immediately
+        :param token_ttl: expires_in of the issued access tokens
+        :param seed: Seed of the random latency, errors and driver locations
+        :param host: Interface to listen on
+        :param port: Port to listen on, 0 for any free port
+        :param compress: Set to True to gzip the responses of the clients sending Accept-Encoding: gzip, as the Lyft
+                         API does
+        :param history: Number of past rides listed by GET /v1/rides, requested every HISTORY_INTERVAL seconds from
+                        HISTORY_START on
+        """
+        self.latency      = latency
+        self.jitter       = jitter
+        self.error_rate   = error_rate
+        self.error_status = error_status
+        self.rate_limit   = rate_limit
+        self.window       = window
+        self.ride_step    = ride_step
+        self.token_ttl    = token_ttl
+        self.compress     = compress
+        self.history      = history
+        self.counts       = {}
+        self.connections  = 0
+        self.errors       = 0
+        self.throttled    = 0
+        self.bytes_sent   = 0
+        self.__random     = random.Random(seed)
+        self.__seed       = seed
+        self.__lock       = threading.Lock()
+        self.__windows    = {}
+        self.__rides      = {}
+        self.__ride_ids   = 0
+        self.__routes     = [("POST", re.compile(r"^/oauth/token$"), self._token),
+                             ("POST", re.compile(r"^/oauth/revoke_refresh_token$"), self._revoke),
+                             ("GET", re.compile(r"^/v1/ridetypes$"), self._get_ride_types),
+                             ("GET", re.compile(r"^/v1/eta$"), self._eta),
+                             ("GET", re.compile(r"^/v1/cost$"), self._cost),
+                             ("GET", re.compile(r"^/v1/drivers$"), self._drivers),
+                             ("GET", re.compile(r"^/v1/nearby-drivers-pickup-etas$"), self._pickup_etas),
+                             ("POST", re.compile(r"^/v1/rides$"), self._create_ride),
+                             ("GET", re.compile(r"^/v1/rides$"), self._ride_history),
+                             ("GET", re.compile(r"^/v1/rides/(\w+)$"), self._ride_details),
+                             ("PUT", re.compile(r"^/v1/rides/(\w+)/destination$"), self._update_destination),
+                             ("PUT", re.compile(r"^/v1/rides/(\w+)/rating$"), self._rating),
+                             ("GET", re.compile(r"^/v1/rides/(\w+)/receipt$"), self._receipt),
+                             ("GET", re.compile(r"^/v1/rides/(\w+)/cancel$"), self._cancel),
+                             ("POST", re.compile(r"^/v1/rides/(\w+)/cancel$"), self._cancel)]
+        self.__server     = ThreadingHTTPServer((host, port), self._make_handler())
+        self.__server.daemon_threads = True
+        self.__thread     = threading.Thread(target=self.__server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.__server.server_address[:2]
+        return "http://{}:{}".format(host, port)
+
+    def start(self):
+        self.__thread.start()
+        return self
+
+    def stop(self):
+        self.__server.shutdown()
+        self.__server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def stats(self):
+        """Returns the number of requests per endpoint, the connections opened, the injected errors, the 429
+        responses and the bytes of response bodies sent, compressed or not
+
+        :return: dict
+        """
+        with self.__lock:
+            return {"requests"    : sum(self.counts.values()),
+                    "endpoints"   : dict(self.counts),
+                    "connections" : self.connections,
+                    "errors"      : self.errors,
+                    "throttled"   : self.throttled,
+                    "bytes_sent"  : self.bytes_sent}
+
+    def _connected(self):
+        with self.__lock:
+            self.connections += 1
+
+    def _sent(self, size):
+        with self.__lock:
+            self.bytes_sent += size
+
+    def _make_handler(self):
+        simulator = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version        = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                BaseHTTPRequestHandler.setup(self)
+                simulator._connected()
+
+            def log_message(self, *args):
+                pass
+
+            def _handle(self):
+                length = int(self.headers.get("content-length") or 0)
+                body   = self.rfile.read(length) if length else b""
+                status, payload, headers = simulator.handle(self.command, self.path, self.headers, body)
+                data = json.dumps(payload).encode("utf-8") if payload is not None else b""
+                gzipped = simulator.compress and data and "gzip" in (self.headers.get("accept-encoding") or "")
+                if gzipped:
+                    data = gzip.compress(data)
+                simulator._sent(len(data))
+                self.send_response(status)
+                self.send_header("content-type", "application/json")
+                if gzipped:
+                    self.send_header("content-encoding", "gzip")
+                self.send_header("content-length", str(len(data)))
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET    = _handle
+            do_POST   = _handle
+            do_PUT    = _handle
+            do_DELETE = _handle
+
+        return Handler
+
+    def handle(self, method, path, headers, body):
+        """Answers a request, returns (status, payload, headers)
+
+        :param method: HTTP method
+        :param path: Path with query string
+        :param headers: Case insensitive request headers
+        :param body: Request body bytes
+        """
+        url   = urlsplit(path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        for route_method, pattern, handler in self.__routes:
+            match = pattern.match(url.path) if route_method == method else None
+            if match is not None:
+                break
+        else:
+            return 404, {"error": "not_found", "error_description": "unknown endpoint"}, {}
+
+        with self.__lock:
+            self.counts[handler.__name__.lstrip("_")] = self.counts.get(handler.__name__.lstrip("_"), 0) + 1
+            delay = self.latency + self.__random.random() * self.jitter
+            fail  = self.__random.random() < self.error_rate
+        if delay:
+            time.sleep(delay)
+
+        response_headers = {}
+        try:
+            if url.path != "/oauth/token" and not headers.get("authorization"):
+                raise _Error(401, "invalid_token", "missing Authorization header")
+            self._check_rate_limit(headers.get("authorization") or "", response_headers)
+            if fail:
+                with self.__lock:
+                    self.errors += 1
+                raise _Error(self.error_status, "service_unavailable", "injected error")
+
+            status, payload = handler(query, headers, json.loads(body) if body else {}, *match.groups())
+        except _Error as error:
+            status, payload = error.status, error.payload
+        except ValueError:
+            status, payload = 400, {"error": "bad_parameter", "error_description": "invalid request"}
+        return status, payload, response_headers
+
+    def _check_rate_limit(self, key, response_headers):
+        if self.rate_limit is None:
+            return
+
+        with self.__lock:
+            now = time.monotonic()
+            started_at, count = self.__windows.get(key, (now, 0))
+            if now - started_at >= self.window:
+                started_at, count = now, 0
+            if count >= self.rate_limit:
+                self.throttled += 1
+                response_headers.update({"x-ratelimit-limit"     : str(self.rate_limit),
+                                         "x-ratelimit-remaining" : "0",
+                                         "retry-after"           : str(int(math.ceil(started_at + self.window - now)))})
+                raise _Error(429, "too_many_requests", "rate limit exceeded")
+            self.__windows[key] = (started_at, count + 1)
+
+        response_headers.update({"x-ratelimit-limit"     : str(self.rate_limit),
+                                 "x-ratelimit-remaining" : str(self.rate_limit - count - 1)})
+
+    # oauth
+
+    def _token(self, query, headers, data):
+        client_id, _, client_secret = base64.b64decode(
+            (headers.get("authorization") or "Basic ").split(" ", 1)[-1]).decode("utf-8").partition(":")
+        if not client_id or not client_secret or client_secret in ("None", "SANDBOX-None", "SANDBOX-"):
+            raise _Error(401, "invalid_client", "client authentication failed")
+
+        grant_type = data.get("grant_type")
+        token      = {"access_token" : "sim-{:x}".format(self.__random.getrandbits(64)),
+                      "token_type"   : "Bearer",
+                      "expires_in"   : self.token_ttl,
+                      "scope"        : data.get("scope", "public")}
+        if grant_type == "client_credentials":
+            return 200, token
+        if grant_type in ("authorization_code", "refresh_token"):
+            if not data.get("code") and not data.get("refresh_token"):
+                raise _Error(400, "invalid_grant", "missing code or refresh_token")
+            token["refresh_token"] = data.get("refresh_token") or "sim-refresh-{}".format(data.get("code"))
+            token["scope"]         = "public rides.read rides.request offline"
+            return 200, token
+        raise _Error(400, "unsupported_grant_type", "grant_type {} is not supported".format(grant_type))
+
+    def _revoke(self, query, headers, data):
+        return 200, {}
+
+    # availability
+
+    def _coordinates(self, query, lat="lat", lng="lng"):
+        if lat not in query or lng not in query:
+            raise _Error(400, "bad_parameter", "{} and {} are required".format(lat, lng))
+        return float(query[lat]), float(query[lng])
+
+    def _destination(self, query, lat, lng):
+        if lat in query and lng in query:
+            return float(query[lat]), float(query[lng])
+        return None
+
+    def _eta_seconds(self, lat, lng, index):
+        """Deterministic pickup ETA of a ride type at a location"""
+        return 60 + int(abs(lat * 1000 + lng * 1000) % 5) * 60 + index * 30
+
+    def _get_ride_types(self, query, headers, data):
+        self._coordinates(query)
+        return 200, {"ride_types": _ride_types(query.get("ride_type"))}
+
+    def _eta(self, query, headers, data):
+        lat, lng = self._coordinates(query)
+        return 200, {"eta_estimates": [{"ride_type"         : ride_type["ride_type"],
+                                        "display_name"      : ride_type["display_name"],
+                                        "eta_seconds"       : self._eta_seconds(lat, lng, index),
+                                        "is_valid_estimate" : True}
+                                       for index, ride_type in enumerate(_ride_types(query.get("ride_type")))]}
+
+    def _cost(self, query, headers, data):
+        lat, lng    = self._coordinates(query, "start_lat", "start_lng")
+        destination = self._destination(query, "end_lat", "end_lng")
+        miles       = _distance_miles(lat, lng, *destination) if destination is not None else 0
+        seconds     = int(miles * 180)
+        estimates   = []
+        for ride_type in _ride_types(query.get("ride_type")):
+            pricing = ride_type["pricing_details"]
+            cost    = max(pricing["cost_minimum"], pricing["base_charge"] + pricing["cost_per_mile"] * miles +
+                          pricing["cost_per_minute"] * seconds / 60.0)
+            estimate = {"ride_type"            : ride_type["ride_type"],
+                        "display_name"         : ride_type["display_name"],
+                        "currency"             : "USD",
+                        "primetime_percentage" : "0%",
+                        "is_valid_estimate"    : destination is not None}
+            if destination is not None:
+                estimate.update({"estimated_cost_cents_min"   : int(cost),
+                                 "estimated_cost_cents_max"   : int(cost * 1.25),
+                                 "estimated_duration_seconds" : seconds,
+                                 "estimated_distance_miles"   : round(miles, 2)})
+            estimates.append(estimate)
+        return 200, {"cost_estimates": estimates}
+
+    def _driver_locations(self, lat, lng, ride_type):
+        """5 drivers around the location, each with its 5 last locations. Stable for a given location"""
+        generator = random.Random("{}:{:.4f}:{:.4f}:{}".format(self.__seed, lat, lng, ride_type))
+        drivers   = []
+        for _ in range(5):
+            driver_lat = lat + generator.uniform(-0.01, 0.01)
+            driver_lng = lng + generator.uniform(-0.01, 0.01)
+            drivers.append({"locations": [{"lat"            : round(driver_lat + step * 0.0002, 6),
+                                           "lng"            : round(driver_lng + step * 0.0002, 6),
+                                           "bearing"        : generator.randint(0, 359),
+                                           "recorded_at_ms" : 1500000000000 + step * 5000}
+                                          for step in range(5)]})
+        return drivers
+
+    def _drivers(self, query, headers, data):
+        lat, lng = self._coordinates(query)
+        return 200, {"nearby_drivers": [{"ride_type" : ride_type["ride_type"],
+                                         "drivers"   : self._driver_locations(lat, lng, ride_type["ride_type"])}
+                                        for ride_type in _ride_types()]}
+
+    def _pickup_etas(self, query, headers, data):
+        lat, lng = self._coordinates(query)
+        return 200, {"nearby_drivers_pickup_etas": [
+            {"ride_type"             : ride_type["ride_type"],
+             "display_name"          : ride_type["display_name"],
+             "pickup_duration_range" : {"duration_ms" : self._eta_seconds(lat, lng, index) * 1000,
+                                        "range_ms"    : 60000},
+             "nearby_drivers"        : self._driver_locations(lat, lng, ride_type["ride_type"])}
+            for index, ride_type in enumerate(_ride_types(query.get("ride_type")))]}
+
+    # rides
+
+    def _ride(self, ride_id):
+        ride = self.__rides.get(ride_id)
+        if ride is None:
+            raise _Error(404, "not_found", "ride {} does not exist".format(ride_id))
+        return ride
+
+    def _status(self, ride):
+        if ride["canceled"]:
+            return "canceled"
+        if not self.ride_step:
+            return RIDE_STATUSES[-1]
+        step = int((time.monotonic() - ride["created_at"]) / self.ride_step)
+        return RIDE_STATUSES[min(step, len(RIDE_STATUSES) - 1)]
+
+    def _price(self, ride):
+        origin, destination = ride["origin"], ride["destination"]
+        miles = _distance_miles(origin["lat"], origin["lng"], destination["lat"], destination["lng"])
+        return {"amount": 500 + int(miles * 150), "currency": "USD", "description": "Lyft fare"}
+
+    def _ride_payload(self, ride):
+        status  = self._status(ride)
+        payload = {"ride_id"      : ride["ride_id"],
+                   "status"       : status,
+                   "ride_type"    : ride["ride_type"],
+                   "origin"       : ride["origin"],
+                   "destination"  : ride["destination"],
+                   "passenger"    : {"first_name": "Passenger"},
+                   "requested_at" : ride["requested_at"],
+                   "generated_at" : time.strftime("%Y-%m-%dT%H:%M:%S+0000", time.gmtime()),
+                   "can_cancel"   : [] if status in ("pickedUp", "droppedOff", "canceled") else ["passenger"]}
+        if status not in ("pending", "canceled"):
+            payload.update({"driver"   : {"first_name": "Driver", "rating": "4.9", "phone_number": "+15555550100"},
+                            "vehicle"  : {"make": "Toyota", "model": "Prius", "color": "White",
+                                          "license_plate": "SIM1234"},
+                            "location" : dict(ride["origin"])})
+        if status == "droppedOff":
+            payload["price"] = self._price(ride)
+        if status == "canceled":
+            payload["canceled_by"] = "passenger"
+        return payload
+
+    def _create_ride(self, query, headers, data):
+        origin, destination = data.get("origin"), data.get("destination")
+        if not data.get("ride_type") or not origin or not destination:
+            raise _Error(400, "bad_parameter", "ride_type, origin and destination are required")
+
+        with self.__lock:
+            self.__ride_ids += 1
+            ride_id = str(self.__ride_ids)
+            ride    = self.__rides[ride_id] = {"ride_id"      : ride_id,
+                                               "ride_type"    : data["ride_type"],
+                                               "origin"       : origin,
+                                               "destination"  : destination,
+                                               "canceled"     : False,
+                                               "rating"       : None,
+                                               "created_at"   : time.monotonic(),
+                                               "requested_at" : time.strftime("%Y-%m-%dT%H:%M:%S+0000",
+                                                                              time.gmtime())}
+        return 201, {"ride_id"     : ride_id,
+                     "status"      : "pending",
+                     "ride_type"   : ride["ride_type"],
+                     "origin"      : origin,
+                     "destination" : destination,
+                     "passenger"   : {"first_name": "Passenger"}}
+
+    def _history_ride(self, index):
+        generator    = random.Random("{}:history:{}".format(self.__seed, index))
+        origin       = {"lat": 37.7 + generator.random() * 0.1, "lng": -122.5 + generator.random() * 0.1}
+        destination  = {"lat": 37.7 + generator.random() * 0.1, "lng": -122.5 + generator.random() * 0.1}
+        requested_at = time.gmtime(HISTORY_START + index * HISTORY_INTERVAL)
+        ride         = {"ride_id"      : "h{}".format(index),
+                        "status"       : "droppedOff",
+                        "ride_type"    : RIDE_TYPES[index % len(RIDE_TYPES)][0],
+                        "origin"       : origin,
+                        "destination"  : destination,
+                        "passenger"    : {"first_name": "Passenger"},
+                        "requested_at" : time.strftime("%Y-%m-%dT%H:%M:%S+0000", requested_at)}
+        ride["price"] = self._price(ride)
+        return ride
+
+    def _ride_history(self, query, headers, data):
+        if not query.get("start_time"):
+            raise _Error(400, "bad_parameter", "start_time is required")
+        limit = int(query.get("limit") or 10)
+        if not 0 < limit <= HISTORY_MAX_PAGE:
+            raise _Error(400, "bad_parameter", "limit must be between 1 and {}".format(HISTORY_MAX_PAGE))
+
+        # rides requested from start_time on and before end_time, oldest first
+        start = _timestamp(query["start_time"])
+        end   = _timestamp(query["end_time"]) if query.get("end_time") else time.time()
+        first = max(0, int(math.ceil((start - HISTORY_START) / HISTORY_INTERVAL)))
+        last  = min(self.history, max(0, int(math.ceil((end - HISTORY_START) / HISTORY_INTERVAL))))
+        return 200, {"ride_history": [self._history_ride(index) for index in range(first, min(last, first + limit))]}
+
+    def _ride_details(self, query, headers, data, ride_id):
+        return 200, self._ride_payload(self._ride(ride_id))
+
+    def _update_destination(self, query, headers, data, ride_id):
+        ride = self._ride(ride_id)
+        if self._status(ride) in ("droppedOff", "canceled"):
+            raise _Error(400, "ride_not_active", "the ride is over")
+        ride["destination"] = data
+        return 200, data
+
+    def _rating(self, query, headers, data, ride_id):
+        ride = self._ride(ride_id)
+        if self._status(ride) != "droppedOff":
+            raise _Error(400, "ride_not_dropped_off", "only finished rides can be rated")
+        ride["rating"] = data
+        return 204, None
+
+    def _receipt(self, query, headers, data, ride_id):
+        ride = self._ride(ride_id)
+        if self._status(ride) != "droppedOff":
+            raise _Error(404, "not_found", "the receipt of ride {} is not available yet".format(ride_id))
+        price = self._price(ride)
+        return 200, {"ride_id"      : ride_id,
+                     "price"        : price,
+                     "line_items"   : [{"amount": price["amount"], "currency": "USD", "type": "Lyft fare"}],
+                     "charges"      : [{"amount": price["amount"], "currency": "USD",
+                                        "payment_method": "Visa ***1111"}],
+                     "requested_at" : ride["requested_at"]}
+
+    def _cancel(self, query, headers, data, ride_id):
+        ride = self._ride(ride_id)
+        if self._status(ride) in ("pickedUp", "droppedOff"):
+            raise _Error(400, "cant_cancel_ride", "the ride can no longer be canceled")
+        ride["canceled"] = True
+        return 204, None
@@ -0,0 +1,127 @@
+"""Local sender of signed Lyft webhook events, used to test and benchmark a lyft.webhooks.WebhookReceiver:
+
+    with WebhookServer(WebhookReceiver(token, [handler])) as server:
+        WebhookSender(server.url, token).send_many(ride_status_events(100))
+"""
+import http.client
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from lyft.testing.simulator import HISTORY_START, RIDE_STATUSES
+from lyft.webhooks import SIGNATURE_HEADER, sign
+
+
+def ride_status_events(rides, statuses=RIDE_STATUSES, duplicates=0, shuffle=0, seed=None):
+    """Generates the ride.status.updated events of rides going through statuses, one second apart, in the order
+    Lyft would send them
+
+    :param rides: int, number of rides
+    :param statuses: Statuses every ride goes through
+    :param duplicates: Fraction of the events sent twice, between 0 and 1
+    :param shuffle: Number of positions an event can be moved back, so that it arrives after later events
+    :param seed: Seed of the duplicates and of the shuffle
+    :return: list of event payloads
+    """
+    generator = random.Random(seed)
+    events    = []
+    for step, status in enumerate(statuses):
+        occurred_at = time.strftime("%Y-%m-%dT%H:%M:%S+0000", time.gmtime(HISTORY_START + step))
+        for ride in range(rides):
+            ride_id = str(1000 + ride)
+            events.append({"event_id"    : "{}-{}".format(ride_id, status),
+                           "href"        : "https://api.lyft.com/v1/rides/" + ride_id,
+                           "occurred_at" : occurred_at,
+                           "event_type"  : "ride.status.updated",
+                           "event"       : {"ride_id"   : ride_id,
+                                            "status"    : status,
+                                            "ride_type" : "lyft",
+                                            "passenger" : {"first_name": "Passenger"}}})
+            if generator.random() < duplicates:
+                events.append(events[-1])
+
+    if shuffle:
+        for index in range(len(events) - 1, 0, -1):
+            target = max(0, index - generator.randint(0, shuffle))
+            events[index], events[target] = events[target], events[index]
+    return events
+
+
+class WebhookSender(object):
+
+    def __init__(self, url, verification_token, retry_delay=0.01, max_attempts=100, timeout=10):
+        """Posts signed events to a webhook URL over keep-alive connections, one per thread, retrying the 503
+        responses like Lyft does
+
+        :param url: Webhook URL, eg: WebhookServer.url
+        :param verification_token: Token the events are signed with
+        :param retry_delay: Seconds before a rejected event is sent again
+        :param max_attempts: int, attempts per event before its last status is returned
+        :param timeout: Socket timeout in seconds
+        """
+        url                = urlsplit(url)
+        self.host          = url.hostname
+        self.port          = url.port
+        self.path          = url.path or "/"
+        self.retry_delay   = retry_delay
+        self.max_attempts  = max_attempts
+        self.timeout       = timeout
+        self.__token       = verification_token
+        self.__local       = threading.local()
+        self.__connections = []
+
+    def _connection(self):
+        connection = getattr(self.__local, "connection", None)
+        if connection is None:
+            connection = self.__local.connection = http.client.HTTPConnection(self.host, self.port,
+                                                                              timeout=self.timeout)
+            self.__connections.append(connection)
+        return connection
+
+    def post(self, body, signature):
+        """Posts a body once with the given X-Lyft-Signature, returns the status of the response"""
+        connection = self._connection()
+        connection.request("POST", self.path, body, {"content-type"   : "application/json",
+                                                     SIGNATURE_HEADER : signature})
+        response = connection.getresponse()
+        response.read()
+        return response.status
+
+    def send(self, event):
+        """Signs and posts an event, retrying it while rejected with a 503
+
+        :param event: Event payload, eg: from ride_status_events
+        :return: Status of the last response
+        """
+        body = json.dumps(event).encode("utf-8")
+        for _ in range(self.max_attempts):
+            status = self.post(body, sign(body, self.__token))
+            if status != 503:
+                break
+            time.sleep(self.retry_delay)
+        return status
+
+    def send_many(self, events, concurrency=8):
+        """Sends events from concurrency threads, roughly in order
+
+        :return: dict of status -> number of events
+        """
+        statuses = {}
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for status in executor.map(self.send, events):
+                statuses[status] = statuses.get(status, 0) + 1
+        return statuses
+
+    def close(self):
+        for connection in self.__connections:
+            connection.close()
+        self.__connections = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,183 @@
+import heapq
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from lyft.util.errors import LyftAPIError
+
+FINAL_STATUSES              = ("droppedOff", "canceled")
+DEFAULT_INTERVALS           = {"pending"  : 2,
+                               "accepted" : 5,
+                               "arrived"  : 2,
+                               "pickedUp" : 20}
+DEFAULT_INTERVAL            = 5
+DEFAULT_TRACKER_CONCURRENCY = 8
+DEFAULT_MAX_ERRORS          = 3
+
+RideUpdate = namedtuple("RideUpdate", ["ride_id", "status", "previous_status", "details", "error"])
+RideUpdate.__doc__ = """Status change of a tracked ride
+
+:param ride_id: Id of the ride
+:param status: New status of the ride, eg: "accepted"
+:param previous_status: Status before the change, None for the first update of a ride
+:param details: Response of get_ride_details with the new status, None if the ride is no longer tracked after errors
+:param error: Last exception when the ride is no longer tracked after max_errors failed polls, None otherwise
+"""
+
+
+def _ride_status(details):
+    """Status of a get_ride_details response, a dictionary or a lyft.models.RideResponse"""
+    if isinstance(details, dict):
+        if details.get("status_code") != 200:
+            raise LyftAPIError(details, details.get("status_code"))
+        return details.get("status")
+    return details.status
+
+
+class _RideState(object):
+    __slots__ = ("ride_id", "status", "errors", "due")
+
+    def __init__(self, ride_id):
+        self.ride_id = ride_id
+        self.status  = None
+        self.errors  = 0
+        self.due     = None
+
+    def observe(self, status, details, error, max_errors):
+        """Records the result of a poll, returns (RideUpdate or None, True if the ride is no longer tracked)"""
+        if error is not None:
+            self.errors += 1
+            if self.errors >= max_errors:
+                return RideUpdate(self.ride_id, self.status, self.status, None, error), True
+            return None, False
+
+        self.errors = 0
+        previous, self.status = self.status, status
+        update = RideUpdate(self.ride_id, status, previous, details, None) if status != previous else None
+        return update, status in FINAL_STATUSES
+
+
+class RideTracker(object):
+
+    def __init__(self, rides, ride_ids=(), intervals=None, default_interval=DEFAULT_INTERVAL,
+                 max_concurrency=DEFAULT_TRACKER_CONCURRENCY, max_errors=DEFAULT_MAX_ERRORS):
+        """Tracks many rides by polling get_ride_details concurrently and yields a RideUpdate only when the status
+        of a ride changes. Each ride is polled at the interval of its current status: often while the passenger waits
+        for the driver, rarely during the ride. A ride stops being tracked once droppedOff or canceled, or after
+        max_errors consecutive failed polls.
+
+        Give the Rides object a Transport with pool_maxsize >= max_concurrency so every worker gets a pooled
+        connection.
+
+        :param rides: lyft.rides.Rides used to poll the rides
+        :param ride_ids: Ids of the rides to track, more can be added with add at any time
+        :param intervals: dict of status -> seconds between two polls, defaults to DEFAULT_INTERVALS
+        :param default_interval: Seconds between two polls for the statuses missing from intervals
+        :param max_concurrency: Maximum number of polls in flight
+        :param max_errors: Number of consecutive failed polls after which a ride is no longer tracked
+        """
+        self.intervals        = dict(DEFAULT_INTERVALS if intervals is None else intervals)
+        self.default_interval = default_interval
+        self.max_concurrency  = max_concurrency
+        self.max_errors       = max_errors
+        self.__rides          = rides
+        self.__states         = {}
+        self.__scheduled      = []
+        self.__completed      = []
+        self.__in_flight      = 0
+        self.__stopped        = False
+        self.__condition      = threading.Condition()
+        for ride_id in ride_ids:
+            self.add(ride_id)
+
+    def _schedule(self, state, delay):
+        state.due = time.monotonic() + delay
+        heapq.heappush(self.__scheduled, (state.due, state.ride_id))
+
+    def add(self, ride_id):
+        """Starts tracking a ride, its first update is yielded after its first poll"""
+        with self.__condition:
+            if ride_id not in self.__states:
+                state = self.__states[ride_id] = _RideState(ride_id)
+                self._schedule(state, 0)
+                self.__condition.notify()
+
+    def remove(self, ride_id):
+        """Stops tracking a ride"""
+        with self.__condition:
+            self.__states.pop(ride_id, None)
+
+    def stop(self):
+        """Ends the iteration over the updates, polls in flight are dropped"""
+        with self.__condition:
+            self.__stopped = True
+            self.__condition.notify()
+
+    def tracked(self):
+        """Returns the ids of the rides still tracked"""
+        with self.__condition:
+            return list(self.__states)
+
+    def _poll(self, state):
+        try:
+            details = self.__rides.get_ride_details(state.ride_id)
+            result  = (state, _ride_status(details), details, None)
+        except Exception as error:
+            result  = (state, None, None, error)
+
+        with self.__condition:
+            self.__in_flight -= 1
+            self.__completed.append(result)
+            self.__condition.notify()
+
+    def _submit_due(self, executor):
+        """Submits the polls that are due and returns the seconds until the next one. Caller holds the lock"""
+        now = time.monotonic()
+        while self.__scheduled and self.__in_flight < self.max_concurrency:
+            due, ride_id = self.__scheduled[0]
+            state = self.__states.get(ride_id)
+            if state is None or state.due != due:
+                heapq.heappop(self.__scheduled)
+                continue
+            if due > now:
+                return due - now
+            heapq.heappop(self.__scheduled)
+            self.__in_flight += 1
+            executor.submit(self._poll, state)
+        return None
+
+    def _observe(self, state, status, details, error):
+        """Returns the update of a completed poll and schedules the next one. Caller holds the lock"""
+        if self.__states.get(state.ride_id) is not state:
+            return None
+
+        update, done = state.observe(status, details, error, self.max_errors)
+        if done:
+            del self.__states[state.ride_id]
+        else:
+            self._schedule(state, self.intervals.get(state.status, self.default_interval))
+        return update
+
+    def updates(self):
+        """Generator of RideUpdate in the order the status changes are seen, ends when no ride is left to track or
+        stop is called"""
+        executor = ThreadPoolExecutor(max_workers=self.max_concurrency)
+        try:
+            while True:
+                with self.__condition:
+                    while not self.__completed:
+                        if self.__stopped or (not self.__states and not self.__in_flight):
+                            return
+                        self.__condition.wait(self._submit_due(executor))
+                    completed, self.__completed = self.__completed, []
+                    updates = [self._observe(*result) for result in completed]
+
+                for update in updates:
+                    if update is not None:
+                        yield update
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def __iter__(self):
+        return self.updates()
@@ -0,0 +1,164 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from functools import partial
+
+from lyft.authentication.token_provider import DEFAULT_REFRESH_MARGIN
+from lyft.transport.rate_limiter import DEFAULT_WINDOW, RateLimiter
+
+DEFAULT_LEASE         = 30
+DEFAULT_POLL_INTERVAL = 0.05
+DEFAULT_TIMEOUT       = 5.0
+
+_SCHEMA = ("CREATE TABLE IF NOT EXISTS tokens (name TEXT PRIMARY KEY, token TEXT, expires_at REAL, lease_until REAL)",
+           "CREATE TABLE IF NOT EXISTS limiters (name TEXT PRIMARY KEY, state TEXT NOT NULL)")
+
+
+class Coordinator(object):
+
+    def __init__(self, path, lease=DEFAULT_LEASE, poll_interval=DEFAULT_POLL_INTERVAL, timeout=DEFAULT_TIMEOUT,
+                 clock=time.time, sleep=time.sleep):
+        """Shares access tokens and rate limit budgets between the processes of a host, eg: gunicorn or
+        multiprocessing workers, through a small SQLite database in WAL mode. Each thread and each forked process
+        opens its own connection, the processes do not need to be related.
+
+        A token is fetched by a single process at a time: the others wait for it and reuse it instead of each
+        refreshing their own.
+
+        :param path: Path of the database file, created if missing. Put it on a local disk
+        :param lease: Seconds after which a process still fetching a token is presumed dead and another one fetches
+        :param poll_interval: Seconds between two checks of a process waiting for a token fetched by another one
+        :param timeout: Seconds to wait for the database lock held by another process
+        :param clock: function returning the current wall clock time in seconds, shared between processes
+        :param sleep: function used to wait for a token fetched by another process
+        """
+        self.path          = path
+        self.lease         = lease
+        self.poll_interval = poll_interval
+        self.timeout       = timeout
+        self.clock         = clock
+        self.__sleep       = sleep
+        self.__local       = threading.local()
+
+        with self._transaction() as connection:
+            for statement in _SCHEMA:
+                connection.execute(statement)
+
+    def __reduce__(self):
+        return Coordinator, (self.path, self.lease, self.poll_interval, self.timeout, self.clock, self.__sleep)
+
+    def _connection(self):
+        """Connection of the current thread, reopened in a forked child"""
+        connection = getattr(self.__local, "connection", None)
+        if connection is not None and self.__local.pid == os.getpid():
+            return connection
+
+        connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        self.__local.connection = connection
+        self.__local.pid        = os.getpid()
+        return connection
+
+    @contextmanager
+    def _transaction(self):
+        """Write transaction, holding the database lock against every other thread and process"""
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def token_fetcher(self, name, fetch_token, refresh_margin=DEFAULT_REFRESH_MARGIN):
+        """Returns a fetch_token function for a TokenProvider sharing the token stored under name
+
+        :param name: Name of the shared token, eg: the client id
+        :param fetch_token: function fetching a new token, eg: LyftPublicAuth(config).get_access_token
+        :param refresh_margin: refresh_margin of the TokenProvider
+        :return: function returning a token dictionary
+        """
+        return partial(self.fetch_token, name, fetch_token, refresh_margin)
+
+    def fetch_token(self, name, fetch_token, refresh_margin=DEFAULT_REFRESH_MARGIN):
+        """Returns the token stored under name, or calls fetch_token if it is missing or expires in less than
+        refresh_margin seconds. While a process fetches it, the others wait for its result. The returned
+        "expires_in" is the remaining lifetime of the shared token.
+
+        :return: token dictionary
+        """
+        while True:
+            with self._transaction() as connection:
+                now = self.clock()
+                row = connection.execute("SELECT token, expires_at, lease_until FROM tokens WHERE name = ?",
+                                         (name,)).fetchone()
+                if row is not None and row[0] is not None and now < row[1] - refresh_margin:
+                    token = json.loads(row[0])
+                    token["expires_in"] = row[1] - now
+                    return token
+                if row is None or row[2] is None or row[2] <= now:
+                    connection.execute("INSERT INTO tokens VALUES (?, NULL, NULL, ?) ON CONFLICT (name) DO UPDATE "
+                                       "SET lease_until = excluded.lease_until", (name, now + self.lease))
+                    break
+            self.__sleep(self.poll_interval)
+
+        token = None
+        try:
+            token = fetch_token()
+        finally:
+            with self._transaction() as connection:
+                if token is not None and token.get("access_token"):
+                    connection.execute("UPDATE tokens SET token = ?, expires_at = ?, lease_until = NULL WHERE name = ?",
+                                       (json.dumps(token), self.clock() + float(token.get("expires_in") or 0), name))
+                else:
+                    connection.execute("UPDATE tokens SET lease_until = NULL WHERE name = ?", (name,))
+        return token
+
+    def invalidate_token(self, name):
+        """Deletes the token stored under name, eg: after it was revoked"""
+        with self._transaction() as connection:
+            connection.execute("DELETE FROM tokens WHERE name = ?", (name,))
+
+    def close(self):
+        """Closes the connection of the current thread"""
+        connection = getattr(self.__local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self.__local.connection = None
+
+
+class SharedRateLimiter(RateLimiter):
+
+    def __init__(self, coordinator, name, rate=None, capacity=None, window=DEFAULT_WINDOW):
+        """RateLimiter whose bucket is shared by every process using the same Coordinator and name: N workers draw
+        from one budget instead of each sending the full rate. Every acquire and every response updates the bucket
+        in a database transaction, a few tens of microseconds. The counters of metrics are per process.
+
+        :param coordinator: Coordinator
+        :param name: Name of the shared bucket, eg: the client id whose budget it tracks
+        :param rate: Initial number of requests per second, see RateLimiter
+        :param capacity: Initial burst size, defaults to rate
+        :param window: Seconds over which x-ratelimit-limit requests are allowed
+        """
+        super(SharedRateLimiter, self).__init__(rate, capacity, window, clock=coordinator.clock)
+        self.coordinator = coordinator
+        self.name        = name
+
+    def __reduce__(self):
+        return SharedRateLimiter, (self.coordinator, self.name, self.rate, self.capacity, self.window)
+
+    @contextmanager
+    def _synchronized(self):
+        # the thread lock keeps the threads of this process from interleaving their loads and stores of the bucket
+        with RateLimiter._synchronized(self), self.coordinator._transaction() as connection:
+            row = connection.execute("SELECT state FROM limiters WHERE name = ?", (self.name,)).fetchone()
+            if row is not None:
+                self._set_state(json.loads(row[0]))
+            yield
+            connection.execute("INSERT OR REPLACE INTO limiters VALUES (?, ?)",
+                               (self.name, json.dumps(self._state())))
@@ -0,0 +1,271 @@
+import bisect
+import json
+import re
+import threading
+from urllib.parse import parse_qs, urlsplit
+
+from lyft.util.fork import register_after_fork
+
+# upper bounds in seconds of the latency histogram buckets, the last bucket is unbounded
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_RIDE_ID = re.compile(r"^rides/[^/]+")
+
+
+def endpoint_name(url):
+    """Returns the endpoint of a URL without its version and ride id, eg: "eta", "rides/{ride_id}/receipt" or
+    "oauth/token" """
+    path = urlsplit(url).path.strip("/")
+    if path.startswith("v1/"):
+        path = path[3:]
+    return _RIDE_ID.sub("rides/{ride_id}", path)
+
+
+def _ride_type(url, params, data):
+    query = parse_qs(urlsplit(url).query)
+    if "ride_type" in query:
+        return query["ride_type"][-1]
+    if params and params.get("ride_type") is not None:
+        return params["ride_type"]
+    if data:
+        try:
+            body = json.loads(data)
+        except (TypeError, ValueError):
+            return None
+        return body.get("ride_type") if isinstance(body, dict) else None
+    return None
+
+
+def _size(data):
+    if data is None:
+        return 0
+    if isinstance(data, str):
+        return len(data.encode("utf-8"))
+    if isinstance(data, (bytes, bytearray)):
+        return len(data)
+    return 0
+
+
+class RequestEvent(object):
+    __slots__ = ("method", "url", "endpoint", "ride_type", "attempt", "status_code", "elapsed", "bytes_out",
+                 "bytes_in", "error", "timings")
+
+    def __init__(self, method, url, attempt=1, params=None, data=None):
+        """One attempt of a request, passed to the hooks of a transport. The fields not known yet are None when
+        on_request_start is called.
+
+        :param method: HTTP method
+        :param url: URL of the request
+        :param attempt: Number of the attempt, 1 for the first one
+        :param params: Query parameters
+        :param data: Request body
+        """
+        self.method      = method.upper()
+        self.url         = url
+        self.endpoint    = endpoint_name(url)
+        self.ride_type   = _ride_type(url, params, data)
+        self.attempt     = attempt
+        self.status_code = None
+        self.elapsed     = None
+        self.bytes_out   = _size(data)
+        self.bytes_in    = None
+        self.error       = None
+        # phase durations in seconds when the HTTP client reports them: "ttfb" (time to the response headers),
+        # "dns" and "connect" (aiohttp only, when a new connection is opened)
+        self.timings     = {}
+
+    def __repr__(self):
+        return "RequestEvent({} {} attempt={} status_code={} elapsed={})".format(self.method, self.endpoint,
+                                                                                  self.attempt, self.status_code,
+                                                                                  self.elapsed)
+
+
+class Hooks(object):
+    """Base class of the hooks given to a Transport or an AsyncTransport, override the events you need. Hooks are
+    called synchronously on the request path: keep them fast and never raise from them."""
+
+    def on_request_start(self, event):
+        """Called before an attempt is sent, after the rate limiter let it through"""
+
+    def on_request_end(self, event):
+        """Called after an attempt got a response (status_code is set) or failed (error is set)"""
+
+    def on_retry(self, event, delay):
+        """Called when the attempt described by event is going to be retried after delay seconds"""
+
+    def on_cache_hit(self, endpoint, ride_type):
+        """Called when Availability answers from its GeoCache without sending a request"""
+
+    def on_cache_miss(self, endpoint, ride_type):
+        """Called when Availability does not find a cacheable response in its GeoCache"""
+
+
+def _start_event(hooks, method, url, attempt, params, data):
+    event = RequestEvent(method, url, attempt, params, data)
+    for hook in hooks:
+        hook.on_request_start(event)
+    return event
+
+
+def _end_event(hooks, event, elapsed, response=None, error=None):
+    event.elapsed = elapsed
+    event.error   = error
+    if response is not None:
+        event.status_code = response.status_code
+        event.bytes_in    = len(response.content)
+    for hook in hooks:
+        hook.on_request_end(event)
+
+
+def _retry_event(hooks, method, url, attempt, params, data, delay, response=None, error=None):
+    event = RequestEvent(method, url, attempt, params, data)
+    event.status_code = response.status_code if response is not None else None
+    event.error       = error
+    for hook in hooks:
+        hook.on_retry(event, delay)
+
+
+class _Histogram(object):
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts  = [0] * (len(buckets) + 1)
+        self.count   = 0
+        self.sum     = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum   += value
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the percentile, None if empty or beyond the last bound"""
+        if not self.count:
+            return None
+        rank, seen = fraction * self.count, 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return self.buckets[index] if index < len(self.buckets) else None
+        return None
+
+
+class _Series(object):
+    __slots__ = ("latency", "statuses", "errors", "retries", "bytes_in", "bytes_out", "cache_hits", "cache_misses")
+
+    def __init__(self, buckets):
+        self.latency      = _Histogram(buckets)
+        self.statuses     = {}
+        self.errors       = 0
+        self.retries      = 0
+        self.bytes_in     = 0
+        self.bytes_out    = 0
+        self.cache_hits   = 0
+        self.cache_misses = 0
+
+
+class MetricsHooks(Hooks):
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """Hooks aggregating latency histograms, status codes, retries, payload sizes and cache hits per endpoint
+        and ride_type. Read them with snapshot, or prometheus for the Prometheus text format, and export them to a
+        metrics pipeline.
+
+        :param buckets: Sorted upper bounds in seconds of the latency buckets
+        """
+        self.buckets  = tuple(buckets)
+        self.__lock   = threading.Lock()
+        self.__series = {}
+        register_after_fork(self)
+
+    def _after_fork(self):
+        self.__lock = threading.Lock()
+
+    def __reduce__(self):
+        # the metrics are per process, a copy starts empty
+        return self.__class__, (self.buckets,)
+
+    def _series(self, endpoint, ride_type):
+        """Caller holds the lock"""
+        series = self.__series.get((endpoint, ride_type))
+        if series is None:
+            series = self.__series[(endpoint, ride_type)] = _Series(self.buckets)
+        return series
+
+    def on_request_end(self, event):
+        with self.__lock:
+            series = self._series(event.endpoint, event.ride_type)
+            series.latency.observe(event.elapsed)
+            series.bytes_out += event.bytes_out
+            if event.error is not None:
+                series.errors += 1
+            else:
+                series.statuses[event.status_code] = series.statuses.get(event.status_code, 0) + 1
+                series.bytes_in += event.bytes_in or 0
+
+    def on_retry(self, event, delay):
+        with self.__lock:
+            self._series(event.endpoint, event.ride_type).retries += 1
+
+    def on_cache_hit(self, endpoint, ride_type):
+        with self.__lock:
+            self._series(endpoint, ride_type).cache_hits += 1
+
+    def on_cache_miss(self, endpoint, ride_type):
+        with self.__lock:
+            self._series(endpoint, ride_type).cache_misses += 1
+
+    def reset(self):
+        with self.__lock:
+            self.__series.clear()
+
+    def snapshot(self):
+        """Returns a list of dicts, one per endpoint and ride_type, with the request count, latency sum, p50/p99
+        estimates and cumulative bucket counts, the status codes, errors, retries, bytes and cache hits
+
+        :return: list of dict
+        """
+        with self.__lock:
+            result = []
+            for (endpoint, ride_type), series in sorted(self.__series.items(), key=lambda item: (item[0][0],
+                                                                                                 item[0][1] or "")):
+                latency, cumulative, buckets = series.latency, 0, []
+                for bound, count in zip(self.buckets + (float("inf"),), latency.counts):
+                    cumulative += count
+                    buckets.append((bound, cumulative))
+                result.append({"endpoint"     : endpoint,
+                               "ride_type"    : ride_type,
+                               "requests"     : latency.count,
+                               "latency_sum"  : latency.sum,
+                               "p50"          : latency.percentile(0.5),
+                               "p99"          : latency.percentile(0.99),
+                               "buckets"      : buckets,
+                               "statuses"     : dict(series.statuses),
+                               "errors"       : series.errors,
+                               "retries"      : series.retries,
+                               "bytes_in"     : series.bytes_in,
+                               "bytes_out"    : series.bytes_out,
+                               "cache_hits"   : series.cache_hits,
+                               "cache_misses" : series.cache_misses})
+            return result
+
+    def prometheus(self, prefix="lyft_sdk"):
+        """Returns the metrics in the Prometheus text exposition format
+
+        :param prefix: Prefix of the metric names
+        :return: str
+        """
+        lines = []
+        for series in self.snapshot():
+            labels = 'endpoint="{}",ride_type="{}"'.format(series["endpoint"], series["ride_type"] or "")
+            for bound, count in series["buckets"]:
+                lines.append('{}_request_seconds_bucket{{{},le="{}"}} {}'.format(
+                    prefix, labels, "+Inf" if bound == float("inf") else bound, count))
+            lines.append("{}_request_seconds_sum{{{}}} {}".format(prefix, labels, series["latency_sum"]))
+            lines.append("{}_request_seconds_count{{{}}} {}".format(prefix, labels, series["requests"]))
+            for status, count in sorted(series["statuses"].items()):
+                lines.append('{}_responses_total{{{},status="{}"}} {}'.format(prefix, labels, status, count))
+            for name in ("errors", "retries", "bytes_in", "bytes_out", "cache_hits", "cache_misses"):
+                lines.append("{}_{}_total{{{}}} {}".format(prefix, name, labels, series[name]))
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,472 @@
+import datetime
+import http.client
+import io
+import selectors
+import socket
+import ssl
+import threading
+import time
+import zlib
+from urllib.parse import urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import default_headers, get_encoding_from_headers
+
+try:
+    import h2.config
+    import h2.connection
+    import h2.errors
+    import h2.events
+    import h2.exceptions
+except ImportError:
+    h2 = None
+
+from lyft.transport.transport import Transport
+
+# True when h2 is installed: pip install h2
+HTTP2_AVAILABLE           = h2 is not None
+DEFAULT_HTTP2_CONNECTIONS = 4
+# the Lyft API, like most HTTP/2 servers, lets a client open 100 concurrent streams per connection
+DEFAULT_HTTP2_STREAMS     = 100
+
+_READ_SIZE = 65536
+
+# connection specific headers, forbidden in HTTP/2
+_HOP_BY_HOP = frozenset(("connection", "host", "keep-alive", "proxy-connection", "transfer-encoding", "upgrade"))
+
+
+def _timeouts(timeout):
+    """(connect, read) seconds of a float or (connect, read) timeout, as given to Transport"""
+    if isinstance(timeout, tuple):
+        return timeout
+    return timeout, timeout
+
+
+def _decode(body, encoding):
+    if encoding == "gzip":
+        return zlib.decompress(body, 16 + zlib.MAX_WBITS)
+    if encoding == "deflate":
+        try:
+            return zlib.decompress(body)
+        except zlib.error:
+            return zlib.decompress(body, -zlib.MAX_WBITS)
+    return body
+
+
+def _response(prepared, stream):
+    """requests.Response of a completed stream, so that the SDK handles it like the responses of Transport"""
+    headers = CaseInsensitiveDict((name, value) for name, value in stream.headers if not name.startswith(":"))
+    status  = int(dict(stream.headers)[":status"])
+
+    response             = requests.Response()
+    response.status_code = status
+    response.reason      = http.client.responses.get(status, "")
+    response.headers     = headers
+    response.raw         = io.BytesIO(_decode(b"".join(stream.body), headers.get("content-encoding")))
+    response.url         = prepared.url
+    response.request     = prepared
+    response.encoding    = get_encoding_from_headers(headers)
+    response.elapsed     = datetime.timedelta(seconds=stream.elapsed)
+    return response
+
+
+class _NotNegotiated(Exception):
+    """The TLS server did not select h2 during the handshake"""
+
+
+class _Stream(object):
+    __slots__ = ("headers", "body", "done", "error", "started", "elapsed")
+
+    def __init__(self):
+        self.headers = None
+        self.body    = []
+        self.done    = threading.Event()
+        self.error   = None
+        self.started = time.perf_counter()
+        self.elapsed = 0
+
+
+class _Connection(object):
+
+    def __init__(self, scheme, host, port, connect_timeout):
+        """HTTP/2 connection whose streams any thread opens, while a thread of its own reads and writes the socket.
+        A stream is given its id and its headers are queued under the same lock, so that the streams are opened in
+        the order of their ids as HTTP/2 requires, whatever the number of threads sharing the connection.
+
+        Raises _NotNegotiated if a TLS server does not select h2, OSError if the connection fails.
+
+        :param scheme: "https" to negotiate HTTP/2 during the TLS handshake, "http" to speak it with prior knowledge
+        :param host: Host name
+        :param port: Port
+        :param connect_timeout: Seconds allowed to connect, None to wait as long as needed
+        """
+        sock = socket.create_connection((host, port), timeout=connect_timeout)
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            if scheme == "https":
+                context = ssl.create_default_context()
+                context.set_alpn_protocols(["h2", "http/1.1"])
+                sock = context.wrap_socket(sock, server_hostname=host)
+                if sock.selected_alpn_protocol() != "h2":
+                    raise _NotNegotiated(host)
+            sock.setblocking(False)
+        except BaseException:
+            sock.close()
+            raise
+
+        # reason no stream can be opened anymore: the connection failed, was closed or the server is going away
+        self.error       = None
+        self.__sock      = sock
+        self.__h2        = h2.connection.H2Connection(h2.config.H2Configuration(client_side=True,
+                                                                                header_encoding="utf-8"))
+        # guards self.__h2, self.__streams and self.__outbound, notified when a frame is received
+        self.__changed   = threading.Condition()
+        self.__streams   = {}
+        self.__outbound  = bytearray()
+        self.__tickets   = 0
+        self.__turn      = 0
+        # tickets of the requests which stopped waiting for their turn
+        self.__abandoned = set()
+        self.__wake_r, self.__wake_w = socket.socketpair()
+        self.__wake_r.setblocking(False)
+        self.__wake_w.setblocking(False)
+        with self.__changed:
+            self.__h2.initiate_connection()
+            self.__outbound += self.__h2.data_to_send()
+        threading.Thread(target=self.__run, name="lyft-http2", daemon=True).start()
+
+    def request(self, headers, body, read_timeout):
+        """Sends a request, returns its completed _Stream
+
+        :param headers: List of (name, value), pseudo-headers first
+        :param body: bytes
+        :param read_timeout: Seconds to wait for the response, None to wait as long as needed
+        """
+        stream   = _Stream()
+        deadline = time.monotonic() + read_timeout if read_timeout is not None else None
+        with self.__changed:
+            # the requests over the concurrent streams the server allows wait for their turn, first come first served
+            h2_connection = self.__h2
+            ticket        = self.__tickets
+            self.__tickets += 1
+            while self.error is None and (ticket != self.__turn or h2_connection.open_outbound_streams >=
+                                          h2_connection.remote_settings.max_concurrent_streams):
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    # the requests behind it must not wait for a turn it will never take
+                    if ticket == self.__turn:
+                        self.__next_turn()
+                    else:
+                        self.__abandoned.add(ticket)
+                    raise requests.ReadTimeout("no stream available in {} seconds".format(read_timeout))
+                self.__changed.wait(remaining)
+            if self.error is not None:
+                raise requests.ConnectionError(self.error)
+            self.__next_turn()
+            try:
+                stream_id = h2_connection.get_next_available_stream_id()
+            except h2.exceptions.NoAvailableStreamIDError:
+                self.error = "no stream id left"
+                raise requests.ConnectionError(self.error)
+
+            self.__streams[stream_id] = stream
+            h2_connection.send_headers(stream_id, headers, end_stream=not body)
+            while body and not stream.done.is_set():
+                size = min(h2_connection.local_flow_control_window(stream_id), h2_connection.max_outbound_frame_size)
+                if size <= 0:
+                    self.__flush()
+                    self.__changed.wait()
+                    continue
+                h2_connection.send_data(stream_id, body[:size], end_stream=size >= len(body))
+                body = body[size:]
+            self.__flush()
+
+        if not stream.done.wait(read_timeout):
+            with self.__changed:
+                if self.__streams.pop(stream_id, None) is not None:
+                    self.__h2.reset_stream(stream_id, h2.errors.ErrorCodes.CANCEL)
+                    self.__flush()
+            raise requests.ReadTimeout("no response in {} seconds".format(read_timeout))
+        if stream.error is not None:
+            raise requests.ConnectionError(stream.error)
+        return stream
+
+    def close(self):
+        """Fails the requests in flight and sends GOAWAY, the socket is closed once it is written"""
+        with self.__changed:
+            if self.error is None:
+                self.__h2.close_connection()
+                self.__fail("connection closed")
+                self.__flush()
+
+    def __next_turn(self):
+        """Lets the next request waiting for a stream take its turn, skipping the ones which timed out, the lock being
+        held"""
+        self.__turn += 1
+        while self.__turn in self.__abandoned:
+            self.__abandoned.remove(self.__turn)
+            self.__turn += 1
+        self.__changed.notify_all()
+
+    def __flush(self):
+        """Queues the frames h2 produced for the I/O thread, the lock being held"""
+        was_empty = not self.__outbound
+        self.__outbound += self.__h2.data_to_send()
+        if was_empty and self.__outbound:
+            try:
+                self.__wake_w.send(b"\0")
+            except OSError:
+                # a wake up is already pending, or the I/O thread is gone
+                pass
+
+    def __fail(self, error, last_stream_id=0):
+        """Fails the streams above last_stream_id and prevents new ones, the lock being held"""
+        if self.error is None:
+            self.error = error
+        for stream_id in [stream_id for stream_id in self.__streams if stream_id > last_stream_id]:
+            stream       = self.__streams.pop(stream_id)
+            stream.error = error
+            stream.done.set()
+        self.__changed.notify_all()
+
+    def __run(self):
+        selector = selectors.DefaultSelector()
+        selector.register(self.__wake_r, selectors.EVENT_READ)
+        selector.register(self.__sock, selectors.EVENT_READ)
+        pending = b""
+        try:
+            while True:
+                with self.__changed:
+                    pending += self.__outbound
+                    self.__outbound.clear()
+                    done = self.error is not None and not self.__streams
+                if pending:
+                    pending = pending[self.__send(pending):]
+                if done and not pending:
+                    return
+
+                selector.modify(self.__sock, selectors.EVENT_READ | (selectors.EVENT_WRITE if pending else 0))
+                for key, events in selector.select():
+                    if key.fileobj is self.__wake_r:
+                        try:
+                            self.__wake_r.recv(_READ_SIZE)
+                        except BlockingIOError:
+                            pass
+                    elif events & selectors.EVENT_READ:
+                        self.__receive()
+        except Exception as error:
+            # socket or protocol error: the requests in flight must not wait for their responses forever
+            with self.__changed:
+                self.__fail(error)
+        finally:
+            selector.close()
+            self.__sock.close()
+            self.__wake_r.close()
+            self.__wake_w.close()
+
+    def __send(self, data):
+        try:
+            return self.__sock.send(data)
+        except (BlockingIOError, ssl.SSLWantReadError, ssl.SSLWantWriteError):
+            return 0
+
+    def __receive(self):
+        # reads until the socket would block, TLS may have decrypted more than the selector sees
+        while True:
+            try:
+                data = self.__sock.recv(_READ_SIZE)
+            except (BlockingIOError, ssl.SSLWantReadError, ssl.SSLWantWriteError):
+                return
+            if not data:
+                raise ConnectionResetError("connection closed by the server")
+
+            with self.__changed:
+                for event in self.__h2.receive_data(data):
+                    self.__received(event)
+                self.__flush()
+                self.__changed.notify_all()
+
+    def __received(self, event):
+        if isinstance(event, h2.events.ResponseReceived):
+            stream = self.__streams.get(event.stream_id)
+            if stream is not None:
+                stream.headers = event.headers
+                stream.elapsed = time.perf_counter() - stream.started
+        elif isinstance(event, h2.events.DataReceived):
+            stream = self.__streams.get(event.stream_id)
+            if stream is not None:
+                stream.body.append(event.data)
+            self.__h2.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+        elif isinstance(event, h2.events.StreamEnded):
+            stream = self.__streams.pop(event.stream_id, None)
+            if stream is not None:
+                stream.done.set()
+        elif isinstance(event, h2.events.StreamReset):
+            stream = self.__streams.pop(event.stream_id, None)
+            if stream is not None:
+                stream.error = "stream reset by the server: {}".format(event.error_code)
+                stream.done.set()
+        elif isinstance(event, h2.events.ConnectionTerminated):
+            # GOAWAY: the streams the server did not process can be retried on another connection
+            self.__fail("connection closed by the server: {}".format(event.error_code), event.last_stream_id or 0)
+
+
+class _Http2Session(object):
+
+    def __init__(self, connections, streams, prior_knowledge, fallback):
+        """requests.Session look-alike sending the requests over HTTP/2, so that Transport sends its requests,
+        retries them and reports them to its hooks unchanged. A request goes to the first connection to its origin
+        with fewer than streams requests in flight: a connection is only opened when the previous ones are full,
+        up to connections per origin, after which the least busy one is used.
+
+        The origins which do not speak HTTP/2 are sent to the fallback session: plain http:// without prior
+        knowledge and the TLS servers not selecting h2.
+
+        :param connections: Maximum number of connections per origin
+        :param streams: Requests in flight on a connection before the next one is opened
+        :param prior_knowledge: Set to True to speak HTTP/2 to the plain http:// origins
+        :param fallback: requests.Session
+        """
+        self.__connections     = connections
+        self.__streams         = streams
+        self.__prior_knowledge = prior_knowledge
+        self.__fallback        = fallback
+        self.__lock            = threading.Lock()
+        # origin -> list of [_Connection, requests in flight]
+        self.__pools           = {}
+        # origin -> Event set once the connection a thread is opening to it is open or failed
+        self.__opening         = {}
+        self.__http1           = set()
+        self.__user_agent      = default_headers()["User-Agent"]
+
+    def request(self, method, url, timeout=None, **kwargs):
+        split  = urlsplit(url)
+        origin = (split.scheme, split.hostname, split.port or (443 if split.scheme == "https" else 80))
+        if origin in self.__http1 or (split.scheme == "http" and not self.__prior_knowledge):
+            return self.__fallback.request(method, url, timeout=timeout, **kwargs)
+
+        headers = CaseInsensitiveDict({"user-agent": self.__user_agent, "accept-encoding": "gzip, deflate",
+                                       "accept": "*/*"})
+        headers.update(kwargs.get("headers") or {})
+        prepared = requests.Request(method, url, **dict(kwargs, headers=headers)).prepare()
+        body     = prepared.body.encode("utf-8") if isinstance(prepared.body, str) else prepared.body or b""
+        request_headers = [(":method", prepared.method), (":scheme", split.scheme), (":authority", split.netloc),
+                           (":path", prepared.path_url)]
+        request_headers.extend((name.lower(), value) for name, value in prepared.headers.items()
+                               if name.lower() not in _HOP_BY_HOP)
+
+        connect_timeout, read_timeout = _timeouts(timeout)
+        entry = self.__acquire(origin, connect_timeout)
+        if entry is None:
+            return self.__fallback.request(method, url, timeout=timeout, **kwargs)
+        try:
+            return _response(prepared, entry[0].request(request_headers, body, read_timeout))
+        finally:
+            with self.__lock:
+                entry[1] -= 1
+
+    def __acquire(self, origin, connect_timeout):
+        """Returns the pool entry of the connection to send a request on, None if the origin only speaks HTTP/1.1"""
+        while True:
+            with self.__lock:
+                if origin in self.__http1:
+                    return None
+                pool = self.__pools.setdefault(origin, [])
+                pool[:] = [entry for entry in pool if entry[0].error is None]
+                entry   = next((entry for entry in pool if entry[1] < self.__streams), None)
+                opening = self.__opening.get(origin)
+                if entry is None and opening is None and len(pool) >= self.__connections:
+                    entry = min(pool, key=lambda entry: entry[1])
+                if entry is not None:
+                    entry[1] += 1
+                    return entry
+                if opening is None:
+                    opening = self.__opening[origin] = threading.Event()
+                    break
+            # another thread is opening a connection to the origin, the request shares it instead of opening its own
+            if not opening.wait(connect_timeout):
+                raise requests.ConnectTimeout("no connection to {}:{} in {} seconds".format(origin[1], origin[2],
+                                                                                           connect_timeout))
+
+        # opened outside the lock, so that a slow origin does not hold up the requests to the other ones
+        entry = None
+        try:
+            entry = [_Connection(origin[0], origin[1], origin[2], connect_timeout), 1]
+        except _NotNegotiated:
+            with self.__lock:
+                self.__http1.add(origin)
+            return None
+        except socket.timeout as error:
+            raise requests.ConnectTimeout(error) from error
+        except OSError as error:
+            raise requests.ConnectionError(error) from error
+        finally:
+            with self.__lock:
+                del self.__opening[origin]
+                if entry is not None:
+                    self.__pools.setdefault(origin, []).append(entry)
+            opening.set()
+        return entry
+
+    def close(self):
+        with self.__lock:
+            pools, self.__pools = self.__pools, {}
+        for pool in pools.values():
+            for connection, _ in pool:
+                connection.close()
+        self.__fallback.close()
+
+
+def _new_http2_transport(kwargs):
+    return Http2Transport(**kwargs)
+
+
+class Http2Transport(Transport):
+
+    def __init__(self, max_connections=DEFAULT_HTTP2_CONNECTIONS, streams_per_connection=DEFAULT_HTTP2_STREAMS,
+                 prior_knowledge=False, **kwargs):
+        """Transport multiplexing concurrent requests over a few HTTP/2 connections, instead of one connection per
+        request in flight with HTTP/1.1: a fan-out of hundreds of get_driver_eta and get_ride_estimates calls from
+        a thread pool shares max_connections connections. Pass it to any SDK class like a Transport; the rate
+        limiter, retry policy, circuit breaker, single flight and hooks work the same.
+
+        Requires h2 (pip install h2). Without it, and for the servers which do not select HTTP/2 during the TLS
+        handshake, the requests are sent over HTTP/1.1 by the requests session of Transport, with a pool of
+        max_connections connections. http2 is False when h2 is missing.
+
+        :param max_connections: Maximum number of connections per host
+        :param streams_per_connection: Requests in flight on a connection before the next connection is opened, at
+                                       most the concurrent streams the server allows
+        :param prior_knowledge: Set to True to speak HTTP/2 to a plain http:// server without negotiation, eg: a
+                                local lyft.testing.http2.Http2Simulator. The server must support HTTP/2
+        :param kwargs: Other arguments of Transport, eg: timeout, base_url, rate_limiter or retry_policy
+        """
+        self.max_connections        = max_connections
+        self.streams_per_connection = streams_per_connection
+        self.prior_knowledge        = prior_knowledge
+        self.http2                  = HTTP2_AVAILABLE
+        kwargs.setdefault("pool_maxsize", max_connections)
+        Transport.__init__(self, **kwargs)
+
+    def _create_session(self):
+        session = Transport._create_session(self)
+        if not self.http2:
+            return session
+        return _Http2Session(self.max_connections, self.streams_per_connection, self.prior_knowledge, session)
+
+    def __reduce__(self):
+        return _new_http2_transport, ({"max_connections"        : self.max_connections,
+                                       "streams_per_connection" : self.streams_per_connection,
+                                       "prior_knowledge"        : self.prior_knowledge,
+                                       "pool_connections"       : self.pool_connections,
+                                       "pool_maxsize"           : self.pool_maxsize,
+                                       "pool_block"             : self.pool_block,
+                                       "timeout"                : self.timeout,
+                                       "base_url"               : self.base_url,
+                                       "rate_limiter"           : self.rate_limiter,
+                                       "rate_limit_timeout"     : self.rate_limit_timeout,
+                                       "retry_policy"           : self.retry_policy,
+                                       "circuit_breaker"        : self.circuit_breaker,
+                                       "single_flight"          : self.single_flight,
+                                       "hooks"                  : self.hooks},)
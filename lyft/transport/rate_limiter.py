@@ -0,0 +1,207 @@
+import threading
+import time
+
+from lyft.util.fork import register_after_fork
+from lyft.util.lazy import lazy_module
+
+# asyncio takes longer to import than the rest of the SDK, it is only imported by the first coroutine
+asyncio = lazy_module("asyncio")
+
+DEFAULT_WINDOW = 60
+
+
+class RateLimitExceeded(Exception):
+    """Raised by a transport when no rate limit token could be acquired in time"""
+
+
+class RateLimiter(object):
+
+    def __init__(self, rate=None, capacity=None, window=DEFAULT_WINDOW, clock=time.monotonic):
+        """Token bucket pacing the requests sent to the Lyft API. Share one RateLimiter between the transports of
+        an application so that Availability, Rides and the authentication calls draw from the same budget.
+
+        The bucket is seeded and continuously corrected from the x-ratelimit-limit and x-ratelimit-remaining
+        headers of the responses: the limit becomes the burst capacity, spread over window seconds, and the bucket
+        never holds more tokens than the API reports as remaining. A 429 response empties the bucket until its
+        Retry-After delay has passed. Until the first headers arrive the limiter lets everything through, unless a
+        rate is given.
+
+        The bucket lives in the memory of a process: forked workers each start from a copy of it. Use a
+        lyft.transport.coordinator.SharedRateLimiter to share one budget between processes.
+
+        :param rate: Initial number of requests per second, None for no limit until the headers are seen
+        :param capacity: Initial burst size, defaults to rate
+        :param window: Seconds over which x-ratelimit-limit requests are allowed
+        :param clock: function returning the current time in seconds
+        """
+        self.rate            = rate
+        self.capacity        = capacity if capacity is not None else rate
+        self.window          = window
+        self.acquired        = 0
+        self.delayed         = 0
+        self.rejected        = 0
+        self.throttled       = 0
+        self.waiting         = 0
+        self.wait_time       = 0.0
+        self.__clock         = clock
+        self.__tokens        = self.capacity
+        self.__updated_at    = clock()
+        self.__blocked_until = 0
+        self.__lock          = threading.Lock()
+        register_after_fork(self)
+
+    def _after_fork(self):
+        self.__lock  = threading.Lock()
+        self.waiting = 0
+
+    def __reduce__(self):
+        # the bucket is not copied, the limits learned from the headers are
+        return RateLimiter, (self.rate, self.capacity, self.window, self.__clock)
+
+    def _synchronized(self):
+        """Context manager guarding the bucket, see SharedRateLimiter"""
+        return self.__lock
+
+    def _state(self):
+        """Returns the bucket as a list of numbers. Caller holds the lock"""
+        return [self.rate, self.capacity, self.__tokens, self.__updated_at, self.__blocked_until]
+
+    def _set_state(self, state):
+        """Replaces the bucket by a list returned by _state. Caller holds the lock"""
+        self.rate, self.capacity, self.__tokens, self.__updated_at, self.__blocked_until = state
+
+    def _refill(self, now):
+        if self.rate is not None:
+            self.__tokens = min(self.capacity, self.__tokens + (now - self.__updated_at) * self.rate)
+        self.__updated_at = now
+
+    def _reserve(self, tokens):
+        """Takes the tokens if available and returns 0, otherwise returns the seconds to wait. Caller holds the lock"""
+        now = self.__clock()
+        if now < self.__blocked_until:
+            return self.__blocked_until - now
+
+        self._refill(now)
+        if self.rate is None or self.__tokens >= tokens:
+            if self.rate is not None:
+                self.__tokens -= tokens
+            self.acquired += 1
+            return 0
+        if self.rate <= 0:
+            return self.window
+        return (tokens - self.__tokens) / self.rate
+
+    def try_acquire(self, tokens=1):
+        """Takes the tokens without waiting
+
+        :return: True if the tokens were taken, False otherwise
+        """
+        with self._synchronized():
+            if self._reserve(tokens) == 0:
+                return True
+            self.rejected += 1
+            return False
+
+    def _wait(self, tokens, timeout):
+        """Generator of the delays to sleep before the tokens are taken, shared by acquire and acquire_async"""
+        deadline = None if timeout is None else self.__clock() + timeout
+        queued   = False
+        try:
+            while True:
+                with self._synchronized():
+                    delay = self._reserve(tokens)
+                    if delay == 0:
+                        return
+                    if deadline is not None and self.__clock() + delay > deadline:
+                        self.rejected += 1
+                        raise RateLimitExceeded("no rate limit token available within {}s".format(timeout))
+                    if not queued:
+                        queued = True
+                        self.delayed += 1
+                        self.waiting += 1
+                    self.wait_time += delay
+                yield delay
+        finally:
+            if queued:
+                with self._synchronized():
+                    self.waiting -= 1
+
+    def acquire(self, tokens=1, timeout=None):
+        """Blocks until the tokens are taken. Raises RateLimitExceeded if that takes longer than timeout seconds
+
+        :param tokens: Number of tokens to take
+        :param timeout: Maximum number of seconds to wait, None to wait as long as needed
+        """
+        for delay in self._wait(tokens, timeout):
+            time.sleep(delay)
+
+    async def acquire_async(self, tokens=1, timeout=None):
+        """asyncio version of acquire, waiting does not block the event loop"""
+        for delay in self._wait(tokens, timeout):
+            await asyncio.sleep(delay)
+
+    def update_from_headers(self, headers):
+        """Corrects the bucket from the x-ratelimit-limit and x-ratelimit-remaining response headers
+
+        :param headers: Case insensitive response headers
+        """
+        limit     = headers.get("x-ratelimit-limit")
+        remaining = headers.get("x-ratelimit-remaining")
+        if limit is None and remaining is None:
+            return
+
+        with self._synchronized():
+            now    = self.__clock()
+            seeded = self.rate is not None
+            self._refill(now)
+            if limit is not None:
+                self.capacity = float(limit)
+                self.rate     = self.capacity / self.window
+            if remaining is not None:
+                remaining     = float(remaining)
+                self.__tokens = min(self.__tokens, remaining) if seeded else remaining
+            elif not seeded:
+                self.__tokens = self.capacity
+
+    def throttle(self, retry_after=None):
+        """Empties the bucket after a 429 response, for retry_after seconds if given
+
+        :param retry_after: Seconds to wait before sending the next request
+        """
+        with self._synchronized():
+            now = self.__clock()
+            self._refill(now)
+            self.throttled += 1
+            self.__tokens = 0 if self.rate is not None else self.__tokens
+            if retry_after:
+                self.__blocked_until = max(self.__blocked_until, now + float(retry_after))
+
+    def observe(self, response):
+        """Updates the bucket from a response, called by the transports after every request"""
+        self.update_from_headers(response.headers)
+        if response.status_code == 429:
+            retry_after = response.headers.get("retry-after")
+            try:
+                self.throttle(float(retry_after) if retry_after is not None else None)
+            except ValueError:
+                self.throttle()
+
+    def metrics(self):
+        """Returns the counters of the limiter:
+        acquired: requests let through, delayed: requests that had to wait, waiting: requests waiting right now,
+        rejected: requests refused by try_acquire or a timeout, throttled: 429 responses received,
+        wait_time: total seconds spent waiting
+
+        :return: dict
+        """
+        with self._synchronized():
+            self._refill(self.__clock())
+            return {"acquired"  : self.acquired,
+                    "delayed"   : self.delayed,
+                    "waiting"   : self.waiting,
+                    "rejected"  : self.rejected,
+                    "throttled" : self.throttled,
+                    "wait_time" : self.wait_time,
+                    "tokens"    : self.__tokens,
+                    "rate"      : self.rate,
+                    "capacity"  : self.capacity}
@@ -0,0 +1,149 @@
+import random
+import threading
+import time
+
+from lyft.util.fork import register_after_fork
+
+# (connect timeout, read timeout) in seconds
+DEFAULT_TIMEOUT        = (3.05, 30)
+DEFAULT_RETRY_STATUSES = (429, 500, 502, 503, 504)
+IDEMPOTENT_METHODS     = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+
+
+def cap_timeout(timeout, remaining):
+    """Caps a float or (connect, read) timeout to the remaining seconds before a deadline"""
+    remaining = max(remaining, 0.001)
+    if isinstance(timeout, tuple):
+        return tuple(min(value, remaining) if value is not None else remaining for value in timeout)
+    return min(timeout, remaining) if timeout is not None else remaining
+
+
+class CircuitOpenError(Exception):
+    """Raised by a transport instead of sending a request while its circuit breaker is open"""
+
+
+class RetryPolicy(object):
+
+    def __init__(self, max_attempts=3, backoff_factor=0.25, max_backoff=10, jitter=True, deadline=None,
+                 retry_statuses=DEFAULT_RETRY_STATUSES, idempotent_methods=IDEMPOTENT_METHODS, random=random.random):
+        """Retries idempotent requests failing with a transient error (connection error, timeout or one of
+        retry_statuses) with an exponential backoff. Requests that are not idempotent, like a ride creation, are
+        never retried since the first attempt may have reached Lyft.
+
+        The SDK methods tell the transport whether they are idempotent, for other requests the HTTP method decides.
+
+        :param max_attempts: Maximum number of attempts of a request, including the first one
+        :param backoff_factor: Delay in seconds before the first retry, doubled at every retry
+        :param max_backoff: Maximum delay in seconds between two attempts
+        :param jitter: Set to True to wait a random delay between 0 and the backoff ("full jitter")
+        :param deadline: Default maximum number of seconds spent on a request, attempts and delays included
+        :param retry_statuses: HTTP status codes that are retried
+        :param idempotent_methods: HTTP methods retried by default
+        :param random: function returning a float in [0, 1)
+        """
+        self.max_attempts       = max_attempts
+        self.backoff_factor     = backoff_factor
+        self.max_backoff        = max_backoff
+        self.jitter             = jitter
+        self.deadline           = deadline
+        self.retry_statuses     = frozenset(retry_statuses)
+        self.idempotent_methods = frozenset(idempotent_methods)
+        self.__random           = random
+
+    def is_idempotent(self, method):
+        return method.upper() in self.idempotent_methods
+
+    def should_retry(self, attempt, response=None):
+        """Tells whether the attempt number attempt should be followed by another one
+
+        :param attempt: Number of attempts made so far
+        :param response: Response of the attempt, None if it failed with a connection error or a timeout
+        :return: bool
+        """
+        if attempt >= self.max_attempts:
+            return False
+        return response is None or response.status_code in self.retry_statuses
+
+    def retry_delay(self, attempt, response=None):
+        """Returns the number of seconds to wait after the attempt number attempt, honouring Retry-After"""
+        delay = min(self.max_backoff, self.backoff_factor * (2 ** (attempt - 1)))
+        if self.jitter:
+            delay = self.__random() * delay
+
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after is not None:
+            try:
+                delay = max(delay, min(float(retry_after), self.max_backoff))
+            except ValueError:
+                pass
+        return delay
+
+
+class CircuitBreaker(object):
+
+    CLOSED    = "closed"
+    OPEN      = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, recovery_timeout=30, clock=time.monotonic):
+        """Stops sending requests to a degraded API. After failure_threshold consecutive failures (5xx responses,
+        connection errors or timeouts) the circuit opens and requests fail immediately with CircuitOpenError. After
+        recovery_timeout seconds a single trial request is let through: the circuit closes again if it succeeds and
+        re-opens otherwise.
+
+        :param failure_threshold: Number of consecutive failures opening the circuit
+        :param recovery_timeout: Seconds the circuit stays open before a trial request
+        :param clock: function returning the current time in seconds
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout  = recovery_timeout
+        self.state             = self.CLOSED
+        self.failures          = 0
+        self.rejected          = 0
+        self.__opened_at       = 0
+        self.__clock           = clock
+        self.__lock            = threading.Lock()
+        register_after_fork(self)
+
+    def _after_fork(self):
+        self.__lock = threading.Lock()
+
+    def __reduce__(self):
+        return self.__class__, (self.failure_threshold, self.recovery_timeout, self.__clock)
+
+    def before_request(self):
+        """Raises CircuitOpenError if the request must not be sent"""
+        with self.__lock:
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.OPEN and self.__clock() - self.__opened_at >= self.recovery_timeout:
+                self.state = self.HALF_OPEN
+                return
+
+            self.rejected += 1
+            raise CircuitOpenError("Lyft API circuit is {} after {} failures".format(self.state, self.failures))
+
+    def record_success(self):
+        with self.__lock:
+            self.state    = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self.__lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state       = self.OPEN
+                self.__opened_at = self.__clock()
+
+    def release(self):
+        """Gives back the trial request of a half open circuit when it ended without a verdict on the API, eg: it was
+        cancelled or a hook failed, so that the next request is the trial. Not a failure"""
+        with self.__lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+
+    def record(self, response):
+        if response.status_code >= 500:
+            self.record_failure()
+        else:
+            self.record_success()
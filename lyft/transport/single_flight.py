@@ -0,0 +1,124 @@
+import threading
+from urllib.parse import parse_qsl, urlsplit, urlunsplit
+
+from lyft.util.fork import register_after_fork
+from lyft.util.lazy import lazy_module
+
+# asyncio takes longer to import than the rest of the SDK, it is only imported by the first coroutine
+asyncio = lazy_module("asyncio")
+
+
+def request_key(method, url, params=None, headers=None):
+    """Returns a key identifying a request: its method, URL with sorted query parameters and Authorization header,
+    so that only requests made with the same token scope are collapsed"""
+    scheme, netloc, path, query, _ = urlsplit(url)
+    query = parse_qsl(query, keep_blank_values=True)
+    if params:
+        query.extend((key, str(value)) for key, value in dict(params).items() if value is not None)
+    authorization = None
+    for name, value in (headers or {}).items():
+        if name.lower() == "authorization":
+            authorization = value
+    return method.upper(), urlunsplit((scheme, netloc, path, "", "")), tuple(sorted(query)), authorization
+
+
+class _Call(object):
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event  = threading.Event()
+        self.result = None
+        self.error  = None
+
+
+class SingleFlight(object):
+
+    def __init__(self):
+        """Collapses identical concurrent requests into a single upstream call whose result is handed to every
+        caller. A request arriving after the call completed starts a new one, nothing is cached.
+
+        Threads use do and asyncio tasks use do_async, a task cancelled while waiting does not cancel the shared
+        call.
+        """
+        self.calls     = 0
+        self.collapsed = 0
+        self.__lock    = threading.Lock()
+        self.__calls   = {}
+        self.__tasks   = {}
+        register_after_fork(self)
+
+    def _after_fork(self):
+        # the calls in flight belong to threads of the parent process, nobody would complete them in the child
+        self.__lock  = threading.Lock()
+        self.__calls = {}
+        self.__tasks = {}
+
+    def __reduce__(self):
+        return SingleFlight, ()
+
+    def do(self, key, function):
+        """Calls function, or waits for the identical call in flight and returns its result
+
+        :param key: Hashable identifying the call, see request_key
+        :param function: function without arguments
+        :return: result of function
+        """
+        with self.__lock:
+            self.calls += 1
+            call = self.__calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.__calls[key] = _Call()
+            else:
+                self.collapsed += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = function()
+            return call.result
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self.__lock:
+                del self.__calls[key]
+            call.event.set()
+
+    async def do_async(self, key, function):
+        """asyncio version of do
+
+        :param key: Hashable identifying the call, see request_key
+        :param function: coroutine function without arguments
+        :return: result of function
+        """
+        key = (id(asyncio.get_running_loop()), key)
+        with self.__lock:
+            self.calls += 1
+            task = self.__tasks.get(key)
+            if task is None:
+                task = self.__tasks[key] = asyncio.ensure_future(function())
+                task.add_done_callback(lambda _: self._forget(key, task))
+            else:
+                self.collapsed += 1
+
+        return await asyncio.shield(task)
+
+    def _forget(self, key, task):
+        with self.__lock:
+            if self.__tasks.get(key) is task:
+                del self.__tasks[key]
+
+    def stats(self):
+        """Returns the number of calls made and how many of them were collapsed into another one
+
+        :return: dict
+        """
+        with self.__lock:
+            return {"calls"     : self.calls,
+                    "collapsed" : self.collapsed,
+                    "in_flight" : len(self.__calls) + len(self.__tasks)}
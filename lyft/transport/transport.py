@@ -0,0 +1,224 @@
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from lyft.transport.hooks import _end_event, _retry_event, _start_event
+from lyft.transport.retry import DEFAULT_TIMEOUT, cap_timeout
+from lyft.transport.single_flight import request_key
+from lyft.util.fork import register_after_fork
+from lyft.util.url_util import API_HOST
+
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE     = 10
+
+
+class Transport(object):
+
+    def __init__(self, pool_connections=DEFAULT_POOL_CONNECTIONS, pool_maxsize=DEFAULT_POOL_MAXSIZE,
+                 pool_block=False, timeout=DEFAULT_TIMEOUT, base_url=None, rate_limiter=None,
+                 rate_limit_timeout=None, retry_policy=None, circuit_breaker=None, single_flight=None, hooks=None):
+        """HTTP transport shared by the SDK classes. It owns a keep-alive connection pool so that consecutive calls
+        to the Lyft API reuse the same TCP/TLS connection instead of opening a new one per request.
+
+        One Transport can (and should) be passed to every Availability, Rides, LyftPublicAuth, LyftUserAuth and
+        Session object of an application.
+
+        A Transport is fork safe: a forked child process opens its own connections on its first request instead of
+        using the sockets of the parent. It can be pickled, eg: to send SDK objects to multiprocessing workers, the
+        copy opens its own connections and the default transport is unpickled as the default transport of the
+        receiving process.
+
+        :param pool_connections: Number of per-host connection pools to keep
+        :param pool_maxsize: Maximum number of connections kept alive per host
+        :param pool_block: Set to True to block when the per-host limit is reached instead of opening a throwaway
+                           connection
+        :param timeout: Default timeout in seconds, either a float or a (connect, read) tuple
+        :param base_url: Optional scheme and host, eg: "http://127.0.0.1:8080", used instead of https://api.lyft.com
+        :param rate_limiter: Optional lyft.transport.rate_limiter.RateLimiter pacing the requests
+        :param rate_limit_timeout: Maximum number of seconds a request waits for the rate limiter before
+                                   RateLimitExceeded is raised, None to wait as long as needed and 0 to never wait
+        :param retry_policy: Optional lyft.transport.retry.RetryPolicy retrying transient failures
+        :param circuit_breaker: Optional lyft.transport.retry.CircuitBreaker failing fast while the API is degraded
+        :param single_flight: Optional lyft.transport.single_flight.SingleFlight sharing one upstream call between
+                              identical concurrent GET requests
+        :param hooks: Optional list of lyft.transport.hooks.Hooks notified of every attempt, retry and cache hit
+        """
+        self.pool_connections   = pool_connections
+        self.pool_maxsize       = pool_maxsize
+        self.pool_block         = pool_block
+        self.timeout            = timeout
+        self.base_url           = base_url.rstrip("/") if base_url else None
+        self.rate_limiter       = rate_limiter
+        self.rate_limit_timeout = rate_limit_timeout
+        self.retry_policy       = retry_policy
+        self.circuit_breaker    = circuit_breaker
+        self.single_flight      = single_flight
+        self.hooks              = tuple(hooks or ())
+        self.__session          = self._create_session()
+        register_after_fork(self)
+
+    def _create_session(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_connections,
+                              pool_maxsize=self.pool_maxsize,
+                              pool_block=self.pool_block)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def _after_fork(self):
+        # the pooled sockets are shared with the parent process, the child must not read or write them
+        self.__session = self._create_session()
+
+    def __reduce__(self):
+        if self is _default_transport:
+            return get_default_transport, ()
+        return Transport, (self.pool_connections, self.pool_maxsize, self.pool_block, self.timeout, self.base_url,
+                           self.rate_limiter, self.rate_limit_timeout, self.retry_policy, self.circuit_breaker,
+                           self.single_flight, self.hooks)
+
+    def _resolve_url(self, url):
+        if self.base_url is not None and url.startswith(API_HOST):
+            return self.base_url + url[len(API_HOST):]
+        return url
+
+    def _send(self, method, url, attempt=1, **kwargs):
+        # the rate limit is waited for first: past the recovery timeout, before_request lets a single trial request
+        # through, a RateLimitExceeded raised after it would leave the circuit half open for good
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(timeout=self.rate_limit_timeout)
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.before_request()
+
+        event = None
+        try:
+            if self.hooks:
+                event   = _start_event(self.hooks, method, url, attempt, kwargs.get("params"), kwargs.get("data"))
+                started = time.perf_counter()
+
+            try:
+                response = self.__session.request(method, url, **kwargs)
+            except Exception as error:
+                if event is not None:
+                    _end_event(self.hooks, event, time.perf_counter() - started, error=error)
+                raise
+
+            if event is not None:
+                event.timings["ttfb"] = response.elapsed.total_seconds()
+                _end_event(self.hooks, event, time.perf_counter() - started, response)
+        except (requests.RequestException, OSError):
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.record_failure()
+            raise
+        except BaseException:
+            # a hook error or an interruption says nothing about the API, a trial request is given back
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.release()
+            raise
+
+        if self.rate_limiter is not None:
+            self.rate_limiter.observe(response)
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.record(response)
+        return response
+
+    def request(self, method, url, idempotent=None, deadline=None, **kwargs):
+        """Sends a request over the pooled session, retrying it according to the retry policy
+
+        :param method: HTTP method, eg: "GET"
+        :param url: Absolute URL of the endpoint
+        :param idempotent: Whether the request may be sent more than once, defaults to the retry policy guess based
+                           on the HTTP method
+        :param deadline: Maximum number of seconds spent on the request, retries included, defaults to the retry
+                         policy deadline
+        :param kwargs: Any keyword argument accepted by requests, eg: headers, data, params, auth
+        :return: requests.Response
+        """
+        if self.single_flight is not None and method.upper() == "GET":
+            key = request_key(method, url, kwargs.get("params"), kwargs.get("headers"))
+            return self.single_flight.do(key, lambda: self._request(method, url, idempotent, deadline, **kwargs))
+        return self._request(method, url, idempotent, deadline, **kwargs)
+
+    def _request(self, method, url, idempotent, deadline, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        url    = self._resolve_url(url)
+        policy = self.retry_policy
+        if policy is None:
+            return self._send(method, url, **kwargs)
+
+        retry      = policy.is_idempotent(method) if idempotent is None else idempotent
+        deadline   = deadline if deadline is not None else policy.deadline
+        expires_at = time.monotonic() + deadline if deadline is not None else None
+        timeout    = kwargs["timeout"]
+        attempt    = 0
+        while True:
+            attempt += 1
+            if expires_at is not None:
+                kwargs["timeout"] = cap_timeout(timeout, expires_at - time.monotonic())
+
+            try:
+                response, error = self._send(method, url, attempt, **kwargs), None
+            except (requests.ConnectionError, requests.Timeout) as exception:
+                response, error = None, exception
+
+            if not retry or not policy.should_retry(attempt, response):
+                break
+            delay = policy.retry_delay(attempt, response)
+            if expires_at is not None and time.monotonic() + delay >= expires_at:
+                break
+            if self.hooks:
+                _retry_event(self.hooks, method, url, attempt, kwargs.get("params"), kwargs.get("data"), delay,
+                             response, error)
+            time.sleep(delay)
+
+        if error is not None:
+            raise error
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request("PUT", url, **kwargs)
+
+    def close(self):
+        """Closes every pooled connection"""
+        self.__session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+_default_transport = None
+_default_transport_lock = threading.Lock()
+
+
+def _reset_default_transport_lock():
+    global _default_transport_lock
+    _default_transport_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_default_transport_lock)
+
+
+def get_default_transport():
+    """Returns the process wide Transport used by the SDK classes when none is given to them
+
+    :return: Transport
+    """
+    global _default_transport
+    if _default_transport is None:
+        with _default_transport_lock:
+            if _default_transport is None:
+                _default_transport = Transport()
+    return _default_transport
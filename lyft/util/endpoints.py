@@ -0,0 +1,89 @@
+import json
+from functools import lru_cache
+from urllib.parse import quote, quote_plus
+
+# query values are mostly a handful of ride types, encoding them once each keeps urllib off the hot path
+_quote_plus = lru_cache(maxsize=1024)(quote_plus)
+
+
+class Endpoint(object):
+    __slots__ = ("name", "method", "path", "params", "required", "body", "idempotent", "__query", "__has_path")
+
+    def __init__(self, name, method, path, params=(), required=(), body=None, idempotent=None):
+        """Declarative description of an API endpoint, compiled once into a URL and body builder
+
+        :param name: Name of the endpoint, eg: "eta"
+        :param method: HTTP method
+        :param path: Absolute URL of the endpoint, with {name} placeholders for the path parameters, eg: {ride_id}
+        :param params: Sequence of (name, type) of the query parameters, in the order url receives their values.
+                       type is float or str
+        :param required: Names of the query parameters always sent, the others are left out when None
+        :param body: Function building the JSON body from the arguments given to data
+        :param idempotent: Passed to Transport.request, None to decide from the method
+        """
+        self.name       = name
+        self.method     = method
+        self.path       = path
+        self.params     = tuple(params)
+        self.required   = frozenset(required)
+        self.body       = body
+        self.idempotent = idempotent
+        # "name=" prefixes encoded once, values are encoded per call
+        self.__query    = tuple((quote_plus(param) + "=", kind, param in self.required) for param, kind in self.params)
+        self.__has_path = "{" in path
+
+    def url(self, *values, **path_params):
+        """Returns the URL of a request: the path parameters are given by name, the query parameters by position in
+        the order of params. Floats are sent in their shortest repr, strings are percent-encoded.
+
+        :return: URL string
+        """
+        url = self.path
+        if self.__has_path:
+            url = url.format(**{name: quote(str(value), safe="") for name, value in path_params.items()})
+
+        # float() raises on a missing required coordinate
+        query = [prefix + (repr(float(value)) if kind is float else _quote_plus(str(value)))
+                 for (prefix, kind, required), value in zip(self.__query, values) if value is not None or required]
+
+        return url + "?" + "&".join(query) if query else url
+
+    def data(self, *args):
+        """Returns the JSON body built by the body function from the arguments"""
+        return json.dumps(self.body(*args))
+
+    def __repr__(self):
+        return "Endpoint({} {} {})".format(self.name, self.method, self.path)
+
+
+class HeaderCache(object):
+
+    def __init__(self, headers=None):
+        """Request headers of an SDK object, built once per token instead of once per call. The returned dictionary
+        is shared between calls and must not be modified.
+
+        :param headers: Headers sent along the Authorization header, eg: {"content-type": "application/json"}
+        """
+        self.__headers = dict(headers or {})
+        self.__entry   = None
+
+    def _build(self, key, authorization):
+        headers = {"Authorization": authorization}
+        headers.update(self.__headers)
+        # replaced in a single assignment, so concurrent callers read a consistent entry
+        self.__entry = (key, headers)
+        return headers
+
+    def get(self, authorization):
+        """Returns the headers for an Authorization header value, eg: given by a TokenProvider"""
+        entry = self.__entry
+        if entry is not None and entry[0] == authorization:
+            return entry[1]
+        return self._build(authorization, authorization)
+
+    def for_token(self, token_type, access_token):
+        """Returns the headers for a token type and an access token"""
+        entry = self.__entry
+        if entry is not None and entry[0] == (token_type, access_token):
+            return entry[1]
+        return self._build((token_type, access_token), "{} {}".format(token_type, access_token))
@@ -0,0 +1,77 @@
+from lyft.util.fast_json import loads
+
+
+class LyftAPIError(Exception):
+
+    def __init__(self, error, status_code=None):
+        """Raised when the Lyft API answers with an error. The first argument is the decoded JSON error body, as it
+        used to be for the bare Exception raised by the SDK, or the raw text if the body is not JSON.
+
+        :param error: Decoded error body, or its text
+        :param status_code: HTTP status code of the response
+        """
+        Exception.__init__(self, error)
+        self.error       = error
+        self.status_code = status_code
+
+    @classmethod
+    def from_response(cls, response):
+        try:
+            error = loads(response.content)
+        except ValueError:
+            content = getattr(response, "content", b"") or b""
+            error   = content.decode("utf-8", "replace") if isinstance(content, bytes) else content
+        return cls(error, response.status_code)
+
+
+class FilteredPairError(Exception):
+
+    def __init__(self, pair, distance):
+        """Reported in the BatchEstimate of an origin/destination pair rejected by a lyft.util.geo.PairFilter, no
+        request was sent for it.
+
+        :param pair: (start_lat, start_lng, end_lat, end_lng) tuple
+        :param distance: Great-circle distance in meters between origin and destination
+        """
+        Exception.__init__(self, "pair {} filtered out, trip distance {:.0f}m".format(pair, distance))
+        self.pair     = pair
+        self.distance = distance
+
+
+class InvalidStateError(Exception):
+
+    def __init__(self, state):
+        """Raised by lyft.authentication.code_exchange.StateStore for a state it did not issue, already consumed or
+        expired: the redirect does not come from a login started by the application, or came too late.
+
+        :param state: state query parameter of the redirect
+        """
+        Exception.__init__(self, "unknown or expired state {!r}".format(state))
+        self.state = state
+
+
+class InvalidSignatureError(Exception):
+
+    def __init__(self, signature):
+        """Raised by lyft.webhooks.WebhookReceiver for a webhook request whose X-Lyft-Signature header is missing or
+        does not match its body: it was not sent by Lyft, or was signed with another verification token.
+
+        :param signature: X-Lyft-Signature header of the request, None if missing
+        """
+        Exception.__init__(self, "invalid webhook signature {!r}".format(signature))
+        self.signature = signature
+
+
+class ReceiverOverloadedError(Exception):
+
+    def __init__(self, ride_id, timeout):
+        """Raised by lyft.webhooks.WebhookReceiver when the queue of the worker handling a ride is still full after
+        timeout seconds. The webhook request is answered with a 503, which Lyft retries later.
+
+        :param ride_id: Ride of the rejected event, None for the events of no ride
+        :param timeout: Seconds waited for room in the queue
+        """
+        Exception.__init__(self, "webhook workers overloaded, event of ride {} rejected after {}s".format(ride_id,
+                                                                                                          timeout))
+        self.ride_id = ride_id
+        self.timeout = timeout
@@ -0,0 +1,17 @@
+import json
+from importlib.util import find_spec
+
+from lyft.util.lazy import lazy_function
+
+# decoders of the installed backends, each parses the response body from its bytes. The backends are found without
+# being imported, orjson or ujson is only imported by the first body it decodes
+BACKENDS = {"json": json.loads}
+for _name in ("ujson", "orjson"):
+    if find_spec(_name) is not None:
+        BACKENDS[_name] = lazy_function(_name, "loads")
+
+# fastest installed backend: orjson, then ujson, then the standard library. Its loads parses a response body from
+# its bytes: orjson and ujson read them directly, the standard library decodes them to text first. Raises ValueError
+# if the body is not JSON
+BACKEND = "orjson" if "orjson" in BACKENDS else "ujson" if "ujson" in BACKENDS else "json"
+loads   = BACKENDS[BACKEND]
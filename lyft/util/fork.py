@@ -0,0 +1,24 @@
+import os
+import weakref
+
+_objects = weakref.WeakSet()
+
+
+def register_after_fork(obj):
+    """Calls obj._after_fork() in the child process after every os.fork, eg: under gunicorn or a multiprocessing
+    pool, so that it drops the locks, pooled connections and timers inherited from the parent. Only a weak reference
+    to obj is kept.
+
+    :param obj: object with an _after_fork method
+    """
+    _objects.add(obj)
+
+
+def _after_fork_in_child():
+    # the child runs a single thread, nothing can modify the set while it is copied
+    for obj in list(_objects):
+        obj._after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
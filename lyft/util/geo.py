@@ -0,0 +1,128 @@
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+EARTH_RADIUS_METERS = 6371008.8
+
+# stands for a missing destination while grouping, outside of the valid coordinates
+_NO_COORDINATE = 1000.0
+
+
+def _require_numpy():
+    if numpy is None:
+        raise ImportError("lyft.util.geo requires numpy, install it with: pip install numpy")
+
+
+def haversine(lat, lng, end_lat, end_lng):
+    """Great-circle distances in meters between two sets of points, computed on whole arrays at once. Arguments are
+    floats or array-likes of the same shape (or broadcastable), nan where a coordinate is unknown.
+
+    :param lat: Latitudes of the origins
+    :param lng: Longitudes of the origins
+    :param end_lat: Latitudes of the destinations
+    :param end_lng: Longitudes of the destinations
+    :return: float64 numpy array of distances in meters, nan where a coordinate is nan
+    """
+    _require_numpy()
+    lat, lng, end_lat, end_lng = (numpy.radians(numpy.asarray(value, dtype=numpy.float64))
+                                  for value in (lat, lng, end_lat, end_lng))
+    a = (numpy.sin((end_lat - lat) / 2) ** 2 +
+         numpy.cos(lat) * numpy.cos(end_lat) * numpy.sin((end_lng - lng) / 2) ** 2)
+    return 2 * EARTH_RADIUS_METERS * numpy.arcsin(numpy.sqrt(numpy.minimum(a, 1.0)))
+
+
+def snap(values, precision):
+    """Rounds coordinates to a number of decimals, so that nearby points compare equal: 3 decimals is about 110m,
+    4 about 11m and 5 about 1.1m in latitude.
+
+    :param values: float or array-like of coordinates
+    :param precision: int, number of decimals kept
+    :return: float64 numpy array
+    """
+    _require_numpy()
+    return numpy.round(numpy.asarray(values, dtype=numpy.float64), precision)
+
+
+def pairs_array(pairs):
+    """Converts normalized (start_lat, start_lng, end_lat, end_lng) tuples into a (n, 4) float64 array, nan for a
+    missing destination"""
+    _require_numpy()
+    # numpy converts None to nan in float arrays
+    return numpy.array(pairs, dtype=numpy.float64).reshape(-1, 4)
+
+
+class PairFilter(object):
+
+    def __init__(self, max_distance=None, min_distance=None, precision=None):
+        """Filters and merges origin/destination pairs before they are queried, see
+        lyft.availability.Availability.iter_batch_estimates. Requires numpy.
+
+        Pairs whose trip is longer than max_distance or shorter than min_distance are rejected without a request.
+        Pairs whose coordinates are equal once rounded to precision decimals are merged and queried once, at the
+        rounded coordinates. Pairs without a destination are never rejected.
+
+        :param max_distance: Maximum great-circle distance in meters between origin and destination, None for no limit
+        :param min_distance: Minimum great-circle distance in meters between origin and destination, None for no limit
+        :param precision: Decimals the coordinates are rounded to before merging, None to only merge identical pairs
+        """
+        _require_numpy()
+        self.max_distance = max_distance
+        self.min_distance = min_distance
+        self.precision    = precision
+
+    def distances(self, pairs):
+        """Trip distances in meters of normalized pairs, nan for the pairs without destination
+
+        :param pairs: list of (start_lat, start_lng, end_lat, end_lng) tuples or (n, 4) array
+        :return: float64 numpy array
+        """
+        array = pairs if isinstance(pairs, numpy.ndarray) else pairs_array(pairs)
+        return haversine(array[:, 0], array[:, 1], array[:, 2], array[:, 3])
+
+    def plan(self, pairs):
+        """Splits normalized pairs into the pairs to query and the rejected ones
+
+        :param pairs: list of (start_lat, start_lng, end_lat, end_lng) tuples, end coordinates may be None
+        :return: (groups, rejected) tuple. groups is an ordered dictionary of pair to query -> list of input indexes,
+                 rejected a list of (index, pair, distance) tuples
+        """
+        array     = pairs_array(pairs)
+        distances = self.distances(array)
+        keep      = numpy.ones(len(array), dtype=bool)
+        with numpy.errstate(invalid="ignore"):
+            if self.max_distance is not None:
+                keep &= ~(distances > self.max_distance)
+            if self.min_distance is not None:
+                keep &= ~(distances < self.min_distance)
+
+        rejected = [(index, pairs[index], float(distances[index])) for index in numpy.flatnonzero(~keep).tolist()]
+        indexes  = numpy.flatnonzero(keep)
+        if not len(indexes):
+            return {}, rejected
+
+        kept = array[indexes]
+        if self.precision is not None:
+            kept = snap(kept, self.precision)
+        keys = numpy.where(numpy.isnan(kept), _NO_COORDINATE, kept)
+
+        # sort the rows, equal rows are then contiguous and stay in input order within a run
+        order  = numpy.lexsort(keys.T[::-1])
+        keys   = keys[order]
+        new    = numpy.ones(len(keys), dtype=bool)
+        new[1:] = (keys[1:] != keys[:-1]).any(axis=1)
+        starts  = numpy.flatnonzero(new)
+        firsts  = order[starts]
+        members = indexes[order].tolist()
+        rows    = kept[firsts].tolist()
+        ends    = starts[1:].tolist() + [len(keys)]
+        starts  = starts.tolist()
+
+        groups = {}
+        # order the groups by their first input index
+        for group in numpy.argsort(firsts, kind="stable").tolist():
+            row = rows[group]
+            if row[2] != row[2] or row[3] != row[3]:
+                row = [None if value != value else value for value in row]
+            groups[tuple(row)] = members[starts[group]:ends[group]]
+        return groups, rejected
@@ -0,0 +1,38 @@
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def encode(lat, lng, precision=7):
+    """Encodes a coordinate into a geohash string. Points in the same cell share the same geohash, the cell size
+    shrinks with the precision: 5 is about 4.9km x 4.9km, 6 about 1.2km x 0.6km, 7 about 153m x 153m and
+    8 about 38m x 19m.
+
+    :param lat: float, Latitude of a location
+    :param lng: float, Longitude of a location
+    :param precision: int, number of characters of the geohash
+    :return: geohash string
+    """
+    lat_interval = [-90.0, 90.0]
+    lng_interval = [-180.0, 180.0]
+    geohash      = []
+    bits         = 0
+    bit_count    = 0
+    even         = True
+
+    while len(geohash) < precision:
+        interval, value = (lng_interval, lng) if even else (lat_interval, lat)
+        middle = (interval[0] + interval[1]) / 2
+        if value >= middle:
+            bits = (bits << 1) | 1
+            interval[0] = middle
+        else:
+            bits = bits << 1
+            interval[1] = middle
+        even = not even
+
+        bit_count += 1
+        if bit_count == 5:
+            geohash.append(_BASE32[bits])
+            bits      = 0
+            bit_count = 0
+
+    return "".join(geohash)
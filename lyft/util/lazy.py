@@ -0,0 +1,48 @@
+import importlib
+
+
+class _LazyModule(object):
+    __slots__ = ("__name", "__module")
+
+    def __init__(self, name):
+        self.__name   = name
+        self.__module = None
+
+    def __getattr__(self, attribute):
+        module = self.__module
+        if module is None:
+            module = self.__module = importlib.import_module(self.__name)
+        return getattr(module, attribute)
+
+    def __repr__(self):
+        return "<lazy module {!r}>".format(self.__name)
+
+
+def lazy_module(name):
+    """Returns a stand-in for a module, imported on the first access to one of its attributes. Lets a module refer to
+    a dependency that takes long to import, eg: asyncio, without making every importer pay for it.
+
+    :param name: Absolute name of the module, eg: "asyncio"
+    :return: object forwarding attribute accesses to the module
+    """
+    return _LazyModule(name)
+
+
+def lazy_function(module, name):
+    """Returns a function calling a function or class of a module, only imported on the first call, eg: the requests
+    based transport of the SDK classes created with a transport of their own.
+
+    :param module: Absolute name of the module, eg: "lyft.transport.transport"
+    :param name: Name of the function or class in the module
+    :return: function
+    """
+    target = []
+
+    def call(*args, **kwargs):
+        if not target:
+            target.append(getattr(importlib.import_module(module), name))
+        return target[0](*args, **kwargs)
+
+    call.__name__ = call.__qualname__ = name
+    call.__doc__  = "{}.{}, imported on the first call".format(module, name)
+    return call
@@ -1,6 +1,6 @@
-
-PUBLIC_AUTH_URL    = "https://api.lyft.com/oauth/token"
-USER_AUTH_URL      = "https://api.lyft.com/oauth/authorize"
-AUTH_REVOKE_URL    = "https://api.lyft.com/oauth/revoke_refresh_token"
-RIDE               = "https://api.lyft.com/v1/rides"
-AVAILABILITY       = "https://api.lyft.com/v1/"
+API_HOST           = "https://api.lyft.com"
+PUBLIC_AUTH_URL    = "{}/oauth/token".format(API_HOST)
+USER_AUTH_URL      = "{}/oauth/authorize".format(API_HOST)
+AUTH_REVOKE_URL    = "{}/oauth/revoke_refresh_token".format(API_HOST)
+RIDE               = "{}/v1/rides".format(API_HOST)
+AVAILABILITY       = "{}/v1/".format(API_HOST)
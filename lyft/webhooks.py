@@ -0,0 +1,408 @@
+import base64
+import hashlib
+import heapq
+import hmac
+import json
+import queue
+import threading
+import time
+import zlib
+from collections import OrderedDict, namedtuple
+
+from lyft.rides import _parse_time
+from lyft.util.errors import InvalidSignatureError, ReceiverOverloadedError
+from lyft.util.fast_json import loads
+from lyft.util.fork import register_after_fork
+from lyft.util.lazy import lazy_module
+
+# only imported by WebhookServer, a receiver called from a web framework does not need it
+http_server = lazy_module("http.server")
+
+SIGNATURE_HEADER         = "X-Lyft-Signature"
+# the only events whose status is checked against the progress of their ride
+STATUS_EVENT_TYPE        = "ride.status.updated"
+DEFAULT_WEBHOOK_WORKERS  = 8
+DEFAULT_QUEUE_SIZE       = 1024
+DEFAULT_SUBMIT_TIMEOUT   = 1.0
+DEFAULT_REORDER_DELAY    = 0
+DEFAULT_MAX_EVENT_IDS    = 100000
+DEFAULT_MAX_RIDES        = 100000
+# progress of a ride, orders the events of a ride sent within the same second
+STATUS_RANKS             = {"pending"    : 0,
+                            "accepted"   : 1,
+                            "arrived"    : 2,
+                            "pickedUp"   : 3,
+                            "droppedOff" : 4,
+                            "canceled"   : 4}
+
+_STOP = object()
+
+WebhookEvent = namedtuple("WebhookEvent", ["event_id", "event_type", "occurred_at", "ride_id", "status", "payload"])
+WebhookEvent.__doc__ = """Event pushed by Lyft to a webhook URL
+
+:param event_id: Unique id of the event, the same for every delivery attempt
+:param event_type: Type of the event, eg: "ride.status.updated"
+:param occurred_at: ISO 8601 time of the event
+:param ride_id: Id of the ride of the event, None if it is not about a ride
+:param status: Status of the ride, eg: "accepted", None if it is not about a ride
+:param payload: Decoded JSON body of the webhook request, payload["event"] has the details of the ride
+"""
+
+
+def sign(body, verification_token):
+    """Returns the X-Lyft-Signature header of a webhook body: sha256= followed by the base64 encoded HMAC-SHA256 of the
+    body, keyed with the webhook verification token of the application
+
+    :param body: Request body bytes
+    :param verification_token: Webhook verification token, from the Lyft developer portal
+    :return: string
+    """
+    digest = hmac.new(verification_token.encode("utf-8"), body, hashlib.sha256).digest()
+    return "sha256=" + base64.b64encode(digest).decode("ascii")
+
+
+def verify_signature(body, signature, verification_token):
+    """Returns True if signature is the X-Lyft-Signature of body, compared in constant time"""
+    return signature is not None and hmac.compare_digest(sign(body, verification_token), signature)
+
+
+def _parse_event(body):
+    """WebhookEvent of a webhook body, raises ValueError if it is not an event"""
+    payload = loads(body)
+    if not isinstance(payload, dict) or not payload.get("event_id"):
+        raise ValueError("not a webhook event")
+    occurred_at = payload.get("occurred_at")
+    if occurred_at is not None and not isinstance(occurred_at, str):
+        raise ValueError("invalid occurred_at {!r}, expected ISO 8601".format(occurred_at))
+    details = payload.get("event") if isinstance(payload.get("event"), dict) else {}
+    ride_id = details.get("ride_id")
+    event   = WebhookEvent(str(payload["event_id"]), payload.get("event_type"), occurred_at,
+                           str(ride_id) if ride_id is not None else None, details.get("status"), payload)
+    # rejected here with a 400 rather than failing on the worker ordering the events of the ride
+    _order_key(event)
+    return event
+
+
+def _order_key(event):
+    """Events of a ride are dispatched by time, then by progress of the ride"""
+    occurred_at = _parse_time(event.occurred_at).timestamp() if event.occurred_at else 0.0
+    return occurred_at, STATUS_RANKS.get(event.status, -1)
+
+
+class WebhookReceiver(object):
+
+    def __init__(self, verification_token, handlers=None, workers=DEFAULT_WEBHOOK_WORKERS,
+                 queue_size=DEFAULT_QUEUE_SIZE, submit_timeout=DEFAULT_SUBMIT_TIMEOUT,
+                 reorder_delay=DEFAULT_REORDER_DELAY, max_event_ids=DEFAULT_MAX_EVENT_IDS,
+                 max_rides=DEFAULT_MAX_RIDES, clock=time.monotonic):
+        """Receives the ride events Lyft pushes to a webhook URL, instead of polling get_ride_details, and dispatches
+        them to handlers on a pool of worker threads.
+
+        Every request is checked against its X-Lyft-Signature. Lyft delivers events at least once, possibly out of
+        order: an event id already received is acknowledged without being dispatched again, and the events of a ride
+        are all handled by the same worker, in order. A status update going back in the progress of its ride, eg: an
+        "accepted" arriving after "arrived", is dropped as stale; the other events are always dispatched. With a
+        reorder_delay the events of a ride are held that many seconds and sorted first, so that late status updates
+        are reordered instead of dropped.
+
+        Each worker queues at most queue_size events. When the queue of a ride is full the request waits up to
+        submit_timeout seconds, then is rejected with ReceiverOverloadedError, answered with a 503 for Lyft to
+        retry the event later: slow handlers slow down the deliveries instead of growing the memory.
+
+        Serve it with WebhookServer, or call handle from the view of a web framework.
+
+        :param verification_token: Webhook verification token of the application, from the Lyft developer portal
+        :param handlers: Functions called with each WebhookEvent, more can be added with add_handler
+        :param workers: int, number of worker threads
+        :param queue_size: int, maximum number of events queued per worker
+        :param submit_timeout: Seconds a request waits for room in a full queue
+        :param reorder_delay: Seconds the events of a ride are held to be sorted, 0 to dispatch them on arrival
+        :param max_event_ids: int, number of most recent event ids remembered to drop the duplicates
+        :param max_rides: int, number of most recent rides whose last status is remembered to drop the stale ones
+        :param clock: function returning the current time in seconds
+        """
+        self.workers        = workers
+        self.queue_size     = queue_size
+        self.submit_timeout = submit_timeout
+        self.reorder_delay  = reorder_delay
+        self.max_event_ids  = max_event_ids
+        self.max_rides      = max_rides
+        self.counts         = dict.fromkeys(("received", "duplicates", "stale", "dispatched", "errors", "rejected",
+                                             "overloaded"), 0)
+        self.last_error     = None
+        self.__token        = verification_token
+        self.__handlers     = list(handlers or [])
+        self.__clock        = clock
+        self.__event_ids    = OrderedDict()
+        self.__queues       = []
+        self.__threads      = []
+        self.__pending      = 0
+        self.__condition    = threading.Condition()
+        register_after_fork(self)
+
+    def _after_fork(self):
+        # the worker threads do not exist in the child, start creates new ones
+        self.__condition = threading.Condition()
+        self.__queues    = []
+        self.__threads   = []
+        self.__pending   = 0
+
+    def add_handler(self, handler):
+        """Adds a function called with each WebhookEvent. Handlers run on the worker threads, an exception raised by
+        one is counted in counts["errors"] and kept in last_error, as is an event which cannot be ordered"""
+        self.__handlers.append(handler)
+
+    def start(self):
+        """Starts the worker threads, called by submit if needed"""
+        with self.__condition:
+            if not self.__threads:
+                self.__queues  = [queue.Queue(maxsize=self.queue_size) for _ in range(self.workers)]
+                self.__threads = [threading.Thread(target=self._run, args=(events,), daemon=True)
+                                  for events in self.__queues]
+                for thread in self.__threads:
+                    thread.start()
+        return self
+
+    def _count(self, name, pending=0):
+        with self.__condition:
+            self.counts[name] += 1
+            self.__pending    += pending
+            if not self.__pending:
+                self.__condition.notify_all()
+
+    def handle(self, body, headers):
+        """Answers a webhook request, eg: from the view of a web framework
+
+        :param body: Request body bytes
+        :param headers: Case insensitive request headers, or a dictionary
+        :return: (status, payload) of the response to send: 200 once the event is queued or if it is a duplicate,
+                 401 for an invalid signature, 400 for a body which is not an event and 503 when overloaded
+        """
+        signature = headers.get(SIGNATURE_HEADER) or headers.get(SIGNATURE_HEADER.lower())
+        try:
+            queued = self.receive(body, signature)
+        except InvalidSignatureError:
+            return 401, {"error": "invalid_signature"}
+        except ReceiverOverloadedError:
+            return 503, {"error": "overloaded"}
+        except ValueError:
+            return 400, {"error": "invalid_event"}
+        return 200, {"queued": queued}
+
+    def receive(self, body, signature):
+        """Verifies and queues a webhook request. Raises InvalidSignatureError, ValueError if the body is not an event
+        and ReceiverOverloadedError
+
+        :param body: Request body bytes
+        :param signature: X-Lyft-Signature header of the request
+        :return: False if the event was already received, True otherwise
+        """
+        if not verify_signature(body, signature, self.__token):
+            self._count("rejected")
+            raise InvalidSignatureError(signature)
+        return self.submit(_parse_event(body))
+
+    def submit(self, event, timeout=None):
+        """Queues an event for its worker, waiting up to timeout seconds for room. Raises ReceiverOverloadedError
+
+        :param event: WebhookEvent
+        :param timeout: Seconds, defaults to submit_timeout
+        :return: False if the event id was already received, True otherwise
+        """
+        timeout = self.submit_timeout if timeout is None else timeout
+        with self.__condition:
+            if event.event_id in self.__event_ids:
+                self.__event_ids.move_to_end(event.event_id)
+                self.counts["duplicates"] += 1
+                return False
+            self.__event_ids[event.event_id] = True
+            while len(self.__event_ids) > self.max_event_ids:
+                self.__event_ids.popitem(last=False)
+            self.counts["received"] += 1
+            self.__pending += 1
+
+        self.start()
+        events = self.__queues
+        # the events of a ride always go to the same worker, which keeps them in order
+        key = event.ride_id if event.ride_id is not None else event.event_id
+        try:
+            events[zlib.crc32(key.encode("utf-8")) % len(events)].put(event, timeout=timeout)
+        except queue.Full:
+            with self.__condition:
+                # forgotten, so the retry of Lyft is not taken for a duplicate
+                self.__event_ids.pop(event.event_id, None)
+                self.counts["received"]   -= 1
+                self.counts["overloaded"] += 1
+                self.__pending            -= 1
+                if not self.__pending:
+                    self.__condition.notify_all()
+            raise ReceiverOverloadedError(event.ride_id, timeout)
+        return True
+
+    def _dispatch(self, event):
+        for handler in self.__handlers:
+            try:
+                handler(event)
+            except Exception as error:
+                self.last_error = error
+                self._count("errors")
+        self._count("dispatched", -1)
+
+    def _release(self, held, last):
+        """Dispatches the held events of a ride in order, drops the status updates of a lower rank than the last one
+        dispatched. The other events, and the status updates of the same rank, are distinct events: the duplicates
+        were already dropped by event id"""
+        for _, _, event in sorted(held):
+            rank = STATUS_RANKS.get(event.status) if event.event_type == STATUS_EVENT_TYPE else None
+            if rank is not None:
+                previous = last.get(event.ride_id)
+                if previous is not None and rank < previous:
+                    self._count("stale", -1)
+                    continue
+                last[event.ride_id] = rank
+                last.move_to_end(event.ride_id)
+                while len(last) > self.max_rides:
+                    last.popitem(last=False)
+            self._dispatch(event)
+
+    def _run(self, events):
+        """Worker loop, owns the ordering state of its rides"""
+        held     = {}            # ride_id -> list of (key, sequence, event) waiting for the reorder delay
+        due      = []            # heap of (due_at, sequence, ride_id), one per ride in held
+        last     = OrderedDict() # ride_id -> rank of the last status dispatched, least recently updated first
+        sequence = 0
+        while True:
+            timeout = max(0, due[0][0] - self.__clock()) if due else None
+            try:
+                event = events.get(timeout=timeout)
+            except queue.Empty:
+                event = None
+
+            if event is _STOP:
+                for ride_id in list(held):
+                    self._release(held.pop(ride_id), last)
+                return
+            if event is not None and event.ride_id is None:
+                self._dispatch(event)
+            elif event is not None:
+                try:
+                    key = _order_key(event)
+                except Exception as error:
+                    # an event given to submit with an occurred_at which is not ISO 8601, the worker keeps going
+                    self.last_error = error
+                    self._count("errors", -1)
+                else:
+                    sequence += 1
+                    entry = (key, sequence, event)
+                    if event.ride_id in held:
+                        held[event.ride_id].append(entry)
+                    else:
+                        held[event.ride_id] = [entry]
+                        heapq.heappush(due, (self.__clock() + self.reorder_delay, sequence, event.ride_id))
+
+            now = self.__clock()
+            while due and due[0][0] <= now:
+                _, _, ride_id = heapq.heappop(due)
+                self._release(held.pop(ride_id), last)
+
+    def join(self, timeout=None):
+        """Waits until every queued event is dispatched or dropped
+
+        :param timeout: Seconds, None to wait for as long as needed
+        :return: True if no event is pending
+        """
+        with self.__condition:
+            return self.__condition.wait_for(lambda: not self.__pending, timeout)
+
+    def stats(self):
+        """Returns the counts of events and the number of events queued or held
+
+        :return: dict
+        """
+        with self.__condition:
+            stats = dict(self.counts)
+            stats["pending"] = self.__pending
+            return stats
+
+    def close(self):
+        """Dispatches the events queued and held, then stops the worker threads"""
+        with self.__condition:
+            queues, threads, self.__queues, self.__threads = self.__queues, self.__threads, [], []
+        for events in queues:
+            events.put(_STOP)
+        for thread in threads:
+            thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class WebhookServer(object):
+
+    def __init__(self, receiver, host="127.0.0.1", port=0, path="/lyft/webhooks"):
+        """Keep-alive HTTP server answering the POST requests of Lyft on path with a WebhookReceiver. Put it behind
+        the HTTPS reverse proxy of the webhook URL registered on the Lyft developer portal.
+
+        :param receiver: WebhookReceiver
+        :param host: Interface to listen on
+        :param port: Port to listen on, 0 for any free port
+        :param path: Path of the webhook URL, the other paths get a 404
+        """
+        self.receiver = receiver
+        self.path     = path
+        self.__server = http_server.ThreadingHTTPServer((host, port), self._make_handler())
+        self.__server.daemon_threads = True
+        self.__thread = threading.Thread(target=self.__server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.__server.server_address[:2]
+        return "http://{}:{}{}".format(host, port, self.path)
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(http_server.BaseHTTPRequestHandler):
+            protocol_version        = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("content-length") or 0)
+                body   = self.rfile.read(length) if length else b""
+                if self.path.split("?", 1)[0] != server.path:
+                    status, payload = 404, {"error": "not_found"}
+                else:
+                    status, payload = server.receiver.handle(body, self.headers)
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("content-type", "application/json")
+                self.send_header("content-length", str(len(data)))
+                if status == 503:
+                    self.send_header("retry-after", "1")
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+    def start(self):
+        self.receiver.start()
+        self.__thread.start()
+        return self
+
+    def stop(self):
+        """Stops answering requests, then dispatches the events already received"""
+        self.__server.shutdown()
+        self.__server.server_close()
+        self.receiver.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
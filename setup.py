@@ -1,4 +1,4 @@
-from distutils.core import setup
+from setuptools import find_packages, setup
 
 setup(
     name='Lyft-python-sdk',
@@ -6,6 +6,18 @@ setup(
     author=['Raj Dutta', 'Krishna Chaitanya'],
     author_email=['rzskhr@outlook.com', 'vmanikes@gmail.com'],
     url='GITHUB',
-    description="A python wrapper for the Lyft REST API"
+    description="A python wrapper for the Lyft REST API",
+    packages=find_packages(exclude=("tests", "benchmarks")),
+    install_requires=["requests>=2.25"],
+    # pip install Lyft-python-sdk[aio,http2], each feature imports its dependency on first use
+    extras_require={
+        "aio"   : ["aiohttp>=3.7"],
+        "http2" : ["h2>=4"],
+        "geo"   : ["numpy"],
+        "export": ["pyarrow"],
+        "json"  : ["orjson"],
+        "brotli": ["brotli"],
+        "all"   : ["aiohttp>=3.7", "h2>=4", "numpy", "pyarrow", "orjson", "brotli"],
+    }
 
-)
\ No newline at end of file
+)
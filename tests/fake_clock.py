@@ -0,0 +1,8 @@
+class FakeClock(object):
+    """Clock the tests move by hand, passed where the SDK takes a clock=time.monotonic"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
@@ -0,0 +1,83 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubServer(object):
+
+    def __init__(self, routes=None):
+        """Local keep-alive HTTP server answering canned JSON responses, used to test the SDK without the Lyft API
+
+        :param routes: Dictionary of (method, path) -> (status_code, body dict, headers dict), or a function of the
+                       request path and query string returning that tuple
+        """
+        self.routes      = dict(routes or {})
+        self.requests    = []
+        self.connections = 0
+        self.delay       = 0
+        self._lock       = threading.Lock()
+        self.__server    = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self.__server.daemon_threads = True
+        self.__thread    = threading.Thread(target=self.__server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        return "http://127.0.0.1:{}".format(self.__server.server_address[1])
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version        = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                BaseHTTPRequestHandler.setup(self)
+                with stub._lock:
+                    stub.connections += 1
+
+            def log_message(self, *args):
+                pass
+
+            def _handle(self):
+                length = int(self.headers.get("content-length") or 0)
+                body   = self.rfile.read(length) if length else b""
+                path   = self.path.split("?")[0]
+                with stub._lock:
+                    stub.requests.append((self.command, self.path, dict(self.headers), body))
+                if stub.delay:
+                    time.sleep(stub.delay)
+                route = stub.routes.get((self.command, path), (404, {"error": "not_found"}, {}))
+                status, payload, headers = route(self.path) if callable(route) else route
+                if isinstance(payload, bytes) or payload is None:
+                    data = payload or b""
+                else:
+                    data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("content-type", "application/json")
+                self.send_header("content-length", str(len(data)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET  = _handle
+            do_POST = _handle
+            do_PUT  = _handle
+
+        return Handler
+
+    def start(self):
+        self.__thread.start()
+        return self
+
+    def stop(self):
+        self.__server.shutdown()
+        self.__server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
@@ -0,0 +1,113 @@
+import asyncio
+import gc
+import unittest
+import warnings
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from tests import availability_res
+from tests.stub_server import StubServer
+
+
+@unittest.skipIf(aiohttp is None, "aiohttp is not installed")
+class AsyncClientTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer({
+            ("GET", "/v1/ridetypes"): (200, availability_res.ride_types_res, {}),
+            ("GET", "/v1/eta"): (200, {"eta_estimates": []}, {}),
+            ("GET", "/v1/drivers"): (400, {"error": "bad_parameter"}, {}),
+            ("GET", "/v1/rides/42/receipt"): (200, {"ride_id": "42"}, {}),
+            ("POST", "/oauth/token"): (200, {"access_token": "abc", "token_type": "Bearer"},
+                                       {"x-ratelimit-limit": "100", "x-ratelimit-remaining": "99"}),
+        }).start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def transport(self, **kwargs):
+        from lyft.aio.transport import AsyncTransport
+        return AsyncTransport(base_url=self.server.base_url, **kwargs)
+
+    def test_same_surface_as_blocking_classes(self):
+        from lyft.aio.auth import AsyncLyftPublicAuth
+        from lyft.aio.availability import AsyncAvailability
+        from lyft.aio.rides import AsyncRides
+
+        async def run():
+            async with self.transport() as transport:
+                token = await AsyncLyftPublicAuth({"client_id": "id", "client_secret": "secret"},
+                                                  transport=transport).get_access_token()
+                availability = AsyncAvailability(token["token_type"], token["access_token"], transport=transport)
+                rides = AsyncRides(token["token_type"], token["access_token"], transport=transport)
+                return (token, await availability.get_ride_types(37.7763, -122.3918),
+                        await rides.get_receipt("42"))
+
+        token, ride_types, receipt = asyncio.run(run())
+        self.assertEqual(token["x-ratelimit-remaining"], "99")
+        self.assertEqual(ride_types, availability_res.ride_types_res)
+        self.assertEqual(receipt, {"ride_id": "42", "status_code": 200})
+        self.assertEqual(self.server.requests[-1][2].get("Authorization"), "Bearer abc")
+
+    def test_errors_are_raised(self):
+        from lyft.aio.availability import AsyncAvailability
+
+        async def run():
+            async with self.transport() as transport:
+                await AsyncAvailability("Bearer", "abc", transport=transport).get_nearby_drivers(37.7763, -122.3918)
+
+        with self.assertRaises(Exception):
+            asyncio.run(run())
+
+    def test_concurrency_limit_and_shared_pool(self):
+        from lyft.aio.availability import AsyncAvailability
+
+        async def run():
+            async with self.transport(limit=4, max_concurrency=4) as transport:
+                availability = AsyncAvailability("Bearer", "abc", transport=transport)
+                return await asyncio.gather(*[availability.get_driver_eta(37.7763, -122.3918) for _ in range(40)])
+
+        self.assertEqual(len(asyncio.run(run())), 40)
+        self.assertLessEqual(self.server.connections, 4)
+
+    def test_cancellation(self):
+        from lyft.aio.availability import AsyncAvailability
+        self.server.delay = 0.5
+
+        async def run():
+            async with self.transport(max_concurrency=1) as transport:
+                availability = AsyncAvailability("Bearer", "abc", transport=transport)
+                task = asyncio.ensure_future(availability.get_driver_eta(37.7763, -122.3918))
+                await asyncio.sleep(0.05)
+                task.cancel()
+                with self.assertRaises(asyncio.CancelledError):
+                    await task
+                self.server.delay = 0
+                # the cancelled request gave its slot back
+                return await asyncio.wait_for(availability.get_driver_eta(37.7763, -122.3918), 5)
+
+        self.assertEqual(asyncio.run(run()), {"eta_estimates": []})
+
+    def test_reused_across_event_loops(self):
+        from lyft.aio.availability import AsyncAvailability
+        transport    = self.transport(limit=2, max_concurrency=2)
+        availability = AsyncAvailability("Bearer", "abc", transport=transport)
+
+        async def run():
+            return await asyncio.gather(*[availability.get_driver_eta(37.7763, -122.3918) for _ in range(10)])
+
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            # each asyncio.run has a loop of its own, the semaphore and the session of the first one are not reused
+            self.assertEqual(len(asyncio.run(run())), 10)
+            self.assertEqual(len(asyncio.run(run())), 10)
+            asyncio.run(transport.close())
+            gc.collect()
+        self.assertFalse([warning for warning in caught if "Unclosed" in str(warning.message)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import asyncio
+import unittest
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from lyft.availability import Availability, _normalize_pair
+from lyft.transport.transport import Transport
+from lyft.util.errors import FilteredPairError
+from tests.stub_server import StubServer
+
+
+def eta_route(path):
+    if "lat=0.0" in path:
+        return 400, {"error": "bad_parameter"}, {}
+    return 200, {"eta_estimates": [{"eta_seconds": 120}]}, {}
+
+
+class BatchEstimatesTest(unittest.TestCase):
+
+    pairs = [(37.7763, -122.3918, 37.7972, -122.4533),
+             ((37.7763, -122.3918), (37.7972, -122.4533)),
+             (0, 0, 1, 1),
+             (37.7833, -122.4167)]
+
+    def setUp(self):
+        self.server = StubServer({
+            ("GET", "/v1/eta"): eta_route,
+            ("GET", "/v1/cost"): (200, {"cost_estimates": [{"estimated_cost_cents_max": 1500}]}, {}),
+        }).start()
+        self.transport = Transport(pool_maxsize=4, base_url=self.server.base_url)
+
+    def tearDown(self):
+        self.transport.close()
+        self.server.stop()
+
+    def assert_results(self, results):
+        self.assertEqual([result.index for result in results], [0, 1, 2, 3])
+        self.assertEqual(results[0].pair, (37.7763, -122.3918, 37.7972, -122.4533))
+        self.assertEqual(results[0].eta, results[1].eta)
+        self.assertEqual(results[0].cost["cost_estimates"][0]["estimated_cost_cents_max"], 1500)
+        self.assertIsNone(results[0].error)
+
+        self.assertIsNone(results[2].eta)
+        self.assertIsNotNone(results[2].cost)
+        self.assertIsNotNone(results[2].error)
+
+        self.assertEqual(results[3].pair, (37.7833, -122.4167, None, None))
+        # the duplicated pair is only queried once
+        self.assertEqual(len(self.server.requests), 6)
+
+    def test_normalize_pair(self):
+        self.assertEqual(_normalize_pair(("1", 2, 3, "4")), (1.0, 2.0, 3.0, 4.0))
+        self.assertEqual(_normalize_pair(((1, 2), None)), (1.0, 2.0, None, None))
+
+    def test_batch_estimates(self):
+        availability = Availability("Bearer", "token", transport=self.transport)
+        self.assert_results(availability.batch_estimates(self.pairs, max_concurrency=4))
+
+    def test_iter_batch_estimates_streams_every_index(self):
+        availability = Availability("Bearer", "token", transport=self.transport)
+        indexes = sorted(result.index for result in availability.iter_batch_estimates(self.pairs))
+        self.assertEqual(indexes, [0, 1, 2, 3])
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_prefilter(self):
+        from lyft.util.geo import PairFilter
+
+        availability = Availability("Bearer", "token", transport=self.transport)
+        pairs = self.pairs + [(37.77631, -122.39182, 37.79719, -122.45331), (37.7763, -122.3918, 40.7128, -74.0060)]
+        results = availability.batch_estimates(pairs, prefilter=PairFilter(max_distance=100000, precision=3))
+
+        merged = [result.pair for result in results[:2] + results[4:5]]
+        self.assertEqual(merged, [(37.776, -122.392, 37.797, -122.453)] * 3)
+        self.assertIsNone(results[4].error)
+        self.assertIsInstance(results[2].error, FilteredPairError)
+        self.assertIsInstance(results[5].error, FilteredPairError)
+        self.assertEqual((results[5].eta, results[5].cost), (None, None))
+        # the 3 nearby pairs are queried once, the 2 distant ones not at all
+        self.assertEqual(len(self.server.requests), 4)
+
+    @unittest.skipIf(aiohttp is None, "aiohttp is not installed")
+    def test_async_batch_estimates(self):
+        from lyft.aio.availability import AsyncAvailability
+        from lyft.aio.transport import AsyncTransport
+
+        async def run():
+            async with AsyncTransport(base_url=self.server.base_url) as transport:
+                availability = AsyncAvailability("Bearer", "token", transport=transport)
+                return await availability.batch_estimates(self.pairs, max_concurrency=4)
+
+        self.assert_results(asyncio.run(run()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import time
+import unittest
+from urllib.parse import parse_qs, urlsplit
+
+from lyft.authentication.auth import LyftUserAuth
+from lyft.authentication.code_exchange import CodeExchanger, StateStore
+from lyft.testing.simulator import LyftSimulator
+from lyft.transport.transport import Transport
+from lyft.util.errors import InvalidStateError, LyftAPIError
+from tests.fake_clock import FakeClock
+
+CONFIG = {"client_id": "id", "client_secret": "secret"}
+
+
+class AuthorizationUriTest(unittest.TestCase):
+
+    def test_built_locally_and_encoded(self):
+        # the transport is never used
+        auth = LyftUserAuth(CONFIG, ["rides.read", "offline"], "next=/home&x=1", transport=object())
+        uri  = auth.get_authorization_uri()
+        self.assertEqual(uri, "https://api.lyft.com/oauth/authorize?client_id=id&scope=rides.read%20offline"
+                              "&state=next%3D%2Fhome%26x%3D1&response_type=code")
+        self.assertEqual(parse_qs(urlsplit(uri).query)["state"], ["next=/home&x=1"])
+        self.assertIn("state=abc", auth.get_authorization_uri(state="abc"))
+
+        self.assertIsNone(LyftUserAuth(CONFIG, [], "state").get_authorization_uri())
+        self.assertIsNone(LyftUserAuth({"client_id": ""}, ["offline"], "state").get_authorization_uri())
+
+
+class StateStoreTest(unittest.TestCase):
+
+    def test_states_are_consumed_once_and_expire(self):
+        clock  = FakeClock()
+        states = StateStore(ttl=600, clock=clock)
+        first  = states.issue("/home")
+        second = states.issue()
+        self.assertNotEqual(first, second)
+
+        self.assertEqual(states.pop(first), "/home")
+        with self.assertRaises(InvalidStateError):
+            states.pop(first)
+        with self.assertRaises(InvalidStateError):
+            states.pop("forged")
+
+        clock.now += 600
+        with self.assertRaises(InvalidStateError):
+            states.pop(second)
+
+        states.issue()
+        clock.now += 601
+        states.purge()
+        self.assertEqual(len(states), 0)
+
+    def test_bounded(self):
+        states = StateStore(max_size=3)
+        issued = [states.issue(index) for index in range(5)]
+        self.assertEqual((len(states), states.evictions), (3, 2))
+        with self.assertRaises(InvalidStateError):
+            states.pop(issued[0])
+        self.assertEqual(states.pop(issued[4]), 4)
+
+
+class CodeExchangerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.simulator = LyftSimulator(latency=0.05).start()
+        self.transport = Transport(base_url=self.simulator.base_url, pool_maxsize=10)
+        self.exchanger = CodeExchanger(LyftUserAuth(CONFIG, ["offline"], None, transport=self.transport),
+                                       max_concurrency=10)
+
+    def tearDown(self):
+        self.exchanger.close()
+        self.transport.close()
+        self.simulator.stop()
+
+    def test_exchange_many(self):
+        callbacks = []
+        for index in range(20):
+            state = parse_qs(urlsplit(self.exchanger.authorization_uri(index)).query)["state"][0]
+            callbacks.append(("code-{}".format(index), state))
+        callbacks.append(("code-x", "forged"))
+
+        start   = time.perf_counter()
+        results = sorted(self.exchanger.exchange_many(callbacks))
+        # 20 token requests of 50ms, 10 at a time
+        self.assertLess(time.perf_counter() - start, 0.5)
+
+        self.assertEqual([result.value for result in results[:20]], list(range(20)))
+        self.assertEqual(results[3].token["refresh_token"], "sim-refresh-code-3")
+        self.assertIsInstance(results[20].error, InvalidStateError)
+        self.assertEqual(self.simulator.stats()["endpoints"], {"token": 20})
+        self.assertLessEqual(self.simulator.stats()["connections"], 10)
+
+    def test_submit(self):
+        state = self.exchanger.states.issue("/rides")
+        token, value = self.exchanger.submit("code", state).result()
+        self.assertEqual(value, "/rides")
+        self.assertTrue(token["access_token"])
+
+        # a refused code raises LyftAPIError, the state is consumed
+        state = self.exchanger.states.issue()
+        with self.assertRaises(LyftAPIError):
+            self.exchanger.exchange("", state)
+        with self.assertRaises(InvalidStateError):
+            self.exchanger.exchange("code", state)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import asyncio
+import json
+import unittest
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from lyft.availability import Availability
+from lyft.testing.simulator import LyftSimulator
+from lyft.transport.transport import Transport
+from lyft.util import fast_json
+from tests import availability_res
+
+
+class CompressionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.plain      = LyftSimulator(seed=1).start()
+        self.compressed = LyftSimulator(seed=1, compress=True).start()
+
+    def tearDown(self):
+        self.plain.stop()
+        self.compressed.stop()
+
+    def eta_and_nearby_drivers(self, simulator):
+        with Transport(base_url=simulator.base_url) as transport:
+            return Availability("Bearer", "token", transport=transport).get_eta_and_nearby_drivers(37.7, -122.3)
+
+    def test_gzip_is_negotiated(self):
+        self.assertEqual(self.eta_and_nearby_drivers(self.compressed), self.eta_and_nearby_drivers(self.plain))
+        self.assertLess(self.compressed.stats()["bytes_sent"], self.plain.stats()["bytes_sent"] / 2)
+
+    @unittest.skipIf(aiohttp is None, "aiohttp is not installed")
+    def test_gzip_is_negotiated_asyncio(self):
+        from lyft.aio.availability import AsyncAvailability
+        from lyft.aio.transport import AsyncTransport
+
+        async def run():
+            async with AsyncTransport(base_url=self.compressed.base_url) as transport:
+                return await AsyncAvailability("Bearer", "token", transport=transport).get_eta_and_nearby_drivers(
+                    37.7, -122.3)
+
+        self.assertEqual(asyncio.run(run()), self.eta_and_nearby_drivers(self.plain))
+        self.assertLess(self.compressed.stats()["bytes_sent"], self.plain.stats()["bytes_sent"] / 2)
+
+    def test_json_backends(self):
+        content = json.dumps(availability_res.ride_types_res).encode("utf-8")
+        self.assertIn(fast_json.BACKEND, fast_json.BACKENDS)
+        for name, loads in fast_json.BACKENDS.items():
+            self.assertEqual(loads(content), availability_res.ride_types_res, name)
+            self.assertEqual(loads('{"display_name": "Lyft Lux SUV é"}'.encode("utf-8")),
+                             {"display_name": "Lyft Lux SUV é"}, name)
+            with self.assertRaises(ValueError):
+                loads(b"<html>Bad Gateway</html>")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+
+from lyft.authentication.auth import LyftPublicAuth
+from lyft.authentication.token_provider import TokenProvider
+from lyft.availability import Availability
+from lyft.cache.disk_cache import DiskCache
+from lyft.rides import Rides
+from lyft.testing.simulator import LyftSimulator
+from lyft.transport.transport import Transport
+from tests.fake_clock import FakeClock
+
+
+def write_entries(path, worker, count):
+    cache = DiskCache(path, ttls={"receipt": None})
+    for index in range(count):
+        cache.set(cache.key("receipt", "{}-{}".format(worker, index)), b'{"ride_id": "x"}')
+
+
+class DiskCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path      = os.path.join(self.directory, "lyft.sqlite")
+        self.simulator = LyftSimulator(ride_step=0).start()
+        self.transport = Transport(base_url=self.simulator.base_url)
+
+    def tearDown(self):
+        self.transport.close()
+        self.simulator.stop()
+        shutil.rmtree(self.directory)
+
+    def test_ride_types_survive_a_restart(self):
+        cache = DiskCache(self.path)
+        first = Availability("Bearer", "token", transport=self.transport, disk_cache=cache).get_ride_types(37.7, -122.3)
+        cache.close()
+
+        # a new cache on the same file, as after a process restart, nearby in the same geohash cell
+        cache = DiskCache(self.path)
+        availability = Availability("Bearer", "token", transport=self.transport, disk_cache=cache, models=True)
+        second = availability.get_ride_types(37.70001, -122.30001)
+        self.assertEqual(second.raw, first)
+        self.assertEqual(len(second), 4)
+        self.assertEqual(self.simulator.stats()["endpoints"], {"get_ride_types": 1})
+
+        # other endpoints are not stored
+        availability.get_driver_eta(37.7, -122.3)
+        availability.get_driver_eta(37.7, -122.3)
+        self.assertEqual(self.simulator.stats()["endpoints"]["eta"], 2)
+        self.assertEqual(cache.stats(), {"hits": 1, "misses": 0, "size": 1, "hit_ratio": 1.0})
+
+    def test_receipts(self):
+        cache = DiskCache(self.path)
+        auth  = LyftPublicAuth({"client_id": "id", "client_secret": "secret"}, transport=self.transport)
+        provider = TokenProvider.from_public_auth(auth, background=False)
+        rides = Rides(transport=self.transport, token_provider=provider, disk_cache=cache, user_id="alice")
+        ride_id = rides.create_ride_request("lyft", 37.7, -122.3, 37.8, -122.4)["ride_id"]
+
+        receipt = rides.get_receipt(ride_id)
+        self.assertEqual(rides.get_receipt(ride_id), receipt)
+        self.assertEqual(self.simulator.stats()["endpoints"]["receipt"], 1)
+
+        # stored for the user, not for the token: still read after the token is refreshed
+        provider.refresh(force=True)
+        self.assertEqual(rides.get_receipt(ride_id), receipt)
+        self.assertEqual(self.simulator.stats()["endpoints"]["receipt"], 1)
+
+        # errors are not stored
+        self.assertIn("error", rides.get_receipt("unknown"))
+        self.assertIn("error", rides.get_receipt("unknown"))
+        self.assertEqual(self.simulator.stats()["endpoints"]["receipt"], 3)
+        self.assertEqual(len(cache), 1)
+
+        # the stored receipt is never read by another user, receipts are not stored without a user id
+        Rides(transport=self.transport, token_provider=provider, disk_cache=cache, user_id="bob").get_receipt(ride_id)
+        Rides(transport=self.transport, token_provider=provider, disk_cache=cache).get_receipt(ride_id)
+        Rides(transport=self.transport, token_provider=provider, disk_cache=cache).get_receipt(ride_id)
+        self.assertEqual(self.simulator.stats()["endpoints"]["receipt"], 6)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.invalidate(cache.user_key("receipt", "alice", ride_id)), 1)
+
+    def test_ttl_and_invalidation(self):
+        clock = FakeClock()
+        cache = DiskCache(self.path, ttls={"ridetypes": 60, "receipt": None}, clock=clock)
+        cache.set(cache.location_key("ridetypes", 37.7, -122.3), b"{}")
+        cache.set(cache.location_key("ridetypes", 40.7, -74.0), b"{}")
+        cache.set(cache.key("receipt", "1"), b"{}")
+        self.assertIsNone(cache.location_key("eta", 37.7, -122.3))
+
+        clock.now += 30
+        self.assertIsNotNone(cache.get(cache.location_key("ridetypes", 37.7, -122.3)))
+        clock.now += 31
+        self.assertIsNone(cache.get(cache.location_key("ridetypes", 37.7, -122.3)))
+        self.assertIsNotNone(cache.get(cache.key("receipt", "1")))
+        self.assertEqual(cache.purge(), 2)
+
+        cache.set(cache.location_key("ridetypes", 37.7, -122.3), b"{}")
+        self.assertEqual(cache.invalidate(endpoint="ridetypes"), 1)
+        self.assertEqual(cache.invalidate(cache.key("receipt", "1")), 1)
+        self.assertEqual(len(cache), 0)
+
+    @unittest.skipIf("fork" not in multiprocessing.get_all_start_methods(), "fork is not available")
+    def test_concurrent_processes(self):
+        cache = DiskCache(self.path, ttls={"receipt": None})
+        context = multiprocessing.get_context("fork")
+        processes = [context.Process(target=write_entries, args=(self.path, worker, 50)) for worker in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+        self.assertEqual([process.exitcode for process in processes], [0] * 4)
+        self.assertEqual(len(cache), 200)
+        self.assertEqual(cache.get(cache.key("receipt", "3-49")).json(), {"ride_id": "x"})
+
+
+if __name__ == '__main__':
+    unittest.main()
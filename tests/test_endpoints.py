@@ -0,0 +1,46 @@
+import unittest
+from urllib.parse import parse_qsl, urlsplit
+
+from lyft.availability import AVAILABILITY_ENDPOINTS, _driver_eta_url, _ride_estimates_url
+from lyft.rides import RIDE_ENDPOINTS
+from lyft.util.endpoints import Endpoint, HeaderCache
+
+
+class EndpointTest(unittest.TestCase):
+
+    def test_query_parameters(self):
+        self.assertEqual(_driver_eta_url(37.7763, "-122.3918"), "https://api.lyft.com/v1/eta?lat=37.7763&lng=-122.3918")
+        # the destination of the eta endpoint is destination_lat and destination_lng
+        url = _driver_eta_url(37.7763, -122.3918, 37.7972, -122.4533, "lyft")
+        self.assertEqual(parse_qsl(urlsplit(url).query), [("lat", "37.7763"), ("lng", "-122.3918"),
+                                                          ("destination_lat", "37.7972"),
+                                                          ("destination_lng", "-122.4533"), ("ride_type", "lyft")])
+        # a zero coordinate is a coordinate
+        self.assertIn("end_lat=0.0&end_lng=0.0", _ride_estimates_url(1, 1, 0, 0))
+
+    def test_encoding(self):
+        url = AVAILABILITY_ENDPOINTS["ridetypes"].url(1, 2, "lyft line&x=1")
+        self.assertEqual(url, "https://api.lyft.com/v1/ridetypes?lat=1.0&lng=2.0&ride_type=lyft+line%26x%3D1")
+        self.assertEqual(RIDE_ENDPOINTS["receipt"].url(ride_id="a/b c"),
+                         "https://api.lyft.com/v1/rides/a%2Fb%20c/receipt")
+
+    def test_required_parameters(self):
+        with self.assertRaises(TypeError):
+            _driver_eta_url(None, -122.3918)
+
+    def test_body(self):
+        endpoint = Endpoint("rating", "PUT", "https://example.com/{ride_id}", body=lambda rating: {"rating": rating})
+        self.assertEqual(endpoint.data(5), '{"rating": 5}')
+        self.assertEqual(endpoint.url(ride_id=1), "https://example.com/1")
+
+    def test_header_cache(self):
+        cache = HeaderCache({"content-type": "application/json"})
+        headers = cache.for_token("Bearer", "a")
+        self.assertEqual(headers, {"Authorization": "Bearer a", "content-type": "application/json"})
+        self.assertIs(cache.for_token("Bearer", "a"), headers)
+        self.assertEqual(cache.for_token("Bearer", "b")["Authorization"], "Bearer b")
+        self.assertIs(cache.get("Bearer c"), cache.get("Bearer c"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import csv
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+from lyft.export import Checkpoint, CsvWriter, NdjsonWriter, ParquetWriter, ReceiptExporter
+from lyft.rides import Rides
+from lyft.testing.simulator import LyftSimulator
+from lyft.transport.transport import Transport
+
+
+class ExportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.simulator = LyftSimulator(ride_step=0).start()
+        self.transport = Transport(pool_maxsize=4, base_url=self.simulator.base_url)
+        self.rides     = Rides("Bearer", "token", transport=self.transport)
+        self.ride_ids  = [self.rides.create_ride_request("lyft", 37.7, -122.3, 37.8, -122.4)["ride_id"]
+                          for _ in range(10)]
+
+    def tearDown(self):
+        self.transport.close()
+        self.simulator.stop()
+        shutil.rmtree(self.directory)
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def test_ndjson_export_resumes_from_checkpoint(self):
+        checkpoint = Checkpoint(self.path("checkpoint"))
+        with NdjsonWriter(self.path("receipts.ndjson")) as writer:
+            exporter = ReceiptExporter(self.rides, writer, checkpoint, max_concurrency=4, checkpoint_every=3)
+            result = exporter.export(iter(self.ride_ids[:6]))
+        checkpoint.close()
+        self.assertEqual(result, (6, 0, []))
+
+        # a new process resumes with the whole list
+        checkpoint = Checkpoint(self.path("checkpoint"))
+        with NdjsonWriter(self.path("receipts.ndjson")) as writer:
+            result = ReceiptExporter(self.rides, writer, checkpoint, max_concurrency=4).export(self.ride_ids)
+        checkpoint.close()
+        self.assertEqual(result, (4, 6, []))
+
+        with open(self.path("receipts.ndjson")) as receipts:
+            records = [json.loads(line) for line in receipts]
+        self.assertEqual(sorted(record["ride_id"] for record in records), sorted(self.ride_ids))
+        self.assertNotIn("status_code", records[0])
+        self.assertEqual(self.simulator.stats()["endpoints"]["receipt"], 10)
+
+    def test_csv_export_and_failures(self):
+        delays = []
+        with CsvWriter(self.path("receipts.csv")) as writer:
+            exporter = ReceiptExporter(self.rides, writer, max_attempts=3, backoff=0.5, sleep=delays.append)
+            result = exporter.export(self.ride_ids[:3] + ["unknown"])
+
+        self.assertEqual(result.exported, 3)
+        self.assertEqual([ride_id for ride_id, _ in result.failed], ["unknown"])
+        self.assertEqual(result.failed[0][1]["error"], "not_found")
+        self.assertEqual(delays, [0.5, 1.0])
+
+        with open(self.path("receipts.csv"), newline="") as receipts:
+            rows = list(csv.DictReader(receipts))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]["price.currency"], "USD")
+        self.assertEqual(json.loads(rows[0]["charges"])[0]["payment_method"], "Visa ***1111")
+
+    def test_models(self):
+        rides = Rides("Bearer", "token", transport=self.transport, models=True)
+        with NdjsonWriter(self.path("receipts.ndjson")) as writer:
+            self.assertEqual(ReceiptExporter(rides, writer).export(self.ride_ids[:2]).exported, 2)
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_parquet_export(self):
+        import pyarrow.parquet
+
+        for ride_ids in (self.ride_ids[:4], self.ride_ids[4:]):
+            with ParquetWriter(self.path("receipts")) as writer:
+                ReceiptExporter(self.rides, writer, checkpoint_every=2).export(ride_ids)
+
+        table = pyarrow.parquet.read_table(self.path("receipts"))
+        self.assertEqual(table.num_rows, 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import math
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class GeoTest(unittest.TestCase):
+
+    def test_haversine(self):
+        from lyft.util.geo import haversine
+
+        # one degree of latitude along a meridian
+        self.assertAlmostEqual(float(haversine(0, 0, 1, 0)), 6371008.8 * math.pi / 180, places=3)
+        distances = haversine([37.7763, 37.7763, 37.7763], [-122.3918, -122.3918, -122.3918],
+                              [37.7763, 37.7972, numpy.nan], [-122.3918, -122.4533, numpy.nan])
+        self.assertEqual(distances[0], 0)
+        self.assertAlmostEqual(distances[1], 5883, delta=5)
+        self.assertTrue(numpy.isnan(distances[2]))
+
+    def test_snap(self):
+        from lyft.util.geo import snap
+
+        self.assertEqual(snap([37.77634, -122.39176], 3).tolist(), [37.776, -122.392])
+
+    def test_plan(self):
+        from lyft.util.geo import PairFilter
+
+        pairs = [(37.7763, -122.3918, 37.7972, -122.4533),
+                 (37.77631, -122.39179, 37.79721, -122.45332),
+                 (37.7763, -122.3918, 40.7128, -74.0060),
+                 (37.7763, -122.3918, 37.7764, -122.3918),
+                 (37.7833, -122.4167, None, None),
+                 (37.7763, -122.3918, 37.7972, -122.4533)]
+
+        groups, rejected = PairFilter(max_distance=100000, min_distance=100, precision=3).plan(pairs)
+        self.assertEqual(list(groups.items()), [((37.776, -122.392, 37.797, -122.453), [0, 1, 5]),
+                                                ((37.783, -122.417, None, None), [4])])
+        self.assertEqual([(index, pair) for index, pair, _ in rejected], [(2, pairs[2]), (3, pairs[3])])
+        self.assertGreater(rejected[0][2], 4000000)
+
+        groups, rejected = PairFilter().plan(pairs)
+        self.assertEqual(list(groups.values()), [[0, 5], [1], [2], [3], [4]])
+        self.assertEqual(next(iter(groups)), pairs[0])
+        self.assertEqual(rejected, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
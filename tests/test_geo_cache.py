@@ -0,0 +1,70 @@
+import unittest
+
+from lyft.availability import Availability
+from lyft.cache.geo_cache import GeoCache
+from lyft.transport.transport import Transport
+from lyft.util import geohash
+from tests import availability_res
+from tests.fake_clock import FakeClock
+from tests.stub_server import StubServer
+
+
+class GeohashTest(unittest.TestCase):
+
+    def test_encode(self):
+        self.assertEqual(geohash.encode(57.64911, 10.40744, 11), "u4pruydqqvj")
+        self.assertEqual(geohash.encode(37.7763, -122.3918, 7), geohash.encode(37.7764, -122.3917, 7))
+
+
+class GeoCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = GeoCache(precision=7, ttls={"eta": 30, "cost": 60}, max_size=2, clock=self.clock)
+
+    def test_key(self):
+        self.assertEqual(self.cache.key("eta", 37.7763, -122.3918), self.cache.key("eta", 37.7764, -122.3917))
+        self.assertNotEqual(self.cache.key("eta", 37.7763, -122.3918),
+                            self.cache.key("eta", 37.7763, -122.3918, "lyft"))
+        self.assertNotEqual(self.cache.key("cost", 37.7763, -122.3918, None, 37.79, -122.45),
+                            self.cache.key("cost", 37.7763, -122.3918, None, 37.80, -122.45))
+        self.assertIsNone(self.cache.key("drivers", 37.7763, -122.3918))
+
+    def test_ttl(self):
+        key = self.cache.key("eta", 37.7763, -122.3918)
+        self.cache.set(key, {"eta_estimates": []})
+        self.assertEqual(self.cache.get(key), {"eta_estimates": []})
+        self.clock.now += 31
+        self.assertIsNone(self.cache.get(key))
+        self.assertEqual(self.cache.stats()["hits"], 1)
+        self.assertEqual(self.cache.stats()["misses"], 1)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_lru_eviction(self):
+        first, second, third = [self.cache.key("eta", lat, -122.3918) for lat in (37.70, 37.75, 37.80)]
+        self.cache.set(first, 1)
+        self.cache.set(second, 2)
+        self.cache.get(first)
+        self.cache.set(third, 3)
+        self.assertEqual(self.cache.get(first), 1)
+        self.assertIsNone(self.cache.get(second))
+        self.assertEqual(self.cache.stats()["evictions"], 1)
+
+
+class AvailabilityCacheTest(unittest.TestCase):
+
+    def test_nearby_requests_hit_the_cache(self):
+        with StubServer({("GET", "/v1/ridetypes"): (200, availability_res.ride_types_res, {})}) as server:
+            with Transport(base_url=server.base_url) as transport:
+                cache = GeoCache()
+                availability = Availability("Bearer", "token", transport=transport, cache=cache)
+                self.assertEqual(availability.get_ride_types(37.7763, -122.3918), availability_res.ride_types_res)
+                self.assertEqual(availability.get_ride_types(37.7764, -122.3917), availability_res.ride_types_res)
+                availability.get_ride_types(37.7763, -122.3918, "lyft")
+
+        self.assertEqual(len(server.requests), 2)
+        self.assertEqual(cache.stats()["hits"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import asyncio
+import unittest
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from lyft.availability import Availability
+from lyft.cache.geo_cache import GeoCache
+from lyft.rides import Rides
+from lyft.testing.simulator import LyftSimulator
+from lyft.transport.hooks import Hooks, MetricsHooks, endpoint_name
+from lyft.transport.retry import RetryPolicy
+from lyft.transport.transport import Transport
+from lyft.util.errors import LyftAPIError
+
+
+class RecordingHooks(Hooks):
+
+    def __init__(self):
+        self.events = []
+
+    def on_request_start(self, event):
+        self.events.append(("start", event.endpoint, event.attempt))
+
+    def on_request_end(self, event):
+        self.events.append(("end", event.endpoint, event.status_code))
+        self.last = event
+
+    def on_retry(self, event, delay):
+        self.events.append(("retry", event.endpoint, event.status_code))
+
+    def on_cache_hit(self, endpoint, ride_type):
+        self.events.append(("hit", endpoint, ride_type))
+
+    def on_cache_miss(self, endpoint, ride_type):
+        self.events.append(("miss", endpoint, ride_type))
+
+
+class HooksTest(unittest.TestCase):
+
+    def setUp(self):
+        self.simulator = LyftSimulator(ride_step=0).start()
+
+    def tearDown(self):
+        self.simulator.stop()
+
+    def test_endpoint_name(self):
+        self.assertEqual(endpoint_name("https://api.lyft.com/v1/eta?lat=1&lng=2"), "eta")
+        self.assertEqual(endpoint_name("https://api.lyft.com/v1/rides/123/receipt"), "rides/{ride_id}/receipt")
+        self.assertEqual(endpoint_name("https://api.lyft.com/v1/rides"), "rides")
+        self.assertEqual(endpoint_name("https://api.lyft.com/oauth/token"), "oauth/token")
+
+    def test_request_events(self):
+        hooks, metrics = RecordingHooks(), MetricsHooks()
+        with Transport(base_url=self.simulator.base_url, hooks=[hooks, metrics]) as transport:
+            availability = Availability("Bearer", "token", transport=transport, cache=GeoCache())
+            availability.get_driver_eta(37.7763, -122.3918, ride_type="lyft")
+            availability.get_driver_eta(37.7763, -122.3918, ride_type="lyft")
+            Rides("Bearer", "token", transport=transport).create_ride_request("lyft_plus", 37.7, -122.3, 37.8, -122.4)
+
+        self.assertEqual(hooks.events, [("miss", "eta", "lyft"), ("start", "eta", 1), ("end", "eta", 200),
+                                        ("hit", "eta", "lyft"), ("start", "rides", 1), ("end", "rides", 201)])
+        self.assertEqual(hooks.last.ride_type, "lyft_plus")
+        self.assertGreater(hooks.last.bytes_out, 0)
+        self.assertGreater(hooks.last.bytes_in, 0)
+        self.assertIn("ttfb", hooks.last.timings)
+
+        eta, rides = metrics.snapshot()
+        self.assertEqual((eta["endpoint"], eta["ride_type"], eta["requests"]), ("eta", "lyft", 1))
+        self.assertEqual((eta["cache_hits"], eta["cache_misses"], eta["statuses"]), (1, 1, {200: 1}))
+        self.assertEqual(eta["buckets"][-1], (float("inf"), 1))
+        self.assertIsNotNone(eta["p99"])
+        self.assertEqual((rides["ride_type"], rides["statuses"]), ("lyft_plus", {201: 1}))
+
+        text = metrics.prometheus()
+        self.assertIn('lyft_sdk_request_seconds_count{endpoint="eta",ride_type="lyft"} 1', text)
+        self.assertIn('lyft_sdk_responses_total{endpoint="rides",ride_type="lyft_plus",status="201"} 1', text)
+
+    def test_retries_and_errors(self):
+        hooks, metrics = RecordingHooks(), MetricsHooks()
+        self.simulator.error_rate = 1
+        with Transport(base_url=self.simulator.base_url, hooks=[hooks, metrics],
+                       retry_policy=RetryPolicy(max_attempts=2, backoff_factor=0.01)) as transport:
+            with self.assertRaises(LyftAPIError):
+                Availability("Bearer", "token", transport=transport).get_nearby_drivers(37.7, -122.3)
+        with Transport(base_url="http://127.0.0.1:9", hooks=[metrics]) as transport:
+            with self.assertRaises(Exception):
+                Availability("Bearer", "token", transport=transport).get_nearby_drivers(37.7, -122.3)
+
+        self.assertEqual(hooks.events, [("start", "drivers", 1), ("end", "drivers", 503), ("retry", "drivers", 503),
+                                        ("start", "drivers", 2), ("end", "drivers", 503)])
+        drivers = metrics.snapshot()[0]
+        self.assertEqual((drivers["requests"], drivers["retries"], drivers["errors"]), (3, 1, 1))
+        self.assertEqual(drivers["statuses"], {503: 2})
+
+    def test_disabled_by_default(self):
+        with Transport(base_url=self.simulator.base_url) as transport:
+            self.assertEqual(transport.hooks, ())
+
+    @unittest.skipIf(aiohttp is None, "aiohttp is not installed")
+    def test_async_timings(self):
+        from lyft.aio.availability import AsyncAvailability
+        from lyft.aio.transport import AsyncTransport
+
+        hooks, metrics = RecordingHooks(), MetricsHooks()
+
+        async def run():
+            async with AsyncTransport(base_url=self.simulator.base_url, hooks=[hooks, metrics]) as transport:
+                await AsyncAvailability("Bearer", "token", transport=transport).get_ride_types(37.7, -122.3)
+
+        asyncio.run(run())
+        self.assertEqual(hooks.events, [("start", "ridetypes", 1), ("end", "ridetypes", 200)])
+        self.assertIn("ttfb", hooks.last.timings)
+        self.assertIn("connect", hooks.last.timings)
+        self.assertEqual(metrics.snapshot()[0]["requests"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
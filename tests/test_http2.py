@@ -0,0 +1,162 @@
+import pickle
+import socket
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import requests
+
+from lyft.authentication.auth import LyftPublicAuth
+from lyft.availability import Availability
+from lyft.rides import Rides
+from lyft.testing.simulator import LyftSimulator
+from lyft.transport import http2
+from lyft.transport.http2 import Http2Transport
+from lyft.transport.retry import RetryPolicy
+from lyft.transport.transport import Transport
+
+CONFIG = {"client_id": "id", "client_secret": "secret"}
+
+
+@unittest.skipIf(not http2.HTTP2_AVAILABLE, "h2 is not installed")
+class Http2TransportTest(unittest.TestCase):
+
+    def setUp(self):
+        from lyft.testing.http2 import Http2Simulator
+
+        self.simulator = LyftSimulator(ride_step=0, seed=1)
+        self.server    = Http2Simulator(self.simulator).start()
+        self.transport = Http2Transport(base_url=self.server.base_url, prior_knowledge=True, max_connections=2)
+
+    def tearDown(self):
+        self.transport.close()
+        self.server.stop()
+
+    def test_same_results_as_http1(self):
+        with LyftSimulator(ride_step=0, seed=1) as simulator, Transport(base_url=simulator.base_url) as transport:
+            expected = Availability("Bearer", "token", transport=transport).get_eta_and_nearby_drivers(37.7, -122.3)
+        availability = Availability("Bearer", "token", transport=self.transport)
+        self.assertEqual(availability.get_eta_and_nearby_drivers(37.7, -122.3), expected)
+
+        token = LyftPublicAuth(CONFIG, transport=self.transport).get_access_token()
+        self.assertEqual(token["token_type"], "Bearer")
+        rides = Rides("Bearer", token["access_token"], transport=self.transport)
+        ride  = rides.create_ride_request("lyft", 37.7763, -122.3918, 37.7972, -122.4533)
+        self.assertEqual(rides.get_ride_details(ride["ride_id"])["status"], "droppedOff")
+        self.assertEqual(self.server.stats()["streams"], 4)
+
+    def test_concurrent_requests_share_connections(self):
+        self.simulator.latency = 0.2
+        availability = Availability("Bearer", "token", transport=self.transport)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(100) as executor:
+            etas = list(executor.map(lambda index: availability.get_driver_eta(37.7, -122.3 + index / 1000),
+                                     range(100)))
+        # 100 requests in flight at once over a single connection, instead of 100 connections with HTTP/1.1
+        self.assertLess(time.perf_counter() - start, 1)
+        self.assertTrue(all("eta_estimates" in eta for eta in etas))
+        self.assertEqual(self.server.stats()["streams"], 100)
+        self.assertEqual(self.server.stats()["connections"], 1)
+
+    def test_full_connections_open_the_next_one(self):
+        self.simulator.latency = 0.2
+        with Http2Transport(max_connections=3, streams_per_connection=10, prior_knowledge=True,
+                            base_url=self.server.base_url) as transport:
+            availability = Availability("Bearer", "token", transport=transport)
+            with ThreadPoolExecutor(40) as executor:
+                etas = list(executor.map(lambda index: availability.get_driver_eta(37.7, -122.3), range(80)))
+        self.assertTrue(all("eta_estimates" in eta for eta in etas))
+        self.assertEqual(self.server.stats()["connections"], 3)
+
+    def test_compressed_responses(self):
+        availability = Availability("Bearer", "token", transport=self.transport)
+        expected     = availability.get_eta_and_nearby_drivers(37.7, -122.3)
+        uncompressed = self.server.stats()["bytes_sent"]
+        self.simulator.compress = True
+        self.assertEqual(availability.get_eta_and_nearby_drivers(37.7, -122.3), expected)
+        self.assertLess(self.server.stats()["bytes_sent"] - uncompressed, uncompressed / 2)
+
+    def test_timeouts(self):
+        self.simulator.latency = 0.5
+        with Http2Transport(prior_knowledge=True, timeout=0.1, base_url=self.server.base_url) as transport:
+            availability = Availability("Bearer", "token", transport=transport)
+            with self.assertRaises(requests.Timeout):
+                availability.get_driver_eta(37.7, -122.3)
+            # the stream is reset, the connection keeps serving the other requests
+            self.simulator.latency = 0
+            self.assertIn("eta_estimates", availability.get_driver_eta(37.7, -122.3))
+        self.assertEqual(self.server.stats()["connections"], 1)
+
+    def test_waiting_for_a_stream_times_out(self):
+        from lyft.testing.http2 import Http2Simulator
+
+        self.simulator.latency = 0.5
+        with Http2Simulator(self.simulator, max_concurrent_streams=1) as server, \
+                Http2Transport(prior_knowledge=True, retry_policy=None, base_url=server.base_url) as transport:
+            url     = server.base_url + "/v1/eta"
+            request = dict(params={"lat": 37.7, "lng": -122.3}, headers={"Authorization": "Bearer token"})
+            with ThreadPoolExecutor(1) as executor:
+                slow = executor.submit(transport.get, url, timeout=5, **request)
+                time.sleep(0.1)
+                # the only stream is taken, the request gives up after its read timeout instead of waiting for it
+                start = time.perf_counter()
+                with self.assertRaises(requests.ReadTimeout):
+                    transport.get(url, timeout=0.1, **request)
+                self.assertLess(time.perf_counter() - start, 0.3)
+                self.assertEqual(slow.result().status_code, 200)
+            self.simulator.latency = 0
+            self.assertEqual(transport.get(url, timeout=1, **request).status_code, 200)
+
+    def test_slow_origin_does_not_hold_up_the_others(self):
+        # accepts the connection, never answers the TLS handshake
+        silent = socket.create_server(("127.0.0.1", 0))
+        availability = Availability("Bearer", "token", transport=self.transport)
+        try:
+            with ThreadPoolExecutor(1) as executor:
+                stuck = executor.submit(self.transport.get, "https://127.0.0.1:{}/".format(silent.getsockname()[1]),
+                                        timeout=1)
+                time.sleep(0.1)
+                start = time.perf_counter()
+                self.assertIn("eta_estimates", availability.get_driver_eta(37.7, -122.3))
+                self.assertLess(time.perf_counter() - start, 0.5)
+                with self.assertRaises(requests.ConnectionError):
+                    stuck.result()
+        finally:
+            silent.close()
+
+    def test_falls_back_to_http1(self):
+        with LyftSimulator(seed=1) as simulator:
+            with Http2Transport(base_url=simulator.base_url) as transport:
+                eta = Availability("Bearer", "token", transport=transport).get_driver_eta(37.7, -122.3)
+            self.assertIn("eta_estimates", eta)
+            self.assertEqual(simulator.stats()["connections"], 1)
+
+    def test_connection_errors_are_requests_errors(self):
+        policy = RetryPolicy(max_attempts=2, backoff_factor=0.01)
+        with Http2Transport(base_url="http://127.0.0.1:9", prior_knowledge=True, retry_policy=policy) as transport:
+            with self.assertRaises(requests.ConnectionError):
+                Availability("Bearer", "token", transport=transport).get_driver_eta(37.7, -122.3)
+
+    def test_pickle(self):
+        copy = pickle.loads(pickle.dumps(self.transport))
+        self.assertIsInstance(copy, Http2Transport)
+        self.assertEqual((copy.base_url, copy.max_connections, copy.prior_knowledge),
+                         (self.server.base_url, 2, True))
+        self.assertIn("eta_estimates", Availability("Bearer", "token", transport=copy).get_driver_eta(37.7, -122.3))
+        copy.close()
+
+
+class Http2FallbackTest(unittest.TestCase):
+
+    def test_without_h2(self):
+        with mock.patch.object(http2, "HTTP2_AVAILABLE", False), LyftSimulator(seed=1) as simulator:
+            with Http2Transport(base_url=simulator.base_url, max_connections=8) as transport:
+                self.assertFalse(transport.http2)
+                self.assertEqual(transport.pool_maxsize, 8)
+                eta = Availability("Bearer", "token", transport=transport).get_driver_eta(37.7, -122.3)
+        self.assertIn("eta_estimates", eta)
+
+
+if __name__ == '__main__':
+    unittest.main()
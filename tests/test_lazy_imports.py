@@ -0,0 +1,53 @@
+import subprocess
+import sys
+import unittest
+
+import lyft
+from lyft.util.lazy import lazy_function, lazy_module
+
+_SCRIPT = """
+import sys
+import {module}
+print(" ".join(name for name in {names!r} if name in sys.modules))
+"""
+
+
+def _loaded(module, names):
+    """Imports module in a new interpreter, returns the names of the modules it loaded"""
+    output = subprocess.run([sys.executable, "-c", _SCRIPT.format(module=module, names=names)], check=True,
+                            stdout=subprocess.PIPE, universal_newlines=True).stdout
+    return output.split()
+
+
+class LazyImportTest(unittest.TestCase):
+
+    def test_dependencies_are_imported_on_first_use(self):
+        heavy = ("requests", "asyncio", "orjson", "sqlite3", "http.server", "lyft.transport.transport")
+        for module in ("lyft", "lyft.authentication.scopes", "lyft.availability", "lyft.rides",
+                       "lyft.authentication.auth", "lyft.session.session", "lyft.webhooks"):
+            self.assertEqual(_loaded(module, heavy), [], module)
+        self.assertEqual(_loaded("lyft.aio.transport", ("requests", "lyft.transport.transport")), [])
+
+    def test_namespace(self):
+        from lyft.authentication.scopes import Scopes
+        from lyft.rides import Rides
+
+        self.assertIs(lyft.Scopes, Scopes)
+        self.assertIs(lyft.Rides, Rides)
+        self.assertIs(lyft.availability, sys.modules["lyft.availability"])
+        self.assertIn("Transport", dir(lyft))
+        with self.assertRaises(AttributeError):
+            lyft.Missing
+        for name in lyft.__all__:
+            self.assertEqual(getattr(lyft, name).__name__, name)
+
+    def test_lazy_helpers(self):
+        self.assertEqual(lazy_function("json", "dumps")([1]), "[1]")
+        self.assertEqual(lazy_function("collections", "OrderedDict")(a=1)["a"], 1)
+        self.assertEqual(lazy_module("json").loads("[2]"), [2])
+        with self.assertRaises(AttributeError):
+            lazy_module("json").missing
+
+
+if __name__ == '__main__':
+    unittest.main()
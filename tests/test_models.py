@@ -0,0 +1,110 @@
+import json
+import unittest
+
+from lyft.availability import Availability
+from lyft.models import (CostEstimates, NearbyDrivers, PickupEtas, PricingDetails, ReceiptResponse, RideResponse,
+                         RideTypes)
+from lyft.rides import Rides
+from lyft.transport.transport import Transport
+from tests import availability_res
+from tests.stub_server import StubServer
+
+nearby_drivers_res = {"nearby_drivers": [{"ride_type": "lyft",
+                                          "drivers": [{"locations": [{"lat": 37.1, "lng": -122.1},
+                                                                     {"lat": 37.2, "lng": -122.2}]},
+                                                      {"locations": [{"lat": 37.3, "lng": -122.3}]}]},
+                                         {"ride_type": "lyft_plus",
+                                          "drivers": [{"locations": [{"lat": 37.4, "lng": -122.4}]}]}]}
+
+pickup_etas_res = {"nearby_drivers_pickup_etas": [{"ride_type": "lyft", "display_name": "Lyft",
+                                                   "pickup_duration_range": {"duration_ms": 120000,
+                                                                             "range_ms": 60000},
+                                                   "nearby_drivers": [{"locations": [{"lat": 37.1, "lng": -122.1,
+                                                                                      "bearing": 90,
+                                                                                      "recorded_at_ms": 1}]}]}]}
+
+ride_res = {"ride_id": "123", "status": "pending", "ride_type": "lyft",
+            "origin": {"lat": 37.7, "lng": -122.3, "address": "Market St"}}
+
+
+class ModelsTest(unittest.TestCase):
+
+    def test_decoded_on_first_access(self):
+        ride_types = RideTypes(json.dumps(availability_res.ride_types_res).encode())
+        with self.assertRaises(AttributeError):
+            object.__getattribute__(ride_types, "items")
+
+        self.assertEqual(len(ride_types), 6)
+        self.assertEqual(ride_types[0].ride_type, "lyft_line")
+        self.assertEqual(ride_types[0].pricing_details, PricingDetails.from_dict(
+            availability_res.ride_types_res["ride_types"][0]["pricing_details"]))
+        self.assertEqual(ride_types.raw, availability_res.ride_types_res)
+
+    def test_slots(self):
+        ride_type = RideTypes(json.dumps(availability_res.ride_types_res).encode())[0]
+        self.assertFalse(hasattr(ride_type, "__dict__"))
+        with self.assertRaises(AttributeError):
+            ride_type.unknown = 1
+        self.assertEqual(ride_type.to_dict()["pricing_details"]["cost_minimum"], 475)
+
+    def test_missing_fields_are_none(self):
+        estimates = CostEstimates(b'{"cost_estimates": [{"ride_type": "lyft"}]}')
+        self.assertIsNone(estimates[0].estimated_cost_cents_max)
+        self.assertEqual(len(CostEstimates(b"{}")), 0)
+
+    def test_nearby_drivers(self):
+        drivers = NearbyDrivers(json.dumps(nearby_drivers_res).encode())
+        self.assertEqual([driver.ride_type for driver in drivers], ["lyft", "lyft", "lyft_plus"])
+        self.assertEqual((drivers[0].lat, drivers[0].lng), (37.2, -122.2))
+        self.assertEqual(drivers[0].locations, ((37.1, -122.1), (37.2, -122.2)))
+
+        etas = PickupEtas(json.dumps(pickup_etas_res).encode())
+        self.assertEqual(etas[0].pickup_duration_ms, 120000)
+        self.assertEqual(etas[0].drivers[0].bearing, 90)
+
+    def test_ride_and_receipt(self):
+        ride = RideResponse(json.dumps(ride_res).encode(), 201)
+        self.assertEqual(ride.status_code, 201)
+        self.assertEqual(ride.status, "pending")
+        self.assertEqual(ride.origin.address, "Market St")
+        self.assertIsNone(ride.driver)
+        with self.assertRaises(AttributeError):
+            ride.unknown
+
+        receipt = ReceiptResponse(b'{"ride_id": "123", "price": {"amount": 1000}}')
+        self.assertEqual(receipt.price["amount"], 1000)
+
+
+class ModelsClientTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer({
+            ("GET", "/v1/ridetypes"): (200, availability_res.ride_types_res, {}),
+            ("GET", "/v1/drivers"): (200, nearby_drivers_res, {}),
+            ("POST", "/v1/rides"): (201, ride_res, {}),
+            ("GET", "/v1/rides/123/receipt"): (404, {"error": "not_found"}, {}),
+        }).start()
+        self.transport = Transport(base_url=self.server.base_url)
+
+    def tearDown(self):
+        self.transport.close()
+        self.server.stop()
+
+    def test_availability(self):
+        availability = Availability("Bearer", "token", transport=self.transport, models=True)
+        self.assertIsInstance(availability.get_ride_types(37.7, -122.3), RideTypes)
+        self.assertEqual(len(availability.get_nearby_drivers(37.7, -122.3)), 3)
+
+        availability = Availability("Bearer", "token", transport=self.transport)
+        self.assertEqual(availability.get_ride_types(37.7, -122.3), availability_res.ride_types_res)
+
+    def test_rides(self):
+        rides = Rides("Bearer", "token", transport=self.transport, models=True)
+        ride = rides.create_ride_request("lyft", 37.7, -122.3, 37.8, -122.4)
+        self.assertEqual((ride.status_code, ride.ride_id), (201, "123"))
+        # errors are still returned as dictionaries
+        self.assertEqual(rides.get_receipt("123"), {"error": "not_found"})
+
+
+if __name__ == '__main__':
+    unittest.main()
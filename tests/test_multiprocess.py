@@ -0,0 +1,117 @@
+import multiprocessing
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+from lyft.authentication.auth import LyftPublicAuth
+from lyft.authentication.token_provider import TokenProvider
+from lyft.availability import Availability
+from lyft.cache.geo_cache import GeoCache
+from lyft.rides import Rides
+from lyft.testing.simulator import LyftSimulator
+from lyft.transport.coordinator import Coordinator, SharedRateLimiter
+from lyft.transport.hooks import MetricsHooks
+from lyft.transport.rate_limiter import RateLimitExceeded, RateLimiter
+from lyft.transport.retry import CircuitBreaker, RetryPolicy
+from lyft.transport.single_flight import SingleFlight
+from lyft.transport.transport import Transport, get_default_transport
+
+CONFIG = {"client_id": "id", "client_secret": "secret"}
+
+fork_only = unittest.skipIf("fork" not in multiprocessing.get_all_start_methods(), "fork is not available")
+
+
+def eta_count(availability):
+    return len(availability.get_driver_eta(37.7, -122.3)["eta_estimates"])
+
+
+def check_eta_count(availability):
+    assert eta_count(availability) == 4
+
+
+def shared_authorization(coordinator, base_url):
+    transport = Transport(base_url=base_url)
+    fetch_token = coordinator.token_fetcher("app", LyftPublicAuth(CONFIG, transport=transport).get_access_token)
+    return TokenProvider(fetch_token, background=False).authorization()
+
+
+def acquired_tokens(limiter):
+    return sum(limiter.try_acquire() for _ in range(5))
+
+
+class MultiprocessTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.simulator = LyftSimulator(ride_step=0).start()
+        self.transport = Transport(base_url=self.simulator.base_url, rate_limiter=RateLimiter(),
+                                   retry_policy=RetryPolicy(), circuit_breaker=CircuitBreaker(),
+                                   single_flight=SingleFlight(), hooks=[MetricsHooks()])
+
+    def tearDown(self):
+        self.transport.close()
+        self.simulator.stop()
+        shutil.rmtree(self.directory)
+
+    def test_pickle(self):
+        provider = TokenProvider.from_public_auth(LyftPublicAuth(CONFIG, transport=self.transport), background=False)
+        availability = Availability(transport=self.transport, cache=GeoCache(), token_provider=provider)
+        self.assertEqual(eta_count(availability), 4)
+
+        copy = pickle.loads(pickle.dumps(availability))
+        self.assertEqual(eta_count(copy), 4)
+        rides = pickle.loads(pickle.dumps(Rides("Bearer", "token", transport=self.transport)))
+        self.assertIn("ride_id", rides.create_ride_request("lyft", 37.7, -122.3, 37.8, -122.4))
+        # the copies carry the token and open their own connections, objects pickled separately do not share them
+        self.assertEqual(self.simulator.stats()["endpoints"]["token"], 1)
+        self.assertEqual(self.simulator.stats()["connections"], 3)
+
+        self.assertIs(pickle.loads(pickle.dumps(get_default_transport())), get_default_transport())
+
+    @fork_only
+    def test_forked_workers_open_their_own_connections(self):
+        provider = TokenProvider.from_public_auth(LyftPublicAuth(CONFIG, transport=self.transport))
+        availability = Availability(transport=self.transport, token_provider=provider)
+        self.assertEqual(eta_count(availability), 4)
+
+        context   = multiprocessing.get_context("fork")
+        processes = [context.Process(target=check_eta_count, args=(availability,)) for _ in range(3)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        self.assertEqual([process.exitcode for process in processes], [0] * 3)
+
+        # the children reuse the token of the parent and never touch its pooled connection
+        self.assertEqual(self.simulator.stats()["endpoints"], {"token": 1, "eta": 4})
+        self.assertEqual(self.simulator.stats()["connections"], 4)
+        self.assertEqual(eta_count(availability), 4)
+        self.assertEqual(self.simulator.stats()["connections"], 4)
+        provider.close()
+
+    @fork_only
+    def test_shared_token_and_budget(self):
+        coordinator = Coordinator(os.path.join(self.directory, "lyft.sqlite"), poll_interval=0.01)
+        context     = multiprocessing.get_context("fork")
+
+        with context.Pool(4) as pool:
+            authorizations = pool.starmap(shared_authorization, [(coordinator, self.simulator.base_url)] * 8)
+        self.assertEqual(len(set(authorizations)), 1)
+        self.assertEqual(self.simulator.stats()["endpoints"]["token"], 1)
+
+        limiter = SharedRateLimiter(coordinator, "app", rate=0.001, capacity=10)
+        with context.Pool(4) as pool:
+            self.assertEqual(sum(pool.map(acquired_tokens, [limiter] * 4)), 10)
+        self.assertFalse(limiter.try_acquire())
+
+        # a 429 seen by one process pauses the others
+        other = SharedRateLimiter(coordinator, "app")
+        limiter.throttle(retry_after=60)
+        with self.assertRaises(RateLimitExceeded):
+            other.acquire(timeout=30)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import asyncio
+import unittest
+
+from lyft.availability import Availability
+from lyft.rides import Rides
+from lyft.transport.rate_limiter import RateLimiter, RateLimitExceeded
+from lyft.transport.transport import Transport
+from tests.fake_clock import FakeClock
+from tests.stub_server import StubServer
+
+
+class RateLimiterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def test_unlimited_until_seeded(self):
+        limiter = RateLimiter(clock=self.clock)
+        self.assertTrue(all(limiter.try_acquire() for _ in range(1000)))
+
+    def test_seeded_from_headers(self):
+        limiter = RateLimiter(window=10, clock=self.clock)
+        limiter.update_from_headers({"x-ratelimit-limit": "10", "x-ratelimit-remaining": "2"})
+        self.assertEqual(limiter.rate, 1)
+        self.assertTrue(limiter.try_acquire())
+        self.assertTrue(limiter.try_acquire())
+        self.assertFalse(limiter.try_acquire())
+        self.clock.now += 1
+        self.assertTrue(limiter.try_acquire())
+        self.assertEqual(limiter.metrics()["rejected"], 1)
+
+    def test_remaining_header_corrects_the_bucket(self):
+        limiter = RateLimiter(rate=5, capacity=5, clock=self.clock)
+        limiter.update_from_headers({"x-ratelimit-remaining": "1"})
+        self.assertTrue(limiter.try_acquire())
+        self.assertFalse(limiter.try_acquire())
+
+    def test_throttle_with_retry_after(self):
+        limiter = RateLimiter(rate=100, capacity=100, clock=self.clock)
+        limiter.throttle(retry_after=2)
+        self.assertFalse(limiter.try_acquire())
+        self.clock.now += 2.5
+        self.assertTrue(limiter.try_acquire())
+        self.assertEqual(limiter.metrics()["throttled"], 1)
+
+    def test_acquire_timeout(self):
+        limiter = RateLimiter(rate=0.1, capacity=1)
+        limiter.acquire()
+        with self.assertRaises(RateLimitExceeded):
+            limiter.acquire(timeout=0)
+
+    def test_blocking_and_async_acquire_wait(self):
+        limiter = RateLimiter(rate=50, capacity=1)
+        for _ in range(3):
+            limiter.acquire()
+
+        async def run():
+            for _ in range(3):
+                await limiter.acquire_async()
+
+        asyncio.run(run())
+        metrics = limiter.metrics()
+        self.assertEqual(metrics["acquired"], 6)
+        self.assertGreaterEqual(metrics["delayed"], 4)
+        self.assertEqual(metrics["waiting"], 0)
+
+
+class TransportRateLimitTest(unittest.TestCase):
+
+    def test_shared_by_availability_and_rides(self):
+        headers = {"x-ratelimit-limit": "120", "x-ratelimit-remaining": "1"}
+        routes = {("GET", "/v1/drivers"): (200, {"nearby_drivers": []}, headers),
+                  ("GET", "/v1/rides/42/receipt"): (429, {"error": "too_many_requests"}, {"retry-after": "30"})}
+        limiter = RateLimiter()
+        with StubServer(routes) as server, Transport(base_url=server.base_url, rate_limiter=limiter,
+                                                     rate_limit_timeout=0) as transport:
+            Availability("Bearer", "token", transport=transport).get_nearby_drivers(37.7763, -122.3918)
+            Rides("Bearer", "token", transport=transport).get_receipt("42")
+            with self.assertRaises(RateLimitExceeded):
+                Availability("Bearer", "token", transport=transport).get_nearby_drivers(37.7763, -122.3918)
+
+        metrics = limiter.metrics()
+        self.assertEqual(metrics["capacity"], 120)
+        self.assertEqual(metrics["throttled"], 1)
+        self.assertEqual(metrics["rejected"], 1)
+        self.assertEqual(len(server.requests), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from lyft.availability import Availability
+from lyft.registry import ClientRegistry
+from lyft.testing.simulator import LyftSimulator
+from lyft.transport.rate_limiter import RateLimitExceeded
+from lyft.transport.transport import Transport
+from tests.fake_clock import FakeClock
+
+
+def config(index):
+    return {"client_id": "app-{}".format(index), "client_secret": "secret"}
+
+
+class ClientRegistryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.simulator = LyftSimulator(ride_step=0).start()
+        self.transport = Transport(base_url=self.simulator.base_url, pool_maxsize=4, pool_block=True)
+
+    def tearDown(self):
+        self.transport.close()
+        self.simulator.stop()
+
+    def test_tenants_share_the_pool(self):
+        registry = ClientRegistry(self.transport)
+        for index in range(20):
+            registry.add_app(index, config(index))
+
+        def eta(tenant_id):
+            return len(registry.availability(tenant_id).get_driver_eta(37.7, -122.3)["eta_estimates"])
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            self.assertEqual(list(executor.map(eta, list(range(20)) * 5)), [4] * 100)
+
+        # one token per tenant, fetched once despite the concurrent requests, over at most pool_maxsize connections
+        self.assertEqual(self.simulator.stats()["endpoints"], {"token": 20, "eta": 100})
+        self.assertLessEqual(self.simulator.stats()["connections"], 4)
+        authorizations = {registry.token_provider(index).authorization() for index in range(20)}
+        self.assertEqual(len(authorizations), 20)
+        self.assertIs(registry.availability(3), registry.availability(3))
+        self.assertEqual(registry.stats(), {"tenants": 20, "active": 20, "evictions": 0})
+
+    def test_user_sessions(self):
+        registry = ClientRegistry(self.transport)
+        registry.add_user("alice", config(0), "refresh-alice")
+        registry.add_user("bob", config(0), "refresh-bob")
+
+        ride = registry.rides("alice").create_ride_request("lyft", 37.7, -122.3, 37.8, -122.4)
+        self.assertIn("ride_id", ride)
+        self.assertEqual(registry.token_provider("bob").get_token()["scope"], "public rides.read rides.request offline")
+        self.assertEqual(self.simulator.stats()["endpoints"]["token"], 2)
+
+        self.assertTrue(registry.remove("bob"))
+        self.assertFalse(registry.remove("bob"))
+        self.assertNotIn("bob", registry)
+        with self.assertRaises(KeyError):
+            registry.rides("bob")
+
+    def test_rate_limit_budget_per_tenant(self):
+        self.simulator.rate_limit = 5
+        registry = ClientRegistry(self.transport, rate_limit_timeout=0)
+        registry.add_app("busy", config(0))
+        registry.add_app("quiet", config(1))
+
+        # the token request takes the first of the 5 requests allowed to the busy tenant
+        for _ in range(4):
+            registry.availability("busy").get_driver_eta(37.7, -122.3)
+        with self.assertRaises(RateLimitExceeded):
+            registry.availability("busy").get_driver_eta(37.7, -122.3)
+
+        self.assertIn("eta_estimates", registry.availability("quiet").get_driver_eta(37.7, -122.3))
+        self.assertEqual(self.simulator.stats()["throttled"], 0)
+
+    def test_eviction(self):
+        clock    = FakeClock()
+        registry = ClientRegistry(self.transport, max_active=3, idle_timeout=60, clock=clock)
+        for index in range(5):
+            registry.add_app(index, config(index))
+
+        providers = [registry.token_provider(index) for index in range(5)]
+        self.assertEqual(registry.stats(), {"tenants": 5, "active": 3, "evictions": 2})
+        # the least recently used tenants were evicted
+        self.assertIsNot(registry.token_provider(0), providers[0])
+        self.assertIs(registry.token_provider(4), providers[4])
+
+        clock.now += 30
+        registry.token_provider(4)
+        clock.now += 30
+        self.assertEqual(registry.evict_idle(), 2)
+        self.assertEqual(registry.stats(), {"tenants": 5, "active": 1, "evictions": 5})
+
+        # an evicted tenant fetches a new token on its next request
+        registry.availability(0).get_driver_eta(37.7, -122.3)
+        registry.availability(0).get_driver_eta(37.7, -122.3)
+        self.assertEqual(self.simulator.stats()["endpoints"]["token"], 1)
+
+        registry.close()
+        self.assertEqual(registry.stats()["active"], 0)
+
+    def test_sdk_objects_of_evicted_tenants(self):
+        registry = ClientRegistry(self.transport, max_active=2)
+        for index in range(6):
+            registry.add_app(index, config(index))
+        availability = registry.availability(0)
+        self.assertIs(registry.availability(0), availability)
+        registry.remove(0)
+        registry.add_app(0, config(0))
+        self.assertIsNot(registry.availability(0), availability)
+
+        # another thread evicting the tenant while its Availability is built waits for it to be built
+        evicting = threading.Thread(target=registry.close)
+
+        def evict_while_built(**kwargs):
+            evicting.start()
+            evicting.join(0.2)
+            return Availability(**kwargs)
+
+        with mock.patch("lyft.registry.Availability", side_effect=evict_while_built):
+            availability = registry.availability(1)
+        evicting.join()
+        self.assertEqual(registry.stats()["active"], 0)
+        # the tenant was evicted after it got its object, the next one is built for its new token provider
+        self.assertIsNot(registry.availability(1), availability)
+        self.assertIn("eta_estimates", registry.availability(1).get_driver_eta(37.7, -122.3))
+        registry.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
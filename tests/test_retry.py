@@ -0,0 +1,242 @@
+import asyncio
+import unittest
+
+import requests
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from lyft.availability import Availability
+from lyft.rides import Rides
+from lyft.transport.hooks import Hooks
+from lyft.transport.rate_limiter import RateLimiter, RateLimitExceeded
+from lyft.transport.retry import CircuitBreaker, CircuitOpenError, RetryPolicy
+from lyft.transport.transport import Transport
+from lyft.util.errors import LyftAPIError
+from tests.fake_clock import FakeClock
+from tests.stub_server import StubServer
+
+
+class FlakyRoute(object):
+
+    def __init__(self, failures, status=503, payload=None):
+        self.calls    = 0
+        self.failures = failures
+        self.status   = status
+        self.payload  = payload if payload is not None else {"error": "unavailable"}
+
+    def __call__(self, path):
+        self.calls += 1
+        if self.calls <= self.failures:
+            return self.status, self.payload, {}
+        return 200, {"id": "ok"}, {}
+
+
+class RetryPolicyTest(unittest.TestCase):
+
+    def test_backoff(self):
+        policy = RetryPolicy(backoff_factor=0.5, max_backoff=3, jitter=False)
+        self.assertEqual([policy.retry_delay(attempt) for attempt in (1, 2, 3, 4)], [0.5, 1, 2, 3])
+        jittered = RetryPolicy(backoff_factor=1, random=lambda: 0.5)
+        self.assertEqual(jittered.retry_delay(2), 1)
+
+    def test_should_retry(self):
+        policy = RetryPolicy(max_attempts=2)
+        self.assertTrue(policy.should_retry(1))
+        self.assertFalse(policy.should_retry(2))
+        self.assertTrue(policy.is_idempotent("get"))
+        self.assertFalse(policy.is_idempotent("POST"))
+
+
+class CircuitBreakerTest(unittest.TestCase):
+
+    def test_open_and_recover(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=10, clock=clock)
+        breaker.record_failure()
+        breaker.before_request()
+        breaker.record_failure()
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_request()
+
+        clock.now += 10
+        breaker.before_request()
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_request()
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+
+class FailingHook(Hooks):
+
+    def __init__(self):
+        self.failing = False
+
+    def on_request_start(self, event):
+        if self.failing:
+            raise RuntimeError("hook failed")
+
+
+class TransportRetryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.eta     = FlakyRoute(2)
+        self.ride    = FlakyRoute(1)
+        self.details = FlakyRoute(1)
+        self.server  = StubServer({("GET", "/v1/eta"): self.eta,
+                                   ("POST", "/v1/rides"): self.ride,
+                                   ("GET", "/v1/rides/42"): self.details,
+                                   ("GET", "/v1/drivers"): (502, b"<html>Bad Gateway</html>", {}),
+                                   ("GET", "/v1/ridetypes"): (200, {"ride_types": []}, {})}).start()
+        self.policy  = RetryPolicy(max_attempts=3, backoff_factor=0.01)
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_idempotent_requests_are_retried(self):
+        with Transport(base_url=self.server.base_url, retry_policy=self.policy) as transport:
+            self.assertEqual(Availability("Bearer", "token", transport=transport).get_driver_eta(37.7, -122.3),
+                             {"id": "ok"})
+            self.assertEqual(Rides("Bearer", "token", transport=transport).get_ride_details("42")["status_code"], 200)
+        self.assertEqual(self.eta.calls, 3)
+        self.assertEqual(self.details.calls, 2)
+
+    def test_ride_creation_is_never_retried(self):
+        with Transport(base_url=self.server.base_url, retry_policy=self.policy) as transport:
+            response = Rides("Bearer", "token", transport=transport).create_ride_request("lyft", 37.7, -122.3,
+                                                                                         37.8, -122.4)
+        self.assertEqual(response["status_code"], 503)
+        self.assertEqual(self.ride.calls, 1)
+
+    def test_deadline(self):
+        policy = RetryPolicy(max_attempts=10, backoff_factor=1, jitter=False, deadline=0.5)
+        with Transport(base_url=self.server.base_url, retry_policy=policy) as transport:
+            with self.assertRaises(LyftAPIError):
+                Availability("Bearer", "token", transport=transport).get_driver_eta(37.7, -122.3)
+        self.assertEqual(self.eta.calls, 1)
+
+    def test_non_json_error(self):
+        with Transport(base_url=self.server.base_url) as transport:
+            with self.assertRaises(LyftAPIError) as context:
+                Availability("Bearer", "token", transport=transport).get_nearby_drivers(37.7, -122.3)
+        self.assertEqual(context.exception.status_code, 502)
+        self.assertIn("Bad Gateway", context.exception.error)
+
+    def test_connection_errors_open_the_circuit(self):
+        breaker = CircuitBreaker(failure_threshold=3)
+        with Transport(base_url="http://127.0.0.1:9", retry_policy=self.policy,
+                       circuit_breaker=breaker) as transport:
+            availability = Availability("Bearer", "token", transport=transport)
+            with self.assertRaises(requests.ConnectionError):
+                availability.get_driver_eta(37.7, -122.3)
+            with self.assertRaises(CircuitOpenError):
+                availability.get_driver_eta(37.7, -122.3)
+        self.assertEqual(breaker.failures, 3)
+
+    def test_trial_request_is_never_lost(self):
+        clock   = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=10, clock=clock)
+        limiter = RateLimiter(rate=1, capacity=1, clock=clock)
+        hook    = FailingHook()
+        with Transport(base_url=self.server.base_url, rate_limiter=limiter, rate_limit_timeout=0,
+                       circuit_breaker=breaker, hooks=[hook]) as transport:
+            availability = Availability("Bearer", "token", transport=transport)
+            breaker.record_failure()
+            clock.now += 10
+            self.assertTrue(limiter.try_acquire())
+            # the rate limit is exceeded before the trial request is let through
+            with self.assertRaises(RateLimitExceeded):
+                availability.get_ride_types(37.7, -122.3)
+            self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+            # a hook failing says nothing about the API: not a failure, the next request is the trial
+            clock.now += 1
+            hook.failing = True
+            with self.assertRaises(RuntimeError):
+                availability.get_ride_types(37.7, -122.3)
+            self.assertEqual((breaker.state, breaker.failures), (CircuitBreaker.OPEN, 1))
+
+            clock.now += 1
+            hook.failing = False
+            self.assertEqual(availability.get_ride_types(37.7, -122.3), {"ride_types": []})
+            self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    @unittest.skipIf(aiohttp is None, "aiohttp is not installed")
+    def test_async_trial_request_is_never_lost(self):
+        from lyft.aio.availability import AsyncAvailability
+        from lyft.aio.transport import AsyncTransport
+        clock   = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=10, clock=clock)
+        limiter = RateLimiter(rate=1, capacity=1, clock=clock)
+
+        async def run():
+            async with AsyncTransport(base_url=self.server.base_url, rate_limiter=limiter, rate_limit_timeout=0,
+                                      circuit_breaker=breaker) as transport:
+                availability = AsyncAvailability("Bearer", "token", transport=transport)
+                with self.assertRaises(RateLimitExceeded):
+                    await availability.get_ride_types(37.7, -122.3)
+                self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+                clock.now += 1
+                return await availability.get_ride_types(37.7, -122.3)
+
+        breaker.record_failure()
+        clock.now += 10
+        self.assertTrue(limiter.try_acquire())
+        self.assertEqual(asyncio.run(run()), {"ride_types": []})
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    @unittest.skipIf(aiohttp is None, "aiohttp is not installed")
+    def test_cancelled_requests_are_not_failures(self):
+        from lyft.aio.availability import AsyncAvailability
+        from lyft.aio.transport import AsyncTransport
+        clock   = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=10, clock=clock)
+        self.server.delay = 0.3
+
+        async def cancel_in_flight(availability, count):
+            tasks = [asyncio.ensure_future(availability.get_ride_types(37.7, -122.3)) for _ in range(count)]
+            await asyncio.sleep(0.1)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        async def run():
+            async with AsyncTransport(base_url=self.server.base_url, circuit_breaker=breaker) as transport:
+                availability = AsyncAvailability("Bearer", "token", transport=transport)
+                await cancel_in_flight(availability, 10)
+                self.assertEqual((breaker.state, breaker.failures), (CircuitBreaker.CLOSED, 0))
+
+                # a cancelled trial request is given back, the next request is the trial
+                breaker.record_failure()
+                breaker.record_failure()
+                clock.now += 10
+                await cancel_in_flight(availability, 1)
+                self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+                self.server.delay = 0
+                return await availability.get_ride_types(37.7, -122.3)
+
+        self.assertEqual(asyncio.run(run()), {"ride_types": []})
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    @unittest.skipIf(aiohttp is None, "aiohttp is not installed")
+    def test_async_retries(self):
+        from lyft.aio.rides import AsyncRides
+        from lyft.aio.transport import AsyncTransport
+
+        async def run():
+            async with AsyncTransport(base_url=self.server.base_url, retry_policy=self.policy) as transport:
+                rides = AsyncRides("Bearer", "token", transport=transport)
+                created = await rides.create_ride_request("lyft", 37.7, -122.3, 37.8, -122.4)
+                details = await rides.get_ride_details("42")
+                return created, details
+
+        created, details = asyncio.run(run())
+        self.assertEqual((created["status_code"], details["status_code"]), (503, 200))
+        self.assertEqual((self.ride.calls, self.details.calls), (1, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import asyncio
+import datetime
+import time
+import unittest
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from lyft.rides import Rides, _history_windows, _HistoryCursor
+from lyft.testing.simulator import HISTORY_INTERVAL, LyftSimulator
+from lyft.transport.transport import Transport
+from lyft.util.errors import LyftAPIError
+
+START = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+END   = START + datetime.timedelta(seconds=300 * HISTORY_INTERVAL)
+
+
+def _ride(ride_id, requested_at):
+    return {"ride_id": ride_id, "requested_at": requested_at}
+
+
+class HistoryCursorTest(unittest.TestCase):
+
+    def test_windows(self):
+        windows = _history_windows("2020-01-01T00:00:00Z", "2020-01-01T00:00:10+0000", 4)
+        self.assertEqual([(start.second, end.second) for start, end in windows], [(0, 2), (2, 5), (5, 7), (7, 10)])
+        self.assertEqual(len(_history_windows(START, START + datetime.timedelta(seconds=2), 8)), 2)
+        self.assertEqual(_history_windows(END, START, 4), [])
+        with self.assertRaises(ValueError):
+            _history_windows("yesterday", None, 1)
+
+    def test_rides_of_the_last_second_are_not_repeated(self):
+        cursor = _HistoryCursor(START, START + datetime.timedelta(hours=5), 3)
+        page   = [_ride("1", "2020-01-01T00:00:00Z"), _ride("2", "2020-01-01T00:00:05Z"),
+                  _ride("3", "2020-01-01T00:00:05Z")]
+        self.assertEqual(cursor.advance(page), page)
+        self.assertEqual(cursor.query(), ("2020-01-01T00:00:05Z", "2020-01-01T05:00:00Z", "3"))
+
+        # the next page starts with the rides of 00:00:05 again
+        page = [_ride("2", "2020-01-01T00:00:05Z"), _ride("3", "2020-01-01T00:00:05Z"),
+                _ride("4", "2020-01-01T00:00:05Z")]
+        self.assertEqual([ride["ride_id"] for ride in cursor.advance(page)], ["4"])
+        self.assertFalse(cursor.done)
+
+        # a page full of rides already returned moves on to the next second
+        page = [_ride("2", "2020-01-01T00:00:05Z"), _ride("3", "2020-01-01T00:00:05Z"),
+                _ride("4", "2020-01-01T00:00:05Z")]
+        self.assertEqual(cursor.advance(page), [])
+        self.assertEqual(cursor.query()[0], "2020-01-01T00:00:06Z")
+
+        # rides past the end of the window belong to the next one
+        self.assertEqual(cursor.advance([_ride("5", "2020-01-01T04:00:00Z"), _ride("6", "2020-01-01T05:00:00Z"),
+                                         _ride("7", "2020-01-01T06:00:00Z")]), [_ride("5", "2020-01-01T04:00:00Z")])
+        self.assertTrue(cursor.done)
+
+
+class RideHistoryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.simulator = LyftSimulator(latency=0.02, history=1000).start()
+        self.transport = Transport(base_url=self.simulator.base_url, pool_maxsize=8)
+        self.rides     = Rides("Bearer", "token", transport=self.transport)
+
+    def tearDown(self):
+        self.transport.close()
+        self.simulator.stop()
+
+    def test_page(self):
+        page = self.rides.get_ride_history(START, limit=10)
+        self.assertEqual([ride["ride_id"] for ride in page], ["h{}".format(index) for index in range(10)])
+        self.assertEqual(self.rides.get_ride_history("2020-01-01T01:00:00Z", "2020-01-01T02:00:00Z")[0]["ride_id"],
+                         "h1")
+        with self.assertRaises(LyftAPIError):
+            self.rides.get_ride_history(START, limit=100)
+
+    def test_windows_are_fetched_in_parallel(self):
+        expected = ["h{}".format(index) for index in range(300)]
+
+        start  = time.perf_counter()
+        rides  = [ride["ride_id"] for ride in self.rides.iter_ride_history(START, END, page_size=20)]
+        serial = time.perf_counter() - start
+        self.assertEqual(rides, expected)
+
+        start = time.perf_counter()
+        rides = [ride["ride_id"] for ride in self.rides.iter_ride_history(START, END, page_size=20, windows=4)]
+        self.assertLess(time.perf_counter() - start, serial * 0.6)
+        self.assertEqual(rides, expected)
+
+        # the default end_time is now, the whole history of the simulator
+        self.assertEqual(sum(1 for _ in self.rides.iter_ride_history(START, windows=8)), 1000)
+
+    def test_prefetch_is_bounded(self):
+        history = self.rides.iter_ride_history(START, page_size=10, windows=2, prefetch=2)
+        next(history)
+        time.sleep(0.3)
+        # per window: the queued pages and the one waiting for room, plus the page being consumed
+        self.assertLessEqual(self.simulator.stats()["endpoints"]["ride_history"], 2 * 3 + 1)
+
+        history.close()
+        time.sleep(0.1)
+        requests = self.simulator.stats()["endpoints"]["ride_history"]
+        time.sleep(0.2)
+        self.assertEqual(self.simulator.stats()["endpoints"]["ride_history"], requests)
+
+    def test_error_is_raised_to_the_consumer(self):
+        with self.assertRaises(LyftAPIError):
+            list(self.rides.iter_ride_history(START, END, page_size=51))
+        self.assertEqual(list(self.rides.iter_ride_history(END, START)), [])
+
+    @unittest.skipIf(aiohttp is None, "aiohttp is not installed")
+    def test_asyncio(self):
+        from lyft.aio.rides import AsyncRides
+        from lyft.aio.transport import AsyncTransport
+
+        async def run():
+            async with AsyncTransport(base_url=self.simulator.base_url) as transport:
+                rides   = AsyncRides("Bearer", "token", transport=transport)
+                history = [ride["ride_id"] async for ride in rides.iter_ride_history(START, END, windows=4)]
+                page    = await rides.get_ride_history(START, limit=5)
+                return history, page
+
+        history, page = asyncio.run(run())
+        self.assertEqual(history, ["h{}".format(index) for index in range(300)])
+        self.assertEqual(len(page), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
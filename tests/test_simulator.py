@@ -0,0 +1,101 @@
+import unittest
+
+from lyft.authentication.auth import LyftPublicAuth, LyftUserAuth
+from lyft.availability import Availability
+from lyft.rides import Rides
+from lyft.session.session import Session
+from lyft.testing.simulator import LyftSimulator
+from lyft.transport.rate_limiter import RateLimiter
+from lyft.transport.transport import Transport
+from lyft.util.errors import LyftAPIError
+
+CONFIG = {"client_id": "id", "client_secret": "secret"}
+
+
+class SimulatorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.simulator = LyftSimulator(ride_step=0, seed=1).start()
+        self.transport = Transport(base_url=self.simulator.base_url)
+
+    def tearDown(self):
+        self.transport.close()
+        self.simulator.stop()
+
+    def test_oauth(self):
+        token = LyftPublicAuth(CONFIG, transport=self.transport).get_access_token()
+        self.assertEqual(token["token_type"], "Bearer")
+        self.assertTrue(token["access_token"])
+        self.assertEqual(LyftPublicAuth({"client_id": "", "client_secret": ""},
+                                        transport=self.transport).get_access_token()["error"], "invalid_client")
+
+        user_token = LyftUserAuth(CONFIG, ["rides.read"], "state", transport=self.transport).get_access_token("code")
+        session    = Session(CONFIG, user_token["refresh_token"], transport=self.transport)
+        self.assertTrue(session.refresh_access_token()["access_token"])
+        self.assertEqual(session.revoke_token(), {"status": True})
+
+    def test_availability(self):
+        availability = Availability("Bearer", "token", transport=self.transport)
+        self.assertEqual(len(availability.get_ride_types(37.7763, -122.3918)["ride_types"]), 4)
+        self.assertEqual(len(availability.get_ride_types(37.7763, -122.3918, "lyft")["ride_types"]), 1)
+        self.assertEqual(availability.get_driver_eta(37.7763, -122.3918),
+                         availability.get_driver_eta(37.7763, -122.3918))
+
+        cost = availability.get_ride_estimates(37.7763, -122.3918, 37.7972, -122.4533, "lyft")["cost_estimates"][0]
+        self.assertGreater(cost["estimated_cost_cents_max"], cost["estimated_cost_cents_min"])
+        self.assertAlmostEqual(cost["estimated_distance_miles"], 3.6, delta=0.5)
+
+        drivers = availability.get_nearby_drivers(37.7763, -122.3918)["nearby_drivers"]
+        self.assertEqual(len(drivers[0]["drivers"][0]["locations"]), 5)
+        self.assertIn("nearby_drivers_pickup_etas", availability.get_eta_and_nearby_drivers(37.7763, -122.3918))
+
+        self.assertEqual(self.simulator.handle("GET", "/v1/eta?lat=37.7&lng=-122.3", {}, b"")[0], 401)
+        self.assertEqual(self.simulator.handle("GET", "/v1/eta", {"authorization": "Bearer token"}, b"")[0], 400)
+
+    def test_rides(self):
+        rides = Rides("Bearer", "token", transport=self.transport)
+        ride  = rides.create_ride_request("lyft", 37.7763, -122.3918, 37.7972, -122.4533)
+        self.assertEqual((ride["status_code"], ride["status"]), (201, "pending"))
+
+        details = rides.get_ride_details(ride["ride_id"])
+        self.assertEqual(details["status"], "droppedOff")
+        self.assertEqual(rides.set_rating_and_tip(ride["ride_id"], 5, 100)["status_code"], 204)
+        self.assertEqual(rides.get_receipt(ride["ride_id"])["price"], details["price"])
+        self.assertEqual(rides.get_ride_details("unknown")["status_code"], 404)
+
+    def test_ride_statuses_and_cancel(self):
+        with LyftSimulator(ride_step=60) as simulator, Transport(base_url=simulator.base_url) as transport:
+            rides = Rides("Bearer", "token", transport=transport)
+            ride_id = rides.create_ride_request("lyft", 37.7763, -122.3918, 37.7972, -122.4533)["ride_id"]
+            self.assertEqual(rides.get_ride_details(ride_id)["status"], "pending")
+            self.assertEqual(rides.get_receipt(ride_id)["error"], "not_found")
+            rides.cancel_ride(ride_id)
+            self.assertEqual(rides.get_ride_details(ride_id)["status"], "canceled")
+
+    def test_errors_and_rate_limit(self):
+        with LyftSimulator(error_rate=1, error_status=503) as simulator:
+            with Transport(base_url=simulator.base_url) as transport:
+                with self.assertRaises(LyftAPIError) as context:
+                    Availability("Bearer", "token", transport=transport).get_driver_eta(37.7, -122.3)
+            self.assertEqual(context.exception.status_code, 503)
+            self.assertEqual(simulator.stats()["errors"], 1)
+
+        with LyftSimulator(rate_limit=3) as simulator:
+            limiter = RateLimiter()
+            with Transport(base_url=simulator.base_url, rate_limiter=limiter) as transport:
+                availability = Availability("Bearer", "token", transport=transport)
+                for _ in range(3):
+                    availability.get_driver_eta(37.7, -122.3)
+                self.assertEqual(limiter.metrics()["capacity"], 3)
+                self.assertLess(limiter.metrics()["tokens"], 1)
+
+            status, _, headers = simulator.handle("GET", "/v1/eta?lat=37.7&lng=-122.3",
+                                                  {"authorization": "Bearer token"}, b"")
+            self.assertEqual((status, headers["x-ratelimit-remaining"]), (429, "0"))
+            self.assertEqual(headers["retry-after"], "60")
+            self.assertEqual(simulator.stats()["endpoints"], {"eta": 4})
+            self.assertEqual(simulator.stats()["throttled"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
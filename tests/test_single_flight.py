@@ -0,0 +1,116 @@
+import asyncio
+import threading
+import time
+import unittest
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from lyft.availability import Availability
+from lyft.transport.single_flight import SingleFlight, request_key
+from lyft.transport.transport import Transport
+from tests.stub_server import StubServer
+
+
+class SingleFlightTest(unittest.TestCase):
+
+    def test_request_key(self):
+        self.assertEqual(request_key("get", "https://api.lyft.com/v1/eta?lng=2&lat=1", headers={"Authorization": "a"}),
+                         request_key("GET", "https://api.lyft.com/v1/eta?lat=1&lng=2", headers={"authorization": "a"}))
+        self.assertNotEqual(request_key("GET", "https://api.lyft.com/v1/eta?lat=1", headers={"Authorization": "a"}),
+                            request_key("GET", "https://api.lyft.com/v1/eta?lat=1", headers={"Authorization": "b"}))
+
+    def test_threads_share_one_call(self):
+        flight = SingleFlight()
+        calls = []
+
+        def slow():
+            calls.append(1)
+            time.sleep(0.2)
+            return "result"
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(flight.do("key", slow))) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, ["result"] * 10)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flight.stats(), {"calls": 10, "collapsed": 9, "in_flight": 0})
+
+    def test_errors_are_shared(self):
+        flight = SingleFlight()
+
+        def fail():
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            flight.do("key", fail)
+        self.assertEqual(flight.do("key", lambda: 1), 1)
+
+    def test_asyncio_tasks_share_one_call(self):
+        flight = SingleFlight()
+        calls = []
+
+        async def slow():
+            calls.append(1)
+            await asyncio.sleep(0.1)
+            return "result"
+
+        async def run():
+            waiting = asyncio.ensure_future(flight.do_async("key", slow))
+            results = await asyncio.gather(*[flight.do_async("key", slow) for _ in range(9)])
+            waiting.cancel()
+            return results
+
+        self.assertEqual(asyncio.run(run()), ["result"] * 9)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flight.stats()["collapsed"], 9)
+
+
+class TransportSingleFlightTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer({("GET", "/v1/nearby-drivers-pickup-etas"): (200, {"nearby_drivers_pickup_etas": []},
+                                                                              {})}).start()
+        self.server.delay = 0.2
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_identical_requests_are_collapsed(self):
+        flight = SingleFlight()
+        with Transport(base_url=self.server.base_url, single_flight=flight) as transport:
+            availability = Availability("Bearer", "token", transport=transport)
+            threads = [threading.Thread(target=availability.get_eta_and_nearby_drivers, args=(37.7763, -122.3918))
+                       for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(flight.stats()["collapsed"], 7)
+
+    @unittest.skipIf(aiohttp is None, "aiohttp is not installed")
+    def test_async_identical_requests_are_collapsed(self):
+        from lyft.aio.availability import AsyncAvailability
+        from lyft.aio.transport import AsyncTransport
+        flight = SingleFlight()
+
+        async def run():
+            async with AsyncTransport(base_url=self.server.base_url, single_flight=flight) as transport:
+                availability = AsyncAvailability("Bearer", "token", transport=transport)
+                return await asyncio.gather(*[availability.get_eta_and_nearby_drivers(37.7763, -122.3918)
+                                              for _ in range(8)])
+
+        self.assertEqual(len(asyncio.run(run())), 8)
+        self.assertEqual(len(self.server.requests), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
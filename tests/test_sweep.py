@@ -0,0 +1,90 @@
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from lyft.availability import Availability
+from lyft.testing.simulator import LyftSimulator
+from lyft.transport.transport import Transport
+
+BBOX    = (37.77, -122.42, 37.78, -122.41)
+POLYGON = [(37.77, -122.42), (37.78, -122.42), (37.77, -122.41)]
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class SweepTest(unittest.TestCase):
+
+    def setUp(self):
+        self.simulator = LyftSimulator(seed=1).start()
+        self.transport = Transport(pool_maxsize=4, base_url=self.simulator.base_url)
+        self.availability = Availability("Bearer", "token", transport=self.transport)
+
+    def tearDown(self):
+        self.transport.close()
+        self.simulator.stop()
+
+    def test_sample_points(self):
+        from lyft.sweep import sample_points
+
+        lats, lngs = sample_points(BBOX, 500)
+        self.assertEqual(len(lats), 3 * 2)
+        self.assertEqual((lats.min(), lngs.min()), (37.77, -122.42))
+        self.assertTrue((lats <= 37.78).all() and (lngs <= -122.41).all())
+
+        lats, lngs = sample_points(POLYGON, 250)
+        self.assertTrue(0 < len(lats) < len(sample_points(BBOX, 250)[0]))
+        # the points lie below the hypotenuse of the triangle
+        self.assertTrue(((lats - 37.77) / 0.01 + (lngs + 122.42) / 0.01 <= 1).all())
+
+        with self.assertRaises(ValueError):
+            sample_points(BBOX, 1, max_points=100)
+
+    def test_driver_etas(self):
+        from lyft.sweep import AreaSweep
+
+        result = AreaSweep(self.availability, max_concurrency=4).driver_etas(BBOX, 500, ride_type="lyft")
+        self.assertEqual((len(result), result.points, result.errors), (6, 6, []))
+        self.assertEqual(result.lat.dtype, numpy.float64)
+        self.assertEqual(set(result.ride_type.tolist()), {"lyft"})
+        self.assertFalse(numpy.isnan(result.eta_seconds).any())
+        self.assertEqual(self.simulator.stats()["endpoints"], {"eta": 6})
+
+    def test_nearby_drivers(self):
+        from lyft.sweep import AreaSweep
+
+        result = AreaSweep(self.availability, max_concurrency=4).nearby_drivers(BBOX, 500, ride_type="lyft")
+        self.assertEqual((len(result), result.points), (6 * 5, 6))
+        self.assertEqual(sorted(result.columns()), ["eta_seconds", "lat", "lng", "ride_type"])
+        self.assertEqual(self.simulator.stats()["endpoints"], {"pickup_etas": 6})
+
+    def test_nearby_drivers_are_deduplicated(self):
+        from lyft.sweep import AreaSweep
+
+        class Availability(object):
+            """Every point sees the same driver, with an ETA depending on the point"""
+
+            def get_eta_and_nearby_drivers(self, lat, lng, ride_type=None):
+                location = {"lat": 37.775, "lng": -122.415, "bearing": 0, "recorded_at_ms": 0}
+                return {"nearby_drivers_pickup_etas": [
+                    {"ride_type"             : "lyft",
+                     "pickup_duration_range" : {"duration_ms": int(abs(lat - 37.775) * 1e7), "range_ms": 0},
+                     "nearby_drivers"        : [{"locations": [location]}]}]}
+
+        result = AreaSweep(Availability()).nearby_drivers(BBOX, 500)
+        self.assertEqual(len(result), 1)
+        self.assertEqual((result.lat[0], result.lng[0], result.ride_type[0]), (37.775, -122.415, "lyft"))
+        # the smallest ETA among the 6 points: the middle row of the grid, 500m north of the southern edge
+        self.assertAlmostEqual(result.eta_seconds[0], abs(37.77 + 500 / 111320.0 - 37.775) * 1e4, places=3)
+
+    def test_errors(self):
+        from lyft.sweep import AreaSweep
+
+        self.simulator.error_rate = 1
+        result = AreaSweep(self.availability).driver_etas(BBOX, 500)
+        self.assertEqual((len(result), len(result.errors)), (0, 6))
+
+
+if __name__ == '__main__':
+    unittest.main()
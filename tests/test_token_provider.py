@@ -0,0 +1,155 @@
+import asyncio
+import threading
+import time
+import unittest
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from lyft.authentication.auth import LyftPublicAuth
+from lyft.authentication.token_provider import TokenProvider
+from lyft.availability import Availability
+from lyft.transport.transport import Transport
+from lyft.util.errors import LyftAPIError
+from tests.stub_server import StubServer
+
+
+class FakeAuth(object):
+
+    def __init__(self, expires_in=3600, delay=0):
+        self.calls      = 0
+        self.expires_in = expires_in
+        self.delay      = delay
+        self.lock       = threading.Lock()
+
+    def get_access_token(self):
+        time.sleep(self.delay)
+        with self.lock:
+            self.calls += 1
+            return {"access_token": "token-{}".format(self.calls), "token_type": "Bearer",
+                    "expires_in": self.expires_in}
+
+
+class AsyncFakeAuth(FakeAuth):
+
+    async def get_access_token(self):
+        await asyncio.sleep(self.delay)
+        self.calls += 1
+        return {"access_token": "token-{}".format(self.calls), "token_type": "Bearer", "expires_in": self.expires_in}
+
+
+class TokenProviderTest(unittest.TestCase):
+
+    def test_token_is_cached(self):
+        auth = FakeAuth()
+        provider = TokenProvider.from_public_auth(auth, background=False)
+        self.assertEqual(provider.authorization(), "Bearer token-1")
+        self.assertEqual(provider.authorization(), "Bearer token-1")
+        self.assertEqual(auth.calls, 1)
+
+    def test_lazy_refresh_inside_margin(self):
+        auth = FakeAuth(expires_in=100)
+        now = [0]
+        provider = TokenProvider(auth.get_access_token, refresh_margin=10, background=False, clock=lambda: now[0])
+        provider.get_token()
+        now[0] = 91
+        self.assertEqual(provider.get_token()["access_token"], "token-2")
+
+    def test_concurrent_refreshes_are_coalesced(self):
+        auth = FakeAuth(delay=0.2)
+        provider = TokenProvider.from_public_auth(auth, background=False)
+        threads = [threading.Thread(target=provider.get_token) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(auth.calls, 1)
+
+    def test_async_refreshes_are_coalesced(self):
+        auth = FakeAuth(delay=0.2)
+        provider = TokenProvider.from_public_auth(auth, background=False)
+
+        async def run():
+            return await asyncio.gather(*[provider.authorization_async() for _ in range(10)])
+
+        self.assertEqual(set(asyncio.run(run())), {"Bearer token-1"})
+        self.assertEqual(auth.calls, 1)
+
+    def test_async_fetch_token(self):
+        auth = AsyncFakeAuth(delay=0.2)
+        provider = TokenProvider.from_public_auth(auth)
+        self.assertFalse(provider.background)
+
+        async def run():
+            authorizations = await asyncio.gather(*[provider.authorization_async() for _ in range(10)])
+            await provider.refresh_async(force=True)
+            return authorizations, await provider.authorization_async()
+
+        self.assertEqual(asyncio.run(run()), (["Bearer token-1"] * 10, "Bearer token-2"))
+        self.assertEqual(auth.calls, 2)
+        # a coroutine cannot be awaited from the blocking methods
+        with self.assertRaises(TypeError):
+            provider.get_token()
+        # the lock of the first event loop is not reused by the next one
+        self.assertEqual(asyncio.run(provider.refresh_async(force=True))["access_token"], "token-3")
+
+    def test_background_refresh(self):
+        auth = FakeAuth(expires_in=1.2)
+        provider = TokenProvider.from_public_auth(auth, refresh_margin=1)
+        try:
+            provider.get_token()
+            deadline = time.time() + 5
+            while provider.refresh_count < 2 and time.time() < deadline:
+                time.sleep(0.05)
+            self.assertGreaterEqual(provider.refresh_count, 2)
+        finally:
+            provider.close()
+
+    def test_error_response_raises(self):
+        provider = TokenProvider(lambda: {"error": "invalid_client"}, background=False)
+        with self.assertRaises(LyftAPIError) as raised:
+            provider.get_token()
+        self.assertEqual(raised.exception.error, {"error": "invalid_client"})
+
+    def test_injected_in_availability(self):
+        routes = {("POST", "/oauth/token"): (200, {"access_token": "abc", "token_type": "Bearer",
+                                                   "expires_in": 86400}, {}),
+                  ("GET", "/v1/drivers"): (200, {"nearby_drivers": []}, {})}
+        with StubServer(routes) as server, Transport(base_url=server.base_url) as transport:
+            auth = LyftPublicAuth({"client_id": "id", "client_secret": "secret"}, transport=transport)
+            provider = TokenProvider.from_public_auth(auth)
+            availability = Availability(transport=transport, token_provider=provider)
+            availability.get_nearby_drivers(37.7763, -122.3918)
+            availability.get_nearby_drivers(37.7763, -122.3918)
+            provider.close()
+
+        self.assertEqual([request[1] for request in server.requests].count("/oauth/token"), 1)
+        self.assertEqual(server.requests[-1][2].get("Authorization"), "Bearer abc")
+
+    @unittest.skipIf(aiohttp is None, "aiohttp is not installed")
+    def test_injected_in_async_availability(self):
+        from lyft.aio.auth import AsyncLyftPublicAuth
+        from lyft.aio.availability import AsyncAvailability
+        from lyft.aio.transport import AsyncTransport
+
+        routes = {("POST", "/oauth/token"): (200, {"access_token": "abc", "token_type": "Bearer",
+                                                   "expires_in": 86400}, {}),
+                  ("GET", "/v1/drivers"): (200, {"nearby_drivers": []}, {})}
+
+        async def run(server):
+            async with AsyncTransport(base_url=server.base_url) as transport:
+                auth = AsyncLyftPublicAuth({"client_id": "id", "client_secret": "secret"}, transport=transport)
+                provider = TokenProvider.from_public_auth(auth)
+                availability = AsyncAvailability(transport=transport, token_provider=provider)
+                await asyncio.gather(*[availability.get_nearby_drivers(37.7763, -122.3918) for _ in range(5)])
+
+        with StubServer(routes) as server:
+            asyncio.run(run(server))
+        self.assertEqual([request[1] for request in server.requests].count("/oauth/token"), 1)
+        self.assertEqual(server.requests[-1][2].get("Authorization"), "Bearer abc")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import asyncio
+import threading
+import unittest
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from lyft.rides import Rides
+from lyft.tracker import RideTracker
+from lyft.transport.transport import Transport
+from tests.stub_server import StubServer
+
+INTERVALS = {"pending": 0.01, "accepted": 0.01, "arrived": 0.01, "pickedUp": 0.02}
+
+
+class RideStatuses(object):
+    """Route answering the next status of each ride at every poll, then repeating the last one"""
+
+    def __init__(self, statuses):
+        self.statuses = statuses
+        self.polls    = {}
+        self.lock     = threading.Lock()
+
+    def __call__(self, path):
+        ride_id = path.split("?")[0].rsplit("/", 1)[1]
+        if ride_id not in self.statuses:
+            return 404, {"error": "not_found"}, {}
+        with self.lock:
+            poll = self.polls[ride_id] = self.polls.get(ride_id, 0) + 1
+        statuses = self.statuses[ride_id]
+        return 200, {"ride_id": ride_id, "status": statuses[min(poll, len(statuses)) - 1]}, {}
+
+
+class RideTrackerTest(unittest.TestCase):
+
+    statuses = {"1": ["pending", "pending", "accepted", "accepted", "arrived", "pickedUp", "pickedUp",
+                      "droppedOff"],
+                "2": ["pending", "canceled"]}
+
+    def setUp(self):
+        self.route  = RideStatuses(self.statuses)
+        self.server = StubServer({("GET", "/v1/rides/1"): self.route,
+                                  ("GET", "/v1/rides/2"): self.route,
+                                  ("GET", "/v1/rides/3"): self.route}).start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def assert_updates(self, updates):
+        changes = {}
+        for update in updates:
+            changes.setdefault(update.ride_id, []).append((update.previous_status, update.status))
+        self.assertEqual(changes["1"], [(None, "pending"), ("pending", "accepted"), ("accepted", "arrived"),
+                                        ("arrived", "pickedUp"), ("pickedUp", "droppedOff")])
+        self.assertEqual(changes["2"], [(None, "pending"), ("pending", "canceled")])
+        # rides are no longer polled once over
+        self.assertEqual(self.route.polls, {"1": 8, "2": 2})
+
+        self.assertEqual(changes["3"], [(None, None)])
+        self.assertEqual([update.error.status_code for update in updates if update.ride_id == "3"], [404])
+
+    def test_updates(self):
+        with Transport(base_url=self.server.base_url) as transport:
+            tracker = RideTracker(Rides("Bearer", "token", transport=transport), ["1", "2", "3"],
+                                  intervals=INTERVALS, default_interval=0.01, max_errors=2)
+            updates = list(tracker)
+        self.assertEqual(tracker.tracked(), [])
+        self.assert_updates(updates)
+        self.assertTrue(all(method == "GET" for method, _, _, _ in self.server.requests))
+
+    def test_add_and_stop(self):
+        with Transport(base_url=self.server.base_url) as transport:
+            tracker = RideTracker(Rides("Bearer", "token", transport=transport), intervals={"pending": 10})
+            tracker.add("2")
+            for update in tracker:
+                self.assertEqual(update.status, "pending")
+                tracker.stop()
+        self.assertEqual(tracker.tracked(), ["2"])
+
+    @unittest.skipIf(aiohttp is None, "aiohttp is not installed")
+    def test_async_updates(self):
+        from lyft.aio.rides import AsyncRides
+        from lyft.aio.tracker import AsyncRideTracker
+        from lyft.aio.transport import AsyncTransport
+
+        async def run():
+            async with AsyncTransport(base_url=self.server.base_url) as transport:
+                tracker = AsyncRideTracker(AsyncRides("Bearer", "token", transport=transport), ["1", "2"],
+                                           intervals=INTERVALS, default_interval=0.01, max_errors=2)
+                tracker.add("3")
+                return [update async for update in tracker]
+
+        self.assert_updates(asyncio.run(run()))
+
+
+if __name__ == '__main__':
+    unittest.main()
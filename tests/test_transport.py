@@ -0,0 +1,53 @@
+import unittest
+
+from lyft.authentication.auth import LyftPublicAuth
+from lyft.availability import Availability
+from lyft.rides import Rides
+from lyft.transport.transport import Transport, get_default_transport
+from tests.stub_server import StubServer
+from tests import availability_res
+
+
+class TransportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer({
+            ("GET", "/v1/ridetypes"): (200, availability_res.ride_types_res, {}),
+            ("GET", "/v1/rides/42/receipt"): (200, {"ride_id": "42"}, {}),
+            ("POST", "/oauth/token"): (200, {"access_token": "abc", "token_type": "Bearer", "expires_in": 86400},
+                                       {"x-ratelimit-limit": "100", "x-ratelimit-remaining": "99"}),
+        }).start()
+        self.transport = Transport(pool_maxsize=2, base_url=self.server.base_url)
+
+    def tearDown(self):
+        self.transport.close()
+        self.server.stop()
+
+    def test_default_transport_is_shared(self):
+        self.assertIs(get_default_transport(), get_default_transport())
+
+    def test_base_url_rewrites_api_host(self):
+        self.assertEqual(self.transport._resolve_url("https://api.lyft.com/v1/eta"),
+                         "{}/v1/eta".format(self.server.base_url))
+        self.assertEqual(self.transport._resolve_url("https://example.com/x"), "https://example.com/x")
+
+    def test_connection_is_reused(self):
+        availability = Availability("Bearer", "token", transport=self.transport)
+        for _ in range(5):
+            self.assertEqual(availability.get_ride_types(37.7763, -122.3918), availability_res.ride_types_res)
+        self.assertEqual(self.server.connections, 1)
+
+    def test_classes_share_transport(self):
+        auth  = LyftPublicAuth({"client_id": "id", "client_secret": "secret"}, transport=self.transport)
+        token = auth.get_access_token()
+        self.assertEqual(token.get("access_token"), "abc")
+        self.assertEqual(token.get("x-ratelimit-remaining"), "99")
+
+        rides = Rides(token.get("token_type"), token.get("access_token"), transport=self.transport)
+        self.assertEqual(rides.get_receipt("42").get("ride_id"), "42")
+        self.assertEqual(self.server.requests[-1][2].get("Authorization"), "Bearer abc")
+        self.assertEqual(self.server.connections, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,177 @@
+import json
+import threading
+import unittest
+
+from lyft.testing.simulator import RIDE_STATUSES
+from lyft.testing.webhooks import WebhookSender, ride_status_events
+from lyft.util.errors import InvalidSignatureError, ReceiverOverloadedError
+from lyft.webhooks import SIGNATURE_HEADER, WebhookEvent, WebhookReceiver, WebhookServer, sign, verify_signature
+
+TOKEN = "verification-token"
+
+
+def _body(event):
+    return json.dumps(event).encode("utf-8")
+
+
+class Recorder(object):
+
+    def __init__(self):
+        self.events = []
+        self.lock   = threading.Lock()
+
+    def __call__(self, event):
+        with self.lock:
+            self.events.append(event)
+
+    def statuses(self):
+        statuses = {}
+        for event in self.events:
+            statuses.setdefault(event.ride_id, []).append(event.status)
+        return statuses
+
+
+class SignatureTest(unittest.TestCase):
+
+    def test_sign_and_verify(self):
+        body = _body(ride_status_events(1)[0])
+        self.assertTrue(sign(body, TOKEN).startswith("sha256="))
+        self.assertTrue(verify_signature(body, sign(body, TOKEN), TOKEN))
+        self.assertFalse(verify_signature(body + b" ", sign(body, TOKEN), TOKEN))
+        self.assertFalse(verify_signature(body, sign(body, "other"), TOKEN))
+        self.assertFalse(verify_signature(body, None, TOKEN))
+
+    def test_rejected_requests(self):
+        with WebhookReceiver(TOKEN) as receiver:
+            body = _body(ride_status_events(1)[0])
+            self.assertEqual(receiver.handle(body, {SIGNATURE_HEADER: sign(body, "other")})[0], 401)
+            self.assertEqual(receiver.handle(body, {})[0], 401)
+            with self.assertRaises(InvalidSignatureError):
+                receiver.receive(body, None)
+            self.assertEqual(receiver.handle(b"[]", {SIGNATURE_HEADER: sign(b"[]", TOKEN)})[0], 400)
+            self.assertEqual(receiver.handle(body, {SIGNATURE_HEADER.lower(): sign(body, TOKEN)}),
+                             (200, {"queued": True}))
+            self.assertTrue(receiver.join(1))
+            self.assertEqual(receiver.stats()["rejected"], 3)
+
+
+class OrderingTest(unittest.TestCase):
+
+    def receive(self, receiver, events):
+        for event in events:
+            body = _body(event)
+            receiver.receive(body, sign(body, TOKEN))
+        self.assertTrue(receiver.join(5))
+
+    def test_duplicates_and_stale_events_are_dropped(self):
+        recorder = Recorder()
+        events   = ride_status_events(3)
+        with WebhookReceiver(TOKEN, [recorder], workers=2) as receiver:
+            # "accepted" of ride 1000 arrives after its "arrived", then every event is delivered again
+            self.receive(receiver, events[:3] + events[6:9] + events[3:6] + events)
+            stats = receiver.stats()
+
+        self.assertEqual(recorder.statuses(), {str(1000 + ride): ["pending", "arrived", "pickedUp", "droppedOff"]
+                                               for ride in range(3)})
+        self.assertEqual((stats["received"], stats["duplicates"], stats["stale"], stats["dispatched"]),
+                         (15, 9, 3, 12))
+
+    def test_distinct_events_of_a_ride_are_dispatched(self):
+        recorder = Recorder()
+        events   = ride_status_events(1)
+        dropped  = events[-1]
+        # sent with the same time and status as the droppedOff status update
+        receipt  = dict(dropped, event_id="1000-receipt", event_type="ride.receipt.ready")
+        # without occurred_at, their keys are all the same
+        untimed  = [{"event_id": "1000-note-{}".format(index), "event_type": "ride.note",
+                     "event": {"ride_id": "1000"}} for index in range(3)]
+        canceled = dict(dropped, event_id="1000-canceled", event={"ride_id": "1000", "status": "canceled"})
+        late     = dict(events[1], event_id="1000-accepted-again")
+        with WebhookReceiver(TOKEN, [recorder], workers=1) as receiver:
+            self.receive(receiver, events + [receipt] + untimed + [canceled, late])
+            stats = receiver.stats()
+
+        self.assertEqual([event.event_id for event in recorder.events],
+                         [event["event_id"] for event in events + [receipt] + untimed + [canceled]])
+        # only the status update going back in the progress of the ride is stale
+        self.assertEqual((stats["stale"], stats["dispatched"]), (1, len(events) + 5))
+
+    def test_reorder_delay(self):
+        recorder = Recorder()
+        with WebhookReceiver(TOKEN, [recorder], workers=4, reorder_delay=0.1) as receiver:
+            self.receive(receiver, ride_status_events(20, shuffle=30, seed=3))
+            stats = receiver.stats()
+
+        self.assertEqual(recorder.statuses(), {str(1000 + ride): list(RIDE_STATUSES) for ride in range(20)})
+        self.assertEqual(stats["stale"], 0)
+
+    def test_handler_errors_are_counted(self):
+        def fail(event):
+            raise RuntimeError("handler failed")
+
+        recorder = Recorder()
+        with WebhookReceiver(TOKEN, [fail, recorder]) as receiver:
+            self.receive(receiver, ride_status_events(2))
+            stats = receiver.stats()
+        self.assertEqual((stats["errors"], stats["dispatched"], len(recorder.events)), (10, 10, 10))
+        self.assertIsInstance(receiver.last_error, RuntimeError)
+
+    def test_invalid_times(self):
+        recorder = Recorder()
+        events   = ride_status_events(1)
+        with WebhookReceiver(TOKEN, [recorder], workers=1) as receiver:
+            for occurred_at in ("yesterday", 1449004062):
+                body = _body(dict(events[0], occurred_at=occurred_at))
+                self.assertEqual(receiver.handle(body, {SIGNATURE_HEADER: sign(body, TOKEN)})[0], 400)
+            # submitted without being parsed, the event is counted as an error and the worker keeps going
+            receiver.submit(WebhookEvent("bad", "ride.status.updated", "yesterday", "1000", "pending", {}))
+            self.receive(receiver, events)
+            stats = receiver.stats()
+        self.assertEqual(recorder.statuses(), {"1000": list(RIDE_STATUSES)})
+        self.assertEqual((stats["errors"], stats["pending"]), (1, 0))
+        self.assertIsInstance(receiver.last_error, ValueError)
+
+
+class BackpressureTest(unittest.TestCase):
+
+    def test_full_queue_rejects_events(self):
+        release  = threading.Event()
+        recorder = Recorder()
+        receiver = WebhookReceiver(TOKEN, [lambda event: release.wait(5), recorder], workers=1, queue_size=2,
+                                   submit_timeout=0.05).start()
+        bodies   = [_body(event) for event in ride_status_events(5, statuses=("pending",))]
+        statuses = [receiver.handle(body, {SIGNATURE_HEADER: sign(body, TOKEN)})[0] for body in bodies]
+        # one event in the handler, two queued
+        self.assertEqual(statuses, [200, 200, 200, 503, 503])
+        with self.assertRaises(ReceiverOverloadedError):
+            receiver.receive(bodies[3], sign(bodies[3], TOKEN))
+
+        release.set()
+        self.assertTrue(receiver.join(5))
+        # the retries are not taken for duplicates
+        self.assertEqual(receiver.handle(bodies[4], {SIGNATURE_HEADER: sign(bodies[4], TOKEN)}),
+                         (200, {"queued": True}))
+        receiver.close()
+        self.assertEqual(len(recorder.events), 4)
+        self.assertEqual(receiver.stats()["overloaded"], 3)
+
+
+class WebhookServerTest(unittest.TestCase):
+
+    def test_events_over_http(self):
+        recorder = Recorder()
+        events   = ride_status_events(50, duplicates=0.2, seed=1)
+        with WebhookServer(WebhookReceiver(TOKEN, [recorder], queue_size=4, submit_timeout=0.01)) as server:
+            with WebhookSender(server.url, TOKEN) as sender:
+                self.assertEqual(sender.send_many(events, concurrency=4), {200: len(events)})
+                self.assertEqual(sender.post(b"{}", "sha256=forged"), 401)
+            self.assertTrue(server.receiver.join(5))
+            stats = server.receiver.stats()
+
+        self.assertEqual(stats["dispatched"], 250)
+        self.assertEqual(stats["duplicates"], len(events) - 250)
+        self.assertEqual(recorder.statuses(), {str(1000 + ride): list(RIDE_STATUSES) for ride in range(50)})
+
+
+if __name__ == '__main__':
+    unittest.main()